@@ -145,107 +145,117 @@ async def main():
     from bot.middleware.group_auto_sync_middleware import GroupAutoSyncMiddleware
     dp.update.middleware(GroupAutoSyncMiddleware())
 
+    # ✅ Сброс кэша админов групп по апдейтам chat_member / my_chat_member
+    from bot.middleware.admin_cache_middleware import AdminCacheMiddleware
+    dp.update.middleware(AdminCacheMiddleware())
+
     # ✅ Подключение структурированного логирования ПЕРВЫМ (чтобы перехватить все логи)
     from bot.middleware.structured_logging import StructuredLoggingMiddleware
     # ВАЖНО: middleware выполняется в обратном порядке регистрации, поэтому регистрируем последним
     # чтобы он выполнился первым
     dp.update.middleware(StructuredLoggingMiddleware())
 
+    # ✅ Быстрый путь: обычные сообщения в группах сразу в координатор,
+    # без обхода всех роутеров. Подключается последним — выполняется
+    # после остальных middleware, непосредственно перед роутерами
+    from bot.middleware.fast_path_middleware import FastPathMiddleware, KIND_GROUP_MESSAGE
+    from bot.handlers.group_message_coordinator import group_message_coordinator_router
+    dp.update.middleware(FastPathMiddleware({KIND_GROUP_MESSAGE: group_message_coordinator_router}))
+
+    # ✅ Буфер счётчиков срабатываний паттернов/хешей
+    # Счётчики копятся в памяти (или Redis) и пишутся в БД одним UPDATE
+    # по интервалу; при остановке бота остаток сбрасывается в БД
+    from bot.config import (
+        TRIGGER_COUNTERS_USE_REDIS,
+        TRIGGER_COUNTERS_FLUSH_INTERVAL,
+        TRIGGER_COUNTERS_FLUSH_SIZE,
+    )
+    from bot.services.redis_conn import redis as redis_client
+    from bot.services.trigger_counters import start_trigger_counters, stop_trigger_counters
+    await start_trigger_counters(
+        redis=redis_client if TRIGGER_COUNTERS_USE_REDIS else None,
+        flush_interval=TRIGGER_COUNTERS_FLUSH_INTERVAL,
+        flush_size=TRIGGER_COUNTERS_FLUSH_SIZE,
+    )
+    dp.shutdown.register(stop_trigger_counters)
+
+    # ✅ Кэш настроек групп: подписка на Redis канал settings_changed,
+    # чтобы изменения настроек на одной реплике сбрасывали кэш на всех
+    from bot.services.settings_cache import start_settings_cache, stop_settings_cache
+    await start_settings_cache(redis_client)
+    dp.shutdown.register(stop_settings_cache)
+
+    # ✅ ScamMedia: хеши фото считаются в пуле процессов,
+    # индекс запрещённых хешей прогревается до первого сообщения
+    from bot.config import SCAM_MEDIA_HASH_WORKERS
+    from bot.services.scam_media import (
+        configure_hash_executor,
+        shutdown_hash_executor,
+        get_banned_hash_index,
+    )
+    configure_hash_executor(SCAM_MEDIA_HASH_WORKERS)
+    dp.shutdown.register(shutdown_hash_executor)
+    try:
+        from bot.database.session import get_session
+        async with get_session() as session:
+            await get_banned_hash_index().ensure_loaded(session)
+    except Exception as e:
+        logging.warning(f"⚠️ Не удалось загрузить индекс ScamMedia: {e}")
+
+    # ✅ Капча: отрисовка в пуле процессов и (опционально) пул готовых капч,
+    # чтобы заявка на вступление получала капчу без ожидания отрисовки
+    from bot.config import CAPTCHA_RENDER_WORKERS, CAPTCHA_POOL_SIZE
+    from bot.services.captcha.render_service import configure_render_executor, shutdown_render_executor
+    from bot.services.captcha.pool_service import start_captcha_pool, stop_captcha_pool
+    configure_render_executor(CAPTCHA_RENDER_WORKERS)
+    await start_captcha_pool(CAPTCHA_POOL_SIZE)
+    dp.shutdown.register(stop_captcha_pool)
+    dp.shutdown.register(shutdown_render_executor)
+
+    # ✅ Планировщик отложенных задач: автоудаление сообщений, напоминания
+    # и таймауты капчи хранятся в Redis и выполняются после перезапуска
+    from bot.config import JOB_SCHEDULER_ENABLED, JOB_SCHEDULER_WORKERS
+    from bot.services.job_scheduler import start_job_scheduler, stop_job_scheduler
+    await start_job_scheduler(
+        bot,
+        redis_client if JOB_SCHEDULER_ENABLED else None,
+        workers=JOB_SCHEDULER_WORKERS,
+    )
+    dp.shutdown.register(stop_job_scheduler)
+
+    # ✅ Пакетное удаление сообщений: при остановке дожидаемся накопленных пачек
+    from bot.services.message_deletion import flush_message_deleter
+    dp.shutdown.register(flush_message_deleter)
+
+    # ✅ Очередь массовых действий Anti-Raid: останавливаем воркеры
+    from bot.services.antiraid.raid_executor import stop_raid_executor
+    dp.shutdown.register(stop_raid_executor)
+
+    # ✅ Клиент CAS: закрываем общую HTTP сессию
+    from bot.services.cas_service import close_cas_client
+    dp.shutdown.register(close_cas_client)
+
+    # ✅ Зеркало выгрузки CAS: проверки отвечают из памяти без запроса к API
+    from bot.config import CAS_EXPORT_ENABLED, CAS_EXPORT_SOURCE, CAS_EXPORT_REFRESH_SECONDS
+    if CAS_EXPORT_ENABLED:
+        from bot.services.cas_service import start_cas_mirror, stop_cas_mirror
+        await start_cas_mirror(CAS_EXPORT_SOURCE, CAS_EXPORT_REFRESH_SECONDS)
+        dp.shutdown.register(stop_cas_mirror)
+
     # ✅ Подключение всех маршрутов (хендлеров), которые ты заранее определил
     dp.include_router(handlers_router)
     print(f"Подключен: {handlers_router}")
     
     # ФИКС №2: Восстановление состояния групп после перезапуска
-    # Rate limiting: пауза между API вызовами для защиты от FloodWait
-    API_DELAY = 0.1  # 100ms между вызовами внутри группы
-    GROUP_DELAY = 0.3  # 300ms между группами
+    # Сверка идёт в фоне после запуска polling/webhook (dp.startup):
+    # пул воркеров с общим лимитом запросов к API, прогресс в Redis
+    from bot.services.group_reconciliation import (
+        start_group_reconciliation,
+        stop_group_reconciliation,
+    )
+    dp.startup.register(start_group_reconciliation)
+    dp.shutdown.register(stop_group_reconciliation)
 
-    try:
-        from bot.database.session import get_session
-        from bot.database.models import Group, UserGroup
-        from sqlalchemy import select, delete
-
-        async with get_session() as session:
-            result = await session.execute(select(Group))
-            groups = result.scalars().all()
-            bot_me = await bot.me()
-
-            logging.info(f"🔄 Начинаем восстановление {len(groups)} групп (с rate limiting)...")
-
-            for i, group in enumerate(groups):
-                # БАГ #4 ФИКС: пропускаем служебную запись группы с chat_id=0
-                if group.chat_id == 0:
-                    logging.info("ℹ️ Пропуск служебной записи группы с chat_id=0 при восстановлении")
-                    continue
-                try:
-                    # Проверяем, что бот всё ещё в группе
-                    try:
-                        member = await bot.get_chat_member(group.chat_id, bot_me.id)
-                        await asyncio.sleep(API_DELAY)  # Rate limiting
-
-                        if member.status in ("member", "administrator", "creator"):
-                            logging.info(f"✅ Бот восстановлен в группе {group.title} (ID: {group.chat_id})")
-
-                            # Обновляем информацию о группе (title может измениться)
-                            try:
-                                chat = await bot.get_chat(group.chat_id)
-                                await asyncio.sleep(API_DELAY)  # Rate limiting
-                                group.title = chat.title
-                                await session.flush()
-                            except Exception as e:
-                                logging.warning(f"⚠️ Не удалось обновить название группы {group.chat_id}: {e}")
-
-                            # Восстанавливаем права админов в группе
-                            try:
-                                admins = await bot.get_chat_administrators(group.chat_id)
-                                await asyncio.sleep(API_DELAY)  # Rate limiting
-                                for admin_member in admins:
-                                    if admin_member.status in ("administrator", "creator"):
-                                        admin_user_id = admin_member.user.id
-                                        # Проверяем, есть ли связь в БД
-                                        ug_result = await session.execute(
-                                            select(UserGroup).where(
-                                                UserGroup.user_id == admin_user_id,
-                                                UserGroup.group_id == group.chat_id,
-                                            )
-                                        )
-                                        if not ug_result.scalar_one_or_none():
-                                            # Создаем связь если её нет
-                                            session.add(UserGroup(user_id=admin_user_id, group_id=group.chat_id))
-                                            logging.info(f"✅ Восстановлена связь админа {admin_user_id} с группой {group.chat_id}")
-                                await session.flush()
-                            except Exception as e:
-                                logging.warning(f"⚠️ Не удалось восстановить права админов для группы {group.chat_id}: {e}")
-                        else:
-                            logging.warning(f"⚠️ Бот не является участником группы {group.title} (ID: {group.chat_id})")
-                    except Exception as e:
-                        # Бот не в группе или группа удалена - чистим связи
-                        error_str = str(e).lower()
-                        if "chat not found" in error_str or "user not found" in error_str:
-                            logging.warning(f"⚠️ Группа {group.chat_id} не найдена, удаляем связи")
-                            await session.execute(
-                                delete(UserGroup).where(UserGroup.group_id == group.chat_id)
-                            )
-                            await session.flush()
-                        elif "flood" in error_str or "retry after" in error_str:
-                            # FloodWait - увеличиваем паузу и продолжаем
-                            logging.warning(f"⚠️ FloodWait при проверке группы {group.chat_id}, увеличиваем паузу")
-                            await asyncio.sleep(5)  # 5 сек пауза при FloodWait
-                        else:
-                            logging.warning(f"⚠️ Не удалось проверить группу {group.chat_id}: {e}")
-                except Exception as e:
-                    logging.error(f"❌ Ошибка при обработке группы {group.chat_id}: {e}")
-
-                # Пауза между группами для защиты от FloodWait
-                await asyncio.sleep(GROUP_DELAY)
-
-            await session.commit()
-            logging.info(f"✅ Восстановление групп завершено")
-    except Exception as e:
-        logging.error(f"❌ Ошибка при восстановлении групп: {e}")
-        import traceback
-        logging.error(traceback.format_exc())
-    
     # ✅ Выбираем режим запуска: webhook или polling
     if USE_WEBHOOK:
         logging.info("🌐 Запуск в режиме webhook...")
@@ -48,10 +48,55 @@ ADMIN_IDS: List[int] = [int(x.strip()) for x in raw_admin_ids.split(",") if x.st
 PYROGRAM_API_ID = os.getenv("PYROGRAM_API_ID")  # API ID из my.telegram.org
 PYROGRAM_API_HASH = os.getenv("PYROGRAM_API_HASH")  # API Hash из my.telegram.org
 PYROGRAM_SESSION_NAME = os.getenv("PYROGRAM_SESSION_NAME", "bot_session")  # Имя сессии Pyrogram
+# Лимит проверок через MTProto в секунду (одна проверка = один токен:
+# get_chat_photos или get_users + get_chat_photos для возраста аккаунта)
+PYROGRAM_REQUESTS_PER_SECOND = float(os.getenv("PYROGRAM_REQUESTS_PER_SECOND", "10"))
 
 # Redis настройки
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
+# Буфер счётчиков срабатываний паттернов/хешей (сброс в БД пачкой)
+TRIGGER_COUNTERS_USE_REDIS = os.getenv("TRIGGER_COUNTERS_USE_REDIS", "false").lower() == "true"
+TRIGGER_COUNTERS_FLUSH_INTERVAL = int(os.getenv("TRIGGER_COUNTERS_FLUSH_INTERVAL", "30"))
+TRIGGER_COUNTERS_FLUSH_SIZE = int(os.getenv("TRIGGER_COUNTERS_FLUSH_SIZE", "500"))
+
+# Параллельное выполнение независимых шагов координатора сообщений.
+# Выключено по умолчанию: каждый параллельный шаг держит своё соединение
+# из пула БД на всю волну (до 5-6 на сообщение вместе с DbSessionMiddleware),
+# поэтому перед включением увеличьте DB_POOL_SIZE/DB_MAX_OVERFLOW под
+# ожидаемое число одновременных сообщений в группах.
+COORDINATOR_PARALLEL_STEPS = os.getenv("COORDINATOR_PARALLEL_STEPS", "false").lower() == "true"
+
+# Количество процессов для вычисления хешей ScamMedia (0 = в потоке)
+SCAM_MEDIA_HASH_WORKERS = int(os.getenv("SCAM_MEDIA_HASH_WORKERS", "2"))
+
+# Капча: процессы для отрисовки (0 = в потоке) и размер пула готовых капч (0 = без пула)
+CAPTCHA_RENDER_WORKERS = int(os.getenv("CAPTCHA_RENDER_WORKERS", "2"))
+CAPTCHA_POOL_SIZE = int(os.getenv("CAPTCHA_POOL_SIZE", "0"))
+
+# Планировщик отложенных задач в Redis (автоудаление, напоминания и таймауты капчи)
+# false = задачи ждут в процессе через asyncio (теряются при перезапуске)
+JOB_SCHEDULER_ENABLED = os.getenv("JOB_SCHEDULER_ENABLED", "true").lower() == "true"
+JOB_SCHEDULER_WORKERS = int(os.getenv("JOB_SCHEDULER_WORKERS", "4"))
+
+# Anti-Raid: лимиты очереди массовых действий при рейде (действий в секунду)
+RAID_GLOBAL_ACTIONS_PER_SECOND = float(os.getenv("RAID_GLOBAL_ACTIONS_PER_SECOND", "25"))
+RAID_CHAT_ACTIONS_PER_SECOND = float(os.getenv("RAID_CHAT_ACTIONS_PER_SECOND", "5"))
+
+# Мут пользователя во многих группах: воркеров на рассылку и общий лимит запросов к API в секунду
+MUTE_FANOUT_WORKERS = int(os.getenv("MUTE_FANOUT_WORKERS", "8"))
+MUTE_FANOUT_API_PER_SECOND = float(os.getenv("MUTE_FANOUT_API_PER_SECOND", "20"))
+
+# Сверка групп при старте (в фоне): воркеры и лимит запросов к API в секунду
+GROUP_RECONCILE_WORKERS = int(os.getenv("GROUP_RECONCILE_WORKERS", "4"))
+GROUP_RECONCILE_API_PER_SECOND = float(os.getenv("GROUP_RECONCILE_API_PER_SECOND", "10"))
+
+# CAS: локальное зеркало выгрузки забаненных ID (проверки без запроса к API)
+# Источник — URL выгрузки или путь к локальному файлу
+CAS_EXPORT_ENABLED = os.getenv("CAS_EXPORT_ENABLED", "false").lower() == "true"
+CAS_EXPORT_SOURCE = os.getenv("CAS_EXPORT_SOURCE", "https://api.cas.chat/export.csv")
+CAS_EXPORT_REFRESH_SECONDS = int(os.getenv("CAS_EXPORT_REFRESH_SECONDS", "3600"))
+
 # Webhook настройки
 USE_WEBHOOK = os.getenv("USE_WEBHOOK", "false").lower() == "true"
 WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
@@ -171,7 +171,8 @@ class CrossGroupScammerSettings(Base):
 # МОДЕЛЬ: АКТИВНОСТЬ ПОЛЬЗОВАТЕЛЯ В ГРУППАХ
 # ============================================================
 # Отслеживает кросс-групповую активность каждого пользователя
-# Одна запись на пользователя — хранит данные обо всех группах
+# Одна запись на пользователя — смена профиля и статус детекции
+# (входы и сообщения по группам — в Redis, см. activity_store)
 class CrossGroupUserActivity(Base):
     # Имя таблицы в базе данных
     __tablename__ = 'cross_group_user_activity'
@@ -186,6 +187,8 @@ class CrossGroupUserActivity(Base):
     # ─────────────────────────────────────────────────────────
     # ТРЕКИНГ ВХОДОВ В ГРУППЫ
     # ─────────────────────────────────────────────────────────
+    # УСТАРЕЛО: входы и сообщения теперь хранятся в Redis
+    # (bot/services/cross_group/activity_store.py), колонки не пишутся
     # JSON объект с информацией о входах в группы
     # Формат: {
     #   "chat_id": {
@@ -217,6 +220,7 @@ class CrossGroupUserActivity(Base):
     # ─────────────────────────────────────────────────────────
     # ТРЕКИНГ СООБЩЕНИЙ
     # ─────────────────────────────────────────────────────────
+    # УСТАРЕЛО: см. groups_joined
     # JSON объект с информацией о сообщениях в группах
     # Формат: {
     #   "chat_id": {
@@ -1,19 +1,26 @@
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from contextlib import asynccontextmanager
 
-from bot.config import DATABASE_URL
+from bot.config import DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW
 from bot.database.models import Base
 
 
 # Используем DATABASE_URL из config.py (уже загружен из правильного .env файла)
 
 
+# Размер пула соединений (SQLite использует свой пул без этих параметров)
+_pool_options = {} if DATABASE_URL.startswith("sqlite") else {
+    "pool_size": DB_POOL_SIZE,        # Постоянные соединения
+    "max_overflow": DB_MAX_OVERFLOW,  # Дополнительные при пиковой нагрузке
+}
+
 # создаем движок и фабрику сессий
 engine = create_async_engine(
     DATABASE_URL,
     echo=False,
     pool_pre_ping=True,  # Проверка соединения перед использованием
     pool_recycle=3600,   # Переподключение каждый час
+    **_pool_options,
 )
 async_session = async_sessionmaker(engine, expire_on_commit=False)
 
@@ -56,113 +56,84 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+def _ordered_routers() -> list:
+    """
+    Роутеры в порядке подключения (один список для handlers_router
+    и create_fresh_handlers_router).
+
+    Обычные сообщения в группах (без команды и FSM-состояния) идут
+    напрямую в group_message_coordinator_router через FastPathMiddleware,
+    минуя этот список — см. bot/middleware/fast_path_middleware.py.
+    """
+    return [
+        bot_activity_handlers_router,
+        bot_activity_journal_router,
+        universal_deeplink_router,
+        group_settings_router,
+        moderation_handlers_router,
+        # РЕДИЗАЙН КАПЧИ: Новый модуль капчи (единая точка входа)
+        captcha_router,
+        broadcast_router,
+        new_member_requested_handler,  # Ручной мут ПЕРВЫМ
+        auto_mute_scammers_router,     # Автомут ВТОРЫМ
+        # Удалено: admin_log_router (мёртвый код)
+        enhanced_analysis_router,
+        journal_link_router,           # Привязка журнала через пересылку
+        reaction_mute_router,
+        reaction_mute_settings_router,  # UI настроек мута по реакциям
+        captcha_settings_router,
+        unscam_router,                 # Команда /unscam в ЛС
+        antispam_router,               # Антиспам настройки UI
+        antispam_journal_actions_router,  # Кнопки действий в журнале антиспам
+        content_filter_router,         # Content filter настройки UI
+        message_management_router,     # Message management UI + команды
+        profile_monitor_router,        # Profile monitor callbacks + settings
+        # Команда /stat - статистика пользователя в группе
+        # ВАЖНО: должен быть ДО group_message_coordinator, иначе команда будет удалена
+        user_stats_router,
+        # ScamMedia команды (/mutein, /banin, /scamrm, /scamlogo)
+        # ВАЖНО: должен быть ДО group_message_coordinator
+        scam_media_commands_router,
+        # ScamMedia callbacks (обработка кнопок настроек)
+        scam_media_callbacks_router,
+        # ScamMedia FSM (загрузка/удаление фото через UI)
+        scam_media_fsm_router,
+        # Экспорт/импорт настроек групп (работает в ЛС бота)
+        settings_export_router,
+        # Кросс-групповая детекция скамеров (настройки UI + callbacks журнала)
+        cross_group_router,
+        # Anti-Raid callbacks журнала (разбан, OK, permban, и т.д.)
+        antiraid_callbacks_router,
+        # Anti-Raid настройки UI (в ЛС бота)
+        antiraid_settings_router,
+        # Anti-Raid join/exit трекер (обработка выходов из группы)
+        join_exit_router,
+        # Anti-Raid reaction трекер (обработка массовых реакций)
+        reaction_router,
+        # Ручные команды модерации (/amute, /aban, /akick)
+        # ВАЖНО: должен быть ДО group_message_coordinator
+        manual_commands_router,
+        # ============================================================
+        # GROUP MESSAGE COORDINATOR - единый хендлер для сообщений в группах
+        # ============================================================
+        # Координирует работу ContentFilter, Antispam и ProfileMonitor.
+        # Решает проблему конфликта хендлеров с одинаковыми фильтрами.
+        # Подробнее: docs/ARCHITECTURE.md
+        group_message_coordinator_router,
+    ]
+
+
 handlers_router = Router()
-handlers_router.include_router(bot_activity_handlers_router)
-handlers_router.include_router(bot_activity_journal_router)
-handlers_router.include_router(universal_deeplink_router)
-handlers_router.include_router(group_settings_router)
-handlers_router.include_router(moderation_handlers_router)
-# РЕДИЗАЙН КАПЧИ: Новый модуль капчи (единая точка входа)
-handlers_router.include_router(captcha_router)
-handlers_router.include_router(broadcast_router)
-handlers_router.include_router(new_member_requested_handler)  # Ручной мут ПЕРВЫМ
-handlers_router.include_router(auto_mute_scammers_router)     # Автомут ВТОРЫМ
-# Удалено: admin_log_router (мёртвый код)
-handlers_router.include_router(enhanced_analysis_router)
-handlers_router.include_router(journal_link_router)           # Привязка журнала через пересылку
-handlers_router.include_router(reaction_mute_router)
-handlers_router.include_router(reaction_mute_settings_router)  # UI настроек мута по реакциям
-handlers_router.include_router(captcha_settings_router)
-handlers_router.include_router(unscam_router)                 # Команда /unscam в ЛС
-handlers_router.include_router(antispam_router)               # Антиспам настройки UI
-handlers_router.include_router(antispam_journal_actions_router)  # Кнопки действий в журнале антиспам
-handlers_router.include_router(content_filter_router)         # Content filter настройки UI
-handlers_router.include_router(message_management_router)     # Message management UI + команды
-handlers_router.include_router(profile_monitor_router)        # Profile monitor callbacks + settings
-# Команда /stat - статистика пользователя в группе
-# ВАЖНО: должен быть ДО group_message_coordinator, иначе команда будет удалена
-handlers_router.include_router(user_stats_router)
-# ScamMedia команды (/mutein, /banin, /scamrm, /scamlogo)
-# ВАЖНО: должен быть ДО group_message_coordinator
-handlers_router.include_router(scam_media_commands_router)
-# ScamMedia callbacks (обработка кнопок настроек)
-handlers_router.include_router(scam_media_callbacks_router)
-# ScamMedia FSM (загрузка/удаление фото через UI)
-handlers_router.include_router(scam_media_fsm_router)
-# Экспорт/импорт настроек групп (работает в ЛС бота)
-handlers_router.include_router(settings_export_router)
-# Кросс-групповая детекция скамеров (настройки UI + callbacks журнала)
-handlers_router.include_router(cross_group_router)
-# Anti-Raid callbacks журнала (разбан, OK, permban, и т.д.)
-handlers_router.include_router(antiraid_callbacks_router)
-# Anti-Raid настройки UI (в ЛС бота)
-handlers_router.include_router(antiraid_settings_router)
-# Anti-Raid join/exit трекер (обработка выходов из группы)
-handlers_router.include_router(join_exit_router)
-# Anti-Raid reaction трекер (обработка массовых реакций)
-handlers_router.include_router(reaction_router)
-# Ручные команды модерации (/amute, /aban, /akick)
-# ВАЖНО: должен быть ДО group_message_coordinator
-handlers_router.include_router(manual_commands_router)
-# ============================================================
-# GROUP MESSAGE COORDINATOR - единый хендлер для сообщений в группах
-# ============================================================
-# Координирует работу ContentFilter, Antispam и ProfileMonitor.
-# Решает проблему конфликта хендлеров с одинаковыми фильтрами.
-# Подробнее: docs/ARCHITECTURE.md
-handlers_router.include_router(group_message_coordinator_router)
+for _router in _ordered_routers():
+    handlers_router.include_router(_router)
 
 
 def create_fresh_handlers_router():
     """Создает новый экземпляр handlers_router с подключенными роутерами"""
     from aiogram import Router
     fresh_router = Router()
-    fresh_router.include_router(bot_activity_handlers_router)
-    fresh_router.include_router(bot_activity_journal_router)
-    fresh_router.include_router(universal_deeplink_router)
-    fresh_router.include_router(group_settings_router)
-    fresh_router.include_router(moderation_handlers_router)
-    # РЕДИЗАЙН КАПЧИ: Новый модуль капчи (единая точка входа)
-    fresh_router.include_router(captcha_router)
-    fresh_router.include_router(broadcast_router)
-    fresh_router.include_router(new_member_requested_handler)
-    fresh_router.include_router(auto_mute_scammers_router)
-    # Удалено: admin_log_router (мёртвый код)
-    fresh_router.include_router(enhanced_analysis_router)
-    fresh_router.include_router(journal_link_router)
-    fresh_router.include_router(reaction_mute_router)
-    fresh_router.include_router(reaction_mute_settings_router)  # UI настроек мута по реакциям
-    fresh_router.include_router(captcha_settings_router)
-    fresh_router.include_router(unscam_router)
-    fresh_router.include_router(antispam_router)
-    fresh_router.include_router(antispam_journal_actions_router)  # Кнопки действий в журнале антиспам
-    fresh_router.include_router(content_filter_router)
-    fresh_router.include_router(message_management_router)
-    fresh_router.include_router(profile_monitor_router)
-    # Команда /stat - статистика пользователя (ДО coordinator!)
-    fresh_router.include_router(user_stats_router)
-    # ScamMedia команды (/mutein, /banin, /scamrm, /scamlogo)
-    fresh_router.include_router(scam_media_commands_router)
-    # ScamMedia callbacks (обработка кнопок настроек)
-    fresh_router.include_router(scam_media_callbacks_router)
-    # ScamMedia FSM (загрузка/удаление фото через UI)
-    fresh_router.include_router(scam_media_fsm_router)
-    # Экспорт/импорт настроек групп (работает в ЛС бота)
-    fresh_router.include_router(settings_export_router)
-    # Кросс-групповая детекция скамеров (настройки UI + callbacks журнала)
-    fresh_router.include_router(cross_group_router)
-    # Anti-Raid callbacks журнала (разбан, OK, permban, и т.д.)
-    fresh_router.include_router(antiraid_callbacks_router)
-    # Anti-Raid настройки UI (в ЛС бота)
-    fresh_router.include_router(antiraid_settings_router)
-    # Anti-Raid join/exit трекер (обработка выходов из группы)
-    fresh_router.include_router(join_exit_router)
-    # Anti-Raid reaction трекер (обработка массовых реакций)
-    fresh_router.include_router(reaction_router)
-    # Ручные команды модерации (/amute, /aban, /akick)
-    fresh_router.include_router(manual_commands_router)
-    # Group Message Coordinator - единый хендлер для групповых сообщений
-    fresh_router.include_router(group_message_coordinator_router)
+    for router in _ordered_routers():
+        fresh_router.include_router(router)
     return fresh_router
 
 
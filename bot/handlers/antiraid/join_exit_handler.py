@@ -33,12 +33,13 @@ from bot.services.antiraid import (
     # Mass Join
     check_mass_join,
     apply_raid_action,
-    ban_user,
+    # Очередь массовых действий при рейде
+    RaidAction,
+    get_raid_executor,
 )
 # Импортируем функции журнала
 from bot.services.antiraid.journal_service import (
     send_raid_detected_journal,
-    update_raid_journal,
 )
 # Импортируем трекер для работы со счётчиками
 from bot.services.antiraid.mass_join_tracker import MassJoinTracker
@@ -233,7 +234,8 @@ async def track_mass_join(
     bot: Bot,
     session: AsyncSession,
     chat_id: int,
-    user_id: int
+    user_id: int,
+    is_join_request: bool = False
 ) -> bool:
     """
     Записывает вступление и проверяет на массовые вступления (рейд).
@@ -243,6 +245,10 @@ async def track_mass_join(
     - ВСЕ вступления в protection mode = бан
     - Одно агрегированное уведомление обновляется со счётчиком
 
+    Баны выполняются очередью RaidActionExecutor (лимиты Telegram,
+    FloodWait, правки журнала не чаще раза в несколько секунд).
+    При обнаружении рейда в очередь ставится вся когорта из окна.
+
     Эту функцию следует вызывать из captcha_coordinator.py
     при обработке событий входа.
 
@@ -251,9 +257,10 @@ async def track_mass_join(
         session: Асинхронная сессия SQLAlchemy
         chat_id: ID чата
         user_id: ID пользователя
+        is_join_request: True для chat_join_request (заявка отклоняется)
 
     Returns:
-        True если protection mode активен и юзер забанен
+        True если protection mode активен и юзер поставлен в очередь на бан
     """
     # ─────────────────────────────────────────────────────────
     # Проверяем настройки группы
@@ -289,77 +296,63 @@ async def track_mass_join(
         return False
 
     # ─────────────────────────────────────────────────────────
-    # Protection mode АКТИВЕН — банить юзера!
+    # Protection mode АКТИВЕН — ставим бан в очередь
     # ─────────────────────────────────────────────────────────
     tracker = MassJoinTracker(redis)
+    executor = get_raid_executor()
 
     # Получаем длительность бана из настроек
     ban_duration_hours = settings.mass_join_ban_duration  # 0 = навсегда
 
-    # Применяем бан
-    action_result = await ban_user(
-        bot=bot,
-        chat_id=chat_id,
-        user_id=user_id,
-        duration_hours=ban_duration_hours
+    # При обнаружении рейда баним ретроактивно всю когорту из окна
+    # (текущий юзер в ней уже есть), иначе — только текущего
+    user_ids = list(result.recent_user_ids) if result.is_raid_detected else []
+    if user_id not in user_ids:
+        user_ids.append(user_id)
+
+    actions = []
+    if is_join_request:
+        # Заявку отклоняем, чтобы она не висела у админов
+        actions.append(RaidAction('decline', user_id))
+    actions.extend(
+        RaidAction('ban', raider_id, duration=ban_duration_hours)
+        for raider_id in user_ids
     )
-
-    if not action_result.success:
-        logger.error(
-            f"[ANTIRAID] Ошибка бана рейдера: user_id={user_id}, "
-            f"error={action_result.error_message}"
-        )
-        return False
-
-    # ─────────────────────────────────────────────────────────
-    # Инкрементируем счётчик забаненных
-    # ─────────────────────────────────────────────────────────
-    banned_count = await tracker.increment_banned_count(chat_id)
+    queued = executor.submit(bot, chat_id, actions)
 
     logger.warning(
-        f"[ANTIRAID] 🚫 Рейдер забанен: user_id={user_id}, "
-        f"chat_id={chat_id}, total_banned={banned_count}"
+        f"[ANTIRAID] 🚫 Рейдеры в очереди на бан: user_id={user_id}, "
+        f"chat_id={chat_id}, queued={queued}"
     )
 
     # ─────────────────────────────────────────────────────────
-    # Обновляем агрегированное уведомление в журнале
+    # Агрегированное уведомление в журнале
     # ─────────────────────────────────────────────────────────
+    journal_kwargs = dict(
+        join_count=result.join_count,
+        window_seconds=result.window_seconds,
+        protection_seconds=result.protection_remaining_seconds,
+        action_taken=settings.mass_join_action,
+        slowmode_seconds=settings.mass_join_slowmode
+    )
+
     if result.is_raid_detected:
         # Первое обнаружение — создаём новое уведомление
         message_id = await send_raid_detected_journal(
             bot=bot,
             session=session,
             chat_id=chat_id,
-            join_count=result.join_count,
-            window_seconds=result.window_seconds,
-            banned_count=banned_count,
-            protection_seconds=result.protection_remaining_seconds,
-            action_taken=settings.mass_join_action,
-            slowmode_seconds=settings.mass_join_slowmode
+            banned_count=await tracker.get_banned_count(chat_id),
+            **journal_kwargs
         )
 
         # Сохраняем message_id для последующих обновлений
         if message_id:
             await tracker.set_journal_message_id(chat_id, message_id)
 
-    else:
-        # Protection mode был уже активен — обновляем существующее сообщение
-        journal_message_id = await tracker.get_journal_message_id(chat_id)
-
-        if journal_message_id:
-            await update_raid_journal(
-                bot=bot,
-                session=session,
-                chat_id=chat_id,
-                journal_message_id=journal_message_id,
-                join_count=result.join_count,
-                window_seconds=result.window_seconds,
-                banned_count=banned_count,
-                protection_seconds=result.protection_remaining_seconds,
-                action_taken=settings.mass_join_action,
-                slowmode_seconds=settings.mass_join_slowmode,
-                is_active=True
-            )
+    # Дальше сообщение обновляет исполнитель: счётчик забаненных
+    # растёт по мере выполнения очереди, правки объединяются
+    executor.update_journal(bot, chat_id, is_active=True, **journal_kwargs)
 
     return True
 
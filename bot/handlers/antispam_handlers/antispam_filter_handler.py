@@ -1,7 +1,5 @@
 # Импорт модуля логирования для записи информации о работе фильтра
 import logging
-# Импорт asyncio для отложенных задач
-import asyncio
 # Импорт datetime для работы с временем ограничений
 from datetime import datetime, timedelta, timezone
 # Импорт Router для создания отдельного роутера антиспам фильтра
@@ -25,6 +23,12 @@ from bot.database.models import ChatSettings
 from bot.services.group_journal_service import send_journal_event
 # Импорт сервиса сохранения ограничений в БД
 from bot.services.restriction_service import save_restriction
+# Импорт кэша статуса админов
+from bot.services.admin_status_cache import get_admin_status_cache
+# Импорт кэша настроек групп
+from bot.services.settings_cache import get_settings_cache
+# Импорт планировщика отложенных задач
+from bot.services.job_scheduler import schedule_delete_message
 
 # Создаем логгер для этого модуля
 logger = logging.getLogger(__name__)
@@ -42,6 +46,8 @@ async def schedule_message_deletion(message: Message, delay_seconds: int) -> Non
     """
     Запланировать удаление сообщения через указанное время.
 
+    Удаление — задача планировщика (переживает перезапуск бота).
+
     Args:
         message: Сообщение для удаления
         delay_seconds: Задержка в секундах перед удалением
@@ -49,22 +55,11 @@ async def schedule_message_deletion(message: Message, delay_seconds: int) -> Non
     if delay_seconds <= 0:
         return
 
-    async def delete_after_delay():
-        try:
-            await asyncio.sleep(delay_seconds)
-            await message.delete()
-            logger.debug(
-                f"[ANTISPAM_FILTER] Авто-удалено предупреждение "
-                f"(message_id={message.message_id}) через {delay_seconds} сек"
-            )
-        except TelegramBadRequest as e:
-            # Сообщение уже удалено
-            logger.debug(f"[ANTISPAM_FILTER] Не удалось авто-удалить сообщение: {e}")
-        except Exception as e:
-            logger.error(f"[ANTISPAM_FILTER] Ошибка авто-удаления: {e}")
-
-    # Запускаем задачу в фоне (не ждём завершения)
-    asyncio.create_task(delete_after_delay())
+    await schedule_delete_message(message.bot, message.chat.id, message.message_id, delay_seconds)
+    logger.debug(
+        f"[ANTISPAM_FILTER] Запланировано авто-удаление предупреждения "
+        f"(message_id={message.message_id}) через {delay_seconds} сек"
+    )
 
 
 # Хелпер-функция для получения TTL предупреждений
@@ -79,12 +74,18 @@ async def get_warning_ttl(session: AsyncSession, chat_id: int) -> int:
     Returns:
         TTL в секундах (0 = не удалять)
     """
-    try:
+    async def load_ttl():
         result = await session.execute(
             select(ChatSettings.antispam_warning_ttl_seconds)
             .where(ChatSettings.chat_id == chat_id)
         )
-        ttl = result.scalar_one_or_none()
+        return result.scalar_one_or_none()
+
+    try:
+        # TTL читается на каждом срабатывании — берём из кэша настроек
+        ttl = await get_settings_cache().get_or_load(
+            'chat_settings', chat_id, load_ttl, extra='antispam_warning_ttl_seconds'
+        )
         return ttl if ttl is not None else 0
     except Exception as e:
         logger.error(f"[ANTISPAM_FILTER] Ошибка получения TTL: {e}")
@@ -105,10 +106,8 @@ async def is_user_admin(bot, chat_id: int, user_id: int) -> bool:
         bool: True если пользователь администратор, иначе False
     """
     try:
-        # Получаем информацию о члене чата через API Telegram
-        member = await bot.get_chat_member(chat_id, user_id)
-        # Проверяем статус: creator (создатель) или administrator (админ)
-        return member.status in ["creator", "administrator"]
+        # Статус берём из общего кэша админов (память + Redis)
+        return await get_admin_status_cache().is_admin(bot, chat_id, user_id)
     except Exception as e:
         # Если произошла ошибка при проверке, логируем ее
         logger.error(f"Ошибка при проверке прав администратора: {e}")
@@ -203,7 +203,9 @@ async def bot_removed_from_group(event: types.ChatMemberUpdated, session: AsyncS
         # Чистим кэш синхронизации в Redis (группа может быть ресинхронизирована позже)
         try:
             from bot.services.redis_conn import redis
+            from bot.services.group_auto_sync import forget_group
             await redis.delete(f"group_synced:{chat.id}")
+            forget_group(chat.id)
             # Остальные ключи НЕ удаляем - настройки сохраняются
         except Exception as re:
             logger.warning(f"Не удалось очистить Redis кэш для группы {chat.id}: {re}")
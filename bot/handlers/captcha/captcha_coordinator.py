@@ -184,7 +184,8 @@ async def handle_join_request(
         bot=bot,
         session=session,
         chat_id=chat.id,
-        user_id=user.id
+        user_id=user.id,
+        is_join_request=True
     )
     # Продолжаем обработку — капча всё равно нужна
 
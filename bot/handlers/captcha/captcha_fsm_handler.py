@@ -23,6 +23,8 @@ from aiogram.filters import CommandStart, BaseFilter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.database.session import get_session
+from bot.services.job_scheduler import schedule_delete_message
+from bot.services.message_deletion import delete_messages
 from bot.services.captcha.dm_flow_service import (
     get_captcha_data,
     update_captcha_attempts,
@@ -108,15 +110,8 @@ async def _delete_message_later(bot: Bot, message: Message, delay: int) -> None:
         message: Сообщение для удаления
         delay: Задержка в секундах
     """
-    try:
-        await asyncio.sleep(delay)
-        await bot.delete_message(
-            chat_id=message.chat.id,
-            message_id=message.message_id,
-        )
-        logger.debug(f"🗑️ [AUTO_DELETE] Удалено сообщение: msg_id={message.message_id}")
-    except Exception as e:
-        logger.debug(f"⚠️ [AUTO_DELETE] Не удалось удалить сообщение: {e}")
+    # Удаление — задача планировщика (переживает перезапуск бота)
+    await schedule_delete_message(bot, message.chat.id, message.message_id, delay)
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -277,16 +272,8 @@ async def handle_captcha_deep_link(
             f"fsm_ids={prev_message_ids}, redis_ids={redis_message_ids}"
         )
 
-        # Удаляем предыдущие сообщения
-        deleted_count = 0
-        for msg_id in all_message_ids:
-            try:
-                await bot.delete_message(chat_id=message.chat.id, message_id=msg_id)
-                deleted_count += 1
-                logger.debug(f"🗑️ [FSM] Удалено сообщение: msg_id={msg_id}")
-            except Exception as e:
-                # Сообщение уже удалено - пропускаем
-                logger.debug(f"⚠️ [FSM] Не удалось удалить сообщение {msg_id}: {e}")
+        # Удаляем предыдущие сообщения одной пачкой (уже удалённые пропускаются)
+        deleted_count = await delete_messages(bot, message.chat.id, list(all_message_ids))
 
         if deleted_count > 0:
             logger.info(f"🧹 [FSM] Удалено {deleted_count} предыдущих сообщений")
@@ -40,6 +40,12 @@ from bot.services.group_journal_service import send_journal_event
 # Импортируем сервис сохранения ограничений в БД
 from bot.services.restriction_service import save_restriction
 
+# Импортируем планировщик отложенных задач (удаление с задержкой)
+from bot.services.job_scheduler import schedule_delete_message
+
+# Импортируем пакетное удаление сообщений (флуд-сообщения одной пачкой)
+from bot.services.message_deletion import delete_messages
+
 # Импортируем Redis клиент для FloodDetector
 from bot.services.redis_conn import redis
 
@@ -306,14 +312,9 @@ async def _apply_action(
         deleted_count = 0
 
         if should_delete_flood:
-            # Удаляем все флуд-сообщения
-            for msg_id in result.flood_message_ids:
-                try:
-                    await message.bot.delete_message(chat_id=chat_id, message_id=msg_id)
-                    deleted_count += 1
-                except TelegramAPIError:
-                    # Некоторые сообщения могут быть уже удалены
-                    pass
+            # Удаляем все флуд-сообщения одной пачкой deleteMessages
+            # (уже удалённые сообщения пропускаются)
+            deleted_count = await delete_messages(message.bot, chat_id, result.flood_message_ids)
             logger.info(f"[ContentFilter] Удалено {deleted_count}/{len(result.flood_message_ids)} флуд-сообщений")
         else:
             # Не удаляем - только применяем действие
@@ -415,14 +416,8 @@ async def _delayed_delete(message: Message, delay_seconds: int) -> None:
         message: Сообщение для удаления
         delay_seconds: Задержка в секундах
     """
-    try:
-        await asyncio.sleep(delay_seconds)
-        await message.delete()
-        logger.info(f"[ContentFilter] 🗑️ Удалено msg={message.message_id} после задержки {delay_seconds} сек")
-    except TelegramAPIError as e:
-        logger.warning(f"[ContentFilter] Не удалось удалить сообщение с задержкой: {e}")
-    except asyncio.CancelledError:
-        pass
+    # Удаление — задача планировщика (переживает перезапуск бота)
+    await schedule_delete_message(message.bot, message.chat.id, message.message_id, delay_seconds)
 
 
 async def _schedule_notification_delete(bot, chat_id: int, message_id: int, delay_seconds: int) -> None:
@@ -435,14 +430,7 @@ async def _schedule_notification_delete(bot, chat_id: int, message_id: int, dela
         message_id: ID сообщения для удаления
         delay_seconds: Задержка в секундах
     """
-    try:
-        await asyncio.sleep(delay_seconds)
-        await bot.delete_message(chat_id=chat_id, message_id=message_id)
-        logger.info(f"[ContentFilter] 🔔 Автоудалено уведомление msg={message_id} через {delay_seconds} сек")
-    except TelegramAPIError as e:
-        logger.warning(f"[ContentFilter] Не удалось автоудалить уведомление: {e}")
-    except asyncio.CancelledError:
-        pass
+    await schedule_delete_message(bot, chat_id, message_id, delay_seconds)
 
 
 async def _send_warning(
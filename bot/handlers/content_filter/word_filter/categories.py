@@ -54,6 +54,8 @@ from bot.handlers.content_filter.common import (
 )
 # Импортируем нормализатор для preview
 from bot.services.content_filter.text_normalizer import get_normalizer
+# Импортируем кэш индекса слов (сброс после изменений)
+from bot.services.content_filter.word_index import get_word_index_cache
 
 # Создаём роутер для категорий
 categories_router = Router(name='word_filter_categories')
@@ -352,6 +354,7 @@ async def confirm_add_category_word(
         added += 1
 
     await session.commit()
+    get_word_index_cache().invalidate_chat(chat_id)
     await state.clear()
 
     # Формируем ответ
@@ -579,6 +582,7 @@ async def process_delete_category_word(
             not_found += 1
 
     await session.commit()
+    get_word_index_cache().invalidate_chat(chat_id)
     await state.clear()
 
     # Формируем ответ
@@ -644,6 +648,7 @@ async def delete_all_category_words(
         )
     )
     await session.commit()
+    get_word_index_cache().invalidate_chat(chat_id)
 
     category_name = CATEGORY_NAMES.get(category, 'Слова')
     logger.info(f"[ContentFilter] Удалены все слова категории {db_category} из чата {chat_id}")
@@ -33,6 +33,8 @@ from sqlalchemy import delete
 
 # Импортируем модели
 from bot.database.models_content_filter import FilterWord
+# Импортируем кэш индекса слов (сброс после изменений)
+from bot.services.content_filter.word_index import get_word_index_cache
 
 # Импортируем клавиатуры
 from bot.keyboards.content_filter_keyboards import (
@@ -462,6 +464,7 @@ async def clear_all_words(
     query = delete(FilterWord).where(FilterWord.chat_id == chat_id)
     await session.execute(query)
     await session.commit()
+    get_word_index_cache().invalidate_chat(chat_id)
 
     logger.info(f"[ContentFilter] Удалены все слова из чата {chat_id}")
 
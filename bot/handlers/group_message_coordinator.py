@@ -6,8 +6,15 @@
 # только первый выполняется. Координатор объединяет их в один.
 #
 # Порядок проверки сообщений:
-# 1. ContentFilter (слова, скам, флуд) - если сработал, Antispam не нужен
-# 2. Antispam (ссылки, пересылки, цитаты) - проверяется только если CF пропустил
+# 1. Статистика, кэш автора, проверка админа (параллельно)
+# 2. MessageManagement (системные сообщения, команды), пропуск админов
+# 3. Трекинг, кросс-группа, ContentFilter, ScamMedia, Antispam (параллельно)
+# 4. ProfileMonitor - только если Antispam не сработал
+#
+# Шаги описаны декларативно и выполняются через bot.services.message_pipeline:
+# при COORDINATOR_PARALLEL_STEPS=true независимые шаги идут одной волной,
+# каждый в своей сессии БД (размер пула — DB_POOL_SIZE/DB_MAX_OVERFLOW);
+# по умолчанию шаги выполняются последовательно в сессии middleware.
 #
 # Это паттерн "Single Entry Point" / "Message Coordinator"
 # ============================================================
@@ -23,18 +30,27 @@ from aiogram.types import Message
 from aiogram.exceptions import TelegramAPIError
 # Импортируем логгер
 import logging
-# Импортируем asyncio для асинхронных задач (автоудаление уведомлений)
-import asyncio
 
 # Импортируем типы SQLAlchemy
 from sqlalchemy.ext.asyncio import AsyncSession
 
+# Импортируем движок поэтапного выполнения шагов и фабрики сессий
+# (своя сессия на параллельный шаг / общая сессия middleware)
+from bot.services.message_pipeline import (
+    PipelineStep,
+    run_pipeline,
+    shared_session_factory,
+    step_session,
+)
+# Импортируем флаг параллельного выполнения шагов
+from bot.config import COORDINATOR_PARALLEL_STEPS
+
 # ============================================================
 # ИМПОРТ ЛОГИКИ ИЗ СУЩЕСТВУЮЩИХ МОДУЛЕЙ
 # ============================================================
 
-# ContentFilter - импортируем FilterManager и функции применения действий
-from bot.services.content_filter import FilterManager
+# ContentFilter - импортируем FilterManager, общий разбор текста и функции применения действий
+from bot.services.content_filter import FilterManager, MessageAnalysis
 # Импортируем функции применения действий из filter_handler
 from bot.handlers.content_filter.filter_handler import (
     _apply_action as content_filter_apply_action,
@@ -62,6 +78,10 @@ from bot.handlers.antispam_handlers.antispam_filter_handler import (
 )
 # Импортируем функцию логирования в журнал группы
 from bot.services.group_journal_service import send_journal_event
+# Импортируем планировщик отложенных задач (автоудаление уведомлений)
+from bot.services.job_scheduler import schedule_delete_message
+# Импортируем пакетное удаление сообщений (очистка кросс-сообщений)
+from bot.services.message_deletion import delete_messages
 
 # MessageManagement - импортируем функции фильтрации
 from bot.handlers.message_management.filter_handler import (
@@ -82,7 +102,6 @@ from bot.services.profile_monitor import track_user_message
 # Кросс-групповая детекция - импортируем функции трекинга и проверки
 from bot.services.cross_group.detection_service import (
     track_user_message as cross_group_track_message,
-    check_cross_group_detection,
 )
 # Импортируем функцию применения действия при детекции
 from bot.services.cross_group.action_service import apply_cross_group_action
@@ -101,6 +120,8 @@ from aiogram.types import ChatPermissions, InlineKeyboardMarkup, InlineKeyboardB
 from datetime import timedelta
 # Импорт исключений
 from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+# Импорт кэша статуса админов (вместо get_chat_member на каждое сообщение)
+from bot.services.admin_status_cache import get_admin_status_cache
 
 # ============================================================
 # ИМПОРТ REDIS ДЛЯ КЭШИРОВАНИЯ АВТОРОВ СООБЩЕНИЙ
@@ -138,10 +159,8 @@ async def _is_admin(bot, chat_id: int, user_id: int) -> bool:
         bool: True если админ, False если нет
     """
     try:
-        # Получаем информацию о пользователе в чате
-        member = await bot.get_chat_member(chat_id, user_id)
-        # Проверяем статус: creator или administrator
-        return member.status in ('creator', 'administrator')
+        # Список админов кэшируется (память + Redis), API не дёргается на каждое сообщение
+        return await get_admin_status_cache().is_admin(bot, chat_id, user_id)
     except TelegramAPIError as e:
         # Ошибка API - логируем и считаем что не админ (безопасный подход)
         logger.warning(
@@ -218,11 +237,12 @@ async def group_message_handler(
 
     Координирует работу всех фильтров:
     1. ContentFilter (слова, скам, флуд)
-    2. Antispam (ссылки, пересылки, цитаты)
+    2. ScamMedia (скам-изображения)
+    3. Antispam (ссылки, пересылки, цитаты)
+    4. ProfileMonitor (изменения профиля)
 
-    Если ContentFilter срабатывает - Antispam пропускается.
-    Это логично: если сообщение уже обработано (удалено/наказан),
-    нет смысла проверять его повторно.
+    Фильтры 1-3 выполняются параллельно, каждый в своей сессии.
+    Если Antispam срабатывает - ProfileMonitor пропускается.
 
     Args:
         message: Входящее сообщение
@@ -246,19 +266,38 @@ async def group_message_handler(
         f"text={message.text[:50] if message.text else 'N/A'}..."
     )
 
-    # ─────────────────────────────────────────────────────────
-    # USER STATISTICS: Инкремент счётчика сообщений
-    # ─────────────────────────────────────────────────────────
-    # Считаем ВСЕ сообщения включая админов (для полной статистики)
-    # Ошибки инкремента не блокируют основной поток (ловятся внутри)
-    await increment_message_count(session, chat_id, user_id)
+    # Шаги независимы друг от друга — выполняем их волнами (см. message_pipeline)
+    session_factory = step_session if COORDINATOR_PARALLEL_STEPS else shared_session_factory(session)
+
+    # Результат проверки админа из параллельной волны
+    admin_check = {}
+
+    async def _check_admin(_) -> bool:
+        admin_check['is_admin'] = await _is_admin(message.bot, chat_id, user_id)
+        return False
 
     # ─────────────────────────────────────────────────────────
-    # КЭШИРОВАНИЕ АВТОРА СООБЩЕНИЯ ДЛЯ МУТА ПО РЕАКЦИЯМ
+    # ВОЛНА 0: статистика, кэш автора, проверка админа
     # ─────────────────────────────────────────────────────────
-    # Telegram Bot API не передаёт автора сообщения в событии реакции,
-    # поэтому кэшируем message_id → user_id для последующего мута
-    await cache_message_author(chat_id, message.message_id, user_id)
+    # Статистика: считаем ВСЕ сообщения включая админов
+    # (ошибки инкремента ловятся внутри)
+    # Кэш автора: Telegram Bot API не передаёт автора сообщения в событии
+    # реакции, поэтому кэшируем message_id → user_id для мута по реакциям
+    # Админ: список админов кэшируется, результат нужен только после шага 0
+    await run_pipeline(
+        [
+            PipelineStep('user_stats', lambda s: increment_message_count(s, chat_id, user_id)),
+            PipelineStep(
+                'author_cache',
+                lambda _: cache_message_author(chat_id, message.message_id, user_id),
+                uses_session=False
+            ),
+            PipelineStep('admin_check', _check_admin, uses_session=False),
+        ],
+        session_factory=session_factory,
+        parallel=COORDINATOR_PARALLEL_STEPS,
+        log_prefix="[COORDINATOR]"
+    )
 
     # ─────────────────────────────────────────────────────────
     # ШАГ 0: MESSAGE MANAGEMENT - системные сообщения и репин
@@ -289,8 +328,8 @@ async def group_message_handler(
         and message.sender_chat.id == chat_id
     )
 
-    # Проверяем обычного админа через API
-    is_admin = is_anonymous_admin or await _is_admin(message.bot, chat_id, user_id)
+    # Обычный админ проверен в волне 0 (при ошибке шага считаем что не админ)
+    is_admin = is_anonymous_admin or admin_check.get('is_admin', False)
 
     # ─────────────────────────────────────────────────────────
     # ШАГ 0.5: MESSAGE MANAGEMENT - удаление команд
@@ -308,25 +347,101 @@ async def group_message_handler(
         return
 
     # ─────────────────────────────────────────────────────────
-    # ТРЕКИНГ СООБЩЕНИЙ ДЛЯ PROFILE MONITOR
+    # ШАГИ 1-4: трекинг и детекторы
     # ─────────────────────────────────────────────────────────
-    # Сохраняем message_id в Redis для возможного удаления
-    # Если Profile Monitor обнаружит подозрительное поведение,
-    # он сможет удалить все сообщения пользователя
+    # Трекинг (Profile Monitor, кросс-группа), ContentFilter, ScamMedia
+    # и Antispam не зависят друг от друга — выполняются одной волной.
+    # Как и раньше, срабатывание CF/ScamMedia НЕ отменяет Antispam,
+    # а ProfileMonitor пропускается, если сработал Antispam.
+    # Текст разбирается один раз на апдейт: нормализация, lowercase,
+    # n-граммы и ссылки считаются лениво и общие для всех детекторов
+    analysis = MessageAnalysis.from_message(message)
+
+    async def _scam_media_step(step_session: AsyncSession) -> bool:
+        # Проверяем через ScamMediaFilter только сообщения с медиа
+        if not await has_media(message):
+            return False
+        return await _process_scam_media(message, step_session)
+
+    result = await run_pipeline(
+        [
+            # Сохраняем message_id в Redis: Profile Monitor сможет удалить
+            # все сообщения пользователя при подозрительном поведении
+            PipelineStep(
+                'track_message',
+                lambda _: _track_message_for_profile_monitor(message),
+                uses_session=False
+            ),
+            PipelineStep('cross_group', lambda s: _process_cross_group(message, s), priority=0),
+            PipelineStep('content_filter', lambda s: _process_content_filter(message, s, analysis), priority=1),
+            PipelineStep('scam_media', _scam_media_step, priority=2),
+            PipelineStep('antispam', lambda s: _process_antispam(message, s, analysis), priority=3),
+            PipelineStep(
+                'profile_monitor',
+                lambda s: _process_profile_monitor(message, s),
+                skip_if_triggered=('antispam',),
+                priority=4
+            ),
+        ],
+        session_factory=session_factory,
+        parallel=COORDINATOR_PARALLEL_STEPS,
+        log_prefix="[COORDINATOR]"
+    )
+
+    # Логируем итог (кто сработал первым по приоритету)
+    if result.winner:
+        logger.info(
+            f"[COORDINATOR] Сработали: {', '.join(result.triggered)}, "
+            f"первый: {result.winner}"
+        )
+
+
+# ============================================================
+# ТРЕКИНГ СООБЩЕНИЙ
+# ============================================================
+
+async def _track_message_for_profile_monitor(message: Message) -> bool:
+    """
+    Сохраняет message_id в Redis для возможного удаления Profile Monitor.
+
+    Args:
+        message: Входящее сообщение
+
+    Returns:
+        bool: Всегда False (шаг не является детектором)
+    """
     try:
-        await track_user_message(chat_id, user_id, message.message_id)
+        await track_user_message(message.chat.id, message.from_user.id, message.message_id)
     except Exception as e:
         # Ошибка трекинга не должна блокировать обработку
         logger.warning(f"[COORDINATOR] Ошибка трекинга сообщения: {e}")
+    return False
+
+
+async def _process_cross_group(
+    message: Message,
+    session: AsyncSession
+) -> bool:
+    """
+    Трекинг сообщения и кросс-групповая детекция.
+
+    Записывает факт сообщения пользователя для детекции скамеров,
+    пишущих в несколько групп бота, и применяет действие при детекции.
+
+    Args:
+        message: Входящее сообщение
+        session: Сессия БД
+
+    Returns:
+        bool: True если детекция сработала, False иначе
+    """
+    chat_id = message.chat.id
+    user_id = message.from_user.id
 
-    # ─────────────────────────────────────────────────────────
-    # КРОСС-ГРУППОВАЯ ДЕТЕКЦИЯ: трекинг сообщений
-    # ─────────────────────────────────────────────────────────
-    # Записываем факт сообщения пользователя для детекции
-    # скамеров, пишущих в несколько групп бота
     try:
-        # Записываем факт отправки сообщения в группу
-        await cross_group_track_message(
+        # Записываем факт отправки сообщения в группу и сразу проверяем
+        # детекцию (срабатывает если выполнены все условия)
+        _, detection_result = await cross_group_track_message(
             session=session,
             user_id=user_id,
             chat_id=chat_id,
@@ -334,76 +449,28 @@ async def group_message_handler(
         )
         # Логируем трекинг (debug чтобы не засорять логи)
         logger.debug(f"[CROSS_GROUP] Tracked message: user={user_id} chat={chat_id}")
-        # Проверяем детекцию (срабатывает если выполнены все условия)
-        detection_result = await check_cross_group_detection(
+        if not detection_result:
+            return False
+
+        # Логируем детекцию скамера
+        logger.warning(
+            f"[CROSS_GROUP] DETECTED SCAMMER on MESSAGE: "
+            f"user={user_id} groups={detection_result.get('groups', [])}"
+        )
+        # Применяем действие во всех затронутых группах
+        await apply_cross_group_action(
             session=session,
+            bot=message.bot,
             user_id=user_id,
+            detection_data=detection_result,
+            user_name=message.from_user.full_name,
+            username=message.from_user.username,
         )
-        # Если детекция сработала — применяем действие
-        if detection_result:
-            # Логируем детекцию скамера
-            logger.warning(
-                f"[CROSS_GROUP] DETECTED SCAMMER on MESSAGE: "
-                f"user={user_id} groups={detection_result.get('groups', [])}"
-            )
-            # Получаем имя пользователя для журнала
-            user_name = message.from_user.full_name if message.from_user else None
-            user_username = message.from_user.username if message.from_user else None
-
-            # Применяем действие во всех затронутых группах
-            await apply_cross_group_action(
-                session=session,
-                bot=message.bot,
-                user_id=user_id,
-                detection_data=detection_result,
-                user_name=user_name,
-                username=user_username,
-            )
+        return True
     except Exception as e:
         # Ошибки кросс-групповой детекции не должны ломать основной флоу
         logger.error(f"[CROSS_GROUP] Error in message tracking: {e}")
-
-    # ─────────────────────────────────────────────────────────
-    # ШАГ 1: CONTENT FILTER (слова, скам, флуд)
-    # ─────────────────────────────────────────────────────────
-    # Проверяем сообщение через ContentFilter
-    content_filter_triggered = await _process_content_filter(message, session)
-
-    # Логируем результат ContentFilter
-    # НЕ прерываем выполнение - Antispam должен работать независимо
-    if content_filter_triggered:
-        logger.info(f"[COORDINATOR] ContentFilter сработал, продолжаем проверку Antispam")
-
-    # ─────────────────────────────────────────────────────────
-    # ШАГ 2: SCAM MEDIA FILTER (скам-изображения по pHash)
-    # ─────────────────────────────────────────────────────────
-    # Проверяем сообщение через ScamMediaFilter если есть медиа
-    # Инициализируем флаг для логирования
-    scam_media_triggered = False
-    if await has_media(message):
-        scam_media_triggered = await _process_scam_media(message, session)
-        # Логируем результат ScamMedia
-        # НЕ прерываем выполнение - Antispam должен работать независимо
-        if scam_media_triggered:
-            logger.info(f"[COORDINATOR] ScamMedia сработал, продолжаем проверку Antispam")
-
-    # ─────────────────────────────────────────────────────────
-    # ШАГ 3: ANTISPAM (ссылки, пересылки, цитаты)
-    # ─────────────────────────────────────────────────────────
-    # ContentFilter не сработал - проверяем Antispam
-    antispam_triggered = await _process_antispam(message, session)
-
-    # Если Antispam сработал - Profile Monitor пропускаем
-    if antispam_triggered:
-        logger.info(f"[COORDINATOR] Antispam сработал, пропускаем ProfileMonitor")
-        return
-
-    # ─────────────────────────────────────────────────────────
-    # ШАГ 4: PROFILE MONITOR (отслеживание изменений профиля)
-    # ─────────────────────────────────────────────────────────
-    # ContentFilter и Antispam не сработали - проверяем Profile Monitor
-    # Этот модуль отслеживает изменения профиля и применяет автомут
-    await _process_profile_monitor(message, session)
+        return False
 
 
 # ============================================================
@@ -412,7 +479,8 @@ async def group_message_handler(
 
 async def _process_content_filter(
     message: Message,
-    session: AsyncSession
+    session: AsyncSession,
+    analysis: Optional[MessageAnalysis] = None
 ) -> bool:
     """
     Обрабатывает сообщение через ContentFilter.
@@ -422,6 +490,7 @@ async def _process_content_filter(
     Args:
         message: Входящее сообщение
         session: Сессия БД
+        analysis: Общий разбор текста сообщения
 
     Returns:
         bool: True если фильтр сработал, False если пропущен
@@ -431,7 +500,7 @@ async def _process_content_filter(
 
     try:
         # Проверяем сообщение всеми фильтрами ContentFilter
-        result = await _filter_manager.check_message(message, session)
+        result = await _filter_manager.check_message(message, session, analysis=analysis)
 
         # Логируем результат проверки
         logger.info(
@@ -450,7 +519,8 @@ async def _process_content_filter(
             # ─────────────────────────────────────────────────────
             cross_msg_triggered = await _process_cross_message_detection(
                 message=message,
-                session=session
+                session=session,
+                analysis=analysis
             )
             if cross_msg_triggered:
                 return True
@@ -497,7 +567,8 @@ async def _process_content_filter(
 
 async def _process_cross_message_detection(
     message: Message,
-    session: AsyncSession
+    session: AsyncSession,
+    analysis: Optional[MessageAnalysis] = None
 ) -> bool:
     """
     Обрабатывает кросс-сообщение детекцию с использованием СВОИХ паттернов.
@@ -509,6 +580,7 @@ async def _process_cross_message_detection(
     Args:
         message: Сообщение
         session: Сессия БД
+        analysis: Общий разбор текста сообщения
 
     Returns:
         bool: True если cross_message_threshold превышен, False иначе
@@ -564,7 +636,8 @@ async def _process_cross_message_detection(
             text=text,
             session=session,
             window_seconds=window_seconds,
-            threshold=threshold
+            threshold=threshold,
+            analysis=analysis
         )
 
         # Если ничего не найдено — выходим
@@ -826,40 +899,23 @@ async def _apply_cross_message_action(
         # Планируем автоудаление уведомления если задана задержка
         notification_delay = getattr(settings, 'cross_message_notification_delete_delay', None)
         if sent_notification and notification_delay and notification_delay > 0:
-            async def _delete_notification():
-                try:
-                    await asyncio.sleep(notification_delay)
-                    await bot.delete_message(chat_id, sent_notification.message_id)
-                    logger.info(
-                        f"[COORDINATOR/CM] 🔔 Уведомление автоудалено через {notification_delay} сек"
-                    )
-                except Exception:
-                    pass  # Уведомление могло быть уже удалено
-            asyncio.create_task(_delete_notification())
+            await schedule_delete_message(
+                bot, chat_id, sent_notification.message_id, notification_delay
+            )
 
         # ─────────────────────────────────────────────────────
         # УДАЛЯЕМ ВСЕ НАКОПЛЕННЫЕ СООБЩЕНИЯ
         # ─────────────────────────────────────────────────────
-        deleted_count = 0
-        if message_ids:
-            for msg_id in message_ids:
-                try:
-                    await bot.delete_message(chat_id, msg_id)
-                    deleted_count += 1
-                except Exception:
-                    pass  # Сообщение могло быть уже удалено
+        # Накопленные сообщения и текущее (если не в списке) — одной
+        # пачкой deleteMessages; уже удалённые сообщения пропускаются
+        ids_to_delete = list(message_ids or [])
+        if message.message_id not in ids_to_delete:
+            ids_to_delete.append(message.message_id)
 
-            logger.info(
-                f"[COORDINATOR/CM] 🗑️ Удалено сообщений: {deleted_count}/{len(message_ids)}"
-            )
-
-        # Также удаляем текущее сообщение (если не в списке)
-        if not message_ids or message.message_id not in message_ids:
-            try:
-                await message.delete()
-                deleted_count += 1
-            except Exception:
-                pass
+        deleted_count = await delete_messages(bot, chat_id, ids_to_delete)
+        logger.info(
+            f"[COORDINATOR/CM] 🗑️ Удалено сообщений: {deleted_count}/{len(ids_to_delete)}"
+        )
 
         # ─────────────────────────────────────────────────────
         # ОТПРАВЛЯЕМ В ЖУРНАЛ
@@ -1055,7 +1111,8 @@ async def _process_scam_media(
 
 async def _process_antispam(
     message: Message,
-    session: AsyncSession
+    session: AsyncSession,
+    analysis: Optional[MessageAnalysis] = None
 ) -> bool:
     """
     Обрабатывает сообщение через Antispam.
@@ -1066,6 +1123,7 @@ async def _process_antispam(
     Args:
         message: Входящее сообщение
         session: Сессия БД
+        analysis: Общий разбор текста сообщения (ссылки)
 
     Returns:
         bool: True если спам обнаружен и обработан, False если нет
@@ -1075,7 +1133,9 @@ async def _process_antispam(
 
     try:
         # Вызываем основную функцию проверки на спам
-        decision: AntiSpamDecision = await check_message_for_spam(message, session)
+        decision: AntiSpamDecision = await check_message_for_spam(
+            message, session, analysis=analysis
+        )
 
         # Если сообщение не является спамом - возвращаем False
         if not decision.is_spam:
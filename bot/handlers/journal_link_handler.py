@@ -23,6 +23,7 @@ from bot.services.group_journal_service import (
     unlink_journal_channel
 )
 from bot.services.groups_settings_in_private_logic import check_granular_permissions
+from bot.services.message_deletion import delete_messages
 
 logger = logging.getLogger(__name__)
 
@@ -30,17 +31,13 @@ logger = logging.getLogger(__name__)
 async def _safe_delete_messages(bot: Bot, chat_id: int, message_ids: List[int], delay: float = 0) -> None:
     """
     Безопасное удаление сообщений с опциональной задержкой.
-    Игнорирует ошибки если сообщения уже удалены или нет прав.
+    Сообщения удаляются одной пачкой; уже удалённые и ошибки прав
+    пропускаются.
     """
     if delay > 0:
         await asyncio.sleep(delay)
 
-    for msg_id in message_ids:
-        try:
-            await bot.delete_message(chat_id, msg_id)
-        except Exception as e:
-            # Игнорируем ошибки — сообщение могло быть уже удалено
-            logger.debug(f"Не удалось удалить сообщение {msg_id}: {e}")
+    await delete_messages(bot, chat_id, message_ids)
 
 journal_link_router = Router()
 
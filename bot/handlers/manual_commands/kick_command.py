@@ -31,6 +31,8 @@ from bot.services.manual_commands.parser import ParsedCommand
 
 # Импортируем сервис журнала
 from bot.services.group_journal_service import get_group_journal_channel
+# Импортируем планировщик отложенных задач
+from bot.services.job_scheduler import schedule_delete_message
 # Импортируем модель группы
 from bot.database.models import Group
 
@@ -52,14 +54,8 @@ async def delayed_delete(message: Message, delay_seconds: int):
         message: Сообщение для удаления
         delay_seconds: Задержка в секундах
     """
-    try:
-        await asyncio.sleep(delay_seconds)
-        await message.delete()
-        logger.debug(f"[MANUAL_CMD] Delayed delete: msg_id={message.message_id} after {delay_seconds}s")
-    except TelegramAPIError as e:
-        logger.debug(f"[MANUAL_CMD] Failed to delete after delay: {e}")
-    except asyncio.CancelledError:
-        pass  # Задача отменена — игнорируем
+    # Удаление — задача планировщика (переживает перезапуск бота)
+    await schedule_delete_message(message.bot, message.chat.id, message.message_id, delay_seconds)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
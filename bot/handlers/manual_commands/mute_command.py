@@ -34,9 +34,12 @@ from bot.services.manual_commands import (
     apply_unmute,
     format_user_link,
     MuteResult,
+    CrossMuteProgress,
 )
 # Импортируем сервис журнала
 from bot.services.group_journal_service import get_group_journal_channel
+# Импортируем планировщик отложенных задач
+from bot.services.job_scheduler import schedule_delete_message
 # Импортируем модель группы
 from bot.database.models import Group
 
@@ -58,14 +61,8 @@ async def delayed_delete(message: Message, delay_seconds: int):
         message: Сообщение для удаления
         delay_seconds: Задержка в секундах
     """
-    try:
-        await asyncio.sleep(delay_seconds)
-        await message.delete()
-        logger.debug(f"[MANUAL_CMD] Delayed delete: msg_id={message.message_id} after {delay_seconds}s")
-    except TelegramAPIError as e:
-        logger.debug(f"[MANUAL_CMD] Failed to delete after delay: {e}")
-    except asyncio.CancelledError:
-        pass  # Задача отменена — игнорируем
+    # Удаление — задача планировщика (переживает перезапуск бота)
+    await schedule_delete_message(message.bot, message.chat.id, message.message_id, delay_seconds)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -422,16 +419,25 @@ async def handle_amute_command(
         is_forever = (duration_minutes == 0)
 
     # ─── Шаг 7: Применяем мут ───
-    mute_result = await apply_mute(
-        bot=bot,
-        session=session,
-        chat_id=message.chat.id,
-        user_id=target_id,
-        admin_id=admin_id,
-        duration_minutes=duration_minutes,
-        reason=parsed.reason,
-        is_forever=is_forever,
-    )
+    # Мут навсегда идёт по всем группам — показываем ход, если уведомления включены
+    progress = None
+    if is_forever and settings.mute_notify_group:
+        progress = CrossMuteProgress(bot, message.chat.id)
+    try:
+        mute_result = await apply_mute(
+            bot=bot,
+            session=session,
+            chat_id=message.chat.id,
+            user_id=target_id,
+            admin_id=admin_id,
+            duration_minutes=duration_minutes,
+            reason=parsed.reason,
+            is_forever=is_forever,
+            on_result=progress.on_result if progress else None,
+        )
+    finally:
+        if progress:
+            await progress.close()
 
     # ─── Шаг 8: Проверяем результат ───
     if not mute_result.success:
@@ -28,6 +28,8 @@ from bot.services.message_management_service import (
     disable_repin
 )
 
+# Импортируем планировщик отложенных задач
+from bot.services.job_scheduler import schedule_delete_message
 # Импортируем утилиту проверки прав админа
 from bot.handlers.antispam_handlers.antispam_filter_handler import is_user_admin
 
@@ -247,12 +249,5 @@ async def _delete_message_delayed(message: Message, delay_seconds: int) -> None:
         message: Сообщение для удаления
         delay_seconds: Задержка в секундах
     """
-    try:
-        # Ждём указанное время
-        await asyncio.sleep(delay_seconds)
-
-        # Удаляем сообщение
-        await message.delete()
-    except Exception as e:
-        # Игнорируем ошибки (сообщение могло быть уже удалено)
-        logger.debug(f"[MessageManagement] Не удалось удалить сообщение: {e}")
+    # Удаление — задача планировщика (переживает перезапуск бота)
+    await schedule_delete_message(message.bot, message.chat.id, message.message_id, delay_seconds)
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import logging
 from typing import Optional, Union
 
@@ -9,6 +8,7 @@ from aiogram.types import MessageReactionUpdated, MessageReactionCountUpdated, U
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.services.mute_by_reaction_service import handle_reaction_mute
+from bot.services.job_scheduler import schedule_delete_message
 
 # Импортируем Anti-Raid трекинг реакций для проверки массовых реакций
 from bot.handlers.antiraid import track_reaction
@@ -25,15 +25,8 @@ async def _schedule_notification_delete(bot, chat_id: int, message_id: int, dela
     if delay_seconds <= 0:
         return
 
-    async def delete_later():
-        await asyncio.sleep(delay_seconds)
-        try:
-            await bot.delete_message(chat_id=chat_id, message_id=message_id)
-            logger.info(f"✅ Уведомление {message_id} автоудалено через {delay_seconds} сек")
-        except Exception as e:
-            logger.warning(f"⚠️ Не удалось автоудалить уведомление {message_id}: {e}")
-
-    asyncio.create_task(delete_later())
+    # Задача планировщика (переживает перезапуск бота)
+    await schedule_delete_message(bot, chat_id, message_id, delay_seconds)
 
 
 ReactionEvent = Union[MessageReactionUpdated, MessageReactionCountUpdated]
@@ -75,6 +75,7 @@ async def handle_user_joined(
             session=session,
             user_id=user_id,
             chat_id=chat_id,
+            group_title=event.chat.title,
         )
         # Логируем трекинг
         logger.debug(
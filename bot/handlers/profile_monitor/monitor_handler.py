@@ -23,7 +23,7 @@ from bot.database.models_profile_monitor import (
     ProfileSnapshot,
 )
 from bot.services.profile_monitor.profile_monitor_service import (
-    get_profile_monitor_settings,
+    get_cached_profile_monitor_settings,
     get_profile_snapshot,
     create_profile_snapshot,
     update_profile_snapshot,
@@ -122,7 +122,7 @@ async def process_message_profile_check(
     # ─────────────────────────────────────────────────────────
     # ШАГ 1: Получаем настройки модуля
     # ─────────────────────────────────────────────────────────
-    settings = await get_profile_monitor_settings(session, chat_id)
+    settings = await get_cached_profile_monitor_settings(session, chat_id)
 
     # Если настроек нет или модуль выключен - выход
     if not settings or not settings.enabled:
@@ -34,6 +34,8 @@ from aiogram.exceptions import TelegramAPIError
 # Импорт SQLAlchemy
 from sqlalchemy.ext.asyncio import AsyncSession
 
+# Импорт планировщика отложенных задач (автоудаление уведомлений)
+from bot.services.job_scheduler import schedule_delete_message
 # Импорт локальных сервисов
 from bot.services.scam_media import (
     compute_image_hash,
@@ -163,11 +165,8 @@ async def _delete_after_delay(bot: Bot, chat_id: int, message_id: int, delay: in
         message_id: ID сообщения
         delay: Задержка в секундах
     """
-    await asyncio.sleep(delay)
-    try:
-        await bot.delete_message(chat_id, message_id)
-    except Exception:
-        pass
+    # Удаление — задача планировщика (переживает перезапуск бота)
+    await schedule_delete_message(bot, chat_id, message_id, delay)
 
 
 # ============================================================
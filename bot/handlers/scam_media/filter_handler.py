@@ -9,7 +9,9 @@
 # ============================================================
 
 # Импорт для аннотации типов
-from typing import Optional
+from typing import Any, List, Optional
+# Импорт буфера для скачивания файла
+from io import BytesIO
 # Импорт для логирования
 import logging
 
@@ -74,10 +76,11 @@ async def check_message_for_scam_media(
 
     Порядок проверки:
     1. Проверяет включён ли модуль для группы
-    2. Извлекает фото из сообщения
-    3. Скачивает изображение
-    4. Проверяет хеш против базы
-    5. Применяет действие если есть совпадение
+    2. Находит фото в сообщении
+    3. Берёт хеши/вердикт из кэша по file_unique_id
+    4. При промахе скачивает наименьший достаточный размер
+    5. Проверяет хеш против базы
+    6. Применяет действие если есть совпадение
 
     Args:
         message: Сообщение Telegram
@@ -96,13 +99,20 @@ async def check_message_for_scam_media(
     # Получаем менеджер фильтрации
     manager = _get_filter_manager(bot)
 
-    # Извлекаем изображение из сообщения
-    image_data = await _extract_image_from_message(message, bot)
-    if image_data is None:
+    # Находим изображение в сообщении (без скачивания)
+    sizes = _get_media_sizes(message)
+    if not sizes:
         return FilterResult(filtered=False, action=None, hash_id=None, distance=None)
 
-    # Проверяем изображение
-    result = await manager.filter_message(session, message, image_data)
+    async def load_image(min_side: int) -> Optional[bytes]:
+        # Вызывается только при промахе кэша по file_unique_id
+        return await _download_file(bot, _pick_size(sizes, min_side).file_id)
+
+    # Проверяем изображение; ключ кэша — самый крупный размер
+    # (у каждого PhotoSize свой file_unique_id, у повтора картинки — тот же)
+    result = await manager.filter_message(
+        session, message, load_image, file_unique_id=sizes[-1].file_unique_id
+    )
 
     # Логируем результат
     if result.filtered:
@@ -116,57 +126,83 @@ async def check_message_for_scam_media(
     return result
 
 
-async def _extract_image_from_message(
-    message: Message,
-    bot: Bot
-) -> Optional[bytes]:
+def _get_media_sizes(message: Message) -> List[Any]:
     """
-    Извлекает изображение из сообщения.
+    Находит изображение в сообщении.
 
     Поддерживает:
-    - Фото (message.photo)
+    - Фото (message.photo — все размеры)
     - Документы-изображения (message.document с MIME image/*)
     - Превью видео (message.video.thumbnail)
+    - Превью стикера (message.sticker.thumbnail)
 
     Args:
         message: Сообщение Telegram
-        bot: Экземпляр aiogram Bot
 
     Returns:
-        Байты изображения или None
+        Варианты файла по возрастанию размера (пустой список — нет изображения)
     """
-    file_id: Optional[str] = None
-
-    # Проверяем наличие фото
+    # Проверяем наличие фото (Telegram отдаёт размеры по возрастанию)
     if message.photo:
-        # Берём фото наибольшего размера (последнее в списке)
-        file_id = message.photo[-1].file_id
+        return list(message.photo)
 
     # Проверяем документ (может быть изображение)
-    elif message.document:
+    if message.document:
         mime_type = message.document.mime_type or ""
         if mime_type.startswith("image/"):
-            file_id = message.document.file_id
+            return [message.document]
+        return []
 
     # Проверяем превью видео (если включено в настройках)
-    elif message.video and message.video.thumbnail:
-        file_id = message.video.thumbnail.file_id
+    if message.video and message.video.thumbnail:
+        return [message.video.thumbnail]
 
     # Проверяем стикер (может быть скам)
-    elif message.sticker and message.sticker.thumbnail:
+    if message.sticker and message.sticker.thumbnail:
         # Стикеры тоже могут содержать скам-изображения
-        file_id = message.sticker.thumbnail.file_id
+        return [message.sticker.thumbnail]
 
-    if file_id is None:
-        return None
+    return []
+
+
+def _pick_size(sizes: List[Any], min_side: int) -> Any:
+    """
+    Выбирает самый маленький размер, достаточный для хеша.
+
+    Раньше всегда скачивался photo[-1] (оригинал до 2560px), хотя
+    хеш всё равно считается по уменьшенной копии.
 
-    # Скачиваем файл
+    Args:
+        sizes: Варианты файла по возрастанию размера
+        min_side: Минимальная короткая сторона (required_source_side)
+
+    Returns:
+        PhotoSize/Document для скачивания (самый крупный, если мельче не подходят)
+    """
+    for size in sizes:
+        width = getattr(size, "width", None)
+        height = getattr(size, "height", None)
+        if width and height and min(width, height) >= min_side:
+            return size
+    return sizes[-1]
+
+
+async def _download_file(bot: Bot, file_id: str) -> Optional[bytes]:
+    """
+    Скачивает файл в память.
+
+    Args:
+        bot: Экземпляр aiogram Bot
+        file_id: ID файла Telegram
+
+    Returns:
+        Байты файла или None
+    """
     try:
         file = await bot.get_file(file_id)
         if file.file_path is None:
             return None
         # Скачиваем в байты
-        from io import BytesIO
         buffer = BytesIO()
         await bot.download_file(file.file_path, buffer)
         return buffer.getvalue()
@@ -49,6 +49,12 @@ from bot.database.models_user_stats import UserStatistics
 from bot.database.models_profile_monitor import ProfileSnapshot
 from bot.database.models_content_filter import FilterViolation
 
+# Импортируем кэш статуса админов
+from bot.services.admin_status_cache import get_admin_status_cache
+
+# Импортируем планировщик отложенных задач (автоудаление уведомлений)
+from bot.services.job_scheduler import schedule_delete_message
+
 
 # ============================================================
 # НАСТРОЙКА ЛОГГЕРА
@@ -177,15 +183,8 @@ async def _delete_message_later(message: Message, delay: int) -> None:
         message: Сообщение для удаления
         delay: Задержка в секундах
     """
-    # Ждём указанное время
-    await asyncio.sleep(delay)
-
-    # Пытаемся удалить сообщение
-    try:
-        await message.delete()
-    except TelegramAPIError as e:
-        # Игнорируем ошибки удаления (сообщение могло быть уже удалено)
-        logger.debug(f"[STAT] Не удалось удалить уведомление: {e}")
+    # Удаление — задача планировщика (переживает перезапуск бота)
+    await schedule_delete_message(message.bot, message.chat.id, message.message_id, delay)
 
 
 async def _get_user_id_from_username(
@@ -236,14 +235,8 @@ async def _check_is_admin(bot: Bot, chat_id: int, user_id: int) -> bool:
         return True
 
     try:
-        # Получаем информацию о пользователе в чате
-        member = await bot.get_chat_member(chat_id, user_id)
-
-        # Проверяем статус: creator или administrator
-        if member.status in ('creator', 'administrator'):
-            return True
-
-        return False
+        # Статус берём из общего кэша админов (память + Redis)
+        return await get_admin_status_cache().is_admin(bot, chat_id, user_id)
 
     except TelegramAPIError as e:
         # Ошибка API - логируем и возвращаем False (безопасно)
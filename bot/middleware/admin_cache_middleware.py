@@ -0,0 +1,53 @@
+"""
+Middleware для инвалидации кэша админов групп.
+
+При получении апдейтов chat_member / my_chat_member:
+1. chat_member — если пользователь стал или перестал быть админом,
+   сбрасывает список админов чата
+2. my_chat_member — изменились права самого бота, сбрасывает список
+"""
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+
+from bot.services.admin_status_cache import ADMIN_STATUSES, get_admin_status_cache
+
+logger = logging.getLogger(__name__)
+
+
+class AdminCacheMiddleware(BaseMiddleware):
+    """
+    Middleware сброса кэша админов по апдейтам участников.
+
+    Срабатывает на:
+    - ChatMemberUpdated (chat_member) со сменой админского статуса
+    - ChatMemberUpdated (my_chat_member)
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        chat_id = None
+
+        if event.chat_member:
+            old_status = event.chat_member.old_chat_member.status
+            new_status = event.chat_member.new_chat_member.status
+            # Повышение/понижение, а также уход/кик админа
+            if old_status in ADMIN_STATUSES or new_status in ADMIN_STATUSES:
+                chat_id = event.chat_member.chat.id
+        elif event.my_chat_member:
+            chat_id = event.my_chat_member.chat.id
+
+        if chat_id is not None:
+            try:
+                await get_admin_status_cache().invalidate(chat_id)
+            except Exception as e:
+                # Не блокируем обработку при ошибке сброса
+                logger.warning(f"⚠️ [ADMIN_CACHE] Ошибка сброса кэша админов {chat_id}: {e}")
+
+        return await handler(event, data)
@@ -16,4 +16,13 @@ class DbSessionMiddleware(BaseMiddleware):
     ) -> Any:
         async with self.sessionmaker() as session:  # открываем сессию на каждый запрос/апдейт
             data["session"] = session  # передаем сессию в хендлер через context data
-            return await handler(event, data)  # вызываем хендлер
+            try:
+                result = await handler(event, data)  # вызываем хендлер
+            except Exception:
+                await session.rollback()  # ошибка хендлера — изменения не сохраняем
+                raise
+            # Сессией владеет middleware: фиксируем то, что хендлер не закоммитил сам
+            # (например, шаги координатора в общей сессии)
+            if session.in_transaction():
+                await session.commit()
+            return result
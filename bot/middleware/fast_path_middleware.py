@@ -0,0 +1,148 @@
+"""
+Middleware быстрой маршрутизации апдейтов.
+
+Обычное текстовое сообщение в группе раньше проходило все ~30 роутеров
+из bot/handlers/__init__.py (у каждого свои фильтры) и только в конце
+попадало в group_message_coordinator_router. Синхронные фильтры
+(State, F.*) aiogram выполняет через asyncio.to_thread, так что обход —
+это десятки переходов в пул потоков на каждое сообщение
+(замер: scripts/bench_dispatch.py).
+
+Перед диспетчеризацией апдейт классифицируется по типу апдейта, типу
+чата, команде, служебному сообщению и FSM-состоянию:
+1. Обычное сообщение в группе без команды и без FSM-состояния —
+   сразу в роутер координатора
+2. Всё остальное (команды, служебные сообщения, callback, ЛС,
+   ввод в FSM-состоянии) — полный обход роутеров, как раньше
+
+Регистрируется ПОСЛЕДНИМ из dp.update.middleware, чтобы сессия БД,
+автосинхронизация групп и логирование отработали до маршрутизации.
+
+ВАЖНО: новый хендлер обычных сообщений в группах (без команды и без
+состояния) нужно добавлять в координатор, иначе быстрый путь его обойдёт.
+"""
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware, Router
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.enums import ChatType, ContentType
+from aiogram.types import Update
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# КЛАССЫ АПДЕЙТОВ
+# ============================================================
+# Обычное сообщение в группе (быстрый путь)
+KIND_GROUP_MESSAGE = "group_message"
+# Команда в группе (/stat, /amute, /linkjournal ...)
+KIND_GROUP_COMMAND = "group_command"
+# Служебное сообщение (вход/выход участника, закреп и т.п.)
+KIND_GROUP_SERVICE = "group_service"
+# Сообщение в группе при активном FSM-состоянии пользователя
+KIND_GROUP_STATE = "group_state"
+# Нажатие inline-кнопки
+KIND_CALLBACK = "callback"
+# Сообщение в ЛС бота
+KIND_PRIVATE = "private"
+# Остальные апдейты (chat_member, реакции, заявки и т.п.)
+KIND_OTHER = "other"
+
+# Типы содержимого, которые отправляет пользователь (не служебные)
+USER_CONTENT_TYPES = frozenset({
+    ContentType.TEXT,
+    ContentType.ANIMATION,
+    ContentType.AUDIO,
+    ContentType.DOCUMENT,
+    ContentType.PAID_MEDIA,
+    ContentType.PHOTO,
+    ContentType.STICKER,
+    ContentType.STORY,
+    ContentType.VIDEO,
+    ContentType.VIDEO_NOTE,
+    ContentType.VOICE,
+    ContentType.CONTACT,
+    ContentType.DICE,
+    ContentType.GAME,
+    ContentType.POLL,
+    ContentType.VENUE,
+    ContentType.LOCATION,
+})
+
+_GROUP_TYPES = (ChatType.GROUP, ChatType.SUPERGROUP)
+
+
+def classify_update(update: Update, raw_state: Optional[str] = None) -> str:
+    """
+    Определяет класс апдейта для маршрутизации.
+
+    Args:
+        update: Апдейт Telegram
+        raw_state: Текущее FSM-состояние пользователя в чате (или None)
+
+    Returns:
+        Один из KIND_*
+    """
+    if update.callback_query is not None:
+        return KIND_CALLBACK
+
+    message = update.message
+    if message is None:
+        return KIND_OTHER
+    if message.chat.type not in _GROUP_TYPES:
+        return KIND_PRIVATE
+    if message.content_type not in USER_CONTENT_TYPES:
+        return KIND_GROUP_SERVICE
+
+    # Command() смотрит и в text, и в caption
+    text = message.text or message.caption or ""
+    if text.startswith("/"):
+        return KIND_GROUP_COMMAND
+    if raw_state is not None:
+        return KIND_GROUP_STATE
+    return KIND_GROUP_MESSAGE
+
+
+class FastPathMiddleware(BaseMiddleware):
+    """
+    Маршрутизация апдейтов напрямую в нужный роутер.
+
+    Args:
+        routes: Класс апдейта -> роутер, в который он отправляется
+            напрямую. Классы без роутера идут полным обходом.
+    """
+
+    def __init__(self, routes: Dict[str, Router]):
+        self._routes = routes
+        # Счётчики по классам апдейтов и быстрому пути
+        self.metrics: Dict[str, int] = {"fast_path": 0, "fallback": 0}
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        kind = classify_update(event, data.get("raw_state"))
+        self.metrics[kind] = self.metrics.get(kind, 0) + 1
+
+        router = self._routes.get(kind)
+        if router is None:
+            return await handler(event, data)
+
+        # То же, что делает Dispatcher для апдейта, но без обхода остальных роутеров
+        result = await router.propagate_event(
+            update_type=event.event_type,
+            event=event.event,
+            event_update=event,
+            **data,
+        )
+        if result is not UNHANDLED:
+            self.metrics["fast_path"] += 1
+            return result
+
+        # Фильтры роутера не подошли — обычный обход
+        self.metrics["fallback"] += 1
+        return await handler(event, data)
@@ -2,9 +2,11 @@
 Middleware для автоматической синхронизации групп.
 
 При получении любого сообщения/события из группы:
-1. Проверяет, есть ли группа в БД
-2. Если нет - автоматически создаёт и синхронизирует админов
-3. Использует кэш чтобы не синхронизировать слишком часто
+1. Проверяет кэш известных групп (память процесса → маркер в Redis)
+2. Группа недавно синхронизирована — сразу передаёт управление хендлеру,
+   без сессии БД
+3. Истёк TTL или сменилось название — синхронизация в фоне
+4. Группа не встречалась — создаёт её и синхронизирует админов до хендлера
 """
 import logging
 from typing import Any, Awaitable, Callable, Dict
@@ -14,7 +16,13 @@ from aiogram.types import Update, Message, CallbackQuery, ChatMemberUpdated
 from aiogram.enums import ChatType
 
 from bot.database.session import get_session
-from bot.services.group_auto_sync import ensure_group_exists
+from bot.services.group_auto_sync import (
+    SYNC_STALE,
+    SYNC_UNKNOWN,
+    ensure_group_exists,
+    get_sync_state,
+    schedule_group_sync,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -51,8 +59,14 @@ class GroupAutoSyncMiddleware(BaseMiddleware):
         # Синхронизируем только группы
         if chat and chat.type in (ChatType.GROUP, ChatType.SUPERGROUP) and bot:
             try:
-                async with get_session() as session:
-                    await ensure_group_exists(session, chat, bot)
+                state = await get_sync_state(chat)
+                if state == SYNC_UNKNOWN:
+                    # Возможно, новая группа — хендлерам нужна запись в БД
+                    async with get_session() as session:
+                        await ensure_group_exists(session, chat, bot)
+                elif state == SYNC_STALE:
+                    # Группа уже в БД — обновляем без задержки апдейта
+                    schedule_group_sync(chat, bot)
             except Exception as e:
                 # Не блокируем обработку при ошибке синхронизации
                 logger.warning(f"⚠️ [AUTO_SYNC] Ошибка синхронизации группы {chat.id}: {e}")
@@ -0,0 +1,341 @@
+# ============================================================
+# ADMIN STATUS CACHE - КЭШ СТАТУСА АДМИНИСТРАТОРА В ГРУППАХ
+# ============================================================
+# Отвечает на вопрос "является ли user_id админом chat_id"
+# без запроса к Bot API на каждое сообщение.
+#
+# Раньше координатор, антиспам, статистика и мут по реакциям
+# делали bot.get_chat_member на КАЖДОЕ сообщение, чтобы узнать,
+# что обычный участник не админ.
+#
+# Теперь:
+# - список админов чата берётся ОДНИМ get_chat_administrators
+# - хранится в памяти процесса (TTL) и в Redis (второй уровень)
+# - сбрасывается апдейтами chat_member / my_chat_member
+#   (AdminCacheMiddleware) и обновляется при синхронизации админов
+#
+# Вместе со списком хранятся права каждого админа (AdminRights),
+# поэтому меню настроек в личке и проверки гранулярных прав
+# тоже обходятся без get_chat_member.
+#
+# Если get_chat_administrators недоступен — запасной путь
+# через get_chat_member (без кэширования).
+# ============================================================
+
+# Импортируем asyncio для блокировок на чат
+import asyncio
+# Импортируем json для хранения списка в Redis
+import json
+# Импортируем логгер
+import logging
+# Импортируем time для TTL в памяти
+import time
+# Импортируем типы для аннотаций
+from typing import Dict, FrozenSet, Iterable, NamedTuple, Optional, Tuple
+
+# Импортируем Redis для второго уровня кэша
+from redis.asyncio import Redis
+# Импортируем исключение FloodWait
+from aiogram.exceptions import TelegramRetryAfter
+
+# Импортируем глобальный клиент Redis
+from bot.services.redis_conn import redis
+
+# Создаём логгер
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# КОНСТАНТЫ
+# ============================================================
+
+# Статусы, которые считаются администраторскими
+ADMIN_STATUSES = ('creator', 'administrator')
+
+# TTL списка админов в памяти процесса (секунды)
+MEMORY_TTL = 300
+
+# TTL списка админов в Redis (секунды)
+REDIS_TTL = 600
+
+# Ключ Redis: admin_rights:{chat_id} → JSON {user_id: [status, [права], is_anonymous]}
+REDIS_KEY = "admin_rights:{chat_id}"
+
+# Флаги прав администратора, которые сохраняются в кэше
+RIGHTS_ATTRIBUTES = (
+    'can_manage_chat',
+    'can_change_info',
+    'can_delete_messages',
+    'can_restrict_members',
+    'can_invite_users',
+    'can_pin_messages',
+    'can_promote_members',
+    'can_post_messages',
+)
+
+
+# ============================================================
+# ПРАВА АДМИНИСТРАТОРА
+# ============================================================
+
+class AdminRights(NamedTuple):
+    """
+    Права одного администратора чата.
+
+    Attributes:
+        status: 'creator' или 'administrator'
+        permissions: Выданные флаги can_* (из RIGHTS_ATTRIBUTES)
+        is_anonymous: Админ пишет от имени группы
+    """
+    status: str
+    permissions: FrozenSet[str] = frozenset()
+    is_anonymous: bool = False
+
+    @classmethod
+    def from_member(cls, member) -> "AdminRights":
+        """Создаёт из ChatMemberOwner / ChatMemberAdministrator."""
+        return cls(
+            status=getattr(member, 'status', 'administrator'),
+            permissions=frozenset(
+                attr for attr in RIGHTS_ATTRIBUTES if getattr(member, attr, False) is True
+            ),
+            is_anonymous=getattr(member, 'is_anonymous', False) is True,
+        )
+
+    def has(self, attr: str) -> bool:
+        """Есть ли право (у создателя есть все права)."""
+        return self.status == 'creator' or attr in self.permissions
+
+
+# chat_id → {user_id: права}
+AdminRightsMap = Dict[int, AdminRights]
+
+
+# ============================================================
+# КЭШ
+# ============================================================
+
+class AdminStatusCache:
+    """
+    Двухуровневый кэш админов групп (память + Redis).
+
+    Пример использования:
+        cache = get_admin_status_cache()
+        if await cache.is_admin(bot, chat_id, user_id):
+            return
+    """
+
+    def __init__(
+        self,
+        redis: Optional[Redis] = None,
+        ttl: int = MEMORY_TTL,
+        redis_ttl: int = REDIS_TTL
+    ):
+        """
+        Args:
+            redis: Клиент Redis (None = только память процесса)
+            ttl: TTL в памяти (секунды)
+            redis_ttl: TTL в Redis (секунды)
+        """
+        self._redis = redis
+        self._ttl = ttl
+        self._redis_ttl = redis_ttl
+
+        # chat_id → (время истечения, права админов)
+        self._chats: Dict[int, Tuple[float, AdminRightsMap]] = {}
+        # Блокировки на чат: один get_chat_administrators на чат за раз
+        self._locks: Dict[int, asyncio.Lock] = {}
+        # Поколение чата: сброс во время загрузки не даёт записать старый список
+        self._generations: Dict[int, int] = {}
+
+    # ─────────────────────────────────────────────────────────
+    # ПРОВЕРКА СТАТУСА
+    # ─────────────────────────────────────────────────────────
+
+    async def is_admin(self, bot, chat_id: int, user_id: int) -> bool:
+        """
+        Проверяет является ли пользователь администратором чата.
+
+        Ошибки запасного get_chat_member пробрасываются вызывающему
+        (у каждого модуля своя политика на случай ошибки API).
+
+        Args:
+            bot: Экземпляр бота
+            chat_id: ID чата
+            user_id: ID пользователя
+
+        Returns:
+            True если creator или administrator
+        """
+        admin_ids = await self.get_admin_ids(bot, chat_id)
+        if admin_ids is not None:
+            return user_id in admin_ids
+
+        # Список админов недоступен — проверяем одного пользователя
+        member = await bot.get_chat_member(chat_id, user_id)
+        return getattr(member, 'status', None) in ADMIN_STATUSES
+
+    async def get_admin_ids(self, bot, chat_id: int) -> Optional[FrozenSet[int]]:
+        """
+        Возвращает ID админов чата (память → Redis → Bot API).
+
+        Returns:
+            frozenset ID админов или None если список получить не удалось
+        """
+        rights = await self.get_admin_rights(bot, chat_id)
+        if rights is None:
+            return None
+        return frozenset(rights)
+
+    async def get_admin_rights(
+        self, bot, chat_id: int, raise_retry_after: bool = False
+    ) -> Optional[AdminRightsMap]:
+        """
+        Возвращает права админов чата (память → Redis → Bot API).
+
+        Args:
+            bot: Экземпляр бота
+            chat_id: ID чата
+            raise_retry_after: Пробрасывать TelegramRetryAfter (FloodWait)
+                вызывающему, чтобы он мог подождать и повторить
+
+        Returns:
+            {user_id: AdminRights} или None если список получить не удалось
+        """
+        cached = self._get_from_memory(chat_id)
+        if cached is not None:
+            return cached
+
+        lock = self._locks.setdefault(chat_id, asyncio.Lock())
+        async with lock:
+            # Пока ждали блокировку, список мог загрузить другой запрос
+            cached = self._get_from_memory(chat_id)
+            if cached is not None:
+                return cached
+
+            generation = self._generations.get(chat_id, 0)
+
+            cached = await self._get_from_redis(chat_id)
+            if cached is not None:
+                if self._generations.get(chat_id, 0) == generation:
+                    self._set_memory(chat_id, cached)
+                return cached
+
+            try:
+                admins = await bot.get_chat_administrators(chat_id)
+            except Exception as e:
+                if raise_retry_after and isinstance(e, TelegramRetryAfter):
+                    raise
+                logger.debug(f"[AdminCache] get_chat_administrators недоступен для {chat_id}: {e}")
+                return None
+
+            # Защита от неожиданного ответа (например, в тестовых заглушках)
+            if not isinstance(admins, (list, tuple)):
+                return None
+
+            rights = self._rights_from_members(admins)
+            if self._generations.get(chat_id, 0) == generation:
+                await self._store(chat_id, rights)
+            return rights
+
+    # ─────────────────────────────────────────────────────────
+    # ЗАПОЛНЕНИЕ И ИНВАЛИДАЦИЯ
+    # ─────────────────────────────────────────────────────────
+
+    async def store_admins(self, chat_id: int, admins: Iterable) -> None:
+        """
+        Сохраняет уже полученный список админов (ChatMember объекты).
+        Вызывается там, где get_chat_administrators уже был сделан.
+        """
+        await self._store(chat_id, self._rights_from_members(admins))
+
+    async def invalidate(self, chat_id: int) -> None:
+        """Сбрасывает список админов чата в памяти и в Redis."""
+        self._chats.pop(chat_id, None)
+        self._generations[chat_id] = self._generations.get(chat_id, 0) + 1
+
+        if self._redis is not None:
+            try:
+                await self._redis.delete(REDIS_KEY.format(chat_id=chat_id))
+            except Exception as e:
+                logger.warning(f"[AdminCache] Ошибка удаления из Redis для {chat_id}: {e}")
+
+        logger.debug(f"[AdminCache] Сброшен кэш админов чата {chat_id}")
+
+    def clear(self) -> None:
+        """Очищает кэш в памяти процесса."""
+        self._chats.clear()
+        self._locks.clear()
+        self._generations.clear()
+
+    # ─────────────────────────────────────────────────────────
+    # ВНУТРЕННИЕ МЕТОДЫ
+    # ─────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _rights_from_members(admins: Iterable) -> AdminRightsMap:
+        return {admin.user.id: AdminRights.from_member(admin) for admin in admins}
+
+    def _get_from_memory(self, chat_id: int) -> Optional[AdminRightsMap]:
+        entry = self._chats.get(chat_id)
+        if entry is None:
+            return None
+        expires_at, rights = entry
+        if expires_at < time.monotonic():
+            self._chats.pop(chat_id, None)
+            return None
+        return rights
+
+    def _set_memory(self, chat_id: int, rights: AdminRightsMap) -> None:
+        self._chats[chat_id] = (time.monotonic() + self._ttl, rights)
+
+    async def _get_from_redis(self, chat_id: int) -> Optional[AdminRightsMap]:
+        if self._redis is None:
+            return None
+        try:
+            raw = await self._redis.get(REDIS_KEY.format(chat_id=chat_id))
+        except Exception as e:
+            logger.warning(f"[AdminCache] Ошибка чтения из Redis для {chat_id}: {e}")
+            return None
+        if raw is None:
+            return None
+        return {
+            int(user_id): AdminRights(status, frozenset(permissions), bool(is_anonymous))
+            for user_id, (status, permissions, is_anonymous) in json.loads(raw).items()
+        }
+
+    async def _store(self, chat_id: int, rights: AdminRightsMap) -> None:
+        self._set_memory(chat_id, rights)
+        if self._redis is not None:
+            payload = {
+                str(user_id): [r.status, sorted(r.permissions), r.is_anonymous]
+                for user_id, r in rights.items()
+            }
+            try:
+                await self._redis.setex(
+                    REDIS_KEY.format(chat_id=chat_id),
+                    self._redis_ttl,
+                    json.dumps(payload)
+                )
+            except Exception as e:
+                logger.warning(f"[AdminCache] Ошибка записи в Redis для {chat_id}: {e}")
+
+
+# ============================================================
+# ГЛОБАЛЬНЫЙ ЭКЗЕМПЛЯР
+# ============================================================
+
+_admin_status_cache: Optional[AdminStatusCache] = None
+
+
+def get_admin_status_cache() -> AdminStatusCache:
+    """
+    Возвращает глобальный экземпляр кэша админов.
+
+    Returns:
+        Экземпляр AdminStatusCache
+    """
+    global _admin_status_cache
+    if _admin_status_cache is None:
+        _admin_status_cache = AdminStatusCache(redis=redis)
+    return _admin_status_cache
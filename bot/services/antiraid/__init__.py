@@ -133,6 +133,16 @@ from bot.services.antiraid.mass_reaction_tracker import (
     create_mass_reaction_tracker,
 )
 
+# Экспортируем очередь массовых действий при рейде
+from bot.services.antiraid.raid_executor import (
+    # Действие для очереди (dataclass)
+    RaidAction,
+    # Класс исполнителя
+    RaidActionExecutor,
+    # Глобальный экземпляр
+    get_raid_executor,
+)
+
 # Список публичных экспортов модуля
 __all__ = [
     # ─────────────────────────────────────────────────────────
@@ -218,4 +228,10 @@ __all__ = [
     'MassReactionTracker',
     'check_mass_reaction',
     'create_mass_reaction_tracker',
+    # ─────────────────────────────────────────────────────────
+    # Очередь массовых действий (raid_executor)
+    # ─────────────────────────────────────────────────────────
+    'RaidAction',
+    'RaidActionExecutor',
+    'get_raid_executor',
 ]
@@ -10,8 +10,11 @@
 2. Считаем количество событий в окне времени
 3. Если превышен порог — применяем действие (бан/кик/мут)
 
+Шаги 1-2 выполняются одним Lua-скриптом (см. sliding_window).
+
 Redis ключи:
-- ar:je:{chat_id}:{user_id}:events — List timestamps событий
+- ar:je:{chat_id}:{user_id}:window — Sorted Set событий
+  (member="type:timestamp", score=timestamp)
 """
 
 # Импортируем логгер для записи событий
@@ -29,6 +32,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 # Импортируем сервис настроек
 from bot.services.antiraid.settings_service import get_antiraid_settings
+# Импортируем общее скользящее окно (Lua)
+from bot.services.antiraid.sliding_window import record_window_event
 
 
 # Создаём логгер для этого модуля
@@ -108,7 +113,9 @@ class JoinExitTracker:
         Returns:
             Ключ Redis
         """
-        return f"{self.REDIS_PREFIX}:{chat_id}:{user_id}:events"
+        # Sorted Set; прежний ключ ":events" был List — новое имя
+        # исключает WRONGTYPE на ключах, оставшихся от старой версии
+        return f"{self.REDIS_PREFIX}:{chat_id}:{user_id}:window"
 
     async def record_event(
         self,
@@ -129,58 +136,21 @@ class JoinExitTracker:
         Returns:
             Текущее количество событий в окне
         """
-        # Ключ Redis
-        events_key = self._get_events_key(chat_id, user_id)
-
-        # Текущий timestamp
-        now = time.time()
-
         try:
-            # ─────────────────────────────────────────────────────────
-            # ШАГ 1: Добавляем timestamp события
-            # ─────────────────────────────────────────────────────────
-            # Формат: "type:timestamp" (например "join:1705498800.123")
-            event_data = f"{event_type}:{now}"
-            await self._redis.rpush(events_key, event_data)
-
-            # ─────────────────────────────────────────────────────────
-            # ШАГ 2: Устанавливаем/обновляем TTL
-            # ─────────────────────────────────────────────────────────
+            # Добавление, удаление старых событий, TTL и подсчёт —
+            # один атомарный скрипт вместо чтения и перезаписи списка.
+            # Формат member: "type:timestamp" (например "join:1705498800.123")
             # TTL = window_seconds + небольшой запас
-            await self._redis.expire(events_key, window_seconds + 10)
-
-            # ─────────────────────────────────────────────────────────
-            # ШАГ 3: Удаляем старые события за пределами окна
-            # ─────────────────────────────────────────────────────────
-            # Получаем все события
-            all_events = await self._redis.lrange(events_key, 0, -1)
-
-            # Фильтруем события в пределах окна
-            cutoff = now - window_seconds
-            valid_events = []
-
-            for event in all_events:
-                # Парсим timestamp
-                try:
-                    _, ts_str = event.rsplit(":", 1)
-                    ts = float(ts_str)
-                    if ts >= cutoff:
-                        valid_events.append(event)
-                except (ValueError, IndexError):
-                    # Пропускаем невалидные записи
-                    pass
-
-            # Если есть старые события — перезаписываем список
-            if len(valid_events) < len(all_events):
-                # Удаляем старый список
-                await self._redis.delete(events_key)
-                # Записываем только валидные события
-                if valid_events:
-                    await self._redis.rpush(events_key, *valid_events)
-                    await self._redis.expire(events_key, window_seconds + 10)
+            hit = await record_window_event(
+                self._redis,
+                key=self._get_events_key(chat_id, user_id),
+                member=f"{event_type}:{time.time()}",
+                window_seconds=window_seconds,
+                ttl_padding=10
+            )
 
             # Возвращаем текущее количество событий
-            return len(valid_events)
+            return hit.count
 
         except Exception as e:
             # Логируем ошибку Redis
@@ -267,21 +237,8 @@ class JoinExitTracker:
         cutoff = now - window_seconds
 
         try:
-            # Получаем все события
-            all_events = await self._redis.lrange(events_key, 0, -1)
-
             # Считаем события в пределах окна
-            count = 0
-            for event in all_events:
-                try:
-                    _, ts_str = event.rsplit(":", 1)
-                    ts = float(ts_str)
-                    if ts >= cutoff:
-                        count += 1
-                except (ValueError, IndexError):
-                    pass
-
-            return count
+            return await self._redis.zcount(events_key, cutoff, "+inf")
 
         except Exception as e:
             logger.error(f"[JoinExitTracker] Ошибка получения count: {e}")
@@ -30,6 +30,8 @@ from redis.asyncio import Redis
 
 # Импортируем функцию получения настроек
 from bot.services.antiraid.settings_service import get_antiraid_settings
+# Импортируем общее скользящее окно (Lua)
+from bot.services.antiraid.sliding_window import record_window_event
 
 
 # Создаём логгер для этого модуля
@@ -113,11 +115,11 @@ class MassInviteTracker:
         """
         Записывает инвайт и проверяет на злоупотребление.
 
-        Атомарно выполняет:
-        1. Удаление старых записей (за пределами окна)
-        2. Добавление нового timestamp с invited_user_id как уникальным ID
-        3. Подсчёт записей в окне
-        4. Установка TTL для автоочистки
+        Атомарно (одним Lua-скриптом) выполняет:
+        1. Добавление нового timestamp с invited_user_id как уникальным ID
+        2. Удаление старых записей (за пределами окна)
+        3. Установка TTL для автоочистки
+        4. Подсчёт записей в окне
 
         Args:
             chat_id: ID чата
@@ -127,39 +129,19 @@ class MassInviteTracker:
         Returns:
             MassInviteCheckResult с результатом проверки
         """
-        # Текущий timestamp
-        now = time.time()
-        # Граница окна (удаляем старее этого)
-        window_start = now - self._window_seconds
-
-        # Ключ для этого инвайтера в этой группе
-        key = self._get_key(chat_id, inviter_id)
-
-        # Используем pipeline для атомарности
-        pipe = self._redis.pipeline()
-
-        # 1. Удаляем старые записи (score < window_start)
-        pipe.zremrangebyscore(key, '-inf', window_start)
-
-        # 2. Добавляем новый timestamp
         # Используем invited_user_id как member, timestamp как score
         # Это гарантирует уникальность (один инвайт на юзера)
-        pipe.zadd(key, {str(invited_user_id): now})
-
-        # 3. Считаем количество записей в окне
-        pipe.zcount(key, window_start, '+inf')
-
-        # 4. Устанавливаем TTL для автоочистки (окно + буфер)
-        pipe.expire(key, self._window_seconds + 60)
-
-        # Выполняем pipeline
-        results = await pipe.execute()
-
-        # Извлекаем количество инвайтов
-        invite_count = results[2]  # Результат zcount
+        hit = await record_window_event(
+            self._redis,
+            key=self._get_key(chat_id, inviter_id),
+            member=str(invited_user_id),
+            window_seconds=self._window_seconds,
+            threshold=self._threshold
+        )
 
-        # Проверяем превышение порога
-        is_abuse = invite_count >= self._threshold
+        # Количество инвайтов и превышение порога
+        invite_count = hit.count
+        is_abuse = hit.triggered
 
         if is_abuse:
             logger.warning(
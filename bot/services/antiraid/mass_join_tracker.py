@@ -11,7 +11,7 @@ v2 ИЗМЕНЕНИЯ:
 - Protection mode имеет TTL (protection_duration из настроек)
 - После истечения TTL защита снимается автоматически
 
-Алгоритм v2:
+Алгоритм v2 (одним Lua-скриптом, см. sliding_window):
 1. Проверяем активен ли protection mode
 2. Если ДА → текущий юзер должен быть забанен (is_protection_mode=True)
 3. Записываем вступление в Sorted Set (score=timestamp)
@@ -20,6 +20,9 @@ v2 ИЗМЕНЕНИЯ:
    - Включаем protection mode с TTL=protection_duration
    - Банятся все кто в Sorted Set + текущий юзер
 
+Шаги 1-5 атомарны: при параллельных вступлениях рейд
+обнаруживается ровно один раз.
+
 Redis ключи:
 - ar:mj:{chat_id}:joins — Sorted Set (member=user_id, score=timestamp)
 - ar:mj:{chat_id}:protection — Flag с TTL что protection mode активен
@@ -40,6 +43,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 # Импортируем сервис настроек
 from bot.services.antiraid.settings_service import get_antiraid_settings
+# Импортируем общее скользящее окно (Lua)
+from bot.services.antiraid.sliding_window import record_window_event, WindowHit
 
 
 # Создаём логгер для этого модуля
@@ -353,33 +358,16 @@ class MassJoinTracker:
         Returns:
             Текущее количество вступлений в окне
         """
-        joins_key = self._get_joins_key(chat_id)
-        now = time.time()
-
         try:
-            # ─────────────────────────────────────────────────────────
-            # ШАГ 1: Добавляем вступление в Sorted Set
-            # member = user_id, score = timestamp
-            # ─────────────────────────────────────────────────────────
-            await self._redis.zadd(joins_key, {str(user_id): now})
-
-            # ─────────────────────────────────────────────────────────
-            # ШАГ 2: Удаляем старые записи (за пределами окна)
-            # ─────────────────────────────────────────────────────────
-            cutoff = now - window_seconds
-            await self._redis.zremrangebyscore(joins_key, "-inf", cutoff)
-
-            # ─────────────────────────────────────────────────────────
-            # ШАГ 3: Устанавливаем TTL на ключ
-            # ─────────────────────────────────────────────────────────
-            await self._redis.expire(joins_key, window_seconds + 60)
-
-            # ─────────────────────────────────────────────────────────
-            # ШАГ 4: Считаем количество в окне
-            # ─────────────────────────────────────────────────────────
-            count = await self._redis.zcount(joins_key, cutoff, "+inf")
-
-            return count
+            # member = user_id, score = timestamp; старые записи удаляются,
+            # TTL обновляется и count считается в том же скрипте
+            hit = await record_window_event(
+                self._redis,
+                key=self._get_joins_key(chat_id),
+                member=str(user_id),
+                window_seconds=window_seconds
+            )
+            return hit.count
 
         except Exception as e:
             logger.error(
@@ -442,7 +430,7 @@ class MassJoinTracker:
 
         Это ГЛАВНАЯ функция для использования.
 
-        ЛОГИКА v2:
+        ЛОГИКА v2 (атомарно, один round trip):
         1. Проверяем активен ли protection mode
         2. Если ДА → is_protection_mode=True (нужно банить юзера)
         3. Записываем вступление
@@ -462,42 +450,53 @@ class MassJoinTracker:
             MassJoinCheckResult с результатом проверки
         """
         # ─────────────────────────────────────────────────────────
-        # ШАГ 1: Проверяем активен ли protection mode
-        # ─────────────────────────────────────────────────────────
-        protection_was_active = await self.is_protection_active(chat_id)
-        protection_ttl = await self.get_protection_ttl(chat_id) if protection_was_active else 0
-
-        # ─────────────────────────────────────────────────────────
-        # ШАГ 2: Записываем вступление и получаем count
-        # ─────────────────────────────────────────────────────────
-        join_count = await self.record_join(
-            chat_id=chat_id,
-            user_id=user_id,
-            window_seconds=window_seconds
-        )
-
-        # ─────────────────────────────────────────────────────────
-        # ШАГ 3: Определяем is_raid_detected
+        # ШАГИ 1-4: Protection mode, запись вступления, порог и
+        # включение защиты — одним Lua-скриптом.
         # Рейд обнаружен ТОЛЬКО если:
         # - count >= threshold
         # - protection НЕ был активен до этого
+        # Скрипт атомарен, поэтому из параллельных вступлений
+        # рейд "обнаруживает" ровно одно.
         # ─────────────────────────────────────────────────────────
-        is_raid_detected = join_count >= threshold and not protection_was_active
+        try:
+            hit = await record_window_event(
+                self._redis,
+                key=self._get_joins_key(chat_id),
+                member=str(user_id),
+                window_seconds=window_seconds,
+                threshold=threshold,
+                protection_key=self._get_protection_key(chat_id),
+                protection_duration=protection_duration,
+                members_limit=100
+            )
+        except Exception as e:
+            # При ошибке Redis — считаем что рейда нет
+            # (безопаснее не банить чем банить по ошибке)
+            logger.error(
+                f"[MassJoinTracker] Ошибка записи вступления: {e}, "
+                f"chat_id={chat_id}, user_id={user_id}"
+            )
+            hit = WindowHit(count=0)
 
-        # ─────────────────────────────────────────────────────────
-        # ШАГ 4: Если рейд обнаружен — активируем protection
-        # ─────────────────────────────────────────────────────────
+        protection_was_active = hit.protection_active
+        protection_ttl = hit.protection_ttl
+        join_count = hit.count
+        is_raid_detected = hit.triggered
+
+        # Список всех юзеров для бана (скрипт вернул его при обнаружении)
         recent_user_ids: List[int] = []
 
         if is_raid_detected:
-            # Активируем protection mode
-            await self.activate_protection(chat_id, protection_duration)
+            for member in hit.members:
+                try:
+                    recent_user_ids.append(int(member))
+                except ValueError:
+                    pass
 
-            # Получаем список всех юзеров для бана
-            recent_user_ids = await self.get_recent_user_ids(
-                chat_id, window_seconds, limit=100
+            logger.warning(
+                f"[MassJoinTracker] 🛡️ PROTECTION MODE АКТИВИРОВАН: "
+                f"chat_id={chat_id}, duration={protection_duration}s"
             )
-
             logger.warning(
                 f"[MassJoinTracker] 🚨 РЕЙД ОБНАРУЖЕН! "
                 f"chat_id={chat_id}, "
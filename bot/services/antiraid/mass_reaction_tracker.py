@@ -36,6 +36,8 @@ from redis.asyncio import Redis
 
 # Импортируем функцию получения настроек
 from bot.services.antiraid.settings_service import get_antiraid_settings
+# Импортируем общее скользящее окно (Lua)
+from bot.services.antiraid.sliding_window import record_window_event, WindowHit
 
 
 # Создаём логгер для этого модуля
@@ -124,60 +126,65 @@ class MassReactionTracker:
         """
         return f"{self.REDIS_PREFIX}:{chat_id}:{user_id}"
 
-    async def record_reaction(
+    async def _record_hit(
         self,
         chat_id: int,
         user_id: int,
-        message_id: int
-    ) -> int:
+        message_id: int,
+        members_limit: int = 0
+    ) -> WindowHit:
         """
-        Записывает реакцию пользователя и возвращает количество разных сообщений.
+        Записывает реакцию в окно юзера одним Lua-скриптом.
+
+        member = message_id, score = timestamp.
+        Если юзер ставит несколько реакций на одно сообщение —
+        записывается только последний timestamp (zadd обновляет score),
+        поэтому count — количество УНИКАЛЬНЫХ message_id в окне.
 
         Args:
             chat_id: ID чата
             user_id: ID пользователя
             message_id: ID сообщения на которое поставлена реакция
+            members_limit: Сколько message_id вернуть при срабатывании
 
         Returns:
-            Количество РАЗНЫХ сообщений с реакциями за окно
+            WindowHit (count=0 при ошибке Redis)
         """
-        now = time.time()
-        cutoff = now - self._window_seconds
-        key = self._get_user_key(chat_id, user_id)
-
         try:
-            # ─────────────────────────────────────────────────────────
-            # ШАГ 1: Добавляем message_id в Sorted Set
-            # member = message_id, score = timestamp
-            # Если юзер ставит несколько реакций на одно сообщение —
-            # записывается только последний timestamp (zadd обновляет score)
-            # ─────────────────────────────────────────────────────────
-            await self._redis.zadd(key, {str(message_id): now})
-
-            # ─────────────────────────────────────────────────────────
-            # ШАГ 2: Удаляем старые записи (за пределами окна)
-            # ─────────────────────────────────────────────────────────
-            await self._redis.zremrangebyscore(key, "-inf", cutoff)
-
-            # ─────────────────────────────────────────────────────────
-            # ШАГ 3: Устанавливаем TTL на ключ (автоочистка)
-            # ─────────────────────────────────────────────────────────
-            await self._redis.expire(key, self._window_seconds + 60)
-
-            # ─────────────────────────────────────────────────────────
-            # ШАГ 4: Считаем количество УНИКАЛЬНЫХ message_id в окне
-            # zcount возвращает количество элементов в диапазоне score
-            # ─────────────────────────────────────────────────────────
-            count = await self._redis.zcount(key, cutoff, "+inf")
-
-            return count
-
+            return await record_window_event(
+                self._redis,
+                key=self._get_user_key(chat_id, user_id),
+                member=str(message_id),
+                window_seconds=self._window_seconds,
+                threshold=self._threshold,
+                members_limit=members_limit
+            )
         except Exception as e:
             logger.error(
                 f"[MassReactionTracker] Ошибка записи реакции: {e}, "
                 f"chat_id={chat_id}, user_id={user_id}, message_id={message_id}"
             )
-            return 0
+            return WindowHit(count=0)
+
+    async def record_reaction(
+        self,
+        chat_id: int,
+        user_id: int,
+        message_id: int
+    ) -> int:
+        """
+        Записывает реакцию пользователя и возвращает количество разных сообщений.
+
+        Args:
+            chat_id: ID чата
+            user_id: ID пользователя
+            message_id: ID сообщения на которое поставлена реакция
+
+        Returns:
+            Количество РАЗНЫХ сообщений с реакциями за окно
+        """
+        hit = await self._record_hit(chat_id, user_id, message_id)
+        return hit.count
 
     async def get_recent_message_ids(
         self,
@@ -240,23 +247,21 @@ class MassReactionTracker:
             MassReactionCheckResult с результатом проверки
         """
         # ─────────────────────────────────────────────────────────
-        # Записываем реакцию и получаем количество разных сообщений
+        # Записываем реакцию, считаем разные сообщения и проверяем
+        # порог за один round trip. При срабатывании скрипт сразу
+        # возвращает список message_id для логов.
         # ─────────────────────────────────────────────────────────
-        unique_count = await self.record_reaction(
-            chat_id=chat_id,
-            user_id=user_id,
-            message_id=message_id
-        )
-
-        # ─────────────────────────────────────────────────────────
-        # Проверяем превышение порога
-        # ─────────────────────────────────────────────────────────
-        is_abuse = unique_count >= self._threshold
+        hit = await self._record_hit(chat_id, user_id, message_id, members_limit=20)
+        unique_count = hit.count
+        is_abuse = hit.triggered
 
-        # Если обнаружено злоупотребление — получаем список message_id для логов
         message_ids: List[int] = []
         if is_abuse:
-            message_ids = await self.get_recent_message_ids(chat_id, user_id)
+            for member in hit.members:
+                try:
+                    message_ids.append(int(member))
+                except ValueError:
+                    pass
 
             logger.warning(
                 f"[MassReactionTracker] 🚨 MASS REACTION ABUSE DETECTED! "
@@ -0,0 +1,459 @@
+# bot/services/antiraid/raid_executor.py
+"""
+Исполнитель массовых действий во время рейда.
+
+Раньше при рейде каждое вступление само банило своего юзера через
+ban_user, инкрементировало счётчик и редактировало сообщение в журнале.
+При 500 вступлениях в минуту это сотни запросов к API подряд
+(FloodWait) и сотни правок одного сообщения журнала.
+
+Теперь:
+- действия (бан, кик, отклонение заявки, мут) ставятся в очередь чата
+- воркер чата выполняет их через token bucket: общий лимит бота и
+  лимит на чат
+- TelegramRetryAfter обрабатывается здесь: очередь чата ставится на паузу
+  на указанное время, действие повторяется
+- при обнаружении рейда в очередь сразу ставится вся когорта из окна
+  (recent_user_ids), а не только текущий юзер
+- правки сообщения журнала объединяются: не чаще одной за
+  JOURNAL_EDIT_INTERVAL секунд, с актуальным счётчиком
+
+Пример использования:
+    executor = get_raid_executor()
+    executor.submit(bot, chat_id, [RaidAction('ban', user_id)])
+    executor.update_journal(bot, chat_id, join_count=..., ...)
+"""
+
+# Импортируем asyncio для очередей и таймеров
+import asyncio
+# Импортируем логгер для записи событий
+import logging
+# Импортируем deque для очереди действий чата
+from collections import deque
+# Импортируем dataclass для структур
+from dataclasses import dataclass, field
+# Импортируем datetime для расчёта until_date
+from datetime import datetime, timedelta
+# Импортируем типы для аннотаций
+from typing import Any, Deque, Dict, Iterable, Optional, Set, Tuple
+
+# Импортируем Bot и типы из aiogram
+from aiogram import Bot
+from aiogram.types import ChatPermissions
+# Импортируем исключения Telegram API
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+
+# Импортируем Redis клиент (для аннотаций)
+from redis.asyncio import Redis
+
+# Импортируем трекер (счётчик забаненных и ID сообщения журнала)
+from bot.services.antiraid.mass_join_tracker import MassJoinTracker
+# Импортируем token bucket (общий лимит бота и лимит на чат)
+from bot.utils.token_bucket import TokenBucket
+
+
+# Создаём логгер для этого модуля
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# КОНСТАНТЫ
+# ============================================================
+
+# Общий лимит действий бота в секунду (Bot API ~30 запросов/с)
+GLOBAL_ACTIONS_PER_SECOND = 25.0
+
+# Лимит действий в одном чате в секунду
+CHAT_ACTIONS_PER_SECOND = 5.0
+
+# Минимальный интервал между правками сообщения журнала (секунды)
+JOURNAL_EDIT_INTERVAL = 5.0
+
+# Сколько раз повторять действие после FloodWait
+MAX_FLOOD_RETRIES = 3
+
+# Через сколько секунд простоя удалять состояние чата (очередь пуста,
+# правок журнала нет). Пока рейд идёт, состояние хранит данные журнала
+STATE_IDLE_TTL = 600.0
+
+# Поддерживаемые действия
+ACTION_BAN = 'ban'
+ACTION_KICK = 'kick'
+ACTION_DECLINE = 'decline'
+ACTION_RESTRICT = 'restrict'
+
+
+# ============================================================
+# СТРУКТУРЫ
+# ============================================================
+
+@dataclass(frozen=True)
+class RaidAction:
+    """
+    Действие модерации для очереди чата.
+
+    Attributes:
+        kind: 'ban', 'kick', 'decline' или 'restrict'
+        user_id: ID пользователя
+        duration: Длительность (ban — часы, restrict — минуты; 0 = навсегда)
+    """
+    kind: str
+    user_id: int
+    duration: int = 0
+
+
+@dataclass
+class _ChatState:
+    """Очередь и состояние журнала одного чата."""
+    bot: Bot
+    bucket: TokenBucket
+    queue: Deque[Tuple[RaidAction, int]] = field(default_factory=deque)
+    # (kind, user_id) действий в очереди — для дедупликации
+    queued: Set[Tuple[str, int]] = field(default_factory=set)
+    worker: Optional[asyncio.Task] = None
+    # Последние данные для сообщения журнала о рейде
+    journal_kwargs: Optional[Dict[str, Any]] = None
+    journal_task: Optional[asyncio.Task] = None
+    last_journal_edit: float = 0.0
+    # Отложенное удаление состояния простаивающего чата
+    release_handle: Optional[asyncio.TimerHandle] = None
+
+
+# ============================================================
+# ИСПОЛНИТЕЛЬ
+# ============================================================
+
+class RaidActionExecutor:
+    """
+    Очереди действий по чатам с ограничением скорости.
+
+    Каждый чат обрабатывается своим воркером (создаётся по первому
+    действию и завершается, когда очередь пуста).
+    """
+
+    def __init__(
+        self,
+        redis: Optional[Redis] = None,
+        global_rate: float = GLOBAL_ACTIONS_PER_SECOND,
+        chat_rate: float = CHAT_ACTIONS_PER_SECOND,
+        journal_interval: float = JOURNAL_EDIT_INTERVAL,
+        idle_ttl: float = STATE_IDLE_TTL
+    ):
+        """
+        Args:
+            redis: Клиент Redis (счётчик забаненных и ID сообщения журнала)
+            global_rate: Общий лимит действий в секунду
+            chat_rate: Лимит действий в чате в секунду
+            journal_interval: Минимальный интервал правок журнала (секунды)
+            idle_ttl: Через сколько секунд простоя удалять состояние чата
+        """
+        self._redis = redis
+        self._chat_rate = chat_rate
+        self._journal_interval = journal_interval
+        self._idle_ttl = idle_ttl
+        self._global_bucket = TokenBucket(global_rate)
+        self._chats: Dict[int, _ChatState] = {}
+
+        # Статистика
+        self.metrics = {'executed': 0, 'failed': 0, 'flood_waits': 0, 'journal_edits': 0}
+
+    # ─────────────────────────────────────────────────────────
+    # Очередь действий
+    # ─────────────────────────────────────────────────────────
+
+    def submit(self, bot: Bot, chat_id: int, actions: Iterable[RaidAction]) -> int:
+        """
+        Ставит действия в очередь чата.
+
+        Действие, которое уже ждёт в очереди (тот же kind и user_id),
+        повторно не добавляется.
+
+        Args:
+            bot: Экземпляр Bot
+            chat_id: ID чата
+            actions: Действия
+
+        Returns:
+            Сколько действий добавлено
+        """
+        state = self._get_state(bot, chat_id)
+        added = 0
+        for action in actions:
+            key = (action.kind, action.user_id)
+            if key in state.queued:
+                continue
+            state.queued.add(key)
+            state.queue.append((action, 0))
+            added += 1
+
+        if added and state.worker is None:
+            state.worker = asyncio.create_task(self._run_chat(chat_id, state))
+
+        return added
+
+    def _get_state(self, bot: Bot, chat_id: int) -> _ChatState:
+        """Возвращает состояние чата, создавая его при необходимости."""
+        state = self._chats.get(chat_id)
+        if state is None:
+            state = _ChatState(bot=bot, bucket=TokenBucket(self._chat_rate))
+            self._chats[chat_id] = state
+        if state.release_handle is not None:
+            # Чат снова активен — удаление отменяется
+            state.release_handle.cancel()
+            state.release_handle = None
+        state.bot = bot
+        return state
+
+    async def _run_chat(self, chat_id: int, state: _ChatState) -> None:
+        """Воркер чата: выполняет очередь с учётом лимитов."""
+        try:
+            while state.queue:
+                action, attempt = state.queue.popleft()
+
+                await state.bucket.acquire()
+                await self._global_bucket.acquire()
+
+                retry = False
+                try:
+                    await self._perform(state.bot, chat_id, action)
+                except TelegramRetryAfter as e:
+                    # FloodWait: вся очередь чата ждёт, действие повторяется первым
+                    self.metrics['flood_waits'] += 1
+                    logger.warning(
+                        f"[RaidExecutor] FloodWait {e.retry_after}с в чате {chat_id}, "
+                        f"в очереди {len(state.queue) + 1}"
+                    )
+                    state.bucket.pause(e.retry_after)
+                    if attempt < MAX_FLOOD_RETRIES:
+                        state.queue.appendleft((action, attempt + 1))
+                        retry = True
+                        continue
+                    self.metrics['failed'] += 1
+                except TelegramAPIError as e:
+                    # Юзер уже вышел / уже забанен / нет прав — не повторяем
+                    self.metrics['failed'] += 1
+                    logger.warning(
+                        f"[RaidExecutor] Ошибка {action.kind}: user_id={action.user_id}, "
+                        f"chat_id={chat_id}, error={e}"
+                    )
+                except Exception as e:
+                    # Любая другая ошибка не должна останавливать очередь чата
+                    self.metrics['failed'] += 1
+                    logger.error(
+                        f"[RaidExecutor] Неожиданная ошибка {action.kind}: "
+                        f"user_id={action.user_id}, chat_id={chat_id}, error={e}"
+                    )
+                else:
+                    self.metrics['executed'] += 1
+                    if action.kind == ACTION_BAN:
+                        try:
+                            await self._count_ban(chat_id)
+                        except Exception as e:
+                            logger.error(f"[RaidExecutor] Ошибка счётчика забаненных: {e}")
+                        self._schedule_journal(chat_id, state)
+                finally:
+                    # Действие снова можно поставить в очередь (кроме повтора)
+                    if not retry:
+                        state.queued.discard((action.kind, action.user_id))
+        finally:
+            state.worker = None
+            self._release_if_idle(chat_id, state)
+
+    @staticmethod
+    def _is_idle(state: _ChatState) -> bool:
+        return state.worker is None and not state.queue and state.journal_task is None
+
+    def _release_if_idle(self, chat_id: int, state: _ChatState) -> None:
+        """
+        Планирует удаление состояния чата через idle_ttl, когда очередь
+        и правки журнала закончились (иначе _chats растёт без ограничений).
+        """
+        if not self._is_idle(state) or state.release_handle is not None:
+            return
+        state.release_handle = asyncio.get_running_loop().call_later(
+            self._idle_ttl, self._drop_if_idle, chat_id, state
+        )
+
+    def _drop_if_idle(self, chat_id: int, state: _ChatState) -> None:
+        state.release_handle = None
+        if self._is_idle(state) and self._chats.get(chat_id) is state:
+            del self._chats[chat_id]
+
+    async def _perform(self, bot: Bot, chat_id: int, action: RaidAction) -> None:
+        """
+        Выполняет одно действие через Bot API.
+
+        TelegramRetryAfter и TelegramAPIError пробрасываются воркеру.
+        """
+        if action.kind == ACTION_BAN:
+            until_date = (
+                datetime.now() + timedelta(hours=action.duration)
+                if action.duration > 0 else None
+            )
+            await bot.ban_chat_member(
+                chat_id=chat_id, user_id=action.user_id, until_date=until_date
+            )
+        elif action.kind == ACTION_KICK:
+            # Кик = бан + разбан (пользователь может вернуться)
+            await bot.ban_chat_member(chat_id=chat_id, user_id=action.user_id)
+            await bot.unban_chat_member(chat_id=chat_id, user_id=action.user_id)
+        elif action.kind == ACTION_DECLINE:
+            await bot.decline_chat_join_request(chat_id=chat_id, user_id=action.user_id)
+        elif action.kind == ACTION_RESTRICT:
+            until_date = (
+                datetime.now() + timedelta(minutes=action.duration)
+                if action.duration > 0 else None
+            )
+            await bot.restrict_chat_member(
+                chat_id=chat_id,
+                user_id=action.user_id,
+                permissions=ChatPermissions(
+                    can_send_messages=False,
+                    can_send_audios=False,
+                    can_send_documents=False,
+                    can_send_photos=False,
+                    can_send_videos=False,
+                    can_send_video_notes=False,
+                    can_send_voice_notes=False,
+                    can_send_polls=False,
+                    can_send_other_messages=False,
+                    can_add_web_page_previews=False,
+                ),
+                until_date=until_date
+            )
+        else:
+            raise ValueError(f"Неизвестное действие: {action.kind}")
+
+        logger.info(
+            f"[RaidExecutor] {action.kind}: user_id={action.user_id}, chat_id={chat_id}"
+        )
+
+    async def _count_ban(self, chat_id: int) -> None:
+        """Увеличивает счётчик забаненных при рейде (Redis)."""
+        if self._redis is not None:
+            await MassJoinTracker(self._redis).increment_banned_count(chat_id)
+
+    # ─────────────────────────────────────────────────────────
+    # Журнал
+    # ─────────────────────────────────────────────────────────
+
+    def update_journal(self, bot: Bot, chat_id: int, **journal_kwargs: Any) -> None:
+        """
+        Запоминает данные для сообщения журнала о рейде и планирует правку.
+
+        Правка выполняется не чаще одной за journal_interval секунд,
+        со счётчиком забаненных на момент правки.
+
+        Args:
+            bot: Экземпляр Bot
+            chat_id: ID чата
+            **journal_kwargs: Аргументы update_raid_journal кроме
+                bot, session, chat_id, journal_message_id и banned_count
+        """
+        state = self._get_state(bot, chat_id)
+        state.journal_kwargs = journal_kwargs
+        self._schedule_journal(chat_id, state)
+
+    def _schedule_journal(self, chat_id: int, state: _ChatState) -> None:
+        """Планирует правку журнала, если она ещё не запланирована."""
+        if state.journal_kwargs is None or state.journal_task is not None:
+            return
+        state.journal_task = asyncio.create_task(self._flush_journal(chat_id, state))
+
+    async def _flush_journal(self, chat_id: int, state: _ChatState) -> None:
+        """Ждёт конца интервала и правит сообщение журнала."""
+        loop = asyncio.get_running_loop()
+        try:
+            delay = state.last_journal_edit + self._journal_interval - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        finally:
+            # Изменения после этой точки запланируют следующую правку
+            state.journal_task = None
+
+        state.last_journal_edit = loop.time()
+        try:
+            await self._edit_journal(chat_id, state)
+        except Exception as e:
+            logger.error(f"[RaidExecutor] Ошибка обновления журнала рейда: {e}")
+        self._release_if_idle(chat_id, state)
+
+    async def _edit_journal(self, chat_id: int, state: _ChatState) -> None:
+        """Правит сообщение журнала о рейде актуальными данными."""
+        if self._redis is None or state.journal_kwargs is None:
+            return
+
+        tracker = MassJoinTracker(self._redis)
+        journal_message_id = await tracker.get_journal_message_id(chat_id)
+        if not journal_message_id:
+            return
+        banned_count = await tracker.get_banned_count(chat_id)
+
+        # Lazy import: сессия БД и журнал нужны только при правке
+        from bot.database.session import get_session
+        from bot.services.antiraid.journal_service import update_raid_journal
+
+        async with get_session() as session:
+            await update_raid_journal(
+                bot=state.bot,
+                session=session,
+                chat_id=chat_id,
+                journal_message_id=journal_message_id,
+                banned_count=banned_count,
+                **state.journal_kwargs
+            )
+        self.metrics['journal_edits'] += 1
+
+    # ─────────────────────────────────────────────────────────
+    # Остановка
+    # ─────────────────────────────────────────────────────────
+
+    async def stop(self) -> None:
+        """Останавливает воркеры и отложенные правки журнала."""
+        tasks = []
+        for state in self._chats.values():
+            if state.release_handle is not None:
+                state.release_handle.cancel()
+            for task in (state.worker, state.journal_task):
+                if task is not None:
+                    task.cancel()
+                    tasks.append(task)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._chats.clear()
+
+
+# ============================================================
+# ГЛОБАЛЬНЫЙ ЭКЗЕМПЛЯР (СИНГЛТОН)
+# ============================================================
+
+_raid_executor: Optional[RaidActionExecutor] = None
+
+
+def get_raid_executor() -> RaidActionExecutor:
+    """
+    Возвращает глобальный RaidActionExecutor (синглтон).
+
+    Returns:
+        Экземпляр RaidActionExecutor
+    """
+    global _raid_executor
+    if _raid_executor is None:
+        # Lazy import: общий Redis и лимиты из конфига
+        from bot.services.redis_conn import redis
+        from bot.config import RAID_GLOBAL_ACTIONS_PER_SECOND, RAID_CHAT_ACTIONS_PER_SECOND
+
+        _raid_executor = RaidActionExecutor(
+            redis=redis,
+            global_rate=RAID_GLOBAL_ACTIONS_PER_SECOND,
+            chat_rate=RAID_CHAT_ACTIONS_PER_SECOND
+        )
+    return _raid_executor
+
+
+async def stop_raid_executor() -> None:
+    """Останавливает глобальный исполнитель (вызывается при остановке бота)."""
+    global _raid_executor
+    if _raid_executor is not None:
+        await _raid_executor.stop()
+        _raid_executor = None
@@ -0,0 +1,146 @@
+# bot/services/antiraid/sliding_window.py
+"""
+Общее скользящее окно для трекеров Anti-Raid.
+
+Все трекеры (входы/выходы, массовые вступления, инвайты, реакции)
+устроены одинаково: записать событие в Sorted Set, выкинуть старые
+записи, посчитать оставшиеся и сравнить с порогом. Раньше каждый
+трекер делал это несколькими отдельными командами Redis, а рейд-детектор
+ещё и проверял/включал protection mode не атомарно — два параллельных
+вступления могли оба увидеть "защита выключена" и оба сообщить о рейде.
+
+Здесь это одна Lua-функция: событие, счётчик, состояние protection mode
+и факт срабатывания возвращаются за один round trip, а включение защиты
+происходит в том же атомарном шаге.
+
+Redis ключи задаёт вызывающий трекер:
+- окно — Sorted Set (member=ID события, score=timestamp)
+- protection (опционально) — флаг с TTL
+"""
+
+# Импортируем time для timestamps
+import time
+# Импортируем типы для аннотаций
+from typing import NamedTuple, Optional, List
+
+# Импортируем Redis клиент
+from redis.asyncio import Redis
+
+
+# ============================================================
+# LUA СКРИПТ
+# ============================================================
+
+# Запись события в окно + подсчёт + protection mode за одно обращение.
+# KEYS: window[, protection]
+# ARGV: member, now, cutoff, ttl, threshold, protection_duration, members_limit
+# Возвращает [count, protection_active, protection_ttl, triggered, members...]
+# - protection_active: защита была включена ДО этого события
+# - triggered: с protection — защита включена именно этим событием,
+#   без protection — порог достигнут (count >= threshold, как в трекерах:
+#   threshold=0 срабатывает на любом событии)
+# - members: участники окна (только при triggered и members_limit > 0)
+_WINDOW_HIT_SCRIPT = """
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+local count = redis.call('ZCARD', KEYS[1])
+local threshold = tonumber(ARGV[5])
+local reached = count >= threshold
+local active = 0
+local ttl = 0
+local triggered = 0
+if #KEYS > 1 then
+    local protection_ttl = redis.call('TTL', KEYS[2])
+    if protection_ttl ~= -2 then
+        active = 1
+        ttl = math.max(protection_ttl, 0)
+    elseif reached then
+        redis.call('SET', KEYS[2], '1', 'EX', ARGV[6])
+        triggered = 1
+    end
+elseif reached then
+    triggered = 1
+end
+local result = {count, active, ttl, triggered}
+local limit = tonumber(ARGV[7])
+if triggered == 1 and limit > 0 then
+    local members = redis.call('ZRANGE', KEYS[1], 0, limit - 1)
+    for _, member in ipairs(members) do
+        table.insert(result, member)
+    end
+end
+return result
+"""
+
+
+# ============================================================
+# РЕЗУЛЬТАТ
+# ============================================================
+
+class WindowHit(NamedTuple):
+    """
+    Результат записи события в скользящее окно.
+
+    Attributes:
+        count: Количество событий в окне (включая текущее)
+        protection_active: Protection mode был активен ДО события
+        protection_ttl: Сколько секунд осталось protection mode (если был активен)
+        triggered: Защита включена этим событием / порог достигнут (без защиты)
+        members: Участники окна от старых к новым (только при triggered)
+    """
+    count: int
+    protection_active: bool = False
+    protection_ttl: int = 0
+    triggered: bool = False
+    members: List[str] = []
+
+
+# ============================================================
+# ФУНКЦИЯ ЗАПИСИ СОБЫТИЯ
+# ============================================================
+
+async def record_window_event(
+    redis: Redis,
+    key: str,
+    member: str,
+    window_seconds: int,
+    threshold: int = 0,
+    protection_key: Optional[str] = None,
+    protection_duration: int = 0,
+    members_limit: int = 0,
+    ttl_padding: int = 60
+) -> WindowHit:
+    """
+    Атомарно записывает событие в окно и проверяет порог.
+
+    Args:
+        redis: Клиент Redis
+        key: Ключ Sorted Set окна
+        member: ID события (повторный member обновляет timestamp)
+        window_seconds: Размер окна в секундах
+        threshold: Порог срабатывания (count >= threshold; при 0 — любое событие)
+        protection_key: Ключ флага protection mode (None — без защиты)
+        protection_duration: TTL защиты при срабатывании (секунды)
+        members_limit: Сколько участников окна вернуть при срабатывании
+        ttl_padding: Запас TTL ключа окна сверх window_seconds
+
+    Returns:
+        WindowHit
+    """
+    now = time.time()
+    keys = [key] if protection_key is None else [key, protection_key]
+
+    raw = await redis.eval(
+        _WINDOW_HIT_SCRIPT, len(keys), *keys,
+        member, repr(now), repr(now - window_seconds),
+        window_seconds + ttl_padding, threshold, protection_duration, members_limit,
+    )
+
+    return WindowHit(
+        count=int(raw[0]),
+        protection_active=bool(int(raw[1])),
+        protection_ttl=int(raw[2]),
+        triggered=bool(int(raw[3])),
+        members=[m.decode() if isinstance(m, bytes) else m for m in raw[4:]]
+    )
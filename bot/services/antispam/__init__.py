@@ -9,6 +9,7 @@ from .antispam_service import (
     get_rules_for_chat,
     upsert_rule,
     get_rule_by_type,
+    get_cached_rule_by_type,
     # Функции работы с белым списком
     add_whitelist_pattern,
     remove_whitelist_pattern,
@@ -32,6 +33,7 @@ __all__ = [
     "get_rules_for_chat",
     "upsert_rule",
     "get_rule_by_type",
+    "get_cached_rule_by_type",
     "add_whitelist_pattern",
     "remove_whitelist_pattern",
     "list_whitelist_patterns",
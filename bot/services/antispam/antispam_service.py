@@ -9,7 +9,7 @@
 """
 
 # Импорт типов для аннотаций
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, TYPE_CHECKING
 # Импорт dataclass для создания класса данных
 from dataclasses import dataclass
 # Импорт регулярных выражений для поиска ссылок
@@ -36,10 +36,19 @@ from bot.database.models_antispam import (
     ActionType,
     WhitelistScope,
 )
+# Импорт кэша настроек (правила читаются на каждом сообщении)
+from bot.services.settings_cache import get_settings_cache, register_cached_model
+
+# Type checking импорты (только для аннотаций)
+if TYPE_CHECKING:
+    from bot.services.content_filter.message_analysis import MessageAnalysis
 
 # Создание логгера для этого модуля
 logger = logging.getLogger(__name__)
 
+# Изменения настроек сбрасывают кэш настроек (settings_cache)
+register_cached_model(AntiSpamRule, 'antispam_rule')
+
 
 # ============================================================
 # DATACLASS ДЛЯ РЕЗУЛЬТАТА ПРОВЕРКИ НА СПАМ
@@ -366,6 +375,36 @@ async def get_rule_by_type(
     return rule
 
 
+async def get_cached_rule_by_type(
+    # Асинхронная сессия БД
+    session: AsyncSession,
+    # ID чата
+    chat_id: int,
+    # Тип правила
+    rule_type: RuleType,
+) -> Optional[AntiSpamRule]:
+    """
+    Получить правило антиспам по типу через кэш настроек.
+
+    Используется при проверке сообщений: возвращает отсоединённую
+    копию правила (только для чтения). Кэш сбрасывается автоматически
+    после коммита изменений правил.
+
+    Args:
+        session: Асинхронная сессия БД
+        chat_id: ID чата (группы)
+        rule_type: Тип правила
+
+    Returns:
+        Правило если найдено, иначе None
+    """
+    return await get_settings_cache().get_or_load(
+        'antispam_rule', chat_id,
+        lambda: get_rule_by_type(session, chat_id, rule_type),
+        extra=rule_type
+    )
+
+
 async def upsert_rule(
     # Асинхронная сессия БД
     session: AsyncSession,
@@ -979,6 +1018,8 @@ async def check_message_for_spam(
     message: types.Message,
     # Асинхронная сессия БД
     session: AsyncSession,
+    # Общий разбор текста от координатора (ссылки уже извлечены)
+    analysis: Optional['MessageAnalysis'] = None,
 ) -> AntiSpamDecision:
     """
     Проверить сообщение на спам согласно настроенным правилам.
@@ -992,6 +1033,7 @@ async def check_message_for_spam(
     Args:
         message: Объект сообщения aiogram
         session: Асинхронная сессия БД
+        analysis: Общий разбор текста (если None — ссылки извлекаются здесь)
 
     Returns:
         AntiSpamDecision с информацией о том, является ли сообщение спамом
@@ -1043,7 +1085,7 @@ async def check_message_for_spam(
     # Если это пересылка
     if forward_source:
         # Получаем правило для этого типа пересылки
-        rule = await get_rule_by_type(session, chat_id, forward_source)
+        rule = await get_cached_rule_by_type(session, chat_id, forward_source)
         # Если правило существует и активно (не OFF)
         if rule and rule.action != ActionType.OFF:
             # Формируем строку для проверки белого списка (ID чата источника)
@@ -1111,7 +1153,7 @@ async def check_message_for_spam(
     # Если это цитата
     if quote_source:
         # Получаем правило для этого типа цитаты
-        rule = await get_rule_by_type(session, chat_id, quote_source)
+        rule = await get_cached_rule_by_type(session, chat_id, quote_source)
         # Если правило существует и активно
         if rule and rule.action != ActionType.OFF:
             # Для цитат также проверяем белый список
@@ -1221,16 +1263,20 @@ async def check_message_for_spam(
     # ШАГ 3: ПРОВЕРКА ССЫЛОК
     # ============================================================
 
-    # Получаем текст сообщения (включая caption для медиа)
-    message_text = message.text or message.caption or ""
-    # Извлекаем ссылки из текста (regex поиск)
-    links_from_text = extract_links(message_text)
-    # Извлекаем ссылки из entities (text_link и url)
-    # Это ловит скрытые ссылки типа "нажми сюда" → https://spam.com
-    links_from_entities = extract_links_from_entities(message)
-    # Объединяем ссылки и убираем дубликаты
-    # Используем dict.fromkeys для сохранения порядка
-    links = list(dict.fromkeys(links_from_text + links_from_entities))
+    if analysis is not None:
+        # Координатор уже извлёк ссылки (общий разбор сообщения)
+        links = analysis.links
+    else:
+        # Получаем текст сообщения (включая caption для медиа)
+        message_text = message.text or message.caption or ""
+        # Извлекаем ссылки из текста (regex поиск)
+        links_from_text = extract_links(message_text)
+        # Извлекаем ссылки из entities (text_link и url)
+        # Это ловит скрытые ссылки типа "нажми сюда" → https://spam.com
+        links_from_entities = extract_links_from_entities(message)
+        # Объединяем ссылки и убираем дубликаты
+        # Используем dict.fromkeys для сохранения порядка
+        links = list(dict.fromkeys(links_from_text + links_from_entities))
 
     # Если есть ссылки в сообщении
     if links:
@@ -1239,7 +1285,7 @@ async def check_message_for_spam(
             # Проверяем является ли ссылка Telegram ссылкой
             if is_telegram_link(link):
                 # Получаем правило для Telegram ссылок
-                rule = await get_rule_by_type(session, chat_id, RuleType.TELEGRAM_LINK)
+                rule = await get_cached_rule_by_type(session, chat_id, RuleType.TELEGRAM_LINK)
                 # Если правило существует и активно
                 if rule and rule.action != ActionType.OFF:
                     # Проверяем белый список для Telegram ссылок
@@ -1280,7 +1326,7 @@ async def check_message_for_spam(
 
         # Если дошли сюда - проверяем правило для любых ссылок
         # Получаем правило для любых ссылок
-        any_link_rule = await get_rule_by_type(session, chat_id, RuleType.ANY_LINK)
+        any_link_rule = await get_cached_rule_by_type(session, chat_id, RuleType.ANY_LINK)
         # Если правило существует и активно
         if any_link_rule and any_link_rule.action != ActionType.OFF:
             # Проверяем каждую ссылку по белому списку
@@ -16,6 +16,7 @@ from bot.database.session import get_session
 # TODO: Интегрировать с новым модулем логирования когда будет создан
 # from bot.utils.logger import send_formatted_log  # Пока не используется
 from bot.services.restriction_service import save_restriction
+from bot.services.mute_fanout import STATUS_FAILED, STATUS_MUTED, get_mute_fanout
 
 logger = logging.getLogger(__name__)
 
@@ -146,14 +147,56 @@ async def set_auto_mute_scammers_status(chat_id: int, enabled: bool, session: As
         return False
 
 
+async def get_auto_mute_scammers_statuses(chat_ids: list, session: AsyncSession) -> dict:
+    """
+    Статус автомута скаммеров для многих групп сразу:
+    один MGET в Redis и один SELECT для групп, которых нет в Redis.
+
+    Returns:
+        {chat_id: включен ли автомут}
+    """
+    if not chat_ids:
+        return {}
+    keys = [f"group:{chat_id}:auto_mute_scammers" for chat_id in chat_ids]
+    try:
+        values = await redis.mget(keys)
+        statuses = {
+            chat_id: value == "1"
+            for chat_id, value in zip(chat_ids, values)
+            if value is not None
+        }
+
+        missing = [chat_id for chat_id in chat_ids if chat_id not in statuses]
+        if missing:
+            result = await session.execute(
+                select(ChatSettings.chat_id, ChatSettings.auto_mute_scammers)
+                .where(ChatSettings.chat_id.in_(missing))
+            )
+            from_db = {chat_id: enabled for chat_id, enabled in result.all()}
+            pipe = redis.pipeline()
+            for chat_id in missing:
+                # По умолчанию включено
+                enabled = from_db.get(chat_id)
+                enabled = True if enabled is None else bool(enabled)
+                statuses[chat_id] = enabled
+                pipe.set(f"group:{chat_id}:auto_mute_scammers", "1" if enabled else "0")
+            await pipe.execute()
+        return statuses
+    except Exception as e:
+        logger.error(f"Ошибка при получении статусов автомута скаммеров: {e}")
+        return {chat_id: True for chat_id in chat_ids}  # По умолчанию включено
+
+
 async def mute_scammer_in_all_groups(bot: Bot, user_id: int, user_username: str = None, reason: str = "Подозрительный аккаунт") -> dict:
     """
     Мутит подозрительного пользователя ВО ВСЕХ группах, где присутствует бот
 
     ЛОГИКА:
     1. Получает список ВСЕХ групп из базы данных
-    2. Для каждой группы проверяет, включен ли автомут
-    3. Если автомут включен - мутит пользователя в этой группе
+    2. Одним запросом получает статус автомута всех групп
+    3. Группы с включенным автомутом отдаёт MuteFanoutExecutor: параллельно,
+       с общим лимитом запросов к API, права бота из кэша админов,
+       мут только там, где пользователь участник
     4. Логирует результаты (успешные муты и ошибки)
 
     ВАЖНО: Эта функция вызывается когда пользователь признан подозрительным
@@ -184,126 +227,64 @@ async def mute_scammer_in_all_groups(bot: Bot, user_id: int, user_username: str
 
     try:
         # ============================================================
-        # ШАГ 1: Получаем список ВСЕХ групп из базы данных
+        # ШАГ 1: Получаем список ВСЕХ групп и статусы автомута
         # ============================================================
         async with get_session() as session:
-            # Получаем все группы из таблицы groups
-            result = await session.execute(select(Group))
-            groups = result.scalars().all()
-            results["total_groups"] = len(groups)
+            # Служебную группу с chat_id=0 (если есть) не берём
+            result = await session.execute(select(Group.chat_id).where(Group.chat_id != 0))
+            chat_ids = list(result.scalars().all())
+            statuses = await get_auto_mute_scammers_statuses(chat_ids, session)
 
-            logger.info(f"🌍 [GLOBAL_MUTE] Начинаем глобальный мут пользователя {user_id} (@{user_username})")
-            logger.info(f"🌍 [GLOBAL_MUTE] Найдено групп в БД: {len(groups)}")
-            logger.info(f"🌍 [GLOBAL_MUTE] Причина мута: {reason}")
+        results["total_groups"] = len(chat_ids)
+        enabled = [chat_id for chat_id in chat_ids if statuses.get(chat_id, True)]
+        results["skipped"] = [chat_id for chat_id in chat_ids if not statuses.get(chat_id, True)]
 
-            # ============================================================
-            # ШАГ 2: Проходим по каждой группе и мутим
-            # ============================================================
-            for group in groups:
-                chat_id = group.chat_id
-
-                # Пропускаем служебную группу с chat_id=0 (если есть)
-                if chat_id == 0:
-                    logger.debug(f"🌍 [GLOBAL_MUTE] Пропуск служебной группы с chat_id=0")
-                    continue
-
-                try:
-                    # ШАГ 2.1: Проверяем, включен ли автомут в этой группе
-                    auto_mute_enabled = await get_auto_mute_scammers_status(chat_id, session)
-
-                    if not auto_mute_enabled:
-                        # Автомут выключен - пропускаем эту группу
-                        logger.info(f"🌍 [GLOBAL_MUTE] Группа {group.title} ({chat_id}): автомут выключен, пропуск")
-                        results["skipped"].append(chat_id)
-                        continue
-
-                    # ШАГ 2.2: Проверяем, состоит ли бот в этой группе
-                    try:
-                        bot_me = await bot.me()
-                        member = await bot.get_chat_member(chat_id, bot_me.id)
-
-                        # Проверяем статус бота (должен быть администратором)
-                        if member.status not in ("administrator", "creator"):
-                            logger.warning(f"🌍 [GLOBAL_MUTE] Группа {group.title} ({chat_id}): бот не админ, пропуск")
-                            results["skipped"].append(chat_id)
-                            continue
-
-                    except Exception as e:
-                        # Бот не в группе или группа удалена
-                        logger.warning(f"🌍 [GLOBAL_MUTE] Группа {group.title} ({chat_id}): бот не в группе ({str(e)}), пропуск")
-                        results["skipped"].append(chat_id)
-                        continue
-
-                    # ШАГ 2.3: Проверяем, не является ли пользователь уже участником группы
-                    # Если пользователь не в группе, пропускаем (не мутим заранее)
-                    try:
-                        user_member = await bot.get_chat_member(chat_id, user_id)
-                        if user_member.status in ("left", "kicked"):
-                            # Пользователь не в группе - не мутим
-                            logger.debug(f"🌍 [GLOBAL_MUTE] Группа {group.title} ({chat_id}): пользователь не в группе, пропуск")
-                            results["skipped"].append(chat_id)
-                            continue
-                    except Exception:
-                        # Ошибка получения информации о пользователе - считаем что его нет в группе
-                        logger.debug(f"🌍 [GLOBAL_MUTE] Группа {group.title} ({chat_id}): не удалось проверить пользователя, пропуск")
-                        results["skipped"].append(chat_id)
-                        continue
-
-                    # ШАГ 2.4: МУТИМ пользователя в этой группе
-                    logger.info(f"🌍 [GLOBAL_MUTE] Мутим в группе {group.title} ({chat_id})...")
-
-                    until_date_mute = datetime.now(timezone.utc) + timedelta(days=366 * 10)
-
-                    await bot.restrict_chat_member(
-                        chat_id=chat_id,
-                        user_id=user_id,
-                        permissions=ChatPermissions(
-                            can_send_messages=False,        # Запрет писать сообщения
-                            can_send_media_messages=False,  # Запрет отправлять медиа
-                            can_send_polls=False,           # Запрет отправлять опросы
-                            can_send_other_messages=False,  # Запрет отправлять другие сообщения
-                            can_add_web_page_previews=False, # Запрет превью ссылок
-                            can_change_info=False,          # Запрет менять инфо группы
-                            can_invite_users=False,         # Запрет приглашать пользователей
-                            can_pin_messages=False          # Запрет закреплять сообщения
-                        ),
-                        until_date=until_date_mute
-                    )
-
-                    # Сохраняем ограничение в БД для восстановления после повторного входа
-                    bot_info = await bot.me()
-                    await save_restriction(
-                        session=session,
-                        chat_id=chat_id,
-                        user_id=user_id,
-                        restriction_type="mute",
-                        reason="risk_gate",
-                        restricted_by=bot_info.id,
-                        until_date=until_date_mute,
-                    )
-
-                    # Успешно замучен
-                    results["muted_in"].append(chat_id)
-                    logger.info(f"✅ [GLOBAL_MUTE] Успешно замучен в группе {group.title} ({chat_id})")
-
-                    # Небольшая задержка между мутами (чтобы не превысить лимиты API)
-                    await asyncio.sleep(0.5)
+        logger.info(f"🌍 [GLOBAL_MUTE] Начинаем глобальный мут пользователя {user_id} (@{user_username})")
+        logger.info(f"🌍 [GLOBAL_MUTE] Найдено групп в БД: {len(chat_ids)}, автомут включен в {len(enabled)}")
+        logger.info(f"🌍 [GLOBAL_MUTE] Причина мута: {reason}")
 
-                except Exception as e:
-                    # Ошибка при муте в конкретной группе
-                    logger.error(f"❌ [GLOBAL_MUTE] Ошибка мута в группе {group.title} ({chat_id}): {e}")
-                    results["failed_in"].append(chat_id)
+        # ============================================================
+        # ШАГ 2: Мутим во всех группах с включенным автомутом
+        # ============================================================
+        # Мут сохраняется в БД для восстановления после повторного входа
+        fanout_results = await get_mute_fanout().run(
+            bot,
+            f"scammer:{user_id}",
+            user_id,
+            enabled,
+            permissions=ChatPermissions(
+                can_send_messages=False,        # Запрет писать сообщения
+                can_send_media_messages=False,  # Запрет отправлять медиа
+                can_send_polls=False,           # Запрет отправлять опросы
+                can_send_other_messages=False,  # Запрет отправлять другие сообщения
+                can_add_web_page_previews=False, # Запрет превью ссылок
+                can_change_info=False,          # Запрет менять инфо группы
+                can_invite_users=False,         # Запрет приглашать пользователей
+                can_pin_messages=False          # Запрет закреплять сообщения
+            ),
+            until_date=datetime.now(timezone.utc) + timedelta(days=366 * 10),
+            require_member=True,
+            restriction_reason="risk_gate",
+        )
+
+        for fanout_result in fanout_results:
+            if fanout_result.status == STATUS_MUTED:
+                results["muted_in"].append(fanout_result.chat_id)
+            elif fanout_result.status == STATUS_FAILED:
+                results["failed_in"].append(fanout_result.chat_id)
+            else:
+                results["skipped"].append(fanout_result.chat_id)
 
-            # ============================================================
-            # ШАГ 3: Логируем итоговые результаты
-            # ============================================================
-            logger.info(f"🌍 [GLOBAL_MUTE] ИТОГИ глобального мута пользователя {user_id}:")
-            logger.info(f"   ✅ Замучен в {len(results['muted_in'])} группах")
-            logger.info(f"   ❌ Ошибки в {len(results['failed_in'])} группах")
-            logger.info(f"   ⏭️ Пропущено {len(results['skipped'])} групп")
+        # ============================================================
+        # ШАГ 3: Логируем итоговые результаты
+        # ============================================================
+        logger.info(f"🌍 [GLOBAL_MUTE] ИТОГИ глобального мута пользователя {user_id}:")
+        logger.info(f"   ✅ Замучен в {len(results['muted_in'])} группах")
+        logger.info(f"   ❌ Ошибки в {len(results['failed_in'])} группах")
+        logger.info(f"   ⏭️ Пропущено {len(results['skipped'])} групп")
 
-            if results['muted_in']:
-                logger.info(f"   📋 Замучен в группах: {results['muted_in']}")
+        if results['muted_in']:
+            logger.info(f"   📋 Замучен в группах: {results['muted_in']}")
 
     except Exception as e:
         logger.error(f"❌ [GLOBAL_MUTE] Критическая ошибка глобального мута: {e}")
@@ -13,8 +13,6 @@
 
 import asyncio
 import logging
-import random
-from io import BytesIO
 from typing import Optional, Tuple, Dict, Any
 
 from aiogram import Bot
@@ -28,11 +26,12 @@ from aiogram.types import (
 )
 from aiogram.utils.deep_linking import create_start_link
 from aiogram.fsm.context import FSMContext
-from PIL import Image, ImageDraw, ImageFont
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.services.redis_conn import redis
+from bot.services.message_deletion import delete_messages
+from bot.services.captcha.pool_service import build_dm_captcha, get_captcha_pool
 from bot.handlers.captcha.captcha_messages import (
     CAPTCHA_DM_TITLE,
     CAPTCHA_SOLVE_BUTTON,
@@ -68,62 +67,6 @@ CAPTCHA_DATA_TTL = 600
 JOIN_REQUEST_TTL = 600
 
 
-# ═══════════════════════════════════════════════════════════════════════════════
-# КЭШИРОВАНИЕ ШРИФТОВ
-# ═══════════════════════════════════════════════════════════════════════════════
-
-# Глобальный кэш шрифтов для генерации капчи
-_FONT_CACHE = None
-
-
-def _load_fonts_cached():
-    """
-    Загружает шрифты один раз и кэширует результат.
-
-    Оптимизировано для Windows (первым проверяется Windows путь).
-
-    Returns:
-        Список шрифтов разных размеров
-    """
-    global _FONT_CACHE
-
-    # Если шрифты уже загружены - возвращаем из кэша
-    if _FONT_CACHE is not None:
-        return _FONT_CACHE
-
-    # Пути к шрифтам в порядке приоритета
-    font_paths = [
-        # Windows первым (бот работает на Windows)
-        "C:\\Windows\\Fonts\\arial.ttf",
-        # Linux шрифты
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
-        "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
-        # macOS
-        "/System/Library/Fonts/Arial.ttf",
-        # Относительные пути
-        "arial.ttf",
-        "Arial.ttf",
-    ]
-
-    # Пробуем загрузить шрифты из каждого пути
-    for path in font_paths:
-        try:
-            # Загружаем шрифты разных размеров для вариативности
-            fonts = [ImageFont.truetype(path, size) for size in (120, 130, 140, 150)]
-            logger.info(f"✅ [FONT] Загружен шрифт: {path}")
-            _FONT_CACHE = fonts
-            return fonts
-        except (IOError, OSError):
-            # Шрифт не найден - пробуем следующий
-            continue
-
-    # Fallback на стандартный шрифт PIL
-    logger.warning("⚠️ [FONT] Системные шрифты не найдены, используем стандартный")
-    default_font = ImageFont.load_default()
-    _FONT_CACHE = [default_font] * 4
-    return _FONT_CACHE
-
-
 # ═══════════════════════════════════════════════════════════════════════════════
 # DEEP LINK ФУНКЦИИ
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -517,6 +460,9 @@ async def generate_visual_captcha(
     """
     Генерирует визуальную капчу с изображением и вариантами ответов.
 
+    Если запущен пул капч — капча берётся из него без ожидания,
+    иначе рисуется в пуле процессов (event loop не блокируется).
+
     Args:
         button_count: Количество вариантов ответов (4, 6, 9)
 
@@ -526,171 +472,25 @@ async def generate_visual_captcha(
         - captcha_image: Изображение капчи (BufferedInputFile)
         - options: Список вариантов [{text, hash, is_correct}]
     """
-    # Размеры изображения
-    width, height = 1200, 500
-    img = Image.new("RGB", (width, height), color=(255, 255, 255))
-    d = ImageDraw.Draw(img)
-
-    # Загружаем кэшированные шрифты
-    try:
-        fonts = _load_fonts_cached()
-    except Exception as e:
-        logger.error(f"❌ [CAPTCHA] Ошибка загрузки шрифтов: {e}")
-        fonts = [ImageFont.load_default()]
-
-    # Генерируем тип капчи (числа или простая математика)
-    captcha_type = random.choices(
-        ["simple_number", "simple_math"],
-        weights=[50, 50],  # 50% числа, 50% математика
-    )[0]
-
-    if captcha_type == "simple_number":
-        # Простые числа от 1 до 20
-        answer = random.randint(1, 20)
-        text_to_draw = str(answer)
-        correct_answer = str(answer)
-    else:
-        # Простая математика: сложение/вычитание
-        a = random.randint(1, 10)
-        b = random.randint(1, 10)
-        op = random.choice(["+", "-"])
-        if op == "+":
-            answer = a + b
-            text_to_draw = f"{a} + {b}"
-        else:
-            # Для вычитания - результат положительный
-            if a < b:
-                a, b = b, a
-            answer = a - b
-            text_to_draw = f"{a} - {b}"
-        correct_answer = str(answer)
-
-    # ═══════════════════════════════════════════════════════════════════════
-    # Рисуем фон с градиентом
-    # ═══════════════════════════════════════════════════════════════════════
-    for y in range(height):
-        for x in range(width):
-            intensity = int(255 - (y / height) * 20)
-            img.putpixel((x, y), (intensity, intensity, intensity))
-
-    # Добавляем горизонтальные полосы
-    for _ in range(8):
-        y = random.randint(0, height - 1)
-        color = (
-            random.randint(200, 240),
-            random.randint(200, 240),
-            random.randint(200, 240),
-        )
-        d.line([(0, y), (width, y)], fill=color, width=random.randint(2, 5))
-
-    # Добавляем линии шума
-    for _ in range(25):
-        x1, y1 = random.randint(0, width - 1), random.randint(0, height - 1)
-        x2, y2 = random.randint(0, width - 1), random.randint(0, height - 1)
-        color = (
-            random.randint(120, 200),
-            random.randint(120, 200),
-            random.randint(120, 200),
-        )
-        d.line([(x1, y1), (x2, y2)], fill=color, width=random.randint(1, 4))
-
-    # Добавляем точечный шум
-    for _ in range(1500):
-        x = random.randint(0, width - 1)
-        y = random.randint(0, height - 1)
-        color = (
-            random.randint(200, 255),
-            random.randint(200, 255),
-            random.randint(200, 255),
-        )
-        img.putpixel((x, y), color)
-
-    # ═══════════════════════════════════════════════════════════════════════
-    # Рисуем текст капчи
-    # ═══════════════════════════════════════════════════════════════════════
-    spacing = width // (len(text_to_draw) + 2)
-    x_offset = spacing
-
-    for ch in text_to_draw:
-        # Угол поворота ±30 градусов
-        angle = random.randint(-30, 30)
-
-        # Выбираем случайный шрифт
-        font = random.choice(fonts) if fonts else ImageFont.load_default()
-
-        # Создаём временное изображение для символа
-        char_size = 200
-        char_img = Image.new("RGBA", (char_size, char_size), (255, 255, 255, 0))
-        char_draw = ImageDraw.Draw(char_img)
-
-        # Рисуем символ чёрным цветом
-        char_draw.text(
-            (char_size // 4, char_size // 4),
-            ch,
-            font=font,
-            fill=(0, 0, 0, 255),
-        )
-
-        # Поворачиваем
-        char_img = char_img.rotate(angle, expand=True, fillcolor=(255, 255, 255, 0))
-
-        # Вставляем на основное изображение
-        y_offset = (height - char_img.height) // 2
-        img.paste(char_img, (x_offset, y_offset), char_img)
-
-        x_offset += spacing
+    # Берём готовую капчу из пула (если пул включён и не пуст)
+    pool = get_captcha_pool()
+    captcha = pool.take(button_count) if pool is not None else None
+    from_pool = captcha is not None
 
-    # ═══════════════════════════════════════════════════════════════════════
-    # Конвертируем в BufferedInputFile
-    # ═══════════════════════════════════════════════════════════════════════
-    buffer = BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
+    if captcha is None:
+        captcha = await build_dm_captcha(button_count)
 
     captcha_image = BufferedInputFile(
-        file=buffer.read(),
+        file=captcha.image,
         filename="captcha.png",
     )
 
-    # ═══════════════════════════════════════════════════════════════════════
-    # Генерируем варианты ответов для кнопок
-    # ═══════════════════════════════════════════════════════════════════════
-    import hashlib
-
-    # Правильный ответ как число
-    correct_int = int(correct_answer)
-
-    # Генерируем неправильные варианты
-    wrong_answers = set()
-    while len(wrong_answers) < button_count - 1:
-        # Генерируем числа в диапазоне ±10 от правильного
-        wrong = correct_int + random.randint(-10, 10)
-        # Не допускаем отрицательные и дубликаты
-        if wrong > 0 and wrong != correct_int and wrong not in wrong_answers:
-            wrong_answers.add(wrong)
-
-    # Собираем все варианты
-    all_answers = [correct_int] + list(wrong_answers)
-    random.shuffle(all_answers)
-
-    # Формируем список опций с хэшами
-    options = []
-    for ans in all_answers:
-        # Создаём хэш для callback_data
-        ans_hash = hashlib.md5(str(ans).encode()).hexdigest()[:8]
-        options.append({
-            "text": str(ans),
-            "hash": ans_hash,
-            "is_correct": ans == correct_int,
-        })
-
     # Логируем генерацию (без ответа!)
     logger.info(
-        f"🎨 [CAPTCHA] Сгенерирована капча: type={captcha_type}, "
-        f"options={button_count}"
+        f"🎨 [CAPTCHA] Сгенерирована капча: options={button_count}, from_pool={from_pool}"
     )
 
-    return correct_answer, captcha_image, options
+    return captcha.correct_answer(), captcha_image, captcha.options_with_flags()
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -766,13 +566,8 @@ async def clear_captcha_state(
     # Получаем ID сообщений для удаления
     message_ids = await get_captcha_message_ids(user_id)
 
-    # Пытаемся удалить сообщения
-    for msg_id in message_ids:
-        try:
-            await bot.delete_message(chat_id=user_id, message_id=msg_id)
-        except Exception:
-            # Сообщение уже удалено или недоступно
-            pass
+    # Удаляем сообщения одной пачкой (уже удалённые — не ошибка)
+    await delete_messages(bot, user_id, message_ids)
 
     # Удаляем данные из Redis (с chat_id для правильного ключа)
     await delete_captcha_data(user_id, chat_id)
@@ -46,12 +46,19 @@ from bot.services.captcha.reminder_service import (
     cancel_reminders,
     schedule_dialog_cleanup,
 )
+from bot.services.job_scheduler import register_job_handler, schedule_job
+from bot.services.message_deletion import delete_messages
 
 
 # Логгер для отслеживания потока капчи
 logger = logging.getLogger(__name__)
 
 
+# Типы задач планировщика (таймауты капчи)
+VISUAL_DM_TIMEOUT_JOB = "captcha_visual_dm_timeout"
+GROUP_MESSAGE_TTL_JOB = "captcha_group_message_ttl"
+
+
 # Реэкспорт CaptchaMode для удобства импорта
 __all__ = [
     "CaptchaMode",
@@ -433,17 +440,19 @@ async def _send_visual_dm_deep_link(
     # ═══════════════════════════════════════════════════════════════════════
     timeout = settings.get_timeout_for_mode(CaptchaMode.VISUAL_DM)
 
-    # Запускаем фоновую задачу для таймаута
+    # Планируем задачу таймаута (переживает перезапуск бота)
     # Передаём failure_action из настроек группы для определения
     # что делать при провале: "decline" = отклонить, "keep" = оставить висеть
-    asyncio.create_task(
-        _decline_join_request_after_timeout(
-            bot=bot,
-            chat_id=chat.id,
-            user_id=user.id,
-            timeout=timeout,
-            failure_action=settings.failure_action,
-        )
+    await schedule_job(
+        bot,
+        VISUAL_DM_TIMEOUT_JOB,
+        {
+            "chat_id": chat.id,
+            "user_id": user.id,
+            "failure_action": settings.failure_action,
+        },
+        timeout,
+        job_id=f"{VISUAL_DM_TIMEOUT_JOB}:{user.id}:{chat.id}",
     )
 
     logger.info(
@@ -480,11 +489,20 @@ async def _send_visual_dm_deep_link(
     return True
 
 
+async def _visual_dm_timeout_job(bot: Bot, payload: dict) -> None:
+    """Задача планировщика: таймаут капчи VISUAL_DM."""
+    await _decline_join_request_after_timeout(
+        bot=bot,
+        chat_id=payload["chat_id"],
+        user_id=payload["user_id"],
+        failure_action=payload.get("failure_action", "decline"),
+    )
+
+
 async def _decline_join_request_after_timeout(
     bot: Bot,
     chat_id: int,
     user_id: int,
-    timeout: int,
     failure_action: str = "decline",
 ) -> None:
     """
@@ -501,7 +519,6 @@ async def _decline_join_request_after_timeout(
         bot: Экземпляр бота
         chat_id: ID группы
         user_id: ID пользователя
-        timeout: Таймаут в секундах
         failure_action: Действие при провале ("decline" или "keep")
     """
     from bot.services.captcha.dm_flow_service import (
@@ -516,9 +533,6 @@ async def _decline_join_request_after_timeout(
         mark_captcha_inactive,
     )
 
-    # Ждём таймаут
-    await asyncio.sleep(timeout)
-
     # Проверяем активна ли ещё капча (другой таймаут мог уже обработать)
     if not await is_captcha_active(user_id, chat_id):
         logger.debug(
@@ -563,13 +577,9 @@ async def _decline_join_request_after_timeout(
         # Удаляем join request из Redis (в обоих случаях очищаем кэш)
         await delete_join_request(user_id, chat_id)
 
-        # Удаляем все сообщения капчи
+        # Удаляем все сообщения капчи одной пачкой
         message_ids = await get_captcha_message_ids(user_id)
-        for msg_id in message_ids:
-            try:
-                await bot.delete_message(chat_id=user_id, message_id=msg_id)
-            except Exception:
-                pass
+        await delete_messages(bot, user_id, message_ids)
 
         await delete_captcha_message_ids(user_id)
 
@@ -628,6 +638,9 @@ async def _decline_join_request_after_timeout(
         )
 
 
+register_job_handler(VISUAL_DM_TIMEOUT_JOB, _visual_dm_timeout_job)
+
+
 async def _send_group_captcha(
     bot: Bot,
     session: AsyncSession,
@@ -816,14 +829,12 @@ async def _send_group_captcha(
     # Используем get_message_ttl_for_mode - время автоудаления сообщения в группе
     message_ttl = settings.get_message_ttl_for_mode(mode)
 
-    asyncio.create_task(
-        _delete_group_captcha_message_after_timeout(
-            bot=bot,
-            chat_id=chat.id,
-            user_id=user.id,
-            message_id=msg.message_id,
-            timeout=message_ttl,
-        )
+    await schedule_job(
+        bot,
+        GROUP_MESSAGE_TTL_JOB,
+        {"chat_id": chat.id, "user_id": user.id, "message_id": msg.message_id},
+        message_ttl,
+        job_id=f"{GROUP_MESSAGE_TTL_JOB}:{chat.id}:{msg.message_id}",
     )
 
     logger.info(
@@ -833,12 +844,21 @@ async def _send_group_captcha(
     return True
 
 
+async def _group_message_ttl_job(bot: Bot, payload: dict) -> None:
+    """Задача планировщика: TTL сообщения капчи в группе."""
+    await _delete_group_captcha_message_after_timeout(
+        bot=bot,
+        chat_id=payload["chat_id"],
+        user_id=payload["user_id"],
+        message_id=payload["message_id"],
+    )
+
+
 async def _delete_group_captcha_message_after_timeout(
     bot: Bot,
     chat_id: int,
     user_id: int,
     message_id: int,
-    timeout: int,
 ) -> None:
     """
     Удаляет сообщение капчи в группе после таймаута.
@@ -850,17 +870,9 @@ async def _delete_group_captcha_message_after_timeout(
         chat_id: ID группы
         user_id: ID пользователя
         message_id: ID сообщения
-        timeout: Таймаут в секундах
     """
     from bot.services.captcha.dm_flow_service import get_join_request
 
-    # Ждём таймаут
-    logger.debug(
-        f"⏳ [GROUP_CAPTCHA_TTL] Ожидание: {timeout}с, "
-        f"user_id={user_id}, chat_id={chat_id}, msg_id={message_id}"
-    )
-    await asyncio.sleep(timeout)
-
     # Проверяем не прошёл ли уже пользователь капчу
     join_request = await get_join_request(user_id, chat_id)
     logger.debug(
@@ -892,6 +904,9 @@ async def _delete_group_captcha_message_after_timeout(
         )
 
 
+register_job_handler(GROUP_MESSAGE_TTL_JOB, _group_message_ttl_job)
+
+
 async def _delete_captcha_after_timeout(
     bot: Bot,
     chat_id: int,
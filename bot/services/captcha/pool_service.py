@@ -0,0 +1,260 @@
+# bot/services/captcha/pool_service.py
+"""
+Сервис пула заранее отрисованных капч.
+
+Отвечает за:
+- Сборку капчи для ЛС (ответ, варианты, изображение)
+- Фоновое заполнение пула готовых капч по режимам (количеству кнопок)
+- Мгновенную выдачу капчи из пула при заявке на вступление
+
+Ответы в пуле хранятся только в виде хэша (hash_answer): правильный
+вариант определяется сравнением хэшей при выдаче.
+
+Пул необязателен: при CAPTCHA_POOL_SIZE=0 или пустом пуле капча
+рисуется по запросу (в пуле процессов, см. render_service).
+"""
+
+import asyncio
+import logging
+import random
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+
+from bot.services.captcha.render_service import render_dm_captcha_image, render_off_loop
+from bot.services.captcha.verification_service import hash_answer
+
+
+# Логгер для отслеживания пула
+logger = logging.getLogger(__name__)
+
+
+# Количество кнопок по умолчанию (как в настройках капчи)
+DEFAULT_BUTTON_COUNT = 6
+
+# Пауза после ошибки отрисовки в фоне (секунды)
+REFILL_ERROR_DELAY = 5
+
+
+@dataclass
+class PooledCaptcha:
+    """
+    Готовая капча.
+
+    Attributes:
+        image: PNG в байтах
+        answer_hash: Хэш правильного ответа (hash_answer)
+        options: Варианты ответов [{text, hash}] без признака правильности
+    """
+    image: bytes
+    answer_hash: str
+    options: List[dict]
+
+    def correct_answer(self) -> str:
+        """Текст правильного варианта (по совпадению хэша)."""
+        return next(opt["text"] for opt in self.options if opt["hash"] == self.answer_hash)
+
+    def options_with_flags(self) -> List[dict]:
+        """Варианты в формате generate_visual_captcha: {text, hash, is_correct}."""
+        return [
+            {**opt, "is_correct": opt["hash"] == self.answer_hash}
+            for opt in self.options
+        ]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# СБОРКА КАПЧИ
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _choose_task() -> tuple[str, int]:
+    """
+    Выбирает задание капчи: число или простую математику.
+
+    Returns:
+        (текст на изображении, правильный ответ)
+    """
+    # 50% числа, 50% математика
+    captcha_type = random.choices(["simple_number", "simple_math"], weights=[50, 50])[0]
+
+    if captcha_type == "simple_number":
+        # Простые числа от 1 до 20
+        answer = random.randint(1, 20)
+        return str(answer), answer
+
+    # Простая математика: сложение/вычитание
+    a = random.randint(1, 10)
+    b = random.randint(1, 10)
+    if random.choice(["+", "-"]) == "+":
+        return f"{a} + {b}", a + b
+    # Для вычитания - результат положительный
+    if a < b:
+        a, b = b, a
+    return f"{a} - {b}", a - b
+
+
+def _build_options(correct: int, button_count: int) -> List[dict]:
+    """
+    Варианты ответов: правильный + неправильные в диапазоне ±10
+    (шире, если кнопок больше — иначе при малом ответе вариантов не хватит).
+
+    Returns:
+        Перемешанный список [{text, hash}]
+    """
+    spread = max(10, button_count)
+    wrong_answers = set()
+    while len(wrong_answers) < button_count - 1:
+        wrong = correct + random.randint(-spread, spread)
+        # Не допускаем отрицательные и дубликаты
+        if wrong > 0 and wrong != correct:
+            wrong_answers.add(wrong)
+
+    all_answers = [correct] + list(wrong_answers)
+    random.shuffle(all_answers)
+    return [{"text": str(ans), "hash": hash_answer(str(ans))} for ans in all_answers]
+
+
+async def build_dm_captcha(button_count: int = DEFAULT_BUTTON_COUNT) -> PooledCaptcha:
+    """
+    Собирает капчу для ЛС: задание и варианты выбираются здесь,
+    изображение рисуется в пуле процессов.
+
+    Args:
+        button_count: Количество вариантов ответов
+
+    Returns:
+        PooledCaptcha
+    """
+    text_to_draw, correct = _choose_task()
+    options = _build_options(correct, button_count)
+    image = await render_off_loop(render_dm_captcha_image, text_to_draw)
+    return PooledCaptcha(image=image, answer_hash=hash_answer(str(correct)), options=options)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ПУЛ
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class CaptchaPool:
+    """
+    Пул заранее отрисованных капч по режимам (количеству кнопок).
+
+    Режим регистрируется при первом запросе; фоновая задача
+    поддерживает по size готовых капч для каждого режима.
+    """
+
+    def __init__(self, size: int, button_counts=(DEFAULT_BUTTON_COUNT,)):
+        """
+        Args:
+            size: Сколько капч держать готовыми для каждого режима
+            button_counts: Режимы, заполняемые сразу при старте
+        """
+        self._size = size
+        self._queues: Dict[int, Deque[PooledCaptcha]] = {
+            count: deque() for count in button_counts
+        }
+        # Сигнал фоновой задаче: в пуле появилось место
+        self._refill = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        # Статистика
+        self.hits = 0
+        self.misses = 0
+
+    def take(self, button_count: int) -> Optional[PooledCaptcha]:
+        """
+        Забирает готовую капчу (без ожидания).
+
+        Returns:
+            PooledCaptcha или None если пул этого режима пуст
+        """
+        queue = self._queues.setdefault(button_count, deque())
+        self._refill.set()
+        if queue:
+            self.hits += 1
+            return queue.popleft()
+        self.misses += 1
+        return None
+
+    def size(self, button_count: int) -> int:
+        """Количество готовых капч режима."""
+        return len(self._queues.get(button_count, ()))
+
+    async def fill_once(self) -> int:
+        """
+        Дорисовывает недостающие капчи всех режимов.
+
+        Returns:
+            Сколько капч добавлено
+        """
+        added = 0
+        for button_count, queue in list(self._queues.items()):
+            while len(queue) < self._size:
+                queue.append(await build_dm_captcha(button_count))
+                added += 1
+        return added
+
+    async def _fill_loop(self) -> None:
+        """Фоновое заполнение: после каждой выдачи дорисовывает пул."""
+        while True:
+            self._refill.clear()
+            try:
+                added = await self.fill_once()
+                if added:
+                    logger.debug(f"🎨 [CAPTCHA_POOL] Дорисовано капч: {added}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ [CAPTCHA_POOL] Ошибка заполнения пула: {e}")
+                await asyncio.sleep(REFILL_ERROR_DELAY)
+                continue
+            await self._refill.wait()
+
+    def start(self) -> None:
+        """Запускает фоновое заполнение."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._fill_loop())
+        logger.info(f"✅ [CAPTCHA_POOL] Пул капч запущен: size={self._size}")
+
+    async def stop(self) -> None:
+        """Останавливает фоновое заполнение."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ГЛОБАЛЬНЫЙ ЭКЗЕМПЛЯР
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_captcha_pool: Optional[CaptchaPool] = None
+
+
+def get_captcha_pool() -> Optional[CaptchaPool]:
+    """
+    Возвращает глобальный пул капч.
+
+    Returns:
+        CaptchaPool или None если пул не запущен
+    """
+    return _captcha_pool
+
+
+async def start_captcha_pool(size: int) -> None:
+    """Запускает пул капч (вызывается при старте бота, size=0 — пул выключен)."""
+    global _captcha_pool
+    if size <= 0:
+        return
+    _captcha_pool = CaptchaPool(size)
+    _captcha_pool.start()
+
+
+async def stop_captcha_pool() -> None:
+    """Останавливает пул капч (вызывается при остановке бота)."""
+    global _captcha_pool
+    if _captcha_pool is not None:
+        await _captcha_pool.stop()
+        _captcha_pool = None
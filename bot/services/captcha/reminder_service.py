@@ -7,7 +7,8 @@
 - Отправку напоминаний пользователю
 - Отмену напоминаний при завершении капчи
 
-Использует asyncio.create_task для планирования.
+Напоминания, таймаут и чистка диалога — задачи планировщика
+(job_scheduler): переживают перезапуск бота и отменяются по ключу.
 """
 
 import asyncio
@@ -17,6 +18,8 @@ from typing import Optional, Dict, Any
 from aiogram import Bot
 
 from bot.services.redis_conn import redis
+from bot.services.job_scheduler import cancel_job, register_job_handler, schedule_job
+from bot.services.message_deletion import delete_messages
 from bot.handlers.captcha.captcha_messages import send_reminder_message
 from bot.services.captcha.dm_flow_service import save_captcha_message_id
 
@@ -46,6 +49,26 @@ CAPTCHA_INTERACTED_KEY = "captcha_interacted:{user_id}:{chat_id}"
 CAPTCHA_TTL = 600
 
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# ЗАДАЧИ ПЛАНИРОВЩИКА
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Типы задач
+REMINDER_JOB = "captcha_reminder"
+TIMEOUT_JOB = "captcha_timeout"
+CLEANUP_JOB = "captcha_dialog_cleanup"
+
+
+def _reminder_job_id(user_id: int, chat_id: int) -> str:
+    """ID задачи напоминания (одна на пользователя и группу)."""
+    return f"{REMINDER_JOB}:{user_id}:{chat_id}"
+
+
+def _timeout_job_id(user_id: int, chat_id: int) -> str:
+    """ID задачи таймаута (одна на пользователя и группу)."""
+    return f"{TIMEOUT_JOB}:{user_id}:{chat_id}"
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # ФУНКЦИИ УПРАВЛЕНИЯ СОСТОЯНИЕМ
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -211,16 +234,21 @@ async def schedule_reminder(
     # Отмечаем капчу как активную
     await mark_captcha_active(user_id, chat_id)
 
-    # Создаём задачу напоминания
-    asyncio.create_task(
-        _reminder_task(
-            bot=bot,
-            user_id=user_id,
-            chat_id=chat_id,
-            delay_seconds=reminder_seconds,
-            timeout_seconds=timeout_seconds,
-            max_reminders=max_reminders,
-        )
+    # Планируем первое напоминание (следующие планирует сама задача)
+    await schedule_job(
+        bot,
+        REMINDER_JOB,
+        {
+            "user_id": user_id,
+            "chat_id": chat_id,
+            "delay_seconds": reminder_seconds,
+            "timeout_seconds": timeout_seconds,
+            "max_reminders": max_reminders,
+            "elapsed": 0,
+            "sent_count": 0,
+        },
+        reminder_seconds,
+        job_id=_reminder_job_id(user_id, chat_id),
     )
 
     # Логируем планирование
@@ -230,18 +258,11 @@ async def schedule_reminder(
     )
 
 
-async def _reminder_task(
-    bot: Bot,
-    user_id: int,
-    chat_id: int,
-    delay_seconds: int,
-    timeout_seconds: int,
-    max_reminders: int = 3,
-) -> None:
+async def _reminder_job(bot: Bot, payload: Dict[str, Any]) -> None:
     """
-    Внутренняя задача отправки ПЕРИОДИЧЕСКИХ напоминаний.
+    Задача отправки ПЕРИОДИЧЕСКИХ напоминаний.
 
-    Отправляет напоминание каждые delay_seconds секунд,
+    Отправляет напоминание и планирует следующее через delay_seconds,
     пока:
     - Капча активна
     - Пользователь НЕ начал решать
@@ -252,83 +273,83 @@ async def _reminder_task(
 
     Args:
         bot: Экземпляр бота
-        user_id: ID пользователя
-        chat_id: ID группы
-        delay_seconds: Интервал между напоминаниями (секунды)
-        timeout_seconds: Общий таймаут капчи
-        max_reminders: Максимум напоминаний (0 = безлимит)
+        payload: user_id, chat_id, delay_seconds, timeout_seconds,
+            max_reminders, elapsed (прошло секунд), sent_count (отправлено)
     """
-    elapsed = 0  # Сколько времени прошло с начала
-    sent_count = 0  # Сколько напоминаний отправлено
+    user_id = payload["user_id"]
+    chat_id = payload["chat_id"]
+    delay_seconds = payload["delay_seconds"]
+    timeout_seconds = payload["timeout_seconds"]
+    max_reminders = payload.get("max_reminders", 3)
+    elapsed = payload.get("elapsed", 0) + delay_seconds  # Сколько времени прошло с начала
+    sent_count = payload.get("sent_count", 0)  # Сколько напоминаний отправлено
+
+    # Проверяем активна ли ещё капча
+    if not await is_captcha_active(user_id, chat_id):
+        logger.debug(
+            f"🔕 [REMINDER] Капча неактивна: user_id={user_id}"
+        )
+        return
 
-    try:
-        while True:
-            # Ждём интервал напоминания
-            await asyncio.sleep(delay_seconds)
-            elapsed += delay_seconds
-
-            # Проверяем активна ли ещё капча
-            if not await is_captcha_active(user_id, chat_id):
-                logger.debug(
-                    f"🔕 [REMINDER] Капча неактивна: user_id={user_id}"
-                )
-                break
+    # Проверяем начал ли пользователь решать
+    if await has_user_interacted(user_id, chat_id):
+        logger.debug(
+            f"🔕 [REMINDER] Пользователь решает: user_id={user_id}"
+        )
+        return
 
-            # Проверяем начал ли пользователь решать
-            if await has_user_interacted(user_id, chat_id):
-                logger.debug(
-                    f"🔕 [REMINDER] Пользователь решает: user_id={user_id}"
-                )
-                break
+    # Проверяем лимит напоминаний (если задан)
+    if max_reminders > 0 and sent_count >= max_reminders:
+        logger.debug(
+            f"🔕 [REMINDER] Лимит достигнут: user_id={user_id}, "
+            f"sent={sent_count}/{max_reminders}"
+        )
+        return
 
-            # Проверяем лимит напоминаний (если задан)
-            if max_reminders > 0 and sent_count >= max_reminders:
-                logger.debug(
-                    f"🔕 [REMINDER] Лимит достигнут: user_id={user_id}, "
-                    f"sent={sent_count}/{max_reminders}"
-                )
-                break
+    # Рассчитываем оставшееся время
+    seconds_left = timeout_seconds - elapsed
 
-            # Рассчитываем оставшееся время
-            seconds_left = timeout_seconds - elapsed
+    # Если осталось меньше 10 секунд - прекращаем
+    if seconds_left < 10:
+        logger.debug(
+            f"🔕 [REMINDER] Мало времени: user_id={user_id}"
+        )
+        return
 
-            # Если осталось меньше 10 секунд - прекращаем
-            if seconds_left < 10:
-                logger.debug(
-                    f"🔕 [REMINDER] Мало времени: user_id={user_id}"
-                )
-                break
+    # Удаляем предыдущее напоминание перед отправкой нового
+    await _delete_previous_reminder(bot, user_id)
 
-            # Удаляем предыдущее напоминание перед отправкой нового
-            await _delete_previous_reminder(bot, user_id)
+    # Отправляем новое напоминание
+    message = await send_reminder_message(
+        bot=bot,
+        user_id=user_id,
+        seconds_left=seconds_left,
+    )
 
-            # Отправляем новое напоминание
-            message = await send_reminder_message(
-                bot=bot,
-                user_id=user_id,
-                seconds_left=seconds_left,
-            )
+    # Сохраняем ID для последующего удаления
+    if message:
+        await _save_reminder_message_id(user_id, message.message_id)
+        # Также сохраняем в общий список для чистки диалога
+        await save_captcha_message_id(user_id, message.message_id)
+        sent_count += 1
 
-            # Сохраняем ID для последующего удаления
-            if message:
-                await _save_reminder_message_id(user_id, message.message_id)
-                # Также сохраняем в общий список для чистки диалога
-                await save_captcha_message_id(user_id, message.message_id)
-                sent_count += 1
+    logger.info(
+        f"🔔 [REMINDER] Отправлено: user_id={user_id}, "
+        f"осталось {seconds_left} сек, напоминание {sent_count}"
+        f"{'/' + str(max_reminders) if max_reminders > 0 else ''}"
+    )
 
-            logger.info(
-                f"🔔 [REMINDER] Отправлено: user_id={user_id}, "
-                f"осталось {seconds_left} сек, напоминание {sent_count}"
-                f"{'/' + str(max_reminders) if max_reminders > 0 else ''}"
-            )
+    # Планируем следующее напоминание
+    await schedule_job(
+        bot,
+        REMINDER_JOB,
+        {**payload, "elapsed": elapsed, "sent_count": sent_count},
+        delay_seconds,
+        job_id=_reminder_job_id(user_id, chat_id),
+    )
 
-    except asyncio.CancelledError:
-        logger.debug(f"🔕 [REMINDER] Задача отменена: user_id={user_id}")
 
-    except Exception as e:
-        logger.error(
-            f"❌ [REMINDER] Ошибка: user_id={user_id}, error={e}"
-        )
+register_job_handler(REMINDER_JOB, _reminder_job)
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -354,17 +375,27 @@ async def schedule_timeout(
         chat_id: ID группы
         timeout_seconds: Таймаут в секундах
         on_timeout_callback: Функция для вызова при таймауте
+            (функцию нельзя сохранить в Redis — с callback таймаут
+            ждёт в процессе и не переживает перезапуск)
     """
-    # Создаём задачу таймаута
-    asyncio.create_task(
-        _timeout_task(
-            bot=bot,
-            user_id=user_id,
-            chat_id=chat_id,
-            timeout_seconds=timeout_seconds,
-            on_timeout_callback=on_timeout_callback,
+    if on_timeout_callback is not None:
+        asyncio.create_task(
+            _timeout_task(
+                bot=bot,
+                user_id=user_id,
+                chat_id=chat_id,
+                timeout_seconds=timeout_seconds,
+                on_timeout_callback=on_timeout_callback,
+            )
+        )
+    else:
+        await schedule_job(
+            bot,
+            TIMEOUT_JOB,
+            {"user_id": user_id, "chat_id": chat_id},
+            timeout_seconds,
+            job_id=_timeout_job_id(user_id, chat_id),
         )
-    )
 
     # Логируем планирование
     logger.info(
@@ -381,7 +412,7 @@ async def _timeout_task(
     on_timeout_callback: Optional[Any] = None,
 ) -> None:
     """
-    Внутренняя задача таймаута.
+    Внутренняя задача таймаута с callback (ждёт в процессе).
 
     Args:
         bot: Экземпляр бота
@@ -393,7 +424,32 @@ async def _timeout_task(
     try:
         # Ждём таймаут
         await asyncio.sleep(timeout_seconds)
+        await _handle_timeout(bot, user_id, chat_id, on_timeout_callback)
+    except asyncio.CancelledError:
+        logger.debug(f"⏰ [TIMEOUT] Задача отменена: user_id={user_id}")
+
 
+async def _timeout_job(bot: Bot, payload: Dict[str, Any]) -> None:
+    """Задача планировщика: таймаут капчи."""
+    await _handle_timeout(bot, payload["user_id"], payload["chat_id"])
+
+
+async def _handle_timeout(
+    bot: Bot,
+    user_id: int,
+    chat_id: int,
+    on_timeout_callback: Optional[Any] = None,
+) -> None:
+    """
+    Обработка таймаута капчи.
+
+    Args:
+        bot: Экземпляр бота
+        user_id: ID пользователя
+        chat_id: ID группы
+        on_timeout_callback: Callback при таймауте
+    """
+    try:
         # Проверяем активна ли капча
         if not await is_captcha_active(user_id, chat_id):
             # Капча уже завершена
@@ -487,15 +543,15 @@ async def _timeout_task(
                 cleanup_seconds=cleanup_delay,
             )
 
-    except asyncio.CancelledError:
-        logger.debug(f"⏰ [TIMEOUT] Задача отменена: user_id={user_id}")
-
     except Exception as e:
         logger.error(
             f"❌ [TIMEOUT] Ошибка: user_id={user_id}, error={e}"
         )
 
 
+register_job_handler(TIMEOUT_JOB, _timeout_job)
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -567,6 +623,10 @@ async def cancel_reminders(
     # Отмечаем капчу как неактивную (это остановит все задачи)
     await mark_captcha_inactive(user_id, chat_id)
 
+    # Снимаем запланированные напоминание и таймаут
+    await cancel_job(_reminder_job_id(user_id, chat_id))
+    await cancel_job(_timeout_job_id(user_id, chat_id))
+
     # Удаляем ключ напоминающего сообщения
     key = REMINDER_MSG_KEY.format(user_id=user_id)
     await redis.delete(key)
@@ -596,13 +656,13 @@ async def schedule_dialog_cleanup(
         user_id: ID пользователя (это chat_id для ЛС)
         cleanup_seconds: Через сколько секунд чистить
     """
-    # Создаём задачу чистки
-    asyncio.create_task(
-        _cleanup_task(
-            bot=bot,
-            user_id=user_id,
-            delay_seconds=cleanup_seconds,
-        )
+    # Планируем задачу чистки (повторное планирование переносит чистку)
+    await schedule_job(
+        bot,
+        CLEANUP_JOB,
+        {"user_id": user_id},
+        cleanup_seconds,
+        job_id=f"{CLEANUP_JOB}:{user_id}",
     )
 
     # Логируем
@@ -612,23 +672,16 @@ async def schedule_dialog_cleanup(
     )
 
 
-async def _cleanup_task(
-    bot: Bot,
-    user_id: int,
-    delay_seconds: int,
-) -> None:
+async def _cleanup_job(bot: Bot, payload: Dict[str, Any]) -> None:
     """
-    Внутренняя задача чистки диалога.
+    Задача планировщика: чистка диалога.
 
     Args:
         bot: Экземпляр бота
-        user_id: ID пользователя
-        delay_seconds: Задержка в секундах
+        payload: user_id
     """
+    user_id = payload["user_id"]
     try:
-        # Ждём указанное время
-        await asyncio.sleep(delay_seconds)
-
         # Импортируем функцию получения ID сообщений
         from bot.services.captcha.dm_flow_service import (
             get_captcha_message_ids,
@@ -638,15 +691,8 @@ async def _cleanup_task(
         # Получаем ID сообщений для удаления
         message_ids = await get_captcha_message_ids(user_id)
 
-        # Удаляем сообщения
-        deleted_count = 0
-        for msg_id in message_ids:
-            try:
-                await bot.delete_message(chat_id=user_id, message_id=msg_id)
-                deleted_count += 1
-            except Exception:
-                # Сообщение уже удалено - пропускаем
-                pass
+        # Удаляем сообщения одной пачкой (уже удалённые пропускаются)
+        deleted_count = await delete_messages(bot, user_id, message_ids)
 
         # Удаляем список ID из Redis
         await delete_captcha_message_ids(user_id)
@@ -657,10 +703,10 @@ async def _cleanup_task(
             f"count={deleted_count}/{len(message_ids)}"
         )
 
-    except asyncio.CancelledError:
-        logger.debug(f"🧹 [CLEANUP] Задача отменена: user_id={user_id}")
-
     except Exception as e:
         logger.error(
             f"❌ [CLEANUP] Ошибка: user_id={user_id}, error={e}"
         )
+
+
+register_job_handler(CLEANUP_JOB, _cleanup_job)
@@ -0,0 +1,354 @@
+# bot/services/captcha/render_service.py
+"""
+Сервис отрисовки визуальной капчи.
+
+Отвечает за:
+- Отрисовку изображения капчи (фон, шум, искажения, символы)
+- Выполнение отрисовки в пуле процессов (вне event loop)
+
+Раньше фон и цветовой шум рисовались попиксельно в двойном цикле
+Python (600 тыс. пикселей, random.random() на каждый) прямо внутри
+async функции: во время рейда десятки капч замораживали все апдейты.
+Теперь фон, точечный шум и цветовые искажения считаются массивами
+NumPy, а вся отрисовка выполняется в ProcessPoolExecutor.
+
+Модуль намеренно лёгкий (только PIL и NumPy): функции отрисовки
+выполняются в дочерних процессах.
+"""
+
+import asyncio
+import logging
+import random
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Optional
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+
+# Логгер для отслеживания отрисовки
+logger = logging.getLogger(__name__)
+
+
+# Размеры изображения капчи
+CAPTCHA_WIDTH = 1200
+CAPTCHA_HEIGHT = 500
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# КЭШИРОВАНИЕ ШРИФТОВ
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Кэш шрифтов (в каждом процессе пула — свой)
+_FONT_CACHE = None
+
+
+def _load_fonts_cached():
+    """
+    Загружает шрифты один раз и кэширует результат.
+
+    Оптимизировано для Windows (первым проверяется Windows путь).
+
+    Returns:
+        Список шрифтов разных размеров
+    """
+    global _FONT_CACHE
+
+    # Если шрифты уже загружены - возвращаем из кэша
+    if _FONT_CACHE is not None:
+        return _FONT_CACHE
+
+    # Пути к шрифтам в порядке приоритета
+    font_paths = [
+        # Windows первым (бот работает на Windows)
+        "C:\\Windows\\Fonts\\arial.ttf",
+        # Linux шрифты
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+        # macOS
+        "/System/Library/Fonts/Arial.ttf",
+        # Относительные пути
+        "arial.ttf",
+        "Arial.ttf",
+    ]
+
+    # Пробуем загрузить шрифты из каждого пути
+    for path in font_paths:
+        try:
+            # Загружаем шрифты разных размеров для вариативности
+            fonts = [ImageFont.truetype(path, size) for size in (120, 130, 140, 150)]
+            logger.info(f"✅ [FONT] Загружен шрифт: {path}")
+            _FONT_CACHE = fonts
+            return fonts
+        except (IOError, OSError):
+            # Шрифт не найден - пробуем следующий
+            continue
+
+    # Fallback на стандартный шрифт PIL
+    logger.warning("⚠️ [FONT] Системные шрифты не найдены, используем стандартный")
+    default_font = ImageFont.load_default()
+    _FONT_CACHE = [default_font] * 4
+    return _FONT_CACHE
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ВЕКТОРНЫЕ ОПЕРАЦИИ (NumPy)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _gradient_background(width: int, height: int) -> Image.Image:
+    """
+    Фон с вертикальным градиентом от белого к светло-серому.
+
+    Значения совпадают с прежним попиксельным вариантом:
+    intensity = int(255 - (y / height) * 20)
+    """
+    rows = (255 - (np.arange(height) / height) * 20).astype(np.uint8)
+    arr = np.repeat(rows[:, None], width, axis=1)
+    return Image.fromarray(np.stack([arr, arr, arr], axis=-1), "RGB")
+
+
+def _add_dot_noise(img: Image.Image, rng: np.random.Generator, count: int = 1500) -> Image.Image:
+    """Точечный шум: count случайных светлых пикселей."""
+    arr = np.array(img)
+    height, width = arr.shape[:2]
+    ys = rng.integers(0, height, count)
+    xs = rng.integers(0, width, count)
+    arr[ys, xs] = rng.integers(200, 256, (count, 3), dtype=np.uint8)
+    return Image.fromarray(arr, "RGB")
+
+
+def _add_color_distortion(
+    img: Image.Image,
+    rng: np.random.Generator,
+    share: float = 0.1,
+    amplitude: int = 30,
+) -> Image.Image:
+    """Случайный цветовой сдвиг ±amplitude для доли share пикселей."""
+    arr = np.array(img).astype(np.int16)
+    height, width = arr.shape[:2]
+    mask = rng.random((height, width)) < share
+    shift = rng.integers(-amplitude, amplitude + 1, (height, width, 3), dtype=np.int16)
+    arr += shift * mask[:, :, None]
+    return Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8), "RGB")
+
+
+def _to_png(img: Image.Image) -> bytes:
+    """Сохраняет изображение в PNG."""
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _random_color(rnd: random.Random, low: int, high: int) -> tuple:
+    return (rnd.randint(low, high), rnd.randint(low, high), rnd.randint(low, high))
+
+
+def _draw_wave_lines(d: ImageDraw.ImageDraw, rnd: random.Random, width: int, height: int) -> None:
+    """Волнообразные линии через середину изображения."""
+    for _ in range(5):
+        points = [(i * width // 7, rnd.randint(height // 3, 2 * height // 3)) for i in range(8)]
+        d.line(points, fill=_random_color(rnd, 170, 230), width=rnd.randint(1, 3))
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ОТРИСОВКА (выполняется в пуле процессов)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def render_dm_captcha_image(text_to_draw: str, seed: int) -> bytes:
+    """
+    Рисует капчу для ЛС (чёрные символы, шумовые линии и точки).
+
+    Args:
+        text_to_draw: Текст капчи
+        seed: Зерно случайности (процессы пула не должны
+              повторять одинаковый шум)
+
+    Returns:
+        PNG в байтах
+    """
+    rnd = random.Random(seed)
+    rng = np.random.default_rng(seed)
+    width, height = CAPTCHA_WIDTH, CAPTCHA_HEIGHT
+
+    # Фон с градиентом
+    img = _gradient_background(width, height)
+    d = ImageDraw.Draw(img)
+
+    # Горизонтальные полосы
+    for _ in range(8):
+        y = rnd.randint(0, height - 1)
+        d.line([(0, y), (width, y)], fill=_random_color(rnd, 200, 240), width=rnd.randint(2, 5))
+
+    # Линии шума
+    for _ in range(25):
+        x1, y1 = rnd.randint(0, width - 1), rnd.randint(0, height - 1)
+        x2, y2 = rnd.randint(0, width - 1), rnd.randint(0, height - 1)
+        d.line([(x1, y1), (x2, y2)], fill=_random_color(rnd, 120, 200), width=rnd.randint(1, 4))
+
+    # Точечный шум
+    img = _add_dot_noise(img, rng)
+
+    # Символы капчи
+    try:
+        fonts = _load_fonts_cached()
+    except Exception as e:
+        logger.error(f"❌ [CAPTCHA] Ошибка загрузки шрифтов: {e}")
+        fonts = [ImageFont.load_default()]
+
+    spacing = width // (len(text_to_draw) + 2)
+    x_offset = spacing
+    for ch in text_to_draw:
+        # Угол поворота ±30 градусов
+        angle = rnd.randint(-30, 30)
+        font = rnd.choice(fonts) if fonts else ImageFont.load_default()
+
+        # Временное изображение для символа
+        char_size = 200
+        char_img = Image.new("RGBA", (char_size, char_size), (255, 255, 255, 0))
+        ImageDraw.Draw(char_img).text(
+            (char_size // 4, char_size // 4), ch, font=font, fill=(0, 0, 0, 255)
+        )
+        char_img = char_img.rotate(angle, expand=True, fillcolor=(255, 255, 255, 0))
+
+        # Вставляем на основное изображение
+        img.paste(char_img, (x_offset, (height - char_img.height) // 2), char_img)
+        x_offset += spacing
+
+    return _to_png(img)
+
+
+def render_legacy_captcha_image(text_to_draw: str, seed: int) -> bytes:
+    """
+    Рисует капчу старого потока (visual_captcha_logic): цветные полосы,
+    кривые, цветовые искажения и линии поверх цветных символов.
+
+    Args:
+        text_to_draw: Текст капчи
+        seed: Зерно случайности
+
+    Returns:
+        PNG в байтах
+    """
+    rnd = random.Random(seed)
+    rng = np.random.default_rng(seed)
+    width, height = CAPTCHA_WIDTH, CAPTCHA_HEIGHT
+
+    # Фон с градиентом
+    img = _gradient_background(width, height)
+    d = ImageDraw.Draw(img)
+
+    # Цветные полосы
+    for _ in range(8):
+        y = rnd.randint(0, height - 1)
+        d.line([(0, y), (width, y)], fill=_random_color(rnd, 200, 240), width=rnd.randint(2, 5))
+
+    # Фоновые линии с разными углами
+    for _ in range(25):
+        x1, y1 = rnd.randint(0, width - 1), rnd.randint(0, height - 1)
+        x2, y2 = rnd.randint(0, width - 1), rnd.randint(0, height - 1)
+        d.line([(x1, y1), (x2, y2)], fill=_random_color(rnd, 120, 200), width=rnd.randint(1, 4))
+
+    # Точечный шум, кривые и цветовые искажения (10% пикселей)
+    img = _add_dot_noise(img, rng)
+    _draw_wave_lines(ImageDraw.Draw(img), rnd, width, height)
+    img = _add_color_distortion(img, rng)
+    d = ImageDraw.Draw(img)
+
+    try:
+        fonts = _load_fonts_cached()
+    except Exception as e:
+        logger.error(f"Ошибка загрузки шрифтов: {e}")
+        fonts = [ImageFont.load_default()]
+    default_font = ImageFont.load_default()
+
+    # Посимвольный вывод с искажениями для защиты от ботов
+    spacing = width // (len(text_to_draw) + 2)
+    x_offset = spacing
+    for i, ch in enumerate(text_to_draw):
+        # Угол поворота до ±30 градусов
+        angle = rnd.randint(-30, 30)
+        font = rnd.choice(fonts) if fonts else default_font
+
+        char_img = Image.new("RGBA", (250, 300), (255, 255, 255, 0))
+        # Чётные и нечётные символы разных оттенков
+        color = _random_color(rnd, 10, 60) if i % 2 == 0 else _random_color(rnd, 40, 90)
+        ImageDraw.Draw(char_img).text((25, 25), ch, font=font, fill=color)
+
+        # Стандартный шрифт мелкий — масштабируем
+        if font is default_font:
+            char_img = char_img.resize((750, 900), Image.Resampling.LANCZOS)
+
+        rotated = char_img.rotate(angle, expand=1, fillcolor=(255, 255, 255, 0))
+        y_pos = rnd.randint(height // 4, height // 2)
+        img.paste(rotated, (x_offset, y_pos), rotated)
+        x_offset += spacing + rnd.randint(-20, 20)
+
+    # Искажающие линии поверх текста
+    for _ in range(8):
+        start_y = rnd.randint(height // 5, 4 * height // 5)
+        end_y = rnd.randint(height // 5, 4 * height // 5)
+        d.line([(0, start_y), (width, end_y)], fill=_random_color(rnd, 150, 220), width=rnd.randint(2, 4))
+    _draw_wave_lines(d, rnd, width, height)
+
+    return _to_png(img)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ПУЛ ПРОЦЕССОВ
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Пул процессов (создаётся при первом использовании)
+_executor: Optional[ProcessPoolExecutor] = None
+# Количество процессов (0 = отрисовка в потоке)
+_executor_workers: int = 2
+
+
+def configure_render_executor(workers: int) -> None:
+    """
+    Задаёт количество процессов для отрисовки капчи.
+
+    Args:
+        workers: Количество процессов (0 = отрисовка в потоке)
+    """
+    global _executor_workers
+    _executor_workers = workers
+
+
+async def render_off_loop(render_func, text_to_draw: str) -> bytes:
+    """
+    Рисует капчу вне event loop.
+
+    Args:
+        render_func: render_dm_captcha_image или render_legacy_captcha_image
+        text_to_draw: Текст капчи
+
+    Returns:
+        PNG в байтах
+    """
+    global _executor
+    # Зерно выбирается в основном процессе — у процессов пула
+    # одинаковое состояние random после fork
+    seed = random.getrandbits(64)
+    loop = asyncio.get_running_loop()
+
+    if _executor_workers > 0:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=_executor_workers)
+        try:
+            return await loop.run_in_executor(_executor, render_func, text_to_draw, seed)
+        except BrokenProcessPool as e:
+            # Процесс пула упал — пересоздадим пул при следующем вызове
+            logger.warning(f"⚠️ [CAPTCHA] Пул отрисовки недоступен, рисуем в потоке: {e}")
+            _executor = None
+
+    return await asyncio.to_thread(render_func, text_to_draw, seed)
+
+
+def shutdown_render_executor() -> None:
+    """Останавливает пул процессов (вызывается при остановке бота)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
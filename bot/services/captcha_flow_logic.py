@@ -16,6 +16,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.database.models import ChatSettings
 from bot.services.redis_conn import redis
+from bot.services.job_scheduler import schedule_delete_message
 from bot.services import risk_gate
 from bot.services import global_mute_policy
 from bot.services.spammer_registry import (
@@ -294,15 +295,7 @@ async def schedule_message_deletion(bot: Bot, chat_id: int, user_id: int, ttl: i
     if message_id is None:
         return
 
-    async def _delete_later():
-        try:
-            await asyncio.sleep(ttl)
-            await bot.delete_message(chat_id=user_id, message_id=message_id)
-        except Exception as exc:  # noqa: BLE001
-            if "message to delete not found" not in str(exc).lower():
-                logger.debug("Failed to remove captcha message %s: %s", message_id, exc)
-
-    asyncio.create_task(_delete_later())
+    await schedule_delete_message(bot, user_id, message_id, ttl)
 
 
 async def evaluate_admission(
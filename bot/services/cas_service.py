@@ -8,16 +8,38 @@
 # API: https://api.cas.chat/check?user_id=XXX
 #
 # Документация: https://cas.chat/api
+#
+# Один CASClient на процесс:
+# - общая aiohttp сессия с пулом соединений (без TLS handshake на каждый запрос)
+# - кэш результатов в памяти и в Redis с разными TTL для "в базе" и "чист"
+# - параллельные проверки одного user_id ждут один и тот же запрос
+# - circuit breaker: если CAS тормозит или падает, временно не ходим в него
+#
+# Опционально — локальное зеркало выгрузки CAS (export.csv):
+# все забаненные ID в отсортированном массиве, проверка через bisect
+# без сетевого запроса. Обновляется в фоне с атомарной заменой.
 # ============================================================
 
 # Импортируем aiohttp для асинхронных HTTP запросов
 import aiohttp
-# Импортируем asyncio для таймаутов
+# Импортируем array для компактного хранения ID из выгрузки CAS
+from array import array
+# Импортируем bisect для поиска в отсортированном массиве
+from bisect import bisect_left
+# Импортируем asyncio для таймаутов и объединения запросов
 import asyncio
+# Импортируем json для хранения результатов в Redis
+import json
 # Импортируем logging для логирования ошибок
 import logging
+# Импортируем os для проверки локального файла выгрузки
+import os
+# Импортируем time для TTL кэша и circuit breaker
+import time
+# Импортируем OrderedDict для LRU кэша в памяти
+from collections import OrderedDict
 # Импортируем типы для аннотаций
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple, Iterable
 
 # Создаём логгер для этого модуля
 logger = logging.getLogger(__name__)
@@ -30,7 +52,535 @@ logger = logging.getLogger(__name__)
 CAS_API_URL = "https://api.cas.chat/check"
 # Таймаут запроса в секундах (чтобы не зависать если CAS недоступен)
 CAS_TIMEOUT_SECONDS = 5
+# Максимум одновременных соединений к CAS
+CAS_POOL_LIMIT = 20
+
+# TTL кэша: из базы CAS удаляют редко — "в базе" храним долго,
+# а чистый пользователь может попасть в базу в любой момент
+CAS_POSITIVE_TTL = 6 * 3600
+CAS_NEGATIVE_TTL = 30 * 60
+# Максимум записей в кэше в памяти (старые вытесняются)
+CAS_MEMORY_CACHE_SIZE = 50_000
+# Префикс ключей кэша в Redis
+CAS_REDIS_PREFIX = "cas:"
+
+# Circuit breaker: после N ошибок подряд не ходим в CAS M секунд
+CAS_BREAKER_THRESHOLD = 5
+CAS_BREAKER_COOLDOWN = 60
+
+# Полная выгрузка забаненных ID (по одному в строке)
+CAS_EXPORT_URL = "https://api.cas.chat/export.csv"
+# Выгрузка большая — отдельный таймаут на скачивание
+CAS_EXPORT_TIMEOUT_SECONDS = 120
+
+
+def _empty_result() -> Dict[str, Any]:
+    """Результат по умолчанию — не в базе CAS."""
+    return {
+        "is_banned": False,
+        "offenses": 0,
+        "time_added": None,
+        "error": None
+    }
+
+
+# ============================================================
+# КЛИЕНТ CAS
+# ============================================================
+
+class CASClient:
+    """
+    Клиент CAS API с пулом соединений, кэшем и circuit breaker.
+
+    Ошибки (таймаут, HTTP != 200, сеть) не кэшируются — следующая
+    проверка снова пойдёт в CAS (если breaker не разомкнут).
+    """
+
+    def __init__(
+        self,
+        redis=None,
+        api_url: str = CAS_API_URL,
+        timeout: float = CAS_TIMEOUT_SECONDS,
+        positive_ttl: int = CAS_POSITIVE_TTL,
+        negative_ttl: int = CAS_NEGATIVE_TTL,
+        memory_size: int = CAS_MEMORY_CACHE_SIZE,
+        breaker_threshold: int = CAS_BREAKER_THRESHOLD,
+        breaker_cooldown: float = CAS_BREAKER_COOLDOWN
+    ):
+        """
+        Args:
+            redis: Клиент Redis для общего кэша (None — только память)
+            api_url: URL метода check (в тестах — локальный сервер)
+            timeout: Таймаут запроса в секундах
+            positive_ttl: TTL кэша для пользователей из базы CAS
+            negative_ttl: TTL кэша для чистых пользователей
+            memory_size: Максимум записей в кэше в памяти
+            breaker_threshold: Ошибок подряд до размыкания breaker
+            breaker_cooldown: На сколько секунд размыкается breaker
+        """
+        self._redis = redis
+        self._api_url = api_url
+        self._timeout = timeout
+        self._positive_ttl = positive_ttl
+        self._negative_ttl = negative_ttl
+        self._memory_size = memory_size
+        self._breaker_threshold = breaker_threshold
+        self._breaker_cooldown = breaker_cooldown
+
+        # Общая HTTP сессия (создаётся при первом запросе внутри event loop)
+        self._session: Optional[aiohttp.ClientSession] = None
+        # user_id -> (expires_at, result)
+        self._cache: "OrderedDict[int, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # user_id -> запрос, который уже выполняется
+        self._in_flight: Dict[int, asyncio.Task] = {}
+
+        # Состояние circuit breaker
+        self._failures = 0
+        self._open_until = 0.0
+
+        # Счётчики для логов и тестов
+        self.metrics = {
+            "requests": 0,
+            "memory_hits": 0,
+            "redis_hits": 0,
+            "coalesced": 0,
+            "breaker_rejected": 0,
+        }
+
+    # ─────────────────────────────────────────────────────────
+    # ПУБЛИЧНЫЙ МЕТОД
+    # ─────────────────────────────────────────────────────────
+
+    async def check(self, user_id: int) -> Dict[str, Any]:
+        """
+        Проверяет пользователя в базе CAS (с кэшем и объединением запросов).
+
+        Args:
+            user_id: Telegram ID пользователя
+
+        Returns:
+            Словарь как у check_cas_ban (копия — можно менять)
+        """
+        # ─────────────────────────────────────────────────────
+        # ШАГ 1: Кэш в памяти
+        # ─────────────────────────────────────────────────────
+        cached = self._get_memory(user_id)
+        if cached is not None:
+            self.metrics["memory_hits"] += 1
+            return dict(cached)
+
+        # ─────────────────────────────────────────────────────
+        # ШАГ 2: Запрос уже выполняется — ждём его
+        # ─────────────────────────────────────────────────────
+        task = self._in_flight.get(user_id)
+        if task is not None:
+            self.metrics["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(self._load(user_id))
+            self._in_flight[user_id] = task
+            task.add_done_callback(lambda _t, uid=user_id: self._in_flight.pop(uid, None))
+
+        # shield: отмена одного ожидающего не отменяет запрос для остальных
+        return dict(await asyncio.shield(task))
+
+    # ─────────────────────────────────────────────────────────
+    # ЗАГРУЗКА (Redis → CAS API)
+    # ─────────────────────────────────────────────────────────
+
+    async def _load(self, user_id: int) -> Dict[str, Any]:
+        """Достаёт результат из Redis или запрашивает CAS и кэширует."""
+        result = await self._get_redis(user_id)
+        if result is not None:
+            self.metrics["redis_hits"] += 1
+            self._set_memory(user_id, result)
+            return result
+
+        # Breaker разомкнут — не ждём таймаут от лежащего CAS
+        if time.monotonic() < self._open_until:
+            self.metrics["breaker_rejected"] += 1
+            result = _empty_result()
+            result["error"] = "circuit_open"
+            return result
+
+        result = await self._fetch(user_id)
+        self._record_outcome(result["error"] is None)
+
+        # Ошибки не кэшируем
+        if result["error"] is None:
+            self._set_memory(user_id, result)
+            await self._set_redis(user_id, result)
+        return result
+
+    async def _fetch(self, user_id: int) -> Dict[str, Any]:
+        """Один запрос к CAS API через общую сессию."""
+        result = _empty_result()
+        self.metrics["requests"] += 1
+
+        try:
+            session = self._get_session()
+
+            # Отправляем GET запрос к API CAS
+            async with session.get(self._api_url, params={"user_id": str(user_id)}) as response:
+                # Проверяем статус ответа (должен быть 200 OK)
+                if response.status != 200:
+                    logger.warning(
+                        f"CAS API вернул статус {response.status} для user_id={user_id}"
+                    )
+                    result["error"] = f"HTTP {response.status}"
+                    return result
+
+                # content_type=None: CAS иногда отдаёт JSON как text/plain
+                data = await response.json(content_type=None)
+
+            # ─────────────────────────────────────────────────
+            # Структура ответа CAS API:
+            # Если пользователь В базе:
+            # {"ok": true, "result": {"offenses": 1, "time_added": "2024-01-15T..."}}
+            #
+            # Если пользователь НЕ в базе:
+            # {"ok": false}
+            # ─────────────────────────────────────────────────
+            if data.get("ok"):
+                # Пользователь НАЙДЕН в базе CAS — он спамер!
+                result["is_banned"] = True
+                cas_result = data.get("result") or {}
+                result["offenses"] = cas_result.get("offenses", 0)
+                result["time_added"] = cas_result.get("time_added")
+
+                logger.info(
+                    f"CAS: user_id={user_id} НАЙДЕН в базе! "
+                    f"Нарушений: {result['offenses']}, "
+                    f"Добавлен: {result['time_added']}"
+                )
+
+        except asyncio.TimeoutError:
+            # Таймаут запроса — CAS не ответил вовремя
+            logger.warning(f"CAS API таймаут для user_id={user_id}")
+            result["error"] = "timeout"
+
+        except aiohttp.ClientError as e:
+            # Ошибка сети или подключения
+            logger.error(f"CAS API ошибка сети для user_id={user_id}: {e}")
+            result["error"] = f"network: {str(e)}"
+
+        except Exception as e:
+            # Неожиданная ошибка
+            logger.exception(f"CAS API неожиданная ошибка для user_id={user_id}: {e}")
+            result["error"] = f"unexpected: {str(e)}"
+
+        return result
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Возвращает общую сессию (создаёт при первом вызове)."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=CAS_POOL_LIMIT, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self._timeout)
+            )
+        return self._session
+
+    # ─────────────────────────────────────────────────────────
+    # CIRCUIT BREAKER
+    # ─────────────────────────────────────────────────────────
+
+    def _record_outcome(self, success: bool) -> None:
+        """Учитывает результат запроса в состоянии breaker."""
+        if success:
+            self._failures = 0
+            return
+
+        self._failures += 1
+        if self._failures >= self._breaker_threshold:
+            # После cooldown пропускаем один пробный запрос:
+            # при новой ошибке breaker сразу размыкается снова
+            self._failures = self._breaker_threshold - 1
+            self._open_until = time.monotonic() + self._breaker_cooldown
+            logger.warning(
+                f"CAS API недоступен — проверки пропускаются {self._breaker_cooldown} сек"
+            )
+
+    @property
+    def is_open(self) -> bool:
+        """Разомкнут ли breaker (CAS сейчас не опрашивается)."""
+        return time.monotonic() < self._open_until
+
+    # ─────────────────────────────────────────────────────────
+    # КЭШ
+    # ─────────────────────────────────────────────────────────
+
+    def _ttl_for(self, result: Dict[str, Any]) -> int:
+        """TTL кэша для результата."""
+        return self._positive_ttl if result["is_banned"] else self._negative_ttl
+
+    def _get_memory(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Результат из кэша в памяти (None — нет или истёк)."""
+        entry = self._cache.get(user_id)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at <= time.monotonic():
+            del self._cache[user_id]
+            return None
+        self._cache.move_to_end(user_id)
+        return result
+
+    def _set_memory(self, user_id: int, result: Dict[str, Any]) -> None:
+        """Кладёт результат в кэш в памяти."""
+        self._cache[user_id] = (time.monotonic() + self._ttl_for(result), result)
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self._memory_size:
+            self._cache.popitem(last=False)
+
+    async def _get_redis(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Результат из Redis (общий кэш для всех реплик)."""
+        if self._redis is None:
+            return None
+        try:
+            raw = await self._redis.get(f"{CAS_REDIS_PREFIX}{user_id}")
+            if raw is None:
+                return None
+            result = _empty_result()
+            result.update(json.loads(raw))
+            return result
+        except Exception as e:
+            logger.debug(f"CAS: ошибка чтения кэша Redis для user_id={user_id}: {e}")
+            return None
+
+    async def _set_redis(self, user_id: int, result: Dict[str, Any]) -> None:
+        """Сохраняет результат в Redis с TTL по типу результата."""
+        if self._redis is None:
+            return
+        try:
+            payload = {k: result[k] for k in ("is_banned", "offenses", "time_added")}
+            await self._redis.set(
+                f"{CAS_REDIS_PREFIX}{user_id}", json.dumps(payload), ex=self._ttl_for(result)
+            )
+        except Exception as e:
+            logger.debug(f"CAS: ошибка записи кэша Redis для user_id={user_id}: {e}")
+
+    # ─────────────────────────────────────────────────────────
+    # ЗАКРЫТИЕ
+    # ─────────────────────────────────────────────────────────
+
+    async def close(self) -> None:
+        """Закрывает HTTP сессию."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+# ============================================================
+# ЛОКАЛЬНОЕ ЗЕРКАЛО ВЫГРУЗКИ CAS
+# ============================================================
+
+class CASBanSet:
+    """
+    Неизменяемое множество забаненных ID.
+
+    Отсортированный array('q') — 8 байт на ID (против ~60+ у set[int]),
+    проверка через bisect за O(log n).
+    """
+
+    __slots__ = ("_ids",)
 
+    def __init__(self, ids: Iterable[int] = ()):
+        self._ids = array("q", sorted(set(ids)))
+
+    @classmethod
+    def from_export(cls, data: str) -> "CASBanSet":
+        """
+        Разбирает текст выгрузки CAS.
+
+        Берётся первое поле каждой строки; заголовки и мусор пропускаются.
+        """
+        ids = []
+        for line in data.splitlines():
+            field = line.split(",", 1)[0].strip()
+            if field.lstrip("-").isdigit():
+                ids.append(int(field))
+        return cls(ids)
+
+    def __contains__(self, user_id: int) -> bool:
+        ids = self._ids
+        i = bisect_left(ids, user_id)
+        return i < len(ids) and ids[i] == user_id
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+class CASExportMirror:
+    """
+    Фоновое зеркало выгрузки CAS.
+
+    Пока выгрузка не загружена, contains() возвращает None — проверки
+    идут через CASClient. При ошибке обновления остаётся прежний набор.
+    """
+
+    def __init__(
+        self,
+        source: str = CAS_EXPORT_URL,
+        refresh_interval: float = 3600,
+        timeout: float = CAS_EXPORT_TIMEOUT_SECONDS
+    ):
+        """
+        Args:
+            source: URL выгрузки или путь к локальному файлу
+            refresh_interval: Период обновления в секундах
+            timeout: Таймаут скачивания выгрузки
+        """
+        self._source = source
+        self._refresh_interval = refresh_interval
+        self._timeout = timeout
+        # Текущий набор (заменяется целиком — читатели не видят полусобранный)
+        self._bans: Optional[CASBanSet] = None
+        self._task: Optional[asyncio.Task] = None
+        # Когда набор последний раз успешно обновлён (time.time)
+        self.loaded_at: Optional[float] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        """Загружена ли выгрузка хотя бы раз."""
+        return self._bans is not None
+
+    def contains(self, user_id: int) -> Optional[bool]:
+        """
+        Есть ли пользователь в выгрузке.
+
+        Returns:
+            True/False, или None если выгрузка ещё не загружена
+        """
+        bans = self._bans
+        if bans is None:
+            return None
+        return user_id in bans
+
+    async def refresh(self) -> bool:
+        """
+        Загружает выгрузку и атомарно заменяет набор.
+
+        Returns:
+            True если набор обновлён
+        """
+        try:
+            data = await self._read_source()
+            # Разбор миллионов строк — в потоке, чтобы не блокировать event loop
+            bans = await asyncio.to_thread(CASBanSet.from_export, data)
+        except Exception as e:
+            logger.warning(f"CAS: не удалось обновить выгрузку из {self._source}: {e}")
+            return False
+
+        if not len(bans):
+            # Пустая выгрузка — скорее сбой на стороне CAS, чем пустая база
+            logger.warning("CAS: выгрузка пуста — оставляем прежний набор")
+            return False
+
+        self._bans = bans
+        self.loaded_at = time.time()
+        logger.info(f"CAS: выгрузка обновлена, {len(bans)} ID")
+        return True
+
+    async def _read_source(self) -> str:
+        """Читает выгрузку из локального файла или по URL."""
+        if os.path.exists(self._source):
+            return await asyncio.to_thread(self._read_file)
+
+        timeout = aiohttp.ClientTimeout(total=self._timeout)
+        # Запрос раз в refresh_interval — отдельная сессия здесь дешевле пула
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.get(self._source) as response:
+                response.raise_for_status()
+                return await response.text()
+
+    def _read_file(self) -> str:
+        with open(self._source, encoding="utf-8") as f:
+            return f.read()
+
+    async def _refresh_loop(self) -> None:
+        """Загружает набор сразу и затем периодически обновляет."""
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self._refresh_interval)
+
+    async def start(self) -> None:
+        """Запускает фоновую загрузку и обновление."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        """Останавливает фоновое обновление."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# ============================================================
+# ГЛОБАЛЬНЫЙ ЭКЗЕМПЛЯР
+# ============================================================
+
+_cas_client: Optional[CASClient] = None
+
+
+def get_cas_client() -> CASClient:
+    """
+    Возвращает глобальный клиент CAS (создаёт при первом вызове).
+
+    Returns:
+        Экземпляр CASClient
+    """
+    global _cas_client
+    if _cas_client is None:
+        # Lazy import: общий Redis для кэша результатов
+        from bot.services.redis_conn import redis
+        _cas_client = CASClient(redis=redis)
+    return _cas_client
+
+
+async def close_cas_client() -> None:
+    """Закрывает глобальный клиент (вызывается при остановке бота)."""
+    global _cas_client
+    if _cas_client is not None:
+        await _cas_client.close()
+        _cas_client = None
+
+
+_cas_mirror: Optional[CASExportMirror] = None
+
+
+def get_cas_mirror() -> Optional[CASExportMirror]:
+    """Возвращает зеркало выгрузки CAS (None — зеркало не запущено)."""
+    return _cas_mirror
+
+
+async def start_cas_mirror(source: str = CAS_EXPORT_URL, refresh_interval: float = 3600) -> None:
+    """
+    Запускает зеркало выгрузки CAS (вызывается при старте бота).
+
+    Выгрузка скачивается в фоне и не задерживает старт: пока она
+    не загружена (или если загрузка не удалась), проверки идут через API.
+    """
+    global _cas_mirror
+    if _cas_mirror is None:
+        _cas_mirror = CASExportMirror(source=source, refresh_interval=refresh_interval)
+        await _cas_mirror.start()
+
+
+async def stop_cas_mirror() -> None:
+    """Останавливает зеркало (вызывается при остановке бота)."""
+    global _cas_mirror
+    if _cas_mirror is not None:
+        await _cas_mirror.stop()
+        _cas_mirror = None
+
+
+# ============================================================
+# ФУНКЦИИ ПРОВЕРКИ
+# ============================================================
 
 async def check_cas_ban(user_id: int) -> Dict[str, Any]:
     """
@@ -38,6 +588,9 @@ async def check_cas_ban(user_id: int) -> Dict[str, Any]:
 
     CAS — бесплатная глобальная база спамеров Telegram.
     Содержит миллионы заблокированных пользователей.
+    Если загружено зеркало выгрузки — ответ из него без сети
+    (offenses/time_added в выгрузке нет). Иначе — через CASClient,
+    результаты кэшируются, повторные проверки не ходят в API.
 
     Args:
         user_id: Telegram ID пользователя для проверки
@@ -56,86 +609,14 @@ async def check_cas_ban(user_id: int) -> Dict[str, Any]:
         >>> if result["is_banned"]:
         ...     print(f"Спамер! Нарушений: {result['offenses']}")
     """
-    # Результат по умолчанию — не в базе CAS
-    result = {
-        "is_banned": False,
-        "offenses": 0,
-        "time_added": None,
-        "error": None
-    }
+    if _cas_mirror is not None:
+        in_export = _cas_mirror.contains(user_id)
+        if in_export is not None:
+            result = _empty_result()
+            result["is_banned"] = in_export
+            return result
 
-    try:
-        # Создаём таймаут для запроса (не зависаем если CAS недоступен)
-        timeout = aiohttp.ClientTimeout(total=CAS_TIMEOUT_SECONDS)
-
-        # Создаём HTTP сессию для запроса
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            # Формируем URL с параметром user_id
-            url = f"{CAS_API_URL}?user_id={user_id}"
-
-            # Отправляем GET запрос к API CAS
-            async with session.get(url) as response:
-                # Проверяем статус ответа (должен быть 200 OK)
-                if response.status != 200:
-                    # Логируем ошибку если статус не 200
-                    logger.warning(
-                        f"CAS API вернул статус {response.status} для user_id={user_id}"
-                    )
-                    # Возвращаем результат с ошибкой
-                    result["error"] = f"HTTP {response.status}"
-                    return result
-
-                # Парсим JSON ответ от API
-                data = await response.json()
-
-                # ─────────────────────────────────────────────────
-                # Структура ответа CAS API:
-                # Если пользователь В базе:
-                # {"ok": true, "result": {"offenses": 1, "time_added": "2024-01-15T..."}}
-                #
-                # Если пользователь НЕ в базе:
-                # {"ok": false}
-                # ─────────────────────────────────────────────────
-
-                # Проверяем поле "ok" — если True, пользователь в базе CAS
-                if data.get("ok"):
-                    # Пользователь НАЙДЕН в базе CAS — он спамер!
-                    result["is_banned"] = True
-
-                    # Извлекаем детали из поля "result"
-                    cas_result = data.get("result", {})
-                    # Количество зафиксированных нарушений
-                    result["offenses"] = cas_result.get("offenses", 0)
-                    # Когда пользователь был добавлен в базу
-                    result["time_added"] = cas_result.get("time_added")
-
-                    # Логируем обнаружение спамера (для отладки)
-                    logger.info(
-                        f"CAS: user_id={user_id} НАЙДЕН в базе! "
-                        f"Нарушений: {result['offenses']}, "
-                        f"Добавлен: {result['time_added']}"
-                    )
-                else:
-                    # Пользователь НЕ найден в базе CAS — он чист
-                    result["is_banned"] = False
-
-    except asyncio.TimeoutError:
-        # Таймаут запроса — CAS не ответил вовремя
-        logger.warning(f"CAS API таймаут для user_id={user_id}")
-        result["error"] = "timeout"
-
-    except aiohttp.ClientError as e:
-        # Ошибка сети или подключения
-        logger.error(f"CAS API ошибка сети для user_id={user_id}: {e}")
-        result["error"] = f"network: {str(e)}"
-
-    except Exception as e:
-        # Неожиданная ошибка
-        logger.exception(f"CAS API неожиданная ошибка для user_id={user_id}: {e}")
-        result["error"] = f"unexpected: {str(e)}"
-
-    # Возвращаем результат проверки
-    return result
+    return await get_cas_client().check(user_id)
 
 
 async def is_cas_banned(user_id: int) -> bool:
@@ -155,6 +636,12 @@ async def is_cas_banned(user_id: int) -> bool:
         >>> if await is_cas_banned(123456789):
         ...     await ban_user(123456789)
     """
+    # Зеркало выгрузки — ответ без сети
+    if _cas_mirror is not None:
+        in_export = _cas_mirror.contains(user_id)
+        if in_export is not None:
+            return in_export
+
     # Вызываем полную проверку
     result = await check_cas_ban(user_id)
     # Возвращаем только флаг is_banned
@@ -12,6 +12,7 @@
 # Импортируем основные компоненты для удобного доступа извне
 # Пример: from bot.services.content_filter import FilterManager
 from bot.services.content_filter.text_normalizer import TextNormalizer
+from bot.services.content_filter.message_analysis import MessageAnalysis
 from bot.services.content_filter.word_filter import WordFilter
 from bot.services.content_filter.filter_manager import FilterManager
 
@@ -37,6 +38,7 @@ from bot.services.content_filter.cross_message_service import (
 __all__ = [
     # Базовые компоненты
     'TextNormalizer',
+    'MessageAnalysis',
     'WordFilter',
     'FilterManager',
     # Детекторы Phase 2
@@ -56,11 +56,37 @@ from bot.services.content_filter.text_normalizer import get_normalizer
 
 # Импортируем функции fuzzy/ngram matching (общие из scam_detector)
 from bot.services.content_filter.scam_detector import fuzzy_match, extract_ngrams, ngram_match
+# Импортируем общий разбор текста сообщения
+from bot.services.content_filter.message_analysis import MessageAnalysis
 
 # Создаём логгер для этого модуля
 logger = logging.getLogger(__name__)
 
 
+# ============================================================
+# LUA СКРИПТ
+# ============================================================
+
+# Атомарное накопление скора: INCRBY вместо get+setex, поэтому
+# параллельные сообщения (альбомы) не теряют баллы.
+# Окно "сдвигается" — TTL обновляется при каждом сообщении.
+# KEYS: score, history, messages
+# ARGV: score, window_seconds, history_entry, max_history, message_id
+# Возвращает [total, history_list, message_ids]
+_ADD_SCORE_SCRIPT = """
+local total = redis.call('INCRBY', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('RPUSH', KEYS[2], ARGV[3])
+redis.call('LTRIM', KEYS[2], -tonumber(ARGV[4]), -1)
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+if tonumber(ARGV[5]) > 0 then
+    redis.call('SADD', KEYS[3], ARGV[5])
+    redis.call('EXPIRE', KEYS[3], ARGV[2])
+end
+return {total, redis.call('LRANGE', KEYS[2], 0, -1), redis.call('SMEMBERS', KEYS[3])}
+"""
+
+
 # ============================================================
 # РЕЗУЛЬТАТ ПРОВЕРКИ
 # ============================================================
@@ -245,20 +271,8 @@ class CrossMessageService:
         history_key = self._get_history_key(chat_id, user_id)
         messages_key = self._get_messages_key(chat_id, user_id)
 
-        # Получаем текущий накопленный скор
-        current_score_raw = await self._redis.get(score_key)
-        current_score = int(current_score_raw) if current_score_raw else 0
-
-        # Добавляем новый скор
-        new_total = current_score + score
-
-        # Сохраняем новый скор с TTL
-        # ВАЖНО: setex устанавливает TTL при каждом обновлении
-        # Это значит что окно "сдвигается" с каждым сообщением
-        await self._redis.setex(score_key, window_seconds, str(new_total))
-
         # ─────────────────────────────────────────────────────────
-        # Добавляем запись в историю сообщений
+        # Запись истории сообщений
         # ─────────────────────────────────────────────────────────
         # Формируем запись истории (теперь включает message_id и полный текст)
         history_entry = {
@@ -272,24 +286,19 @@ class CrossMessageService:
             'msg_id': message_id  # ID сообщения для удаления
         }
 
-        # Добавляем в список (RPUSH) и обрезаем до MAX_HISTORY_SIZE (LTRIM)
-        await self._redis.rpush(history_key, json.dumps(history_entry))
-        await self._redis.ltrim(history_key, -self.MAX_HISTORY_SIZE, -1)
-        # Устанавливаем TTL для истории (такой же как для скора)
-        await self._redis.expire(history_key, window_seconds)
-
         # ─────────────────────────────────────────────────────────
-        # Сохраняем message_id для последующего удаления
+        # Скор, история и ID сообщений — одним Lua-скриптом
         # ─────────────────────────────────────────────────────────
-        # Храним ID сообщений отдельно для быстрого доступа при удалении
-        if message_id > 0:
-            # Добавляем ID сообщения в SET (уникальные значения)
-            await self._redis.sadd(messages_key, str(message_id))
-            # Устанавливаем TTL для списка сообщений
-            await self._redis.expire(messages_key, window_seconds)
-
-        # Получаем всю историю для возврата
-        history_raw = await self._redis.lrange(history_key, 0, -1)
+        # Скрипт атомарно прибавляет скор, дописывает историю (с обрезкой
+        # до MAX_HISTORY_SIZE), запоминает message_id для удаления
+        # и возвращает итоговое состояние за один round trip
+        total_raw, history_raw, message_ids_raw = await self._redis.eval(
+            _ADD_SCORE_SCRIPT, 3, score_key, history_key, messages_key,
+            score, window_seconds, json.dumps(history_entry),
+            self.MAX_HISTORY_SIZE, message_id,
+        )
+        new_total = int(total_raw)
+
         history = []
         for entry in history_raw:
             try:
@@ -297,8 +306,7 @@ class CrossMessageService:
             except json.JSONDecodeError:
                 pass
 
-        # Получаем список ID сообщений для возврата
-        message_ids_raw = await self._redis.smembers(messages_key)
+        # Список ID сообщений для возврата
         message_ids = [int(mid) for mid in message_ids_raw if mid.isdigit()]
 
         # Логируем добавление скора
@@ -460,7 +468,8 @@ class CrossMessageService:
         text: str,
         session: AsyncSession,
         window_seconds: int,
-        threshold: int
+        threshold: int,
+        analysis: Optional[MessageAnalysis] = None
     ) -> CrossMessageCheckResult:
         """
         Проверяет текст по СВОИМ паттернам кросс-сообщений.
@@ -476,6 +485,7 @@ class CrossMessageService:
             session: Сессия БД
             window_seconds: Временное окно накопления
             threshold: Порог срабатывания
+            analysis: Общий разбор текста (если None — создаётся локально)
 
         Returns:
             CrossMessageCheckResult с информацией о скоре и срабатывании
@@ -500,12 +510,11 @@ class CrossMessageService:
         # ─────────────────────────────────────────────────────────
         # ШАГ 2: Нормализуем текст (общий TextNormalizer)
         # ─────────────────────────────────────────────────────────
-        normalizer = get_normalizer()
-        normalized = normalizer.normalize(text).lower()
-
-        # Предварительно извлекаем n-граммы для ngram matching
-        text_bigrams = extract_ngrams(normalized, n=2)
-        text_trigrams = extract_ngrams(normalized, n=3)
+        # Если координатор уже разобрал сообщение — берём готовое
+        if analysis is None:
+            analysis = MessageAnalysis(text, normalizer=get_normalizer())
+        normalized = analysis.normalized_lower
+        text_lower = analysis.lower
 
         # ─────────────────────────────────────────────────────────
         # ШАГ 3: Проверяем каждый паттерн
@@ -529,7 +538,7 @@ class CrossMessageService:
                         matched = True
                         match_method = 'regex'
                     # Если не нашли — пробуем в оригинальном тексте
-                    elif regex.search(text.lower()):
+                    elif regex.search(text_lower):
                         matched = True
                         match_method = 'regex'
                 except re.error as e:
@@ -550,7 +559,7 @@ class CrossMessageService:
                     matched = True
                     match_method = 'word'
                 # Пробуем оригинальный паттерн в оригинальном тексте
-                elif re.search(r'\b' + re.escape(pattern.pattern.lower()) + r'\b', text.lower()):
+                elif re.search(r'\b' + re.escape(pattern.pattern.lower()) + r'\b', text_lower):
                     matched = True
                     match_method = 'word'
 
@@ -563,7 +572,7 @@ class CrossMessageService:
                     matched = True
                     match_method = 'phrase'
                 # Точное совпадение подстроки (оригинальный)
-                elif pattern.pattern.lower() in text.lower():
+                elif pattern.pattern.lower() in text_lower:
                     matched = True
                     match_method = 'phrase'
                 # Fuzzy matching (порог 0.8) — только для длинных паттернов
@@ -577,13 +586,13 @@ class CrossMessageService:
                     # Биграммы для паттернов из 2+ слов
                     if len(pattern_words) >= 2:
                         pattern_bigrams = extract_ngrams(pattern.normalized, n=2)
-                        if ngram_match(text_bigrams, pattern_bigrams, min_overlap=0.6):
+                        if ngram_match(analysis.bigrams, pattern_bigrams, min_overlap=0.6):
                             matched = True
                             match_method = 'ngram'
                     # Триграммы для паттернов из 3+ слов
                     if not matched and len(pattern_words) >= 3:
                         pattern_trigrams = extract_ngrams(pattern.normalized, n=3)
-                        if ngram_match(text_trigrams, pattern_trigrams, min_overlap=0.5):
+                        if ngram_match(analysis.trigrams, pattern_trigrams, min_overlap=0.5):
                             matched = True
                             match_method = 'ngram'
 
@@ -15,8 +15,6 @@ from typing import Optional, NamedTuple, List, Dict, Any
 from dataclasses import dataclass
 # Импортируем логгер
 import logging
-# Импортируем re для работы с регулярными выражениями (word boundaries)
-import re
 # Импортируем datetime для работы со временем
 from datetime import datetime, timedelta
 
@@ -38,15 +36,15 @@ from bot.database.models_content_filter import (
 # Импортируем подмодули
 from bot.services.content_filter.word_filter import WordFilter, WordMatchResult
 from bot.services.content_filter.text_normalizer import TextNormalizer, get_normalizer
+# Импортируем общий разбор текста сообщения
+from bot.services.content_filter.message_analysis import MessageAnalysis
 # Импортируем детекторы Phase 2
-from bot.services.content_filter.scam_detector import (
-    ScamDetector, get_scam_detector,
-    # Функции для fuzzy и n-gram matching (используются в CustomSpamSection)
-    fuzzy_match, extract_ngrams, ngram_match,
-    # Функция для получения контекста fuzzy match (только для логирования)
-    get_fuzzy_match_context
-)
+from bot.services.content_filter.scam_detector import ScamDetector, get_scam_detector
+# Импортируем скомпилированный индекс паттернов кастомных разделов
+from bot.services.content_filter.section_matcher import get_section_matcher_cache
 from bot.services.content_filter.flood_detector import FloodDetector, create_flood_detector
+# Импортируем кэш настроек групп
+from bot.services.settings_cache import get_settings_cache, register_cached_model
 # Импортируем CAS сервис для проверки в глобальной базе спамеров
 from bot.services.cas_service import is_cas_banned
 # Импортируем spammer_registry для добавления и проверки в БД спаммеров
@@ -55,6 +53,9 @@ from bot.services.spammer_registry import record_spammer_incident, get_spammer_r
 # Создаём логгер
 logger = logging.getLogger(__name__)
 
+# Изменения настроек сбрасывают кэш настроек (settings_cache)
+register_cached_model(ContentFilterSettings, 'content_filter')
+
 
 class FilterResult(NamedTuple):
     """
@@ -138,7 +139,7 @@ class SectionCandidate:
     Сохраняет все данные раздела чтобы после цикла
     создать FilterResult для победителя (раздел с max score).
     """
-    # Объект раздела CustomSpamSection
+    # Снимок раздела (SectionSnapshot из section_matcher)
     section: Any
     # Набранные баллы
     total_score: int
@@ -203,7 +204,8 @@ class FilterManager:
     async def check_message(
         self,
         message: Message,
-        session: AsyncSession
+        session: AsyncSession,
+        analysis: Optional[MessageAnalysis] = None
     ) -> FilterResult:
         """
         Проверяет сообщение всеми включёнными фильтрами.
@@ -217,6 +219,8 @@ class FilterManager:
         Args:
             message: Сообщение для проверки
             session: Сессия БД
+            analysis: Общий разбор текста от координатора
+                (если None — создаётся здесь)
 
         Returns:
             FilterResult с информацией о срабатывании
@@ -227,7 +231,9 @@ class FilterManager:
         # ─────────────────────────────────────────────────────────
         # ШАГ 1: Загружаем настройки группы
         # ─────────────────────────────────────────────────────────
-        settings = await self._get_settings(chat_id, session)
+        settings = await get_settings_cache().get_or_load(
+            'content_filter', chat_id, lambda: self._get_settings(chat_id, session)
+        )
 
         # Если настроек нет - модуль не настроен для этой группы
         if not settings:
@@ -246,8 +252,12 @@ class FilterManager:
             logger.info(f"[FilterManager] ⏸️ Модуль выключен для чата {chat_id}")
             return FilterResult(should_act=False)
 
-        # Получаем текст сообщения
-        text = message.text or message.caption or ''
+        # Получаем текст сообщения.
+        # Нормализация, lowercase и n-граммы считаются один раз
+        # в MessageAnalysis и переиспользуются всеми детекторами.
+        if analysis is None:
+            analysis = MessageAnalysis.from_message(message, normalizer=self._normalizer)
+        text = analysis.text
 
         # Получаем user_id для детекторов
         user_id = message.from_user.id if message.from_user else 0
@@ -448,7 +458,8 @@ class FilterManager:
             word_result = await self._word_filter.check(
                 text=text,
                 chat_id=chat_id,
-                session=session
+                session=session,
+                analysis=analysis
             )
 
             # Если найдено запрещённое слово
@@ -516,8 +527,10 @@ class FilterManager:
             from bot.services.content_filter.scam_pattern_service import get_section_service
             section_service = get_section_service()
 
-            # Получаем все активные разделы группы
-            sections = await section_service.get_sections(chat_id, session, enabled_only=True)
+            # Получаем скомпилированный индекс всех активных разделов и паттернов группы.
+            # Индекс строится один раз и живёт в памяти до изменения паттернов
+            index = await get_section_matcher_cache().get_index(chat_id, session)
+            sections = index.sections
 
             # Логируем для отладки сколько разделов найдено
             logger.info(
@@ -526,8 +539,15 @@ class FilterManager:
             )
 
             if sections:
-                # Нормализуем текст один раз
-                normalized_text = self._normalizer.normalize(text).lower()
+                # Нормализованный текст из общего разбора
+                normalized_text = analysis.normalized_lower
+
+                # Один проход по тексту для всех разделов:
+                # автомат фраз + готовые n-граммы текста
+                scan = index.scan(
+                    normalized_text, analysis.lower,
+                    bigrams=analysis.bigrams, trigrams=analysis.trigrams
+                )
 
                 # ══════════════════════════════════════════════════════════
                 # НОВАЯ ЛОГИКА: Собираем кандидатов, выбираем с max score
@@ -545,14 +565,15 @@ class FilterManager:
                 # None = ещё не проверяли, True/False = результат проверки
                 cas_result_cached: Optional[bool] = None
 
-                for section in sections:
-                    # Получаем паттерны раздела
-                    patterns = await section_service.get_section_patterns(section.id, session, active_only=True)
+                for compiled_section in sections:
+                    # Снимок раздела (поля CustomSpamSection)
+                    section = compiled_section.section
+                    patterns = compiled_section.patterns
 
                     # Логируем раздел и количество паттернов
                     logger.info(
                         f"[FilterManager] Раздел '{section.name}' (ID={section.id}): "
-                        f"паттернов={len(patterns) if patterns else 0}, порог={section.threshold}"
+                        f"паттернов={len(patterns)}, порог={section.threshold}"
                     )
 
                     if not patterns:
@@ -566,219 +587,37 @@ class FilterManager:
                     # Формат: [{'pattern': str, 'method': str, 'weight': int, 'context': str}, ...]
                     matched_patterns_detailed = []
 
-                    # Предварительно извлекаем n-граммы из текста для n-gram matching
-                    text_bigrams = extract_ngrams(normalized_text, n=2)
-                    text_trigrams = extract_ngrams(normalized_text, n=3)
-
-                    for pattern in patterns:
-                        matched = False
-                        match_method = None
-                        match_context = None  # Контекст где найдено совпадение
-
-                        # ─────────────────────────────────────────────────────
-                        # МЕТОД 0: REGEX (точное совпадение по регулярному выражению)
-                        # Для паттернов с pattern_type='regex' — используем только regex
-                        # и пропускаем phrase/fuzzy/ngram методы
-                        # ─────────────────────────────────────────────────────
-                        if pattern.pattern_type == 'regex':
-                            try:
-                                # Компилируем regex с флагами регистронезависимости и Unicode
-                                regex = re.compile(pattern.pattern, re.IGNORECASE | re.UNICODE)
-                                # Ищем в нормализованном тексте
-                                match_obj = regex.search(normalized_text)
-                                # Если не нашли — пробуем в оригинальном тексте (lowercase)
-                                if not match_obj:
-                                    match_obj = regex.search(text.lower())
-
-                                if match_obj:
-                                    matched = True
-                                    match_method = 'regex'
-                                    # Формируем контекст совпадения
-                                    pos = match_obj.start()
-                                    matched_text = match_obj.group()
-                                    # Берём контекст: 20 символов до и после
-                                    source_text = normalized_text if match_obj.string == normalized_text else text.lower()
-                                    start = max(0, pos - 20)
-                                    end = min(len(source_text), pos + len(matched_text) + 20)
-                                    match_context = source_text[start:end]
-                                    if start > 0:
-                                        match_context = "..." + match_context
-                                    if end < len(source_text):
-                                        match_context = match_context + "..."
-                            except re.error as e:
-                                # Некорректный regex — логируем и пропускаем паттерн
-                                logger.warning(
-                                    f"[FilterManager] Некорректный regex паттерн #{pattern.id}: "
-                                    f"'{pattern.pattern}' — ошибка: {e}"
-                                )
-                                continue
-
-                            # Обрабатываем результат regex и переходим к следующему паттерну
-                            # ВАЖНО: regex паттерны НЕ используют fuzzy/ngram
-                            if matched:
-                                total_score += pattern.weight
-                                # Формируем строку с контекстом для отображения
-                                trigger_info = f"{pattern.pattern} [{match_method}]"
-                                if match_context:
-                                    trigger_info += f" → найдено в: «{match_context}»"
-                                triggered_patterns.append(trigger_info)
-
-                                # Добавляем детальную информацию о паттерне для журнала
-                                matched_patterns_detailed.append({
-                                    'pattern': pattern.pattern,
-                                    'method': match_method,
-                                    'weight': pattern.weight,
-                                    'context': match_context or ''
-                                })
-
-                                # Увеличиваем счётчик срабатываний
-                                await section_service.increment_pattern_trigger(pattern.id, session)
-
-                                # Детальный лог для отладки
-                                logger.info(
-                                    f"[FilterManager] 🔍 REGEX MATCH: паттерн='{pattern.pattern}' "
-                                    f"[{match_method}] +{pattern.weight} баллов\n"
-                                    f"    📍 Контекст: {match_context}\n"
-                                    f"    📝 Норм.текст (первые 200 симв): {normalized_text[:200]}..."
-                                )
-                            # Переходим к следующему паттерну — пропускаем phrase/fuzzy/ngram
-                            continue
-
-                        # ─────────────────────────────────────────────────────
-                        # МЕТОД 1: Точное совпадение подстроки
-                        # Для КОРОТКИХ паттернов (< 5 символов) требуем границы слов
-                        # чтобы избежать ложных срабатываний (weed→вед в "ведущая")
-                        # ВАЖНО: Проверяем и по normalized_text, и по text.lower()
-                        # чтобы английские паттерны работали с английским текстом
-                        # (normalizer транслитерирует англ→кириллица)
-                        # ─────────────────────────────────────────────────────
-                        pattern_norm_lower = pattern.normalized.lower()
-                        pattern_orig_lower = pattern.pattern.lower()
-                        text_lower = text.lower()
-
-                        # Для коротких паттернов используем word boundaries
-                        if len(pattern_norm_lower) < 5:
-                            # Ищем как отдельное слово с границами \b
-                            word_boundary_regex = r'\b' + re.escape(pattern_norm_lower) + r'\b'
-                            match_obj = re.search(word_boundary_regex, normalized_text)
-                            source_text = normalized_text
-                            # Если не нашли в нормализованном — пробуем в оригинальном
-                            if not match_obj:
-                                word_boundary_regex_orig = r'\b' + re.escape(pattern_orig_lower) + r'\b'
-                                match_obj = re.search(word_boundary_regex_orig, text_lower)
-                                source_text = text_lower
-                            if match_obj:
-                                matched = True
-                                match_method = 'phrase'
-                                pos = match_obj.start()
-                                # Берём контекст: 20 символов до и после
-                                start = max(0, pos - 20)
-                                end = min(len(source_text), pos + len(pattern_norm_lower) + 20)
-                                match_context = source_text[start:end]
-                                if start > 0:
-                                    match_context = "..." + match_context
-                                if end < len(source_text):
-                                    match_context = match_context + "..."
-                        else:
-                            # Для длинных паттернов - обычный поиск подстроки
-                            # Сначала ищем в нормализованном тексте
-                            if pattern_norm_lower in normalized_text:
-                                matched = True
-                                match_method = 'phrase'
-                                source_text = normalized_text
-                                search_pattern = pattern_norm_lower
-                            # Если не нашли — ищем оригинальный паттерн в оригинальном тексте
-                            elif pattern_orig_lower in text_lower:
-                                matched = True
-                                match_method = 'phrase'
-                                source_text = text_lower
-                                search_pattern = pattern_orig_lower
-
-                            if matched and match_method == 'phrase':
-                                # Находим позицию совпадения для контекста
-                                pos = source_text.find(search_pattern)
-                                if pos >= 0:
-                                    # Берём контекст: 20 символов до и после
-                                    start = max(0, pos - 20)
-                                    end = min(len(source_text), pos + len(search_pattern) + 20)
-                                    match_context = source_text[start:end]
-                                    # Добавляем маркер где именно совпадение
-                                    if start > 0:
-                                        match_context = "..." + match_context
-                                    if end < len(source_text):
-                                        match_context = match_context + "..."
-
-                        # ─────────────────────────────────────────────────────
-                        # МЕТОД 2: Fuzzy matching (порог 0.8)
-                        # Ловит перестановки слов и небольшие изменения
-                        # ─────────────────────────────────────────────────────
-                        # ВАЖНО: Для длинных текстов (>400 символов) отключаем fuzzy
-                        # для коротких паттернов (<8 символов), чтобы избежать
-                        # ложных срабатываний типа "в руки" → "в руский" (83% similarity)
-                        # Для коротких текстов (спам) fuzzy работает как раньше
-                        # ─────────────────────────────────────────────────────
-                        min_pattern_len_for_fuzzy = 8 if len(normalized_text) > 400 else 5
-                        if not matched and len(pattern_norm_lower) >= min_pattern_len_for_fuzzy:
-                            if fuzzy_match(normalized_text, pattern.normalized, threshold=0.8):
-                                matched = True
-                                match_method = 'fuzzy'
-                                # Получаем контекст — какое слово из текста сработало (только для лога!)
-                                matched_word, match_score = get_fuzzy_match_context(
-                                    normalized_text, pattern.normalized, threshold=0.8
-                                )
-                                # Показываем паттерн И слово из текста которое сработало
-                                match_context = f"fuzzy({match_score}%) '{pattern.normalized}' ← «{matched_word}»"
-
-                        # ─────────────────────────────────────────────────────
-                        # МЕТОД 3: N-gram matching (перекрытие 0.6)
-                        # Ловит перестановки слов в длинных фразах
-                        # ─────────────────────────────────────────────────────
-                        if not matched:
-                            pattern_words = pattern.normalized.split()
-                            # Биграммы для паттернов из 2+ слов
-                            if len(pattern_words) >= 2:
-                                pattern_bigrams = extract_ngrams(pattern.normalized, n=2)
-                                if ngram_match(text_bigrams, pattern_bigrams, min_overlap=0.6):
-                                    matched = True
-                                    match_method = 'ngram'
-                                    # Показываем нормализованную форму паттерна
-                                    match_context = f"ngram ~ '{pattern.normalized}'"
-                            # Триграммы для паттернов из 3+ слов
-                            if not matched and len(pattern_words) >= 3:
-                                pattern_trigrams = extract_ngrams(pattern.normalized, n=3)
-                                if ngram_match(text_trigrams, pattern_trigrams, min_overlap=0.5):
-                                    matched = True
-                                    match_method = 'ngram'
-                                    # Показываем нормализованную форму паттерна
-                                    match_context = f"ngram ~ '{pattern.normalized}'"
-
-                        # Если паттерн сработал - добавляем скор
-                        if matched:
-                            total_score += pattern.weight
-                            # Формируем строку с контекстом для отображения
-                            trigger_info = f"{pattern.pattern} [{match_method}]"
-                            if match_context:
-                                trigger_info += f" → найдено в: «{match_context}»"
-                            triggered_patterns.append(trigger_info)
-
-                            # Добавляем детальную информацию о паттерне для журнала
-                            matched_patterns_detailed.append({
-                                'pattern': pattern.pattern,
-                                'method': match_method,
-                                'weight': pattern.weight,
-                                'context': match_context or ''
-                            })
-
-                            # Увеличиваем счётчик срабатываний
-                            await section_service.increment_pattern_trigger(pattern.id, session)
-
-                            # ВАЖНО: Детальный лог для отладки
-                            logger.info(
-                                f"[FilterManager] 🔍 MATCH: паттерн='{pattern.pattern}' "
-                                f"(norm='{pattern.normalized}') [{match_method}] +{pattern.weight} баллов\n"
-                                f"    📍 Контекст: {match_context}\n"
-                                f"    📝 Норм.текст (первые 200 симв): {normalized_text[:200]}..."
-                            )
+                    # Методы проверки: regex → phrase → fuzzy → ngram (см. section_matcher)
+                    for match in index.match_section(compiled_section, scan):
+                        pattern = match.pattern
+                        match_method = match.method
+                        match_context = match.context
+
+                        total_score += pattern.weight
+                        # Формируем строку с контекстом для отображения
+                        trigger_info = f"{pattern.pattern} [{match_method}]"
+                        if match_context:
+                            trigger_info += f" → найдено в: «{match_context}»"
+                        triggered_patterns.append(trigger_info)
+
+                        # Добавляем детальную информацию о паттерне для журнала
+                        matched_patterns_detailed.append({
+                            'pattern': pattern.pattern,
+                            'method': match_method,
+                            'weight': pattern.weight,
+                            'context': match_context or ''
+                        })
+
+                        # Увеличиваем счётчик срабатываний
+                        await section_service.increment_pattern_trigger(pattern.id, session)
+
+                        # ВАЖНО: Детальный лог для отладки
+                        logger.info(
+                            f"[FilterManager] 🔍 MATCH: паттерн='{pattern.pattern}' "
+                            f"(norm='{pattern.normalized}') [{match_method}] +{pattern.weight} баллов\n"
+                            f"    📍 Контекст: {match_context}\n"
+                            f"    📝 Норм.текст (первые 200 симв): {normalized_text[:200]}..."
+                        )
 
                     # Проверяем достижен ли порог
                     if total_score >= section.threshold:
@@ -995,7 +834,8 @@ class FilterManager:
                 text=text,
                 chat_id=chat_id,
                 session=session,
-                sensitivity=settings.scam_sensitivity
+                sensitivity=settings.scam_sensitivity,
+                analysis=analysis
             )
 
             # Если обнаружен скам
@@ -1110,8 +950,7 @@ class FilterManager:
     ) -> Optional[ContentFilterSettings]:
         """
         Загружает настройки content_filter для группы.
-
-        TODO: Добавить кэширование в Redis.
+        Проверка сообщений читает их через кэш настроек (settings_cache).
 
         Args:
             chat_id: ID группы
@@ -18,7 +18,7 @@
 # Импортируем hashlib для хэширования
 import hashlib
 # Импортируем типы для аннотаций
-from typing import Optional, NamedTuple, List
+from typing import Optional, NamedTuple, List, Tuple
 # Импортируем логгер
 import logging
 # Импортируем json для сериализации
@@ -31,6 +31,32 @@ from redis.asyncio import Redis
 logger = logging.getLogger(__name__)
 
 
+# ============================================================
+# LUA СКРИПТ
+# ============================================================
+
+# Счётчик + список message_id за одно обращение к Redis.
+# При превышении порога сразу забирает все ID и очищает оба ключа,
+# поэтому параллельные сообщения не удалят одни и те же ID дважды.
+# KEYS: count, msgs; ARGV: message_id, max_allowed, time_window
+# Возвращает [count] или [count, message_id, message_id, ...] при флуде
+_FLOOD_HIT_SCRIPT = """
+local count = redis.call('INCR', KEYS[1])
+redis.call('RPUSH', KEYS[2], ARGV[1])
+if count == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    redis.call('EXPIRE', KEYS[2], ARGV[3])
+end
+if count > tonumber(ARGV[2]) then
+    local ids = redis.call('LRANGE', KEYS[2], 0, -1)
+    redis.call('DEL', KEYS[1], KEYS[2])
+    table.insert(ids, 1, count)
+    return ids
+end
+return {count}
+"""
+
+
 # ============================================================
 # РЕЗУЛЬТАТ ПРОВЕРКИ
 # ============================================================
@@ -159,6 +185,35 @@ class FloodDetector:
         """
         return f"{self.REDIS_PREFIX}:{chat_id}:{user_id}:msgs:{msg_hash}"
 
+    async def _hit(
+        self,
+        count_key: str,
+        messages_key: str,
+        message_id: int,
+        max_allowed: int,
+        time_window: int
+    ) -> Tuple[int, List[int]]:
+        """
+        Учитывает сообщение и проверяет порог за один round trip.
+
+        Args:
+            count_key: Ключ счётчика
+            messages_key: Ключ списка ID сообщений
+            message_id: ID текущего сообщения
+            max_allowed: Порог срабатывания
+            time_window: Временное окно в секундах
+
+        Returns:
+            (текущий счётчик, ID сообщений для удаления — пусто если не флуд)
+        """
+        raw = await self._redis.eval(
+            _FLOOD_HIT_SCRIPT, 2, count_key, messages_key,
+            str(message_id), max_allowed, time_window,
+        )
+        current_count = int(raw[0])
+        flood_message_ids = [int(mid) for mid in raw[1:] if mid]
+        return current_count, flood_message_ids
+
     async def check(
         self,
         text: str,
@@ -206,33 +261,15 @@ class FloodDetector:
             # ─────────────────────────────────────────────────────────
             # ШАГ 2: Инкрементируем счётчик и сохраняем message_id
             # ─────────────────────────────────────────────────────────
-            # Инкрементируем счётчик
-            current_count = await self._redis.incr(count_key)
-
-            # Добавляем message_id в список сообщений с этим хэшем
-            await self._redis.rpush(messages_key, str(message_id))
-
-            # Устанавливаем TTL при первом создании ключей
-            if current_count == 1:
-                await self._redis.expire(count_key, time_window)
-                await self._redis.expire(messages_key, time_window)
+            # Счётчик, список ID и проверка порога — одним Lua-скриптом
+            current_count, flood_message_ids = await self._hit(
+                count_key, messages_key, message_id, max_repeats, time_window
+            )
 
-            # ─────────────────────────────────────────────────────────
-            # ШАГ 3: Проверяем превышение порога
-            # ─────────────────────────────────────────────────────────
+            # Проверяем превышение порога
             is_flood = current_count > max_repeats
-            flood_message_ids = []
 
             if is_flood:
-                # Получаем ВСЕ ID сообщений для удаления
-                all_msg_ids = await self._redis.lrange(messages_key, 0, -1)
-                flood_message_ids = [int(mid) for mid in all_msg_ids if mid]
-
-                # Очищаем список сообщений после получения (чтобы не удалять повторно)
-                await self._redis.delete(messages_key)
-                # Сбрасываем счётчик
-                await self._redis.delete(count_key)
-
                 logger.info(
                     f"[FloodDetector] Обнаружен флуд! "
                     f"chat={chat_id}, user={user_id}, "
@@ -298,30 +335,15 @@ class FloodDetector:
         any_messages_key = f"{self.REDIS_PREFIX}:{chat_id}:{user_id}:any:msgs"
 
         try:
-            # Инкрементируем счётчик
-            current_count = await self._redis.incr(any_count_key)
-
-            # Добавляем message_id в список
-            await self._redis.rpush(any_messages_key, str(message_id))
-
-            # Устанавливаем TTL при первом создании
-            if current_count == 1:
-                await self._redis.expire(any_count_key, time_window)
-                await self._redis.expire(any_messages_key, time_window)
+            # Счётчик, список ID и проверка порога — одним Lua-скриптом
+            current_count, flood_message_ids = await self._hit(
+                any_count_key, any_messages_key, message_id, max_messages, time_window
+            )
 
             # Проверяем превышение порога
             is_flood = current_count > max_messages
-            flood_message_ids = []
 
             if is_flood:
-                # Получаем все ID сообщений для удаления
-                all_msg_ids = await self._redis.lrange(any_messages_key, 0, -1)
-                flood_message_ids = [int(mid) for mid in all_msg_ids if mid]
-
-                # Очищаем после получения
-                await self._redis.delete(any_messages_key)
-                await self._redis.delete(any_count_key)
-
                 logger.info(
                     f"[FloodDetector] Обнаружен флуд (любые сообщения)! "
                     f"chat={chat_id}, user={user_id}, "
@@ -382,30 +404,15 @@ class FloodDetector:
         media_messages_key = f"{self.REDIS_PREFIX}:{chat_id}:{user_id}:media:{media_type}:msgs"
 
         try:
-            # Инкрементируем счётчик
-            current_count = await self._redis.incr(media_count_key)
-
-            # Добавляем message_id в список
-            await self._redis.rpush(media_messages_key, str(message_id))
-
-            # Устанавливаем TTL при первом создании
-            if current_count == 1:
-                await self._redis.expire(media_count_key, time_window)
-                await self._redis.expire(media_messages_key, time_window)
+            # Счётчик, список ID и проверка порога — одним Lua-скриптом
+            current_count, flood_message_ids = await self._hit(
+                media_count_key, media_messages_key, message_id, max_repeats, time_window
+            )
 
             # Проверяем превышение порога
             is_flood = current_count > max_repeats
-            flood_message_ids = []
 
             if is_flood:
-                # Получаем все ID сообщений для удаления
-                all_msg_ids = await self._redis.lrange(media_messages_key, 0, -1)
-                flood_message_ids = [int(mid) for mid in all_msg_ids if mid]
-
-                # Очищаем после получения
-                await self._redis.delete(media_messages_key)
-                await self._redis.delete(media_count_key)
-
                 logger.info(
                     f"[FloodDetector] Обнаружен медиа-флуд ({media_type})! "
                     f"chat={chat_id}, user={user_id}, "
@@ -0,0 +1,147 @@
+# ============================================================
+# MESSAGE ANALYSIS - ОБЩИЙ РАЗБОР ТЕКСТА СООБЩЕНИЯ
+# ============================================================
+# Один и тот же текст сообщения раньше независимо приводился
+# к нижнему регистру, нормализовался и разбивался на слова/n-граммы
+# в FilterManager, WordFilter, ScamDetector, CrossMessageService
+# и Antispam (ссылки).
+#
+# MessageAnalysis создаётся ОДИН раз на апдейт в координаторе и
+# передаётся всем детекторам. Каждое представление текста считается
+# лениво — при первом обращении — и дальше берётся из кэша.
+#
+# Пример использования:
+#     analysis = MessageAnalysis.from_message(message)
+#     analysis.normalized_lower   # нормализованный текст
+#     analysis.bigrams            # биграммы нормализованного текста
+#     analysis.links              # ссылки из текста и entities
+# ============================================================
+
+# Импортируем cached_property для ленивых вычислений
+from functools import cached_property
+# Импортируем re для разбиения на слова
+import re
+# Импортируем типы для аннотаций
+from typing import Optional, List, Set, TYPE_CHECKING
+
+# Импортируем нормализатор текста
+from bot.services.content_filter.text_normalizer import TextNormalizer, get_normalizer
+
+if TYPE_CHECKING:
+    from aiogram.types import Message
+
+
+# Разбиение исходного текста на слова (для simple/harmful слов WordFilter)
+_WORD_SPLIT_REGEX = re.compile(r'\W+')
+
+
+class MessageAnalysis:
+    """
+    Представления текста одного сообщения, посчитанные не более одного раза.
+
+    Все свойства ленивые: если детектор выключен и свойство не
+    запрошено — оно не вычисляется.
+
+    Attributes:
+        text: Исходный текст (text или caption)
+        message: Сообщение (нужно только для ссылок из entities)
+    """
+
+    def __init__(
+        self,
+        text: Optional[str],
+        message: Optional['Message'] = None,
+        normalizer: Optional[TextNormalizer] = None
+    ):
+        """
+        Args:
+            text: Текст сообщения
+            message: Сообщение aiogram (для ссылок из entities)
+            normalizer: Экземпляр TextNormalizer (если None — глобальный)
+        """
+        self.text = text or ''
+        self.message = message
+        self._normalizer = normalizer or get_normalizer()
+
+    @classmethod
+    def from_message(
+        cls,
+        message: 'Message',
+        normalizer: Optional[TextNormalizer] = None
+    ) -> 'MessageAnalysis':
+        """
+        Создаёт разбор по тексту или подписи сообщения.
+
+        Args:
+            message: Сообщение aiogram
+            normalizer: Экземпляр TextNormalizer (если None — глобальный)
+
+        Returns:
+            MessageAnalysis
+        """
+        return cls(message.text or message.caption or '', message=message, normalizer=normalizer)
+
+    @cached_property
+    def is_empty(self) -> bool:
+        """True если в сообщении нет текста для проверки."""
+        return not self.text.strip()
+
+    @cached_property
+    def lower(self) -> str:
+        """Исходный текст в нижнем регистре."""
+        return self.text.lower()
+
+    @cached_property
+    def words_lower(self) -> List[str]:
+        """Слова исходного текста в нижнем регистре."""
+        return [w.lower() for w in _WORD_SPLIT_REGEX.split(self.text) if w.strip()]
+
+    @cached_property
+    def normalized(self) -> str:
+        """Нормализованный текст (l33tspeak → кириллица, без разделителей)."""
+        return self._normalizer.normalize(self.text)
+
+    @cached_property
+    def normalized_lower(self) -> str:
+        """Нормализованный текст в нижнем регистре."""
+        return self.normalized.lower()
+
+    @cached_property
+    def normalized_words(self) -> List[str]:
+        """Слова нормализованного текста."""
+        return self._normalizer.get_words_from_text(self.text)
+
+    @cached_property
+    def normalized_no_spaces(self) -> str:
+        """Нормализованный текст без пробелов ("alice demidova" → "алиседемидова")."""
+        return self.normalized.replace(' ', '')
+
+    @cached_property
+    def bigrams(self) -> Set[str]:
+        """Биграммы нормализованного текста."""
+        # Lazy import: scam_detector сам импортирует MessageAnalysis
+        from bot.services.content_filter.scam_detector import extract_ngrams
+        return extract_ngrams(self.normalized_lower, n=2)
+
+    @cached_property
+    def trigrams(self) -> Set[str]:
+        """Триграммы нормализованного текста."""
+        from bot.services.content_filter.scam_detector import extract_ngrams
+        return extract_ngrams(self.normalized_lower, n=3)
+
+    @cached_property
+    def links(self) -> List[str]:
+        """
+        Ссылки из текста и из entities (url, text_link) без дубликатов.
+        """
+        # Lazy import: antispam — отдельный модуль со своими зависимостями
+        from bot.services.antispam.antispam_service import (
+            extract_links,
+            extract_links_from_entities,
+        )
+
+        links = extract_links(self.text)
+        if self.message is not None:
+            links = links + extract_links_from_entities(self.message)
+        # dict.fromkeys сохраняет порядок
+        return list(dict.fromkeys(links))
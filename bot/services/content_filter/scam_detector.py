@@ -46,6 +46,8 @@ def _get_fuzzy_executor() -> ThreadPoolExecutor:
 
 # Импортируем нормализатор текста
 from bot.services.content_filter.text_normalizer import TextNormalizer, get_normalizer
+# Импортируем общий разбор текста сообщения
+from bot.services.content_filter.message_analysis import MessageAnalysis
 
 # Type checking импорты (только для аннотаций)
 if TYPE_CHECKING:
@@ -618,7 +620,8 @@ class ScamDetector:
     def check(
         self,
         text: str,
-        sensitivity: int = 60
+        sensitivity: int = 60,
+        analysis: Optional[MessageAnalysis] = None
     ) -> ScamCheckResult:
         """
         Проверяет текст на признаки скама.
@@ -629,6 +632,7 @@ class ScamDetector:
                 - 40: высокая чувствительность (ловит больше)
                 - 60: средняя (рекомендуется)
                 - 90: низкая (только явный скам)
+            analysis: Общий разбор текста (если None — создаётся локально)
 
         Returns:
             ScamCheckResult с результатом проверки
@@ -646,12 +650,15 @@ class ScamDetector:
         # ─────────────────────────────────────────────────────────
         # ШАГ 1: Нормализуем текст
         # ─────────────────────────────────────────────────────────
-        # Приводим к единому виду (l33tspeak → кириллица)
-        normalized_text = self._normalizer.normalize(text)
+        # Приводим к единому виду (l33tspeak → кириллица).
+        # Если координатор уже разобрал текст — берём готовое.
+        if analysis is None:
+            analysis = MessageAnalysis(text, normalizer=self._normalizer)
+        normalized_text = analysis.normalized
 
         # Также сохраняем оригинальный текст в нижнем регистре
         # (некоторые паттерны лучше работают с оригиналом)
-        lower_text = text.lower()
+        lower_text = analysis.lower
 
         # ─────────────────────────────────────────────────────────
         # ШАГ 2: Проверяем каждый сигнал
@@ -715,7 +722,8 @@ class ScamDetector:
         text: str,
         chat_id: int,
         session: 'AsyncSession',
-        sensitivity: int = 60
+        sensitivity: int = 60,
+        analysis: Optional[MessageAnalysis] = None
     ) -> ScamCheckResult:
         """
         Проверяет текст на скам с учётом кастомных паттернов группы.
@@ -732,6 +740,7 @@ class ScamDetector:
             chat_id: ID группы (для загрузки кастомных паттернов)
             session: Сессия БД
             sensitivity: Порог чувствительности (40, 60, 90)
+            analysis: Общий разбор текста (если None — создаётся локально)
 
         Returns:
             ScamCheckResult с результатом проверки
@@ -748,8 +757,11 @@ class ScamDetector:
         # ─────────────────────────────────────────────────────────
         # ШАГ 1: Нормализуем текст
         # ─────────────────────────────────────────────────────────
-        normalized_text = self._normalizer.normalize(text)
-        lower_text = text.lower()
+        if analysis is None:
+            analysis = MessageAnalysis(text, normalizer=self._normalizer)
+        normalized_text = analysis.normalized
+        normalized_lower = analysis.normalized_lower
+        lower_text = analysis.lower
 
         # ─────────────────────────────────────────────────────────
         # ШАГ 2: Загружаем переопределения базовых сигналов
@@ -827,10 +839,6 @@ class ScamDetector:
         # Список ID паттернов которые сработали (для обновления счётчика)
         triggered_pattern_ids: List[int] = []
 
-        # Предварительно извлекаем n-граммы из текста для n-gram matching
-        text_bigrams = extract_ngrams(normalized_text, n=2)
-        text_trigrams = extract_ngrams(normalized_text, n=3)
-
         # Проверяем каждый кастомный паттерн используя 4 метода
         for pattern in custom_patterns:
             matched = False
@@ -876,7 +884,7 @@ class ScamDetector:
             # ─────────────────────────────────────────────────────
             else:
                 # Сначала точное совпадение подстроки
-                if pattern.normalized in normalized_text.lower():
+                if pattern.normalized in normalized_lower:
                     matched = True
                     match_method = 'phrase'
 
@@ -892,13 +900,14 @@ class ScamDetector:
                     pattern_words = pattern.normalized.split()
                     if len(pattern_words) >= 2:
                         pattern_bigrams = extract_ngrams(pattern.normalized, n=2)
-                        if ngram_match(text_bigrams, pattern_bigrams, min_overlap=0.6):
+                        # n-граммы текста считаются один раз на сообщение
+                        if ngram_match(analysis.bigrams, pattern_bigrams, min_overlap=0.6):
                             matched = True
                             match_method = 'ngram'
 
                     if not matched and len(pattern_words) >= 3:
                         pattern_trigrams = extract_ngrams(pattern.normalized, n=3)
-                        if ngram_match(text_trigrams, pattern_trigrams, min_overlap=0.5):
+                        if ngram_match(analysis.trigrams, pattern_trigrams, min_overlap=0.5):
                             matched = True
                             match_method = 'ngram'
 
@@ -958,7 +967,7 @@ class ScamDetector:
 
                 for keyword in keywords:
                     # Пробуем точное совпадение
-                    if keyword in normalized_text.lower():
+                    if keyword in normalized_lower:
                         category_matched = True
                         matched_keyword = keyword
                         break
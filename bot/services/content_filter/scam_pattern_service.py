@@ -40,6 +40,10 @@ from bot.database.models_content_filter import (
 # Импортируем нормализатор текста для единообразной нормализации
 # паттернов и текста сообщений
 from bot.services.content_filter.text_normalizer import get_normalizer
+# Импортируем кэш скомпилированных индексов разделов (сбрасываем при изменениях)
+from bot.services.content_filter.section_matcher import get_section_matcher_cache
+# Импортируем буферы счётчиков срабатываний (сброс в БД пачкой)
+from bot.services.trigger_counters import scam_pattern_counter, section_pattern_counter
 
 # Создаём логгер для этого модуля
 logger = logging.getLogger(__name__)
@@ -499,25 +503,17 @@ class ScamPatternService:
         """
         Увеличивает счётчик срабатываний паттерна.
         Вызывается когда паттерн сработал при проверке сообщения.
+        Счётчик буферизуется и сбрасывается в БД фоново (trigger_counters).
 
         Args:
             pattern_id: ID паттерна
             session: Сессия БД
         """
         try:
-            # Увеличиваем счётчик и обновляем время последнего срабатывания
-            query = update(ScamPattern).where(
-                ScamPattern.id == pattern_id
-            ).values(
-                triggers_count=ScamPattern.triggers_count + 1,
-                last_triggered_at=_utcnow_naive()
-            )
-
-            await session.execute(query)
-            await session.commit()
+            # Копим в буфере, в БД уходит пачкой (без коммита на горячем пути)
+            await scam_pattern_counter.record(pattern_id)
 
         except Exception as e:
-            await session.rollback()
             logger.error(f"[ScamPatternService] Ошибка обновления счётчика: {e}")
 
     # ─────────────────────────────────────────────────────────
@@ -1351,6 +1347,9 @@ class CustomSectionService:
             await session.commit()
             await session.refresh(section)
 
+            # Сбрасываем скомпилированный индекс разделов группы
+            get_section_matcher_cache().invalidate_chat(chat_id)
+
             logger.info(
                 f"[CustomSectionService] Создан раздел '{name}' (ID={section.id}) "
                 f"для чата {chat_id}"
@@ -1456,6 +1455,9 @@ class CustomSectionService:
             result = await session.execute(query)
             await session.commit()
 
+            # Сбрасываем скомпилированный индекс разделов группы
+            get_section_matcher_cache().invalidate_section(section_id)
+
             if result.rowcount > 0:
                 logger.info(f"[CustomSectionService] Раздел ID={section_id} обновлён")
                 return True, None
@@ -1497,6 +1499,9 @@ class CustomSectionService:
             result = await session.execute(query)
             await session.commit()
 
+            # Сбрасываем скомпилированный индекс разделов группы
+            get_section_matcher_cache().invalidate_section(section_id)
+
             if result.rowcount > 0:
                 logger.info(f"[CustomSectionService] Удалён раздел ID={section_id}")
                 return True
@@ -1541,6 +1546,9 @@ class CustomSectionService:
             await session.execute(query)
             await session.commit()
 
+            # Сбрасываем скомпилированный индекс разделов группы
+            get_section_matcher_cache().invalidate_chat(section.chat_id)
+
             logger.info(
                 f"[CustomSectionService] Раздел ID={section_id} "
                 f"{'включён' if new_status else 'выключен'}"
@@ -1679,6 +1687,9 @@ class CustomSectionService:
             await session.commit()
             await session.refresh(section_pattern)
 
+            # Сбрасываем скомпилированный индекс разделов группы
+            get_section_matcher_cache().invalidate_section(section_id)
+
             logger.info(
                 f"[CustomSectionService] Добавлен паттерн '{pattern[:30]}...' "
                 f"(ID={section_pattern.id}) в раздел {section_id}"
@@ -1711,12 +1722,19 @@ class CustomSectionService:
             True если удалено успешно
         """
         try:
+            # Запоминаем раздел паттерна для сброса индекса
+            pattern = await self.get_section_pattern_by_id(pattern_id, session)
+
             query = delete(CustomSectionPattern).where(
                 CustomSectionPattern.id == pattern_id
             )
             result = await session.execute(query)
             await session.commit()
 
+            if pattern:
+                # Сбрасываем скомпилированный индекс разделов группы
+                get_section_matcher_cache().invalidate_section(pattern.section_id)
+
             if result.rowcount > 0:
                 logger.info(f"[CustomSectionService] Удалён паттерн ID={pattern_id}")
                 return True
@@ -1750,6 +1768,9 @@ class CustomSectionService:
             result = await session.execute(query)
             await session.commit()
 
+            # Сбрасываем скомпилированный индекс разделов группы
+            get_section_matcher_cache().invalidate_section(section_id)
+
             deleted_count = result.rowcount
             if deleted_count > 0:
                 logger.info(
@@ -1814,6 +1835,9 @@ class CustomSectionService:
             await session.execute(query)
             await session.commit()
 
+            # Сбрасываем скомпилированный индекс разделов группы
+            get_section_matcher_cache().invalidate_section(pattern.section_id)
+
             logger.info(
                 f"[CustomSectionService] Паттерн ID={pattern_id} "
                 f"{'включён' if new_status else 'выключен'}"
@@ -1860,6 +1884,9 @@ class CustomSectionService:
             await session.execute(query)
             await session.commit()
 
+            # Сбрасываем скомпилированный индекс разделов группы
+            get_section_matcher_cache().invalidate_section(pattern.section_id)
+
             logger.info(
                 f"[CustomSectionService] Вес паттерна ID={pattern_id} "
                 f"изменён: {pattern.weight} → {new_weight}"
@@ -1899,24 +1926,17 @@ class CustomSectionService:
     ) -> None:
         """
         Увеличивает счётчик срабатываний паттерна раздела.
+        Счётчик буферизуется и сбрасывается в БД фоново (trigger_counters).
 
         Args:
             pattern_id: ID паттерна
             session: Сессия БД
         """
         try:
-            query = update(CustomSectionPattern).where(
-                CustomSectionPattern.id == pattern_id
-            ).values(
-                triggers_count=CustomSectionPattern.triggers_count + 1,
-                last_triggered_at=_utcnow_naive()
-            )
-
-            await session.execute(query)
-            await session.commit()
+            # Копим в буфере, в БД уходит пачкой (без коммита на горячем пути)
+            await section_pattern_counter.record(pattern_id)
 
         except Exception as e:
-            await session.rollback()
             logger.error(f"[CustomSectionService] Ошибка обновления счётчика: {e}")
 
     # ─────────────────────────────────────────────────────────
@@ -0,0 +1,721 @@
+# ============================================================
+# SECTION MATCHER - СКОМПИЛИРОВАННЫЙ ИНДЕКС ПАТТЕРНОВ РАЗДЕЛОВ
+# ============================================================
+# Этот модуль хранит в памяти процесса готовый к проверке индекс
+# всех активных паттернов всех активных разделов группы
+# (CustomSpamSection + CustomSectionPattern).
+#
+# Раньше FilterManager на КАЖДОЕ сообщение:
+# - делал SELECT разделов и по SELECT паттернов на каждый раздел
+# - компилировал regex каждого паттерна заново
+# - строил regex с \b для коротких фраз заново
+# - считал n-граммы паттернов заново
+# - проверял каждую фразу отдельным поиском подстроки
+#
+# Теперь индекс строится ОДИН раз на группу и содержит:
+# - автомат Ахо-Корасик для всех фраз (один проход по тексту)
+# - заранее скомпилированные regex-паттерны и regex с \b
+# - заранее посчитанные множества би/триграмм паттернов
+#
+# Индекс сбрасывается при изменении разделов/паттернов
+# через CustomSectionService (добавление, вкл/выкл, вес, удаление).
+# ============================================================
+
+# Импортируем типы для аннотаций
+from typing import Optional, List, Dict, Set, Tuple
+# Импортируем dataclass для структур индекса
+from dataclasses import dataclass, field
+# Импортируем логгер
+import logging
+# Импортируем re для компиляции regex паттернов
+import re
+# Импортируем time для TTL индекса
+import time
+
+# Импортируем SQLAlchemy компоненты
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Импортируем модели разделов и паттернов
+from bot.database.models_content_filter import (
+    CustomSpamSection,
+    CustomSectionPattern
+)
+# Импортируем функции fuzzy и n-gram matching
+from bot.services.content_filter.scam_detector import (
+    fuzzy_match, extract_ngrams, ngram_match,
+    get_fuzzy_match_context
+)
+
+# Создаём логгер
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# КОНСТАНТЫ
+# ============================================================
+
+# Время жизни индекса в секундах.
+# Страховка на случай изменений в обход CustomSectionService
+# (например, из другой реплики бота).
+INDEX_TTL_SECONDS = 300
+
+# Паттерны короче этой длины ищутся только как отдельное слово (\b...\b)
+SHORT_PATTERN_LENGTH = 5
+
+# Ширина контекста совпадения (символов до и после)
+CONTEXT_CHARS = 20
+
+
+# ============================================================
+# АВТОМАТ АХО-КОРАСИК
+# ============================================================
+
+class AhoCorasick:
+    """
+    Автомат Ахо-Корасик для поиска множества подстрок за один проход.
+
+    Время поиска O(длина текста + число совпадений) и не зависит
+    от количества паттернов — в отличие от цикла `pattern in text`.
+
+    Пример использования:
+        automaton = AhoCorasick(['заработок', 'пиши в лс'])
+        found = automaton.find_all('быстрый заработок, пиши в лс')
+        # found == {'заработок', 'пиши в лс'}
+    """
+
+    def __init__(self, keys: List[str]):
+        """
+        Строит автомат по списку ключей.
+
+        Args:
+            keys: Подстроки для поиска (пустые строки игнорируются)
+        """
+        # Переходы: для каждого состояния словарь символ → состояние
+        self._goto: List[Dict[str, int]] = [{}]
+        # Суффиксные ссылки (fail-переходы)
+        self._fail: List[int] = [0]
+        # Ключи которые заканчиваются в состоянии (с учётом fail-цепочки)
+        self._output: List[Tuple[str, ...]] = [()]
+
+        # ─────────────────────────────────────────────────────
+        # Шаг 1: строим бор (trie) из всех ключей
+        # ─────────────────────────────────────────────────────
+        own_output: List[List[str]] = [[]]
+        for key in set(keys):
+            if not key:
+                continue
+            state = 0
+            for char in key:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    own_output.append([])
+                state = next_state
+            own_output[state].append(key)
+
+        # ─────────────────────────────────────────────────────
+        # Шаг 2: BFS по бору — вычисляем fail-ссылки и выходы
+        # ─────────────────────────────────────────────────────
+        self._output = [tuple(out) for out in own_output]
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                # Ищем самый длинный собственный суффикс с переходом по char
+                fail_state = self._fail[state]
+                while fail_state and char not in self._goto[fail_state]:
+                    fail_state = self._fail[fail_state]
+                fallback = self._goto[fail_state].get(char, 0)
+                self._fail[next_state] = fallback if fallback != next_state else 0
+                # Наследуем выходы fail-состояния
+                if self._output[self._fail[next_state]]:
+                    self._output[next_state] = (
+                        self._output[next_state] + self._output[self._fail[next_state]]
+                    )
+
+    def find_all(self, text: str) -> Set[str]:
+        """
+        Возвращает множество ключей, которые встречаются в тексте.
+
+        Args:
+            text: Текст для поиска
+
+        Returns:
+            Множество найденных ключей
+        """
+        found: Set[str] = set()
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+# ============================================================
+# СТРУКТУРЫ ИНДЕКСА
+# ============================================================
+
+@dataclass(frozen=True)
+class SectionSnapshot:
+    """
+    Неизменяемая копия полей раздела CustomSpamSection.
+
+    Индекс живёт дольше сессии БД, поэтому вместо ORM-объекта
+    храним копию полей, которые нужны FilterManager.
+    """
+    id: int
+    chat_id: int
+    name: str
+    threshold: int
+    action: str
+    mute_duration: Optional[int]
+    forward_channel_id: Optional[int]
+    forward_on_delete: bool
+    forward_on_mute: bool
+    forward_on_ban: bool
+    mute_text: Optional[str]
+    ban_text: Optional[str]
+    delete_delay: Optional[int]
+    notification_delete_delay: Optional[int]
+    cas_enabled: bool
+    add_to_spammer_db: bool
+
+    @classmethod
+    def from_model(cls, section: CustomSpamSection) -> 'SectionSnapshot':
+        """Создаёт снимок из ORM-объекта раздела."""
+        return cls(
+            id=section.id,
+            chat_id=section.chat_id,
+            name=section.name,
+            threshold=section.threshold,
+            action=section.action,
+            mute_duration=section.mute_duration,
+            forward_channel_id=section.forward_channel_id,
+            forward_on_delete=bool(section.forward_on_delete),
+            forward_on_mute=bool(section.forward_on_mute),
+            forward_on_ban=bool(section.forward_on_ban),
+            mute_text=section.mute_text,
+            ban_text=section.ban_text,
+            delete_delay=section.delete_delay,
+            notification_delete_delay=section.notification_delete_delay,
+            cas_enabled=bool(section.cas_enabled),
+            add_to_spammer_db=bool(section.add_to_spammer_db)
+        )
+
+
+@dataclass
+class CompiledPattern:
+    """
+    Паттерн раздела с заранее подготовленными данными для проверки.
+
+    Attributes:
+        id: ID паттерна (для счётчика срабатываний)
+        pattern: Исходный текст паттерна
+        normalized: Нормализованный текст паттерна
+        pattern_type: Тип паттерна (word/phrase/regex)
+        weight: Вес паттерна в баллах
+        norm_lower: normalized.lower() — ключ поиска в нормализованном тексте
+        orig_lower: pattern.lower() — ключ поиска в исходном тексте
+        regex: Скомпилированный regex (только для pattern_type='regex')
+        boundary_norm: Regex \\b...\\b по norm_lower (для коротких паттернов)
+        boundary_orig: Regex \\b...\\b по orig_lower (для коротких паттернов)
+        bigrams: Биграммы паттерна (для паттернов из 2+ слов)
+        trigrams: Триграммы паттерна (для паттернов из 3+ слов)
+    """
+    id: int
+    pattern: str
+    normalized: str
+    pattern_type: str
+    weight: int
+    norm_lower: str = ''
+    orig_lower: str = ''
+    regex: Optional[re.Pattern] = None
+    boundary_norm: Optional[re.Pattern] = None
+    boundary_orig: Optional[re.Pattern] = None
+    bigrams: Set[str] = field(default_factory=set)
+    trigrams: Set[str] = field(default_factory=set)
+
+    @property
+    def is_regex(self) -> bool:
+        """True если паттерн проверяется только как regex."""
+        return self.pattern_type == 'regex'
+
+    @property
+    def is_short(self) -> bool:
+        """True если паттерн ищется только как отдельное слово."""
+        return len(self.norm_lower) < SHORT_PATTERN_LENGTH
+
+
+@dataclass
+class CompiledSection:
+    """Раздел со списком скомпилированных паттернов (по убыванию веса)."""
+    section: SectionSnapshot
+    patterns: List[CompiledPattern]
+
+
+@dataclass
+class PatternMatch:
+    """
+    Результат совпадения одного паттерна.
+
+    Attributes:
+        pattern: Сработавший паттерн
+        method: Метод совпадения (regex, phrase, fuzzy, ngram)
+        context: Контекст совпадения для журнала
+    """
+    pattern: CompiledPattern
+    method: str
+    context: Optional[str]
+
+
+@dataclass
+class TextScan:
+    """
+    Данные текста, посчитанные один раз на сообщение для всех разделов.
+
+    Attributes:
+        normalized_text: Нормализованный текст (lowercase)
+        text_lower: Исходный текст в lowercase
+        found_in_normalized: Ключи автомата найденные в normalized_text
+        found_in_original: Ключи автомата найденные в text_lower
+        bigrams: Биграммы нормализованного текста
+        trigrams: Триграммы нормализованного текста
+    """
+    normalized_text: str
+    text_lower: str
+    found_in_normalized: Set[str]
+    found_in_original: Set[str]
+    bigrams: Set[str]
+    trigrams: Set[str]
+
+
+def _cut_context(source_text: str, pos: int, length: int) -> str:
+    """
+    Вырезает контекст совпадения: CONTEXT_CHARS символов до и после.
+
+    Args:
+        source_text: Текст в котором найдено совпадение
+        pos: Позиция начала совпадения
+        length: Длина совпадения
+
+    Returns:
+        Контекст с маркерами "..." если текст обрезан
+    """
+    start = max(0, pos - CONTEXT_CHARS)
+    end = min(len(source_text), pos + length + CONTEXT_CHARS)
+    context = source_text[start:end]
+    if start > 0:
+        context = "..." + context
+    if end < len(source_text):
+        context = context + "..."
+    return context
+
+
+def compile_pattern(pattern: CustomSectionPattern) -> Optional[CompiledPattern]:
+    """
+    Подготавливает паттерн раздела к проверке.
+
+    Args:
+        pattern: ORM-объект CustomSectionPattern
+
+    Returns:
+        CompiledPattern или None если regex некорректен
+    """
+    compiled = CompiledPattern(
+        id=pattern.id,
+        pattern=pattern.pattern,
+        normalized=pattern.normalized,
+        pattern_type=pattern.pattern_type,
+        weight=pattern.weight
+    )
+
+    # ─────────────────────────────────────────────────────────
+    # REGEX: компилируем один раз с IGNORECASE | UNICODE
+    # ─────────────────────────────────────────────────────────
+    if compiled.is_regex:
+        try:
+            compiled.regex = re.compile(pattern.pattern, re.IGNORECASE | re.UNICODE)
+        except re.error as e:
+            # Некорректный regex — логируем при построении индекса и пропускаем
+            logger.warning(
+                f"[SectionMatcher] Некорректный regex паттерн #{pattern.id}: "
+                f"'{pattern.pattern}' — ошибка: {e}"
+            )
+            return None
+        return compiled
+
+    # ─────────────────────────────────────────────────────────
+    # PHRASE: ключи для автомата и regex с границами слов
+    # ─────────────────────────────────────────────────────────
+    compiled.norm_lower = pattern.normalized.lower()
+    compiled.orig_lower = pattern.pattern.lower()
+
+    # Для коротких паттернов требуем границы слов
+    # (чтобы weed→вед не срабатывал в "ведущая")
+    if compiled.is_short:
+        compiled.boundary_norm = re.compile(r'\b' + re.escape(compiled.norm_lower) + r'\b')
+        compiled.boundary_orig = re.compile(r'\b' + re.escape(compiled.orig_lower) + r'\b')
+
+    # ─────────────────────────────────────────────────────────
+    # N-GRAM: множества би/триграмм паттерна
+    # ─────────────────────────────────────────────────────────
+    word_count = len(pattern.normalized.split())
+    if word_count >= 2:
+        compiled.bigrams = extract_ngrams(pattern.normalized, n=2)
+    if word_count >= 3:
+        compiled.trigrams = extract_ngrams(pattern.normalized, n=3)
+
+    return compiled
+
+
+class SectionPatternIndex:
+    """
+    Скомпилированный индекс паттернов всех активных разделов группы.
+
+    Пример использования:
+        index = SectionPatternIndex(chat_id, sections_with_patterns)
+        scan = index.scan(normalized_text, text.lower())
+        for compiled_section in index.sections:
+            matches = index.match_section(compiled_section, scan)
+    """
+
+    def __init__(self, chat_id: int, sections: List[CompiledSection]):
+        """
+        Строит индекс.
+
+        Args:
+            chat_id: ID группы
+            sections: Разделы со скомпилированными паттернами
+        """
+        self.chat_id = chat_id
+        self.sections = sections
+        self.built_at = time.monotonic()
+
+        # Собираем ключи автомата: нормализованные и исходные формы фраз
+        keys: List[str] = []
+        for compiled_section in sections:
+            for pattern in compiled_section.patterns:
+                if pattern.is_regex:
+                    continue
+                keys.append(pattern.norm_lower)
+                keys.append(pattern.orig_lower)
+
+        # Один автомат на все фразы всех разделов
+        self._automaton = AhoCorasick(keys)
+
+    @property
+    def patterns_count(self) -> int:
+        """Общее количество паттернов в индексе."""
+        return sum(len(s.patterns) for s in self.sections)
+
+    def scan(
+        self,
+        normalized_text: str,
+        text_lower: str,
+        bigrams: Optional[Set[str]] = None,
+        trigrams: Optional[Set[str]] = None
+    ) -> TextScan:
+        """
+        Один проход по тексту для всех разделов.
+
+        Args:
+            normalized_text: Нормализованный текст (lowercase)
+            text_lower: Исходный текст в lowercase
+            bigrams: Готовые биграммы текста (из MessageAnalysis)
+            trigrams: Готовые триграммы текста (из MessageAnalysis)
+
+        Returns:
+            TextScan с найденными ключами и n-граммами текста
+        """
+        return TextScan(
+            normalized_text=normalized_text,
+            text_lower=text_lower,
+            found_in_normalized=self._automaton.find_all(normalized_text),
+            found_in_original=self._automaton.find_all(text_lower),
+            bigrams=bigrams if bigrams is not None else extract_ngrams(normalized_text, n=2),
+            trigrams=trigrams if trigrams is not None else extract_ngrams(normalized_text, n=3)
+        )
+
+    def match_section(
+        self,
+        compiled_section: CompiledSection,
+        scan: TextScan
+    ) -> List[PatternMatch]:
+        """
+        Проверяет текст паттернами одного раздела.
+
+        Порядок методов для каждого паттерна сохранён:
+        regex → phrase → fuzzy → ngram.
+
+        Args:
+            compiled_section: Раздел из индекса
+            scan: Результат scan() для текущего сообщения
+
+        Returns:
+            Список совпадений в порядке паттернов раздела (по убыванию веса)
+        """
+        matches: List[PatternMatch] = []
+        for pattern in compiled_section.patterns:
+            match = self._match_pattern(pattern, scan)
+            if match:
+                matches.append(match)
+        return matches
+
+    def _match_pattern(
+        self,
+        pattern: CompiledPattern,
+        scan: TextScan
+    ) -> Optional[PatternMatch]:
+        """Проверяет один паттерн всеми методами по очереди."""
+        normalized_text = scan.normalized_text
+        text_lower = scan.text_lower
+
+        # ─────────────────────────────────────────────────────
+        # МЕТОД 0: REGEX (fuzzy/ngram для regex не используются)
+        # ─────────────────────────────────────────────────────
+        if pattern.is_regex:
+            match_obj = pattern.regex.search(normalized_text)
+            source_text = normalized_text
+            if not match_obj:
+                match_obj = pattern.regex.search(text_lower)
+                source_text = text_lower
+            if not match_obj:
+                return None
+            context = _cut_context(source_text, match_obj.start(), len(match_obj.group()))
+            return PatternMatch(pattern=pattern, method='regex', context=context)
+
+        # ─────────────────────────────────────────────────────
+        # МЕТОД 1: Точное совпадение подстроки
+        # Автомат уже сказал, какие фразы встречаются в тексте —
+        # regex с \b проверяем только для найденных коротких паттернов
+        # ─────────────────────────────────────────────────────
+        if pattern.is_short:
+            match_obj = None
+            source_text = normalized_text
+            # Пустой ключ не попадает в автомат — проверяем regex напрямую
+            if not pattern.norm_lower or pattern.norm_lower in scan.found_in_normalized:
+                match_obj = pattern.boundary_norm.search(normalized_text)
+            if not match_obj and pattern.orig_lower in scan.found_in_original:
+                match_obj = pattern.boundary_orig.search(text_lower)
+                source_text = text_lower
+            if match_obj:
+                context = _cut_context(source_text, match_obj.start(), len(pattern.norm_lower))
+                return PatternMatch(pattern=pattern, method='phrase', context=context)
+        else:
+            if pattern.norm_lower in scan.found_in_normalized:
+                pos = normalized_text.find(pattern.norm_lower)
+                context = _cut_context(normalized_text, pos, len(pattern.norm_lower))
+                return PatternMatch(pattern=pattern, method='phrase', context=context)
+            if pattern.orig_lower in scan.found_in_original:
+                pos = text_lower.find(pattern.orig_lower)
+                context = _cut_context(text_lower, pos, len(pattern.orig_lower))
+                return PatternMatch(pattern=pattern, method='phrase', context=context)
+
+        # ─────────────────────────────────────────────────────
+        # МЕТОД 2: Fuzzy matching (порог 0.8)
+        # Для длинных текстов (>400 символов) fuzzy только для паттернов >= 8 символов
+        # ─────────────────────────────────────────────────────
+        min_pattern_len_for_fuzzy = 8 if len(normalized_text) > 400 else 5
+        if len(pattern.norm_lower) >= min_pattern_len_for_fuzzy:
+            if fuzzy_match(normalized_text, pattern.normalized, threshold=0.8):
+                matched_word, match_score = get_fuzzy_match_context(
+                    normalized_text, pattern.normalized, threshold=0.8
+                )
+                context = f"fuzzy({match_score}%) '{pattern.normalized}' ← «{matched_word}»"
+                return PatternMatch(pattern=pattern, method='fuzzy', context=context)
+
+        # ─────────────────────────────────────────────────────
+        # МЕТОД 3: N-gram matching (по заранее посчитанным n-граммам)
+        # ─────────────────────────────────────────────────────
+        if pattern.bigrams and ngram_match(scan.bigrams, pattern.bigrams, min_overlap=0.6):
+            return PatternMatch(
+                pattern=pattern, method='ngram',
+                context=f"ngram ~ '{pattern.normalized}'"
+            )
+        if pattern.trigrams and ngram_match(scan.trigrams, pattern.trigrams, min_overlap=0.5):
+            return PatternMatch(
+                pattern=pattern, method='ngram',
+                context=f"ngram ~ '{pattern.normalized}'"
+            )
+
+        return None
+
+
+# ============================================================
+# КЭШ ИНДЕКСОВ ПО ГРУППАМ
+# ============================================================
+
+class SectionMatcherCache:
+    """
+    Кэш скомпилированных индексов разделов в памяти процесса.
+
+    Индекс группы строится при первом сообщении и живёт до
+    инвалидации (изменение разделов/паттернов) или истечения TTL.
+    """
+
+    def __init__(self, ttl_seconds: int = INDEX_TTL_SECONDS):
+        """
+        Args:
+            ttl_seconds: Время жизни индекса в секундах
+        """
+        self._ttl = ttl_seconds
+        # chat_id → индекс
+        self._indexes: Dict[int, SectionPatternIndex] = {}
+        # section_id → chat_id (для инвалидации по ID раздела)
+        self._section_chats: Dict[int, int] = {}
+        # Поколение группы: растёт при каждой инвалидации.
+        # Индекс, построенный до инвалидации, не сохраняется.
+        self._generations: Dict[int, int] = {}
+        # Глобальное поколение (для полной очистки)
+        self._global_generation = 0
+
+    async def get_index(self, chat_id: int, session: AsyncSession) -> SectionPatternIndex:
+        """
+        Возвращает индекс группы, строя его при необходимости.
+
+        Args:
+            chat_id: ID группы
+            session: Сессия БД (используется только при построении)
+
+        Returns:
+            SectionPatternIndex группы
+        """
+        index = self._indexes.get(chat_id)
+        if index and time.monotonic() - index.built_at < self._ttl:
+            return index
+
+        # Запоминаем поколение ДО загрузки из БД
+        generation = (self._global_generation, self._generations.get(chat_id, 0))
+
+        index = await self._build_index(chat_id, session)
+
+        # Если пока строили индекс, данные изменились — не кэшируем
+        if generation == (self._global_generation, self._generations.get(chat_id, 0)):
+            self._store(index)
+
+        return index
+
+    async def _build_index(self, chat_id: int, session: AsyncSession) -> SectionPatternIndex:
+        """
+        Загружает разделы и паттерны группы и компилирует индекс.
+
+        Два запроса вместо 1 + N: разделы и все их паттерны разом.
+        """
+        # Все активные разделы группы (отсортированы по названию)
+        sections_result = await session.execute(
+            select(CustomSpamSection).where(
+                CustomSpamSection.chat_id == chat_id,
+                CustomSpamSection.enabled == True
+            ).order_by(CustomSpamSection.name)
+        )
+        sections = list(sections_result.scalars().all())
+
+        patterns_by_section: Dict[int, List[CompiledPattern]] = {s.id: [] for s in sections}
+        if sections:
+            # Все активные паттерны этих разделов одним запросом
+            patterns_result = await session.execute(
+                select(CustomSectionPattern).where(
+                    CustomSectionPattern.section_id.in_(list(patterns_by_section.keys())),
+                    CustomSectionPattern.is_active == True
+                ).order_by(
+                    CustomSectionPattern.section_id,
+                    CustomSectionPattern.weight.desc(),
+                    CustomSectionPattern.id
+                )
+            )
+            for pattern in patterns_result.scalars().all():
+                compiled = compile_pattern(pattern)
+                if compiled:
+                    patterns_by_section[pattern.section_id].append(compiled)
+
+        index = SectionPatternIndex(
+            chat_id=chat_id,
+            sections=[
+                CompiledSection(
+                    section=SectionSnapshot.from_model(section),
+                    patterns=patterns_by_section[section.id]
+                )
+                for section in sections
+            ]
+        )
+
+        logger.info(
+            f"[SectionMatcher] Построен индекс для чата {chat_id}: "
+            f"разделов={len(index.sections)}, паттернов={index.patterns_count}"
+        )
+        return index
+
+    def _store(self, index: SectionPatternIndex) -> None:
+        """Сохраняет индекс и обновляет обратный маппинг section_id → chat_id."""
+        self._indexes[index.chat_id] = index
+        for compiled_section in index.sections:
+            self._section_chats[compiled_section.section.id] = index.chat_id
+
+    def invalidate_chat(self, chat_id: int) -> None:
+        """
+        Сбрасывает индекс группы.
+
+        Args:
+            chat_id: ID группы
+        """
+        self._generations[chat_id] = self._generations.get(chat_id, 0) + 1
+        index = self._indexes.pop(chat_id, None)
+        if index:
+            for compiled_section in index.sections:
+                self._section_chats.pop(compiled_section.section.id, None)
+            logger.debug(f"[SectionMatcher] Индекс чата {chat_id} сброшен")
+
+    def invalidate_section(self, section_id: int) -> None:
+        """
+        Сбрасывает индекс группы, которой принадлежит раздел.
+
+        Если раздел не найден ни в одном индексе (например, он был
+        выключен и только что включён) — сбрасываем весь кэш.
+
+        Args:
+            section_id: ID раздела
+        """
+        chat_id = self._section_chats.get(section_id)
+        if chat_id is not None:
+            self.invalidate_chat(chat_id)
+        else:
+            self.clear()
+
+    def clear(self) -> None:
+        """Полностью очищает кэш."""
+        self._global_generation += 1
+        self._indexes.clear()
+        self._section_chats.clear()
+
+
+# ============================================================
+# ГЛОБАЛЬНЫЙ ЭКЗЕМПЛЯР (СИНГЛТОН)
+# ============================================================
+
+_matcher_cache: Optional[SectionMatcherCache] = None
+
+
+def get_section_matcher_cache() -> SectionMatcherCache:
+    """
+    Возвращает глобальный экземпляр SectionMatcherCache (синглтон).
+
+    Returns:
+        Экземпляр SectionMatcherCache
+    """
+    global _matcher_cache
+    if _matcher_cache is None:
+        _matcher_cache = SectionMatcherCache()
+    return _matcher_cache
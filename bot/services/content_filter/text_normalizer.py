@@ -14,8 +14,27 @@
 import re
 # Импортируем unicodedata для работы с Unicode категориями и нормализацией
 import unicodedata
+# Импортируем lru_cache для кэша результатов нормализации
+from functools import lru_cache
 # Импортируем тип для аннотаций
-from typing import Optional
+from typing import Optional, Iterable
+
+
+class _StripTable(dict):
+    """
+    Таблица str.translate: удаляет combining marks (Mn/Mc) и невидимые символы.
+
+    Категория символа вычисляется при первой встрече и запоминается,
+    поэтому повторные тексты обрабатываются целиком на стороне C.
+    """
+
+    def __init__(self, invisible_chars: Iterable[str]):
+        super().__init__((ord(c), None) for c in invisible_chars)
+
+    def __missing__(self, code: int) -> Optional[int]:
+        value = None if unicodedata.category(chr(code)) in ('Mn', 'Mc') else code
+        self[code] = value
+        return value
 
 
 class TextNormalizer:
@@ -401,29 +420,68 @@ class TextNormalizer:
         '\u3000',  # Ideographic Space
     ]
 
+    # ─────────────────────────────────────────────────────────
+    # РАЗМЕР КЭША НОРМАЛИЗАЦИИ
+    # ─────────────────────────────────────────────────────────
+    # Один и тот же текст за одно сообщение нормализуют FilterManager,
+    # WordFilter, ScamDetector и CrossMessageService — кэшируем результат
+    NORMALIZE_CACHE_SIZE = 1024
+
+    # ─────────────────────────────────────────────────────────
+    # СКОМПИЛИРОВАННЫЕ ПАТТЕРНЫ (общие для всех экземпляров)
+    # ─────────────────────────────────────────────────────────
+    # Схлопывание повторяющихся букв: "лооооо" → "ло"
+    _REPEAT_REGEX = re.compile(r'(.)\1+')
+    # Короткое слово + разделитель + короткое слово: "шиш - ло" → "шишло"
+    _SHORT_WORDS_REGEX = re.compile(
+        r'\b([а-яёa-z]{1,4})\s*[-.,_*:;]+\s*([а-яёa-z]{1,4})\b',
+        re.IGNORECASE
+    )
+    # Одиночные буквы через пробелы/разделители (минимум 3 буквы): "К а з и н о"
+    _SPACED_REGEX = re.compile(
+        r'\b([а-яёa-z\d])(?:[\s\-\.\,\_\*\:\;\|\~\+\=\/\\]+([а-яёa-z\d])){2,}\b',
+        re.IGNORECASE | re.UNICODE
+    )
+    # Буквы внутри совпадения _SPACED_REGEX
+    _SPACED_LETTER_REGEX = re.compile(r'[а-яёa-z\d]', re.IGNORECASE)
+    # Разбиение нормализованного текста на слова
+    _WORD_SPLIT_REGEX = re.compile(r'\W+', re.UNICODE)
+
     def __init__(self):
         """
         Инициализация нормализатора.
 
-        Компилируем регулярные выражения один раз при создании объекта
-        для повышения производительности при многократном использовании.
+        Компилируем регулярные выражения и таблицы str.translate один раз
+        при создании объекта для повышения производительности.
         """
-        # Компилируем паттерн для удаления невидимых символов
-        # Создаём класс символов [...] из списка
-        invisible_pattern = '[' + ''.join(re.escape(c) for c in self.INVISIBLE_CHARS) + ']'
-        # Компилируем regex для многократного использования
-        self._invisible_regex = re.compile(invisible_pattern)
+        # Таблица удаления combining marks (Mn/Mc) и невидимых символов.
+        # Категории символов вычисляются лениво и запоминаются в таблице.
+        self._strip_table = _StripTable(self.INVISIBLE_CHARS)
+
+        # Таблица замены похожих символов на кириллицу (ШАГ 6)
+        self._char_table = str.maketrans(self.CHAR_MAP)
+
+        # Быстрая проверка: есть ли в тексте хоть один транслит-диграф.
+        # Замены выполняются только если он найден (обычно его нет).
+        self._digraph_regex = re.compile(
+            '|'.join(re.escape(digraph) for digraph, _ in self.TRANSLIT_DIGRAPHS)
+        )
 
         # Компилируем паттерн для удаления разделителей между буквами
-        # Ищем: буква + разделитель + буква, заменяем на: буква + буква
+        # Ищем: разделители, стоящие между двумя буквами, и удаляем их.
+        # Lookbehind/lookahead не поглощают буквы, поэтому один проход
+        # даёт тот же результат, что и повторные проходы (\w)[...]+(\w) → \1\2
         separator_chars = ''.join(re.escape(c) for c in self.SEPARATORS)
-        # Паттерн: (буква)(один или более разделителей)(буква)
-        # \w не подходит идеально, используем Unicode letter categories
         self._separator_regex = re.compile(
-            r'(\w)[' + separator_chars + r']+(\w)',
+            r'(?<=\w)[' + separator_chars + r']+(?=\w)',
             re.UNICODE
         )
 
+        # Кэш результатов normalize (потокобезопасный LRU)
+        self._normalize_cached = lru_cache(maxsize=self.NORMALIZE_CACHE_SIZE)(
+            self._normalize
+        )
+
     def normalize(self, text: str) -> str:
         """
         Нормализует текст для сравнения с запрещёнными словами.
@@ -434,6 +492,9 @@ class TextNormalizer:
         3. Удаление разделителей между буквами
         4. Замена похожих символов на кириллицу
 
+        Результат кэшируется (LRU), поэтому повторная нормализация
+        того же текста в рамках одного сообщения бесплатна.
+
         Args:
             text: Исходный текст для нормализации
 
@@ -453,61 +514,48 @@ class TextNormalizer:
         if not text:
             # Возвращаем пустую строку если входные данные пустые
             return ''
+        return self._normalize_cached(text)
 
+    def _normalize(self, text: str) -> str:
+        """Нормализация без кэша (см. normalize)."""
         # ─────────────────────────────────────────────────────────
-        # ШАГ 1: NFKD нормализация (раскладка compatibility characters)
+        # ШАГ 1-3: NFKD → lower → NFC → удаление combining marks
         # ─────────────────────────────────────────────────────────
-        # Раскладывает специальные Unicode символы в базовые:
+        # NFKD раскладывает специальные Unicode символы в базовые:
         # - ⓚⓞⓚⓐ → koka (enclosed/circled letters)
         # - ｋｏｋａ → koka (fullwidth латиница)
         # - ﬁ → fi (лигатуры)
         # - ² → 2 (надстрочные цифры)
-        result = unicodedata.normalize('NFKD', text)
-
-        # ─────────────────────────────────────────────────────────
-        # ШАГ 2: Приводим к нижнему регистру
-        # ─────────────────────────────────────────────────────────
-        # Это упрощает дальнейшее сравнение
-        # "КОКАИН" и "кокаин" становятся одинаковыми
-        result = result.lower()
-
-        # ─────────────────────────────────────────────────────────
-        # ШАГ 3: Удаляем Combining Marks (зачёркивания, подчёркивания, диакритики)
-        # ─────────────────────────────────────────────────────────
-        # Спамеры используют символы-модификаторы:
-        # - U+0336 COMBINING LONG STROKE OVERLAY (зачёркивание: ш̶u̶ш̶к̶u̶)
-        # - U+035E COMBINING DOUBLE MACRON (подчёркивание сверху: M͞n͞)
-        # - U+035F COMBINING DOUBLE MACRON BELOW (подчёркивание снизу: M͟n͟)
-        # - U+0301 COMBINING ACUTE ACCENT (ударение: á)
-        #
-        # НО! Сначала применяем NFC чтобы сохранить буквы типа й (и + breve)
-        # которые NFKD разложил на составляющие.
-        # Иначе й превратится в и после удаления combining marks.
-        result = unicodedata.normalize('NFC', result)
-        #
-        # Теперь удаляем все символы категории Mn (Mark, Nonspacing) и Mc (Mark, Spacing Combining)
-        # Это уберёт только "декоративные" marks (зачёркивания, подчёркивания),
-        # но не те что являются частью букв (они уже скомпозированы в NFC)
-        result = ''.join(
-            char for char in result
-            if unicodedata.category(char) not in ('Mn', 'Mc')
-        )
+        # NFC собирает обратно буквы типа й (и + breve), чтобы после
+        # удаления combining marks (зачёркивания ш̶u̶ш̶к̶u̶, подчёркивания M͟n͟,
+        # ударения á) й не превратилась в и.
+        # Для ASCII-текста обе нормализации ничего не меняют — пропускаем.
+        if text.isascii():
+            result = text.lower()
+        else:
+            result = unicodedata.normalize(
+                'NFC', unicodedata.normalize('NFKD', text).lower()
+            )
 
         # ─────────────────────────────────────────────────────────
-        # ШАГ 4: Удаляем невидимые символы
+        # ШАГ 3-4: Удаляем combining marks и невидимые символы
         # ─────────────────────────────────────────────────────────
         # Zero-width символы могут разбивать слово:
-        # "ко\u200bкаин" выглядит как "кокаин", но не матчится
-        result = self._invisible_regex.sub('', result)
+        # "ко​каин" выглядит как "кокаин", но не матчится
+        # Одна таблица translate вместо генератора + regex
+        result = result.translate(self._strip_table)
 
         # ─────────────────────────────────────────────────────────
         # ШАГ 5: Заменяем транслит-диграфы
         # ─────────────────────────────────────────────────────────
         # Спамеры пишут русские слова латиницей (транслит):
         # shishki → шишки, marochki → марочки, kokain → кокаин
-        # Важно: диграфы заменяются ДО отдельных букв, иначе sh → сн
-        for digraph, replacement in self.TRANSLIT_DIGRAPHS:
-            result = result.replace(digraph, replacement)
+        # Важно: диграфы заменяются ДО отдельных букв, иначе sh → сн.
+        # Порядок списка важен при пересечениях (tsh, aya), поэтому
+        # замены последовательные — но только если диграф вообще есть.
+        if self._digraph_regex.search(result):
+            for digraph, replacement in self.TRANSLIT_DIGRAPHS:
+                result = result.replace(digraph, replacement)
 
         # ─────────────────────────────────────────────────────────
         # ШАГ 6: Заменяем похожие символы на кириллицу
@@ -515,40 +563,19 @@ class TextNormalizer:
         # "wишki" → "вишки"
         # "k0ka" → "кока"
         # ВАЖНО: делаем ДО удаления разделителей, чтобы k-@-n → к-а-н
-        normalized_chars = []
-        for char in result:
-            # Если символ есть в словаре замен - заменяем
-            if char in self.CHAR_MAP:
-                normalized_chars.append(self.CHAR_MAP[char])
-            else:
-                # Иначе оставляем как есть
-                normalized_chars.append(char)
-
-        # Собираем обратно в строку
-        result = ''.join(normalized_chars)
+        result = result.translate(self._char_table)
 
         # ─────────────────────────────────────────────────────────
         # ШАГ 7: Удаляем разделители между буквами
         # ─────────────────────────────────────────────────────────
         # "к-о-к-а" → "кока"
         # Теперь все символы уже кириллица, разделители корректно удалятся
-        prev_result = None
-        # Повторяем пока есть изменения (максимум 10 итераций для защиты)
-        iterations = 0
-        while prev_result != result and iterations < 10:
-            # Сохраняем предыдущий результат для сравнения
-            prev_result = result
-            # Заменяем: буква + разделители + буква → буква + буква
-            result = self._separator_regex.sub(r'\1\2', result)
-            # Увеличиваем счётчик итераций
-            iterations += 1
+        result = self._separator_regex.sub('', result)
 
         # ─────────────────────────────────────────────────────────
         # ШАГ 8: Удаляем пробелы между одиночными буквами
         # ─────────────────────────────────────────────────────────
         # Обрабатываем случай "К а з и н о" → "Казино"
-        # Паттерн: если слово состоит из букв разделённых пробелами
-        # и каждая "буква" - это одиночный символ
         result = self._collapse_spaced_letters(result)
 
         # ─────────────────────────────────────────────────────────
@@ -556,24 +583,17 @@ class TextNormalizer:
         # ─────────────────────────────────────────────────────────
         # Важно сделать ДО ШАГ 8.2, чтобы "лооооо" стало "ло" (2 буквы)
         # и прошло проверку {1,4} в ШАГ 8.2
-        result = re.sub(r'(.)\1+', r'\1', result)
+        result = self._REPEAT_REGEX.sub(r'\1', result)
 
         # ─────────────────────────────────────────────────────────
         # ШАГ 8.2: Убираем пробелы вокруг разделителей для КОРОТКИХ слов
         # ─────────────────────────────────────────────────────────
         # "шиш - ло" → "шишло"
         # НО "добрый - день" остаётся как есть (длинные слова)
-        # Паттерн: короткое слово (1-4 буквы) + пробел-разделитель-пробел + короткое слово
         # Применяем несколько раз для цепочек типа "ши - ш - ло"
         for _ in range(5):
             prev = result
-            # \b гарантирует что мы не захватываем часть длинного слова
-            result = re.sub(
-                r'\b([а-яёa-z]{1,4})\s*[-.,_*:;]+\s*([а-яёa-z]{1,4})\b',
-                r'\1\2',
-                result,
-                flags=re.IGNORECASE
-            )
+            result = self._SHORT_WORDS_REGEX.sub(r'\1\2', result)
             if result == prev:
                 break
 
@@ -582,12 +602,7 @@ class TextNormalizer:
         # ─────────────────────────────────────────────────────────
         # После схлопывания букв могут остаться разделители:
         # "шиш-ло" → "шишло"
-        prev_result = None
-        iterations = 0
-        while prev_result != result and iterations < 5:
-            prev_result = result
-            result = self._separator_regex.sub(r'\1\2', result)
-            iterations += 1
+        result = self._separator_regex.sub('', result)
 
         # Возвращаем нормализованный текст
         return result
@@ -607,29 +622,17 @@ class TextNormalizer:
         Returns:
             Текст со схлопнутыми буквами
         """
-        # Паттерн: находим последовательности одиночных букв разделённых
-        # пробелами и/или разделителями (-, ., _, и т.д.)
-        # Минимум 3 буквы подряд чтобы не ломать нормальный текст
-        # Разделители: пробелы, дефисы, точки, подчёркивания и т.д.
-        sep = r'[\s\-\.\,\_\*\:\;\|\~\+\=\/\\]+'
-        # Ищем: буква + (разделитель + буква){2,} — минимум 3 буквы
-        spaced_pattern = re.compile(
-            rf'\b([а-яёa-z\d])(?:{sep}([а-яёa-z\d])){{2,}}\b',
-            re.IGNORECASE | re.UNICODE
-        )
-
         def replace_spaced(match):
             # Извлекаем все буквы из совпавшего текста
             # match.group(0) = полный матч, например "ш и - ш - л - о"
-            letters = re.findall(r'[а-яёa-z\d]', match.group(0), re.IGNORECASE)
-            return ''.join(letters)
+            return ''.join(self._SPACED_LETTER_REGEX.findall(match.group(0)))
 
         # Применяем замену несколько раз для вложенных случаев
         prev = None
         iterations = 0
         while prev != text and iterations < 5:
             prev = text
-            text = spaced_pattern.sub(replace_spaced, text)
+            text = self._SPACED_REGEX.sub(replace_spaced, text)
             iterations += 1
 
         return text
@@ -673,7 +676,7 @@ class TextNormalizer:
         normalized = self.normalize(text)
         # Разбиваем по не-буквенным символам
         # \W+ означает один или более не-словесных символов
-        words = re.split(r'\W+', normalized, flags=re.UNICODE)
+        words = self._WORD_SPLIT_REGEX.split(normalized)
         # Фильтруем пустые строки
         return [w for w in words if w]
 
@@ -6,15 +6,13 @@
 #
 # Функционал:
 # - Загрузка списка запрещённых слов из БД
-# - Кэширование в Redis для производительности
+# - Скомпилированный индекс слов в памяти (см. word_index)
 # - Проверка с учётом whitelist (исключений)
 # - Поддержка разных типов совпадений (word, phrase, regex)
 # ============================================================
 
-# Импортируем модуль регулярных выражений
-import re
 # Импортируем типы для аннотаций
-from typing import Optional, List, Set, NamedTuple
+from typing import Optional, List, NamedTuple
 # Импортируем логгер для записи событий
 import logging
 
@@ -23,9 +21,13 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # Импортируем модели БД
-from bot.database.models_content_filter import FilterWord, FilterWhitelist
+from bot.database.models_content_filter import FilterWord
 # Импортируем нормализатор текста
 from bot.services.content_filter.text_normalizer import TextNormalizer, get_normalizer
+# Импортируем кэш скомпилированных индексов слов
+from bot.services.content_filter.word_index import get_word_index_cache
+# Импортируем общий разбор текста сообщения
+from bot.services.content_filter.message_analysis import MessageAnalysis
 
 # Создаём логгер для этого модуля
 logger = logging.getLogger(__name__)
@@ -64,11 +66,10 @@ class WordFilter:
     Класс для проверки текста на запрещённые слова.
 
     Алгоритм работы:
-    1. Загружает слова группы из БД (с кэшированием)
-    2. Загружает whitelist (исключения)
-    3. Нормализует входной текст
-    4. Ищет совпадения с учётом типа (word/phrase/regex)
-    5. Возвращает результат с информацией о слове
+    1. Берёт скомпилированный индекс слов и whitelist группы (кэш)
+    2. Нормализует входной текст
+    3. Ищет совпадения с учётом типа (word/phrase/regex)
+    4. Возвращает результат с информацией о слове
 
     Пример использования:
         filter = WordFilter()
@@ -96,7 +97,8 @@ class WordFilter:
         text: str,
         chat_id: int,
         session: AsyncSession,
-        use_normalizer: bool = True
+        use_normalizer: bool = True,
+        analysis: Optional[MessageAnalysis] = None
     ) -> WordMatchResult:
         """
         Проверяет текст на наличие запрещённых слов.
@@ -109,6 +111,7 @@ class WordFilter:
             chat_id: ID группы (для загрузки слов этой группы)
             session: Сессия БД
             use_normalizer: Deprecated, игнорируется. Нормализация теперь per-category.
+            analysis: Общий разбор текста (если None — создаётся локально)
 
         Returns:
             WordMatchResult с информацией о найденном слове (или matched=False)
@@ -119,194 +122,56 @@ class WordFilter:
             return WordMatchResult(matched=False)
 
         # ─────────────────────────────────────────────────────────
-        # ШАГ 1: Загружаем запрещённые слова для этой группы
+        # ШАГ 1: Берём скомпилированный индекс слов группы
         # ─────────────────────────────────────────────────────────
-        filter_words = await self._get_filter_words(chat_id, session)
+        # Слова и whitelist загружаются из БД только при построении индекса
+        index = await get_word_index_cache().get_index(chat_id, session)
 
         # Если список слов пуст - нечего проверять
-        if not filter_words:
+        if index.is_empty:
             return WordMatchResult(matched=False)
 
         # ─────────────────────────────────────────────────────────
-        # ШАГ 2: Загружаем whitelist (исключения)
+        # ШАГ 2: Ищем совпадения в каждой группе категорий
         # ─────────────────────────────────────────────────────────
-        whitelist = await self._get_whitelist(chat_id, session)
-
-        # ─────────────────────────────────────────────────────────
-        # ШАГ 3: Готовим ОБЕ версии текста
-        # ─────────────────────────────────────────────────────────
-        # Версия для simple/harmful - простой lowercase
-        text_lower = text.lower()
-        text_words_lower = [w.lower() for w in re.split(r'\W+', text) if w.strip()]
-
-        # Версия для obfuscated - полная нормализация (l33tspeak → кириллица)
-        text_normalized = self._normalizer.normalize(text)
-        text_words_normalized = self._normalizer.get_words_from_text(text)
-        # Версия БЕЗ пробелов - для contains/phrase в obfuscated
-        # Чтобы "Alice Demidova" → "алиседемидова" совпадало с паттерном
-        text_normalized_no_spaces = text_normalized.replace(' ', '')
+        # Версии текста ленивые: считаются только для групп, в которых есть слова
+        if analysis is None:
+            analysis = MessageAnalysis(text, normalizer=self._normalizer)
+        candidates = []
+
+        if not index.plain.is_empty:
+            # simple/harmful - простой lowercase
+            candidates.append(index.plain.find_first(
+                analysis.lower, analysis.words_lower, analysis.lower, index.whitelist
+            ))
+
+        if not index.obfuscated.is_empty:
+            # obfuscated - полная нормализация (l33tspeak → кириллица)
+            # Версия БЕЗ пробелов - для contains/phrase
+            # Чтобы "Alice Demidova" → "алиседемидова" совпадало с паттерном
+            candidates.append(index.obfuscated.find_first(
+                analysis.normalized, analysis.normalized_words,
+                analysis.normalized_no_spaces, index.whitelist
+            ))
+
+        # Побеждает слово, стоящее раньше в списке группы
+        found = [entry for entry in candidates if entry is not None]
+        if not found:
+            # Запрещённых слов не найдено
+            return WordMatchResult(matched=False)
 
-        # ─────────────────────────────────────────────────────────
-        # ШАГ 4: Проверяем каждое запрещённое слово
-        # ─────────────────────────────────────────────────────────
+        entry = min(found, key=lambda e: e.order)
         logger.info(
-            f"[WordFilter] Проверка: chat={chat_id}, words={len(filter_words)}, "
-            f"text_lower='{text_lower[:80] if len(text_lower) > 80 else text_lower}'"
+            f"[WordFilter] ✅ Найдено: '{entry.word}' (cat={entry.category}) в чате {chat_id}"
+        )
+        return WordMatchResult(
+            matched=True,
+            word=entry.word,
+            word_id=entry.id,
+            action=entry.action,
+            action_duration=entry.action_duration,
+            category=entry.category
         )
-
-        for fw in filter_words:
-            # ─────────────────────────────────────────────────────
-            # ВЫБОР ВЕРСИИ ТЕКСТА НА ОСНОВЕ КАТЕГОРИИ СЛОВА
-            # ─────────────────────────────────────────────────────
-            # obfuscated → используем нормализованный текст (l33tspeak)
-            # simple/harmful → используем простой lowercase
-            if fw.category == 'obfuscated':
-                check_text = text_normalized
-                check_words = text_words_normalized
-                # Для obfuscated слово тоже должно быть нормализовано
-                check_filter_word = fw.normalized
-                # Текст без пробелов для contains/phrase
-                check_text_no_spaces = text_normalized_no_spaces
-            else:
-                check_text = text_lower
-                check_words = text_words_lower
-                # Для simple/harmful сравниваем с оригиналом слова (lowercase)
-                check_filter_word = fw.word.lower()
-                # Для harmful/simple не убираем пробелы
-                check_text_no_spaces = None
-
-            logger.info(
-                f"[WordFilter] Проверяем: '{fw.word}' (cat={fw.category}, "
-                f"match={fw.match_type}, use_normalized={fw.category == 'obfuscated'})"
-            )
-
-            # Проверяем совпадение в зависимости от типа
-            is_match = self._check_word_match(
-                filter_word=fw,
-                normalized_text=check_text,
-                text_words=check_words,
-                whitelist=whitelist,
-                check_filter_word=check_filter_word,
-                text_no_spaces=check_text_no_spaces,
-            )
-
-            # Если нашли совпадение - возвращаем результат
-            if is_match:
-                logger.info(
-                    f"[WordFilter] ✅ Найдено: '{fw.word}' (cat={fw.category}) в чате {chat_id}"
-                )
-                return WordMatchResult(
-                    matched=True,
-                    word=fw.word,
-                    word_id=fw.id,
-                    action=fw.action,
-                    action_duration=fw.action_duration,
-                    category=fw.category
-                )
-
-        # Запрещённых слов не найдено
-        return WordMatchResult(matched=False)
-
-    def _check_word_match(
-        self,
-        filter_word: FilterWord,
-        normalized_text: str,
-        text_words: List[str],
-        whitelist: Set[str],
-        check_filter_word: Optional[str] = None,
-        text_no_spaces: Optional[str] = None,
-    ) -> bool:
-        """
-        Проверяет совпадение одного запрещённого слова с текстом.
-
-        Args:
-            filter_word: Объект FilterWord из БД
-            normalized_text: Текст для проверки (нормализованный или lowercase)
-            text_words: Список отдельных слов из текста
-            whitelist: Множество слов-исключений
-            check_filter_word: Слово для сравнения (normalized для obfuscated,
-                               lowercase для simple/harmful). Если None - используется
-                               filter_word.normalized (для обратной совместимости)
-            text_no_spaces: Текст без пробелов (для obfuscated + contains/phrase)
-                           Позволяет "Alice Demidova" матчить "alicedemidova"
-
-        Returns:
-            True если слово найдено в тексте
-        """
-        # Используем переданное слово или fallback на normalized
-        normalized_filter_word = check_filter_word or filter_word.normalized
-
-        # ─────────────────────────────────────────────────────────
-        # Проверяем тип совпадения
-        # ─────────────────────────────────────────────────────────
-
-        if filter_word.match_type == 'regex':
-            # ─────────────────────────────────────────────────────
-            # REGEX: используем регулярное выражение
-            # ─────────────────────────────────────────────────────
-            try:
-                # Компилируем regex (оригинальный word, не normalized)
-                pattern = re.compile(filter_word.word, re.IGNORECASE | re.UNICODE)
-                # Ищем в нормализованном тексте
-                match = pattern.search(normalized_text)
-                if match:
-                    # Проверяем что найденное не в whitelist
-                    matched_text = match.group()
-                    if matched_text.lower() not in whitelist:
-                        return True
-            except re.error as e:
-                # Логируем ошибку компиляции regex
-                logger.warning(
-                    f"[WordFilter] Ошибка regex '{filter_word.word}': {e}"
-                )
-            return False
-
-        elif filter_word.match_type in ('phrase', 'contains'):
-            # ─────────────────────────────────────────────────────
-            # PHRASE / CONTAINS: ищем как подстроку
-            # ─────────────────────────────────────────────────────
-            # Для obfuscated + contains/phrase используем текст БЕЗ пробелов
-            # чтобы "Alice Demidova" → "алиседемидова" совпадало с паттерном
-            if text_no_spaces is not None:
-                # obfuscated категория — проверяем в тексте без пробелов
-                search_text = text_no_spaces
-                # Паттерн тоже без пробелов для корректного сравнения
-                search_pattern = normalized_filter_word.replace(' ', '')
-            else:
-                # harmful/simple — проверяем в обычном тексте
-                search_text = normalized_text
-                search_pattern = normalized_filter_word
-
-            is_found = search_pattern in search_text
-            logger.info(
-                f"[WordFilter] {filter_word.match_type.upper()} check: "
-                f"'{normalized_filter_word}' in text = {is_found}"
-            )
-            if is_found:
-                # Для whitelist проверяем полный текст, не отдельные слова
-                # Если искомая фраза есть в whitelist - пропускаем
-                if normalized_filter_word in whitelist:
-                    logger.info(
-                        f"[WordFilter] {filter_word.match_type.upper()} "
-                        f"'{normalized_filter_word}' в whitelist, пропускаем"
-                    )
-                    return False
-                return True
-            return False
-
-        else:
-            # ─────────────────────────────────────────────────────
-            # WORD / EXACT (по умолчанию): ищем как отдельное слово
-            # ─────────────────────────────────────────────────────
-            # Проверяем есть ли слово среди слов текста
-            for text_word in text_words:
-                # Точное совпадение слова
-                if text_word == normalized_filter_word:
-                    # Проверяем что слово не в whitelist
-                    if text_word not in whitelist:
-                        return True
-
-            return False
 
     async def _get_filter_words(
         self,
@@ -316,7 +181,8 @@ class WordFilter:
         """
         Загружает список запрещённых слов для группы из БД.
 
-        TODO: Добавить кэширование в Redis для производительности.
+        Для проверки сообщений используется кэшированный индекс
+        (см. word_index), этот метод — для списков в меню.
 
         Args:
             chat_id: ID группы
@@ -334,36 +200,6 @@ class WordFilter:
         # Возвращаем список объектов
         return list(result.scalars().all())
 
-    async def _get_whitelist(
-        self,
-        chat_id: int,
-        session: AsyncSession
-    ) -> Set[str]:
-        """
-        Загружает whitelist (исключения) для группы.
-
-        Whitelist содержит слова которые НЕ нужно фильтровать,
-        даже если они похожи на запрещённые.
-        Пример: "анализ" не должен срабатывать на "анал".
-
-        Args:
-            chat_id: ID группы
-            session: Сессия БД
-
-        Returns:
-            Множество нормализованных слов-исключений
-        """
-        # Формируем запрос
-        query = select(FilterWhitelist.normalized).where(
-            FilterWhitelist.chat_id == chat_id
-        )
-
-        # Выполняем запрос
-        result = await session.execute(query)
-
-        # Возвращаем как множество для быстрого поиска O(1)
-        return set(result.scalars().all())
-
     async def add_word(
         self,
         chat_id: int,
@@ -432,6 +268,9 @@ class WordFilter:
         # Обновляем объект из БД (получаем id)
         await session.refresh(filter_word)
 
+        # Сбрасываем скомпилированный индекс группы
+        get_word_index_cache().invalidate_chat(chat_id)
+
         logger.info(
             f"[WordFilter] Добавлено слово '{word}' в чат {chat_id} "
             f"пользователем {created_by}"
@@ -472,6 +311,9 @@ class WordFilter:
         await session.delete(filter_word)
         await session.commit()
 
+        # Сбрасываем скомпилированный индекс группы
+        get_word_index_cache().invalidate_chat(chat_id)
+
         logger.info(f"[WordFilter] Удалено слово '{word}' из чата {chat_id}")
 
         return True
@@ -0,0 +1,365 @@
+# ============================================================
+# WORD INDEX - СКОМПИЛИРОВАННЫЙ ИНДЕКС ЗАПРЕЩЁННЫХ СЛОВ
+# ============================================================
+# Этот модуль хранит в памяти процесса готовый к проверке индекс
+# запрещённых слов группы (FilterWord) вместе с whitelist.
+#
+# Раньше WordFilter на КАЖДОЕ сообщение:
+# - делал SELECT всех слов и SELECT whitelist
+# - компилировал regex каждого слова заново
+# - проверял каждое слово отдельным циклом/поиском подстроки
+#
+# Теперь индекс строится ОДИН раз на группу и содержит
+# отдельно для obfuscated и для simple/harmful (остальных) категорий:
+# - словарь слово → записи для match_type='word' (поиск O(1))
+# - автомат Ахо-Корасик для phrase/contains (один проход по тексту)
+# - заранее скомпилированные regex
+#
+# Слова, которые целиком попадают в whitelist, отбрасываются при
+# построении — на проверке они всё равно никогда не сработали бы.
+#
+# Индекс сбрасывается через WordFilter.add_word/remove_word,
+# обработчики категорий слов и импорт настроек.
+# ============================================================
+
+# Импортируем типы для аннотаций
+from typing import Optional, List, Dict, Set, Tuple
+# Импортируем dataclass для структур индекса
+from dataclasses import dataclass, field
+# Импортируем логгер
+import logging
+# Импортируем re для компиляции regex
+import re
+# Импортируем time для TTL индекса
+import time
+
+# Импортируем SQLAlchemy компоненты
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Импортируем модели слов и whitelist
+from bot.database.models_content_filter import FilterWord, FilterWhitelist
+# Импортируем автомат Ахо-Корасик (общий с индексом разделов)
+from bot.services.content_filter.section_matcher import AhoCorasick
+
+# Создаём логгер
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# КОНСТАНТЫ
+# ============================================================
+
+# Время жизни индекса в секундах.
+# Страховка на случай изменений в обход инвалидации
+# (например, из другой реплики бота).
+INDEX_TTL_SECONDS = 300
+
+# Категория, для которой применяется полная нормализация (l33tspeak)
+OBFUSCATED_CATEGORY = 'obfuscated'
+
+
+# ============================================================
+# СТРУКТУРЫ ИНДЕКСА
+# ============================================================
+
+@dataclass(frozen=True)
+class WordEntry:
+    """
+    Снимок запрещённого слова (без привязки к сессии БД).
+
+    order — позиция слова в выборке из БД: при нескольких совпадениях
+    побеждает слово с меньшим order, как в прежнем линейном цикле.
+    """
+    order: int
+    id: int
+    word: str
+    action: Optional[str]
+    action_duration: Optional[int]
+    category: Optional[str]
+
+
+@dataclass
+class WordGroupIndex:
+    """
+    Индекс слов одной группы категорий (obfuscated или остальные).
+
+    Ключи уже приведены к виду, в котором они сравниваются с текстом:
+    normalized для obfuscated, lowercase для остальных.
+    """
+    # match_type='word': слово → записи
+    words: Dict[str, List[WordEntry]] = field(default_factory=dict)
+    # match_type='phrase'/'contains': подстрока → записи
+    phrases: Dict[str, List[WordEntry]] = field(default_factory=dict)
+    # Пустые подстроки — совпадают с любым текстом
+    always: List[WordEntry] = field(default_factory=list)
+    # match_type='regex' в порядке order
+    regexes: List[Tuple[re.Pattern, WordEntry]] = field(default_factory=list)
+    # Автомат по ключам phrases (строится в finalize)
+    automaton: Optional[AhoCorasick] = None
+
+    @property
+    def is_empty(self) -> bool:
+        """True если в группе нет ни одного слова."""
+        return not (self.words or self.phrases or self.always or self.regexes)
+
+    def finalize(self) -> None:
+        """Строит автомат для фраз после заполнения индекса."""
+        if self.phrases:
+            self.automaton = AhoCorasick(list(self.phrases.keys()))
+
+    def find_first(
+        self,
+        text: str,
+        text_words: List[str],
+        text_no_spaces: str,
+        whitelist: Set[str]
+    ) -> Optional[WordEntry]:
+        """
+        Возвращает первое (по order) сработавшее слово группы.
+
+        Args:
+            text: Текст для regex (normalized или lowercase)
+            text_words: Слова текста
+            text_no_spaces: Текст для phrase/contains
+            whitelist: Множество слов-исключений
+
+        Returns:
+            WordEntry или None
+        """
+        best: Optional[WordEntry] = None
+
+        def consider(entry: WordEntry) -> None:
+            nonlocal best
+            if best is None or entry.order < best.order:
+                best = entry
+
+        # WORD: точное совпадение отдельного слова
+        for text_word in set(text_words):
+            entries = self.words.get(text_word)
+            if entries:
+                consider(entries[0])
+
+        # PHRASE / CONTAINS: все подстроки за один проход
+        if self.always:
+            consider(self.always[0])
+        if self.automaton:
+            for key in self.automaton.find_all(text_no_spaces):
+                consider(self.phrases[key][0])
+
+        # REGEX: проверяем только те, что стоят раньше уже найденного
+        for pattern, entry in self.regexes:
+            if best is not None and entry.order > best.order:
+                break
+            match = pattern.search(text)
+            if match and match.group().lower() not in whitelist:
+                consider(entry)
+                break
+
+        return best
+
+
+@dataclass
+class WordIndex:
+    """
+    Скомпилированный индекс запрещённых слов одной группы.
+    """
+    chat_id: int
+    # Слова категории obfuscated (сравнение с нормализованным текстом)
+    obfuscated: WordGroupIndex
+    # Слова остальных категорий (сравнение с lowercase)
+    plain: WordGroupIndex
+    # Whitelist (нормализованные слова-исключения)
+    whitelist: Set[str]
+    # Количество слов в индексе
+    words_count: int = 0
+    # Время построения (для TTL)
+    built_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def is_empty(self) -> bool:
+        """True если у группы нет слов для проверки."""
+        return self.obfuscated.is_empty and self.plain.is_empty
+
+
+def build_word_index(
+    chat_id: int,
+    filter_words: List[FilterWord],
+    whitelist: Set[str]
+) -> WordIndex:
+    """
+    Компилирует индекс из слов и whitelist группы.
+
+    Args:
+        chat_id: ID группы
+        filter_words: Слова группы в порядке проверки
+        whitelist: Множество слов-исключений
+
+    Returns:
+        WordIndex
+    """
+    obfuscated = WordGroupIndex()
+    plain = WordGroupIndex()
+
+    for order, fw in enumerate(filter_words):
+        entry = WordEntry(
+            order=order,
+            id=fw.id,
+            word=fw.word,
+            action=fw.action,
+            action_duration=fw.action_duration,
+            category=fw.category
+        )
+        is_obfuscated = fw.category == OBFUSCATED_CATEGORY
+        group = obfuscated if is_obfuscated else plain
+        # obfuscated сравниваем с normalized, остальные — с lowercase оригинала
+        key = (fw.normalized if is_obfuscated else fw.word.lower()) or fw.normalized or ''
+
+        if fw.match_type == 'regex':
+            try:
+                # Компилируем regex (оригинальный word, не normalized)
+                pattern = re.compile(fw.word, re.IGNORECASE | re.UNICODE)
+            except re.error as e:
+                logger.warning(f"[WordIndex] Ошибка regex '{fw.word}': {e}")
+                continue
+            group.regexes.append((pattern, entry))
+
+        elif fw.match_type in ('phrase', 'contains'):
+            # Фраза из whitelist никогда не срабатывает
+            if key in whitelist:
+                continue
+            # Для obfuscated ищем в тексте без пробелов
+            # чтобы "Alice Demidova" → "алиседемидова" совпадало с паттерном
+            search_key = key.replace(' ', '') if is_obfuscated else key
+            if search_key:
+                group.phrases.setdefault(search_key, []).append(entry)
+            else:
+                group.always.append(entry)
+
+        else:
+            # WORD / EXACT (по умолчанию); слово из whitelist не срабатывает
+            if key in whitelist:
+                continue
+            group.words.setdefault(key, []).append(entry)
+
+    obfuscated.finalize()
+    plain.finalize()
+
+    return WordIndex(
+        chat_id=chat_id,
+        obfuscated=obfuscated,
+        plain=plain,
+        whitelist=whitelist,
+        words_count=len(filter_words)
+    )
+
+
+# ============================================================
+# КЭШ ИНДЕКСОВ ПО ГРУППАМ
+# ============================================================
+
+class WordIndexCache:
+    """
+    Кэш скомпилированных индексов слов в памяти процесса.
+
+    Индекс группы строится при первом сообщении и живёт до
+    инвалидации (изменение слов/whitelist) или истечения TTL.
+    """
+
+    def __init__(self, ttl_seconds: int = INDEX_TTL_SECONDS):
+        """
+        Args:
+            ttl_seconds: Время жизни индекса в секундах
+        """
+        self._ttl = ttl_seconds
+        # chat_id → индекс
+        self._indexes: Dict[int, WordIndex] = {}
+        # Поколение группы: растёт при каждой инвалидации.
+        # Индекс, построенный до инвалидации, не сохраняется.
+        self._generations: Dict[int, int] = {}
+        # Глобальное поколение (для полной очистки)
+        self._global_generation = 0
+
+    async def get_index(self, chat_id: int, session: AsyncSession) -> WordIndex:
+        """
+        Возвращает индекс группы, строя его при необходимости.
+
+        Args:
+            chat_id: ID группы
+            session: Сессия БД (используется только при построении)
+
+        Returns:
+            WordIndex группы
+        """
+        index = self._indexes.get(chat_id)
+        if index and time.monotonic() - index.built_at < self._ttl:
+            return index
+
+        # Запоминаем поколение ДО загрузки из БД
+        generation = (self._global_generation, self._generations.get(chat_id, 0))
+
+        index = await self._build_index(chat_id, session)
+
+        # Если пока строили индекс, данные изменились — не кэшируем
+        if generation == (self._global_generation, self._generations.get(chat_id, 0)):
+            self._indexes[chat_id] = index
+
+        return index
+
+    async def _build_index(self, chat_id: int, session: AsyncSession) -> WordIndex:
+        """Загружает слова и whitelist группы и компилирует индекс."""
+        words_result = await session.execute(
+            select(FilterWord).where(FilterWord.chat_id == chat_id).order_by(FilterWord.id)
+        )
+        filter_words = list(words_result.scalars().all())
+
+        whitelist: Set[str] = set()
+        if filter_words:
+            whitelist_result = await session.execute(
+                select(FilterWhitelist.normalized).where(FilterWhitelist.chat_id == chat_id)
+            )
+            whitelist = set(whitelist_result.scalars().all())
+
+        index = build_word_index(chat_id, filter_words, whitelist)
+
+        logger.info(
+            f"[WordIndex] Построен индекс для чата {chat_id}: "
+            f"слов={index.words_count}, whitelist={len(whitelist)}"
+        )
+        return index
+
+    def invalidate_chat(self, chat_id: int) -> None:
+        """
+        Сбрасывает индекс группы.
+
+        Args:
+            chat_id: ID группы
+        """
+        self._generations[chat_id] = self._generations.get(chat_id, 0) + 1
+        if self._indexes.pop(chat_id, None):
+            logger.debug(f"[WordIndex] Индекс чата {chat_id} сброшен")
+
+    def clear(self) -> None:
+        """Полностью очищает кэш."""
+        self._global_generation += 1
+        self._indexes.clear()
+
+
+# ============================================================
+# ГЛОБАЛЬНЫЙ ЭКЗЕМПЛЯР (СИНГЛТОН)
+# ============================================================
+
+_word_index_cache: Optional[WordIndexCache] = None
+
+
+def get_word_index_cache() -> WordIndexCache:
+    """
+    Возвращает глобальный экземпляр WordIndexCache (синглтон).
+
+    Returns:
+        Экземпляр WordIndexCache
+    """
+    global _word_index_cache
+    if _word_index_cache is None:
+        _word_index_cache = WordIndexCache()
+    return _word_index_cache
@@ -5,6 +5,7 @@
 Содержит:
 - settings_service.py - CRUD настроек модуля
 - detection_service.py - логика детекции скамеров
+- activity_store.py - входы и сообщения пользователей в Redis
 - action_service.py - применение действий (мут/бан/удаление)
 
 Критерии детекции (ВСЕ должны выполниться):
@@ -16,6 +17,7 @@
 # Импортируем сервисы для удобного доступа извне модуля
 from bot.services.cross_group.settings_service import (
     get_cross_group_settings,
+    get_cached_cross_group_settings,
     update_cross_group_settings,
     toggle_cross_group_detection,
     add_excluded_group,
@@ -31,6 +33,11 @@ from bot.services.cross_group.detection_service import (
     clear_old_activity,
 )
 
+from bot.services.cross_group.activity_store import (
+    CrossGroupActivityStore,
+    get_activity_store,
+)
+
 from bot.services.cross_group.action_service import (
     apply_cross_group_action,
     send_journal_notification,
@@ -39,6 +46,7 @@ from bot.services.cross_group.action_service import (
 __all__ = [
     # Settings
     'get_cross_group_settings',
+    'get_cached_cross_group_settings',
     'update_cross_group_settings',
     'toggle_cross_group_detection',
     'add_excluded_group',
@@ -50,6 +58,9 @@ __all__ = [
     'check_cross_group_detection',
     'get_user_activity',
     'clear_old_activity',
+    # Activity store
+    'CrossGroupActivityStore',
+    'get_activity_store',
     # Action
     'apply_cross_group_action',
     'send_journal_notification',
@@ -14,8 +14,6 @@ import logging
 from datetime import datetime, timedelta
 # Импортируем типы для аннотаций
 from typing import Optional, Dict, Any, List
-# Импортируем asyncio для асинхронных операций
-import asyncio
 
 # Импортируем типы aiogram
 from aiogram import Bot
@@ -33,9 +31,11 @@ from bot.database.models_cross_group import (
 )
 
 # Импортируем сервис настроек
-from bot.services.cross_group.settings_service import get_cross_group_settings
+from bot.services.cross_group.settings_service import get_cached_cross_group_settings
 # Импортируем сервис детекции
 from bot.services.cross_group.detection_service import mark_action_taken
+# Импортируем пакетное удаление сообщений
+from bot.services.message_deletion import delete_messages
 
 
 # Создаём логгер для этого модуля
@@ -74,7 +74,7 @@ async def apply_cross_group_action(
             }
     """
     # Получаем настройки модуля
-    settings = await get_cross_group_settings(session)
+    settings = await get_cached_cross_group_settings(session)
 
     # Получаем список затронутых групп
     groups_involved = detection_data.get("groups_involved", {})
@@ -339,7 +339,8 @@ async def _delete_messages(
     """
     Удаляет сообщения пользователя в группе.
 
-    Использует Bot API delete_messages (до 100 за раз).
+    Использует общий сервис пакетного удаления (deleteMessages
+    до 100 ID за вызов, повтор после FloodWait).
 
     Args:
         bot: Объект бота aiogram
@@ -352,42 +353,7 @@ async def _delete_messages(
     if not message_ids:
         return 0
 
-    deleted_count = 0
-
-    # Bot API позволяет удалять до 100 сообщений за раз
-    # Разбиваем на чанки по 100
-    for i in range(0, len(message_ids), 100):
-        chunk = message_ids[i:i + 100]
-
-        try:
-            # Используем delete_messages (Bot API 6.5+)
-            await bot.delete_messages(
-                chat_id=chat_id,
-                message_ids=chunk
-            )
-            deleted_count += len(chunk)
-
-        except TelegramAPIError as e:
-            # Если delete_messages не сработал — удаляем по одному
-            logger.warning(
-                f"delete_messages не удалось ({e}), удаляем по одному"
-            )
-
-            for msg_id in chunk:
-                try:
-                    await bot.delete_message(
-                        chat_id=chat_id,
-                        message_id=msg_id
-                    )
-                    deleted_count += 1
-                except TelegramAPIError:
-                    # Сообщение уже удалено или недоступно
-                    pass
-
-        # Небольшая задержка чтобы не упереться в лимиты
-        await asyncio.sleep(0.1)
-
-    return deleted_count
+    return await delete_messages(bot, chat_id, message_ids)
 
 
 async def send_journal_notification(
@@ -415,7 +381,7 @@ async def send_journal_notification(
         Dict[int, int]: Словарь {chat_id: message_id} отправленных сообщений
     """
     # Получаем настройки модуля
-    settings = await get_cross_group_settings(session)
+    settings = await get_cached_cross_group_settings(session)
 
     # Если уведомления отключены — выходим
     if not settings.send_to_journal:
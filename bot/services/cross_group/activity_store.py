@@ -0,0 +1,291 @@
+# bot/services/cross_group/activity_store.py
+"""
+Хранилище кросс-групповой активности в Redis.
+
+Раньше входы и сообщения пользователя лежали в JSONB колонках
+CrossGroupUserActivity: каждое сообщение копировало весь словарь групп,
+переписывало колонку целиком (WAL на каждое сообщение) и затем заново
+обходило все группы в Python для проверки критериев.
+
+Здесь у каждого пользователя два Sorted Set (member=chat_id, score=время
+последнего события), поэтому "сколько групп активно в окне" — это ZCOUNT,
+а событие + подсчёт выполняются одним Lua-скриптом. В БД остаются только
+редкие события: смена профиля и статус детекции.
+
+Redis ключи (все с TTL, продлеваются при каждом событии):
+- cg:{user_id}:joins — ZSET chat_id -> время входа
+- cg:{user_id}:msgs — ZSET chat_id -> время последнего сообщения
+- cg:{user_id}:meta — HASH {chat}:title, {chat}:first, {chat}:count
+- cg:{user_id}:mids:{chat_id} — LIST последних message_id в группе
+"""
+
+# Импортируем logging для логирования
+import logging
+# Импортируем time для timestamps
+import time
+# Импортируем datetime для формата данных детекции
+from datetime import datetime
+# Импортируем типы для аннотаций
+from typing import Dict, Any, NamedTuple, Optional
+
+# Импортируем Redis клиент
+from redis.asyncio import Redis
+
+
+# Создаём логгер для этого модуля
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# КОНСТАНТЫ
+# ============================================================
+# Сколько последних message_id хранить на группу (для удаления при действии)
+MAX_MESSAGE_IDS = 100
+# Запас TTL ключей сверх самого длинного окна
+TTL_PADDING_SECONDS = 60
+
+
+# ============================================================
+# LUA СКРИПТЫ
+# ============================================================
+
+# Сообщение: обновляет время группы, счётчик, first, список message_id
+# и возвращает число групп с сообщениями и со входами в своих окнах.
+# Группы, выпавшие из окна сообщений (включая текущую, если в ней давно
+# не писали), теряют first/count и список message_id — при возвращении
+# в группу данные начинаются заново.
+# KEYS: msgs, joins, meta, mids
+# ARGV: chat_id, now, msg_cutoff, join_cutoff, message_id, ttl, max_ids, mids_prefix
+_MESSAGE_EVENT_SCRIPT = """
+local stale = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[3])
+for _, chat in ipairs(stale) do
+    redis.call('HDEL', KEYS[3], chat .. ':first', chat .. ':count')
+    redis.call('DEL', ARGV[8] .. chat)
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[3])
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+redis.call('HSETNX', KEYS[3], ARGV[1] .. ':first', ARGV[2])
+redis.call('HINCRBY', KEYS[3], ARGV[1] .. ':count', 1)
+redis.call('RPUSH', KEYS[4], ARGV[5])
+redis.call('LTRIM', KEYS[4], -tonumber(ARGV[7]), -1)
+for i = 1, 4 do
+    redis.call('EXPIRE', KEYS[i], ARGV[6])
+end
+local msg_groups = redis.call('ZCARD', KEYS[1])
+local join_groups = redis.call('ZCOUNT', KEYS[2], ARGV[4], '+inf')
+return {msg_groups, join_groups}
+"""
+
+# Вход: время входа и название группы.
+# KEYS: joins, msgs, meta
+# ARGV: chat_id, now, msg_cutoff, join_cutoff, ttl, title
+_JOIN_EVENT_SCRIPT = """
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[4])
+redis.call('HSET', KEYS[3], ARGV[1] .. ':title', ARGV[6])
+for i = 1, 3 do
+    redis.call('EXPIRE', KEYS[i], ARGV[5])
+end
+local msg_groups = redis.call('ZCOUNT', KEYS[2], ARGV[3], '+inf')
+local join_groups = redis.call('ZCARD', KEYS[1])
+return {msg_groups, join_groups}
+"""
+
+
+# ============================================================
+# РЕЗУЛЬТАТ
+# ============================================================
+
+class ActivityCounts(NamedTuple):
+    """
+    Сколько групп пользователя попадает в окна детекции.
+
+    Attributes:
+        message_groups: Группы с сообщениями за message_interval
+        join_groups: Группы со входом за join_interval
+    """
+    message_groups: int
+    join_groups: int
+
+    def meets(self, min_groups: int) -> bool:
+        """Выполнены ли критерии входов и сообщений."""
+        return self.message_groups >= min_groups and self.join_groups >= min_groups
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    """Timestamp -> ISO строка UTC (формат прежних JSONB полей)."""
+    if ts is None:
+        return None
+    return datetime.utcfromtimestamp(float(ts)).isoformat()
+
+
+# ============================================================
+# ХРАНИЛИЩЕ
+# ============================================================
+
+class CrossGroupActivityStore:
+    """Входы и сообщения пользователей по группам в окнах времени."""
+
+    def __init__(self, redis: Redis):
+        """
+        Args:
+            redis: Клиент Redis
+        """
+        self.redis = redis
+
+    @staticmethod
+    def _keys(user_id: int) -> Dict[str, str]:
+        prefix = f"cg:{user_id}"
+        return {
+            "joins": f"{prefix}:joins",
+            "msgs": f"{prefix}:msgs",
+            "meta": f"{prefix}:meta",
+            "mids": f"{prefix}:mids:",
+        }
+
+    @staticmethod
+    def _ttl(join_interval: int, message_interval: int) -> int:
+        return max(join_interval, message_interval) + TTL_PADDING_SECONDS
+
+    async def record_message(
+        self,
+        user_id: int,
+        chat_id: int,
+        message_id: int,
+        join_interval: int,
+        message_interval: int
+    ) -> ActivityCounts:
+        """
+        Записывает сообщение и возвращает счётчики групп в окнах.
+
+        Args:
+            user_id: ID пользователя
+            chat_id: ID группы
+            message_id: ID сообщения (для удаления при действии)
+            join_interval: Окно входов в секундах
+            message_interval: Окно сообщений в секундах
+
+        Returns:
+            ActivityCounts
+        """
+        keys = self._keys(user_id)
+        now = time.time()
+        raw = await self.redis.eval(
+            _MESSAGE_EVENT_SCRIPT, 4,
+            keys["msgs"], keys["joins"], keys["meta"], f"{keys['mids']}{chat_id}",
+            chat_id, repr(now), repr(now - message_interval), repr(now - join_interval),
+            message_id, self._ttl(join_interval, message_interval), MAX_MESSAGE_IDS,
+            keys["mids"],
+        )
+        return ActivityCounts(int(raw[0]), int(raw[1]))
+
+    async def record_join(
+        self,
+        user_id: int,
+        chat_id: int,
+        group_title: str,
+        join_interval: int,
+        message_interval: int
+    ) -> ActivityCounts:
+        """
+        Записывает вход в группу и возвращает счётчики групп в окнах.
+
+        Args:
+            user_id: ID пользователя
+            chat_id: ID группы
+            group_title: Название группы
+            join_interval: Окно входов в секундах
+            message_interval: Окно сообщений в секундах
+
+        Returns:
+            ActivityCounts
+        """
+        keys = self._keys(user_id)
+        now = time.time()
+        raw = await self.redis.eval(
+            _JOIN_EVENT_SCRIPT, 3,
+            keys["joins"], keys["msgs"], keys["meta"],
+            chat_id, repr(now), repr(now - message_interval), repr(now - join_interval),
+            self._ttl(join_interval, message_interval), group_title,
+        )
+        return ActivityCounts(int(raw[0]), int(raw[1]))
+
+    async def get_counts(
+        self,
+        user_id: int,
+        join_interval: int,
+        message_interval: int
+    ) -> ActivityCounts:
+        """Счётчики групп в окнах без записи события."""
+        keys = self._keys(user_id)
+        now = time.time()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zcount(keys["msgs"], repr(now - message_interval), "+inf")
+            pipe.zcount(keys["joins"], repr(now - join_interval), "+inf")
+            msg_groups, join_groups = await pipe.execute()
+        return ActivityCounts(int(msg_groups), int(join_groups))
+
+    async def get_groups_involved(
+        self,
+        user_id: int,
+        join_interval: int,
+        message_interval: int
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Собирает данные по группам в окнах (только при срабатывании детекции).
+
+        Returns:
+            Словарь chat_id -> данные группы в формате прежнего groups_involved
+        """
+        keys = self._keys(user_id)
+        now = time.time()
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zrangebyscore(keys["joins"], repr(now - join_interval), "+inf", withscores=True)
+            pipe.zrangebyscore(keys["msgs"], repr(now - message_interval), "+inf", withscores=True)
+            pipe.hgetall(keys["meta"])
+            joins, messages, meta = await pipe.execute()
+
+        joins = {str(chat): ts for chat, ts in joins}
+        messages = {str(chat): ts for chat, ts in messages}
+        chat_ids = sorted(set(joins) | set(messages))
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for chat in chat_ids:
+                pipe.lrange(f"{keys['mids']}{chat}", 0, -1)
+            message_ids = await pipe.execute() if chat_ids else []
+
+        groups_involved = {}
+        for chat, ids in zip(chat_ids, message_ids):
+            in_messages = chat in messages
+            groups_involved[chat] = {
+                "group_title": meta.get(f"{chat}:title") or "Неизвестно",
+                "joined_at": _iso(joins.get(chat)),
+                "first_message_at": _iso(meta.get(f"{chat}:first")) if in_messages else None,
+                "last_message_at": _iso(messages.get(chat)),
+                "message_count": int(meta.get(f"{chat}:count", 0)) if in_messages else 0,
+                "message_ids": [int(mid) for mid in ids] if in_messages else [],
+            }
+        return groups_involved
+
+
+# ============================================================
+# ГЛОБАЛЬНЫЙ ЭКЗЕМПЛЯР
+# ============================================================
+
+_activity_store: Optional[CrossGroupActivityStore] = None
+
+
+def get_activity_store() -> CrossGroupActivityStore:
+    """
+    Возвращает глобальное хранилище активности (создаёт при первом вызове).
+
+    Returns:
+        Экземпляр CrossGroupActivityStore
+    """
+    global _activity_store
+    if _activity_store is None:
+        # Lazy import: общий Redis бота
+        from bot.services.redis_conn import redis
+        _activity_store = CrossGroupActivityStore(redis)
+    return _activity_store
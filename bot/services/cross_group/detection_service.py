@@ -11,6 +11,10 @@
 - Вход в 2+ группы в заданном интервале
 - Смена профиля в заданном окне
 - Сообщения в 2+ группах в заданном интервале
+
+Входы и сообщения хранятся в Redis (activity_store): каждое событие —
+один Lua-скрипт, который сразу возвращает число групп в окнах. В БД
+идём только когда критерии входов и сообщений уже выполнены.
 """
 
 # Импортируем логгер для записи событий
@@ -19,8 +23,6 @@ import logging
 from datetime import datetime, timedelta
 # Импортируем типы для аннотаций
 from typing import Optional, Dict, Any, Tuple
-# Импортируем json для работы с JSONB
-import json
 
 # Импортируем AsyncSession для асинхронной работы с БД
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -38,9 +40,14 @@ from bot.database.models_cross_group import (
 
 # Импортируем сервис настроек
 from bot.services.cross_group.settings_service import (
-    get_cross_group_settings,
+    get_cached_cross_group_settings,
     is_group_excluded,
 )
+# Импортируем хранилище активности в Redis
+from bot.services.cross_group.activity_store import (
+    ActivityCounts,
+    get_activity_store,
+)
 
 
 # Создаём логгер для этого модуля
@@ -112,12 +119,12 @@ async def track_user_join(
     session: AsyncSession,
     user_id: int,
     chat_id: int,
-    group_title: str
+    group_title: Optional[str] = None
 ) -> bool:
     """
     Отслеживает вход пользователя в группу.
 
-    Записывает информацию о входе в groups_joined.
+    Записывает время входа в Redis (activity_store).
     Проверяет не находится ли группа в списке исключений.
 
     Args:
@@ -130,7 +137,7 @@ async def track_user_join(
         bool: True если вход записан, False если группа в исключениях
     """
     # Получаем настройки модуля
-    settings = await get_cross_group_settings(session)
+    settings = await get_cached_cross_group_settings(session)
 
     # Проверяем включён ли модуль
     if not settings.enabled:
@@ -141,24 +148,14 @@ async def track_user_join(
         logger.debug(f"Группа {chat_id} в исключениях, пропускаем")
         return False
 
-    # Получаем или создаём запись активности пользователя
-    activity = await get_or_create_user_activity(session, user_id)
-
-    # Получаем текущий список групп (копируем для изменения)
-    groups_joined = dict(activity.groups_joined or {})
-
-    # Добавляем информацию о входе
-    # Используем str(chat_id) так как JSON ключи должны быть строками
-    groups_joined[str(chat_id)] = {
-        "joined_at": datetime.utcnow().isoformat(),
-        "group_title": group_title,
-    }
-
-    # Обновляем запись (JSONB требует явного присваивания)
-    activity.groups_joined = groups_joined
-
-    # Сохраняем в БД
-    await session.commit()
+    # Записываем вход (ZADD в окно входов, без записи в БД)
+    await get_activity_store().record_join(
+        user_id=user_id,
+        chat_id=chat_id,
+        group_title=group_title or "Неизвестно",
+        join_interval=settings.join_interval_seconds,
+        message_interval=settings.message_interval_seconds,
+    )
 
     # Логируем вход
     logger.info(
@@ -191,7 +188,7 @@ async def track_profile_change(
         bool: True если изменение записано
     """
     # Получаем настройки модуля
-    settings = await get_cross_group_settings(session)
+    settings = await get_cached_cross_group_settings(session)
 
     # Проверяем включён ли модуль
     if not settings.enabled:
@@ -230,7 +227,9 @@ async def track_user_message(
     """
     Отслеживает сообщение пользователя в группе.
 
-    Записывает информацию о сообщении и проверяет детекцию.
+    Записывает сообщение в Redis и проверяет детекцию. Скрипт записи
+    сразу возвращает число групп в окнах, поэтому пока критерии входов
+    и сообщений не выполнены, БД не читается и не пишется.
 
     Args:
         session: Асинхронная сессия SQLAlchemy
@@ -244,7 +243,7 @@ async def track_user_message(
             - dict: Данные детекции если сработала, None если нет
     """
     # Получаем настройки модуля
-    settings = await get_cross_group_settings(session)
+    settings = await get_cached_cross_group_settings(session)
 
     # Проверяем включён ли модуль
     if not settings.enabled:
@@ -254,51 +253,30 @@ async def track_user_message(
     if await is_group_excluded(session, chat_id):
         return False, None
 
-    # Получаем или создаём запись активности пользователя
-    activity = await get_or_create_user_activity(session, user_id)
-
-    # Получаем текущий список сообщений (копируем для изменения)
-    messages = dict(activity.messages_in_groups or {})
-
-    # Получаем текущие данные для группы
-    chat_key = str(chat_id)
-    current = messages.get(chat_key, {"message_count": 0, "message_ids": []})
-
-    # Получаем текущий список message_id (ограничиваем до 100 последних)
-    message_ids = current.get("message_ids", [])
-    message_ids.append(message_id)
-    # Храним только последние 100 сообщений чтобы не раздувать БД
-    if len(message_ids) > 100:
-        message_ids = message_ids[-100:]
-
-    # Обновляем информацию о сообщении
-    messages[chat_key] = {
-        "last_message_at": datetime.utcnow().isoformat(),
-        "first_message_at": current.get("first_message_at", datetime.utcnow().isoformat()),
-        "message_count": current.get("message_count", 0) + 1,
-        "message_ids": message_ids,
-    }
-
-    # Обновляем запись (JSONB требует явного присваивания)
-    activity.messages_in_groups = messages
-
-    # Сохраняем в БД
-    await session.commit()
+    # Записываем сообщение и получаем счётчики групп в окнах
+    counts = await get_activity_store().record_message(
+        user_id=user_id,
+        chat_id=chat_id,
+        message_id=message_id,
+        join_interval=settings.join_interval_seconds,
+        message_interval=settings.message_interval_seconds,
+    )
 
     # Логируем сообщение
     logger.debug(
         f"Записано сообщение пользователя {user_id} в группе {chat_id}, msg_id={message_id}"
     )
 
-    # Проверяем детекцию
-    detection_result = await check_cross_group_detection(session, user_id)
+    # Проверяем детекцию (с уже посчитанными счётчиками)
+    detection_result = await check_cross_group_detection(session, user_id, counts=counts)
 
     return True, detection_result
 
 
 async def check_cross_group_detection(
     session: AsyncSession,
-    user_id: int
+    user_id: int,
+    counts: Optional[ActivityCounts] = None
 ) -> Optional[Dict[str, Any]]:
     """
     Проверяет критерии кросс-групповой детекции.
@@ -311,6 +289,7 @@ async def check_cross_group_detection(
     Args:
         session: Асинхронная сессия SQLAlchemy
         user_id: ID пользователя Telegram
+        counts: Счётчики групп в окнах (если уже получены при записи события)
 
     Returns:
         dict: Данные детекции если сработала:
@@ -323,16 +302,37 @@ async def check_cross_group_detection(
         None: Если детекция не сработала
     """
     # Получаем настройки модуля
-    settings = await get_cross_group_settings(session)
+    settings = await get_cached_cross_group_settings(session)
 
     # Проверяем включён ли модуль
     if not settings.enabled:
         return None
 
-    # Получаем запись активности пользователя
+    store = get_activity_store()
+
+    # ═══════════════════════════════════════════════════════════
+    # КРИТЕРИИ 1 и 3: Входы и сообщения (счётчики из Redis)
+    # ═══════════════════════════════════════════════════════════
+    if counts is None:
+        counts = await store.get_counts(
+            user_id,
+            join_interval=settings.join_interval_seconds,
+            message_interval=settings.message_interval_seconds,
+        )
+
+    # Проверяем достаточно ли групп
+    if not counts.meets(settings.min_groups):
+        logger.debug(
+            f"Пользователь {user_id}: недостаточно групп "
+            f"(входы {counts.join_groups}, сообщения {counts.message_groups}, "
+            f"нужно {settings.min_groups})"
+        )
+        return None
+
+    # Получаем запись активности пользователя (смена профиля и статус)
     activity = await get_user_activity(session, user_id)
 
-    # Если записи нет — детекция не срабатывает
+    # Если записи нет — профиль не менялся, детекция не срабатывает
     if activity is None:
         return None
 
@@ -343,37 +343,6 @@ async def check_cross_group_detection(
     # Текущее время для расчётов
     now = datetime.utcnow()
 
-    # ═══════════════════════════════════════════════════════════
-    # КРИТЕРИЙ 1: Входы в группы
-    # ═══════════════════════════════════════════════════════════
-    # Порог времени для входов
-    join_threshold = now - timedelta(seconds=settings.join_interval_seconds)
-
-    # Фильтруем группы по времени входа
-    groups_joined = activity.groups_joined or {}
-    recent_joins = {}
-
-    for chat_id, data in groups_joined.items():
-        # Парсим время входа
-        joined_at_str = data.get("joined_at")
-        if joined_at_str:
-            try:
-                joined_at = datetime.fromisoformat(joined_at_str)
-                # Проверяем попадает ли в интервал
-                if joined_at >= join_threshold:
-                    recent_joins[chat_id] = data
-            except (ValueError, TypeError):
-                # Пропускаем некорректные данные
-                continue
-
-    # Проверяем достаточно ли групп
-    if len(recent_joins) < settings.min_groups:
-        logger.debug(
-            f"Пользователь {user_id}: недостаточно входов "
-            f"({len(recent_joins)} < {settings.min_groups})"
-        )
-        return None
-
     # ═══════════════════════════════════════════════════════════
     # КРИТЕРИЙ 2: Смена профиля
     # ═══════════════════════════════════════════════════════════
@@ -383,66 +352,26 @@ async def check_cross_group_detection(
     )
 
     # Проверяем была ли смена профиля в заданном окне
-    profile_changed = False
-    profile_changes = None
-
-    if activity.profile_changed_at:
-        if activity.profile_changed_at >= profile_threshold:
-            profile_changed = True
-            # Собираем данные об изменении профиля
-            profile_changes = {
-                "change_type": activity.profile_change_type.value if activity.profile_change_type else None,
-                "original_name": activity.original_name,
-                "original_photo_id": activity.original_photo_id,
-                "changed_at": activity.profile_changed_at.isoformat(),
-            }
-
-    # Если профиль не менялся — детекция не срабатывает
-    if not profile_changed:
+    if not activity.profile_changed_at or activity.profile_changed_at < profile_threshold:
         logger.debug(
             f"Пользователь {user_id}: профиль не менялся в заданном окне"
         )
         return None
 
-    # ═══════════════════════════════════════════════════════════
-    # КРИТЕРИЙ 3: Сообщения в группах
-    # ═══════════════════════════════════════════════════════════
-    # Порог времени для сообщений
-    message_threshold = now - timedelta(
-        seconds=settings.message_interval_seconds
-    )
-
-    # Фильтруем группы по времени сообщений
-    messages = activity.messages_in_groups or {}
-    recent_messages = {}
-
-    for chat_id, data in messages.items():
-        # Парсим время сообщения
-        message_at_str = data.get("last_message_at")
-        if message_at_str:
-            try:
-                message_at = datetime.fromisoformat(message_at_str)
-                # Проверяем попадает ли в интервал
-                if message_at >= message_threshold:
-                    recent_messages[chat_id] = data
-            except (ValueError, TypeError):
-                # Пропускаем некорректные данные
-                continue
-
-    # Проверяем достаточно ли групп с сообщениями
-    if len(recent_messages) < settings.min_groups:
-        logger.debug(
-            f"Пользователь {user_id}: недостаточно групп с сообщениями "
-            f"({len(recent_messages)} < {settings.min_groups})"
-        )
-        return None
+    # Собираем данные об изменении профиля
+    profile_changes = {
+        "change_type": activity.profile_change_type.value if activity.profile_change_type else None,
+        "original_name": activity.original_name,
+        "original_photo_id": activity.original_photo_id,
+        "changed_at": activity.profile_changed_at.isoformat(),
+    }
 
     # ═══════════════════════════════════════════════════════════
     # ВСЕ КРИТЕРИИ ВЫПОЛНЕНЫ — ДЕТЕКЦИЯ СРАБОТАЛА!
     # ═══════════════════════════════════════════════════════════
     logger.warning(
         f"КРОСС-ГРУППОВАЯ ДЕТЕКЦИЯ: пользователь {user_id} "
-        f"затронул {len(recent_joins)} групп"
+        f"затронул {counts.join_groups} групп"
     )
 
     # Помечаем пользователя как подозрительного
@@ -452,30 +381,21 @@ async def check_cross_group_detection(
     # Сохраняем изменения
     await session.commit()
 
-    # Формируем данные детекции
-    # Объединяем информацию о входах и сообщениях
-    groups_involved = {}
-    for chat_id in set(recent_joins.keys()) | set(recent_messages.keys()):
-        join_data = recent_joins.get(chat_id, {})
-        msg_data = recent_messages.get(chat_id, {})
-
-        groups_involved[chat_id] = {
-            "group_title": join_data.get("group_title", "Неизвестно"),
-            "joined_at": join_data.get("joined_at"),
-            "first_message_at": msg_data.get("first_message_at"),
-            "last_message_at": msg_data.get("last_message_at"),
-            "message_count": msg_data.get("message_count", 0),
-            "message_ids": msg_data.get("message_ids", []),
-        }
+    # Данные по группам (входы и сообщения в окнах)
+    groups_involved = await store.get_groups_involved(
+        user_id,
+        join_interval=settings.join_interval_seconds,
+        message_interval=settings.message_interval_seconds,
+    )
 
     return {
         "user_id": user_id,
         "groups_involved": groups_involved,
         "profile_changes": profile_changes,
         "reason": (
-            f"Вход в {len(recent_joins)} групп, "
+            f"Вход в {counts.join_groups} групп, "
             f"смена профиля, "
-            f"сообщения в {len(recent_messages)} группах"
+            f"сообщения в {counts.message_groups} группах"
         ),
     }
 
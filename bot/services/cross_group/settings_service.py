@@ -21,11 +21,16 @@ from bot.database.models_cross_group import (
     CrossGroupScammerSettings,
     CrossGroupActionType,
 )
+# Импортируем кэш настроек (чтение на пути обработки сообщений)
+from bot.services.settings_cache import GLOBAL_CHAT_ID, get_settings_cache, register_cached_model
 
 
 # Создаём логгер для этого модуля
 logger = logging.getLogger(__name__)
 
+# Изменения настроек сбрасывают кэш настроек (settings_cache)
+register_cached_model(CrossGroupScammerSettings, 'cross_group', chat_column=None)
+
 
 async def get_cross_group_settings(
     session: AsyncSession
@@ -73,6 +78,26 @@ async def get_cross_group_settings(
     return settings
 
 
+async def get_cached_cross_group_settings(
+    session: AsyncSession
+) -> CrossGroupScammerSettings:
+    """
+    Получает настройки кросс-групповой детекции через кэш настроек.
+
+    Возвращает отсоединённую копию — только для чтения.
+    Для изменения настроек используйте get_cross_group_settings.
+
+    Args:
+        session: Асинхронная сессия SQLAlchemy
+
+    Returns:
+        CrossGroupScammerSettings: Копия настроек модуля
+    """
+    return await get_settings_cache().get_or_load(
+        'cross_group', GLOBAL_CHAT_ID, lambda: get_cross_group_settings(session)
+    )
+
+
 async def update_cross_group_settings(
     session: AsyncSession,
     **kwargs
@@ -255,8 +280,8 @@ async def is_group_excluded(
     Returns:
         bool: True если группа в списке исключений
     """
-    # Получаем текущие настройки
-    settings = await get_cross_group_settings(session)
+    # Получаем текущие настройки (из кэша — проверка на каждом сообщении)
+    settings = await get_cached_cross_group_settings(session)
 
     # Получаем список исключений
     excluded = settings.excluded_groups or []
@@ -3,9 +3,15 @@
 
 Решает проблему: бот добавлен в группу, но записей в БД нет.
 При любой активности в группе - автоматически синхронизирует данные.
+
+Известные группы кэшируются в памяти процесса (TTL + название) поверх
+маркера group_synced:{chat_id} в Redis, поэтому обычное сообщение из
+уже синхронизированной группы не трогает ни БД, ни (в пределах TTL) Redis.
 """
+import asyncio
 import logging
-from typing import Optional
+import time
+from typing import Dict, Optional, Set, Tuple
 from aiogram import Bot
 from aiogram.enums import ChatMemberStatus, ChatType
 from aiogram.types import Chat, User
@@ -14,33 +20,148 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.database.models import Group, User as DbUser, UserGroup, GroupUsers
 from bot.services.redis_conn import redis
+from bot.services.admin_status_cache import get_admin_status_cache
 
 logger = logging.getLogger(__name__)
 
 # Кэш в Redis чтобы не синхронизировать слишком часто
 SYNC_CACHE_TTL = 300  # 5 минут
+# Пауза перед повтором фоновой синхронизации после ошибки
+SYNC_RETRY_DELAY = 60
+
+# Состояние группы для GroupAutoSyncMiddleware
+SYNC_FRESH = "fresh"      # недавно синхронизирована — ничего не делаем
+SYNC_STALE = "stale"      # известна, но TTL истёк или сменилось название — синхронизация в фоне
+SYNC_UNKNOWN = "unknown"  # не встречалась — синхронизация до хендлеров
+
+# Известные группы в памяти процесса: chat_id → (истекает, название)
+# Истёкшие записи не удаляются: по ним видно, что группа уже есть в БД
+_known_groups: Dict[int, Tuple[float, Optional[str]]] = {}
+# Группы, синхронизация которых сейчас идёт в фоне
+_sync_in_progress: Set[int] = set()
+# Ссылки на фоновые задачи (чтобы их не собрал GC)
+_sync_tasks: Set[asyncio.Task] = set()
+# chat_id → когда можно повторить фоновую синхронизацию после ошибки
+_retry_after: Dict[int, float] = {}
+
+
+def _sync_key(chat_id: int) -> str:
+    return f"group_synced:{chat_id}"
 
 
 async def _is_recently_synced(chat_id: int) -> bool:
     """Проверяет, была ли группа недавно синхронизирована"""
-    key = f"group_synced:{chat_id}"
-    return await redis.exists(key) == 1
+    return await redis.exists(_sync_key(chat_id)) == 1
+
+
+async def _mark_as_synced(chat_id: int, title: Optional[str] = None):
+    """Отмечает группу как синхронизированную (в Redis и в памяти процесса)"""
+    # В маркере храним название — другие реплики увидят его смену
+    await redis.setex(_sync_key(chat_id), SYNC_CACHE_TTL, title or "1")
+    _remember_group(chat_id, title)
+
+
+def _remember_group(chat_id: int, title: Optional[str]) -> None:
+    _known_groups[chat_id] = (time.monotonic() + SYNC_CACHE_TTL, title)
+
+
+async def get_sync_state(chat: Chat) -> str:
+    """
+    Определяет, нужна ли синхронизация группы (без обращения к БД).
+
+    Память процесса → маркер в Redis. Маркер со старым значением "1"
+    (до хранения названия) считается совпадающим.
+
+    Returns:
+        SYNC_FRESH / SYNC_STALE / SYNC_UNKNOWN
+    """
+    entry = _known_groups.get(chat.id)
+    if entry is not None:
+        expires_at, title = entry
+        if title != chat.title:
+            return SYNC_STALE
+        if expires_at > time.monotonic():
+            return SYNC_FRESH
+
+    try:
+        marker = await redis.get(_sync_key(chat.id))
+    except Exception as e:
+        logger.debug(f"[AUTO_SYNC] Ошибка чтения маркера синхронизации {chat.id}: {e}")
+        marker = None
+
+    if marker is not None:
+        if isinstance(marker, bytes):
+            marker = marker.decode()
+        if marker in (chat.title, "1"):
+            _remember_group(chat.id, chat.title)
+            return SYNC_FRESH
+        return SYNC_STALE
 
+    return SYNC_STALE if entry is not None else SYNC_UNKNOWN
 
-async def _mark_as_synced(chat_id: int):
-    """Отмечает группу как синхронизированную"""
-    key = f"group_synced:{chat_id}"
-    await redis.setex(key, SYNC_CACHE_TTL, "1")
+
+def forget_group(chat_id: int) -> None:
+    """Убирает группу из кэша процесса (например, бота удалили из группы)"""
+    _known_groups.pop(chat_id, None)
+    _retry_after.pop(chat_id, None)
+
+
+def clear_known_groups() -> None:
+    """Очищает кэш известных групп в памяти процесса"""
+    _known_groups.clear()
+    _retry_after.clear()
+
+
+def schedule_group_sync(chat: Chat, bot: Bot) -> bool:
+    """
+    Запускает полную синхронизацию группы в фоне (одна задача на группу).
+
+    Returns:
+        True если задача запущена
+    """
+    chat_id = chat.id
+    if chat_id in _sync_in_progress or _retry_after.get(chat_id, 0) > time.monotonic():
+        return False
+
+    _sync_in_progress.add(chat_id)
+    task = asyncio.create_task(_background_sync(chat, bot))
+    _sync_tasks.add(task)
+    task.add_done_callback(_sync_tasks.discard)
+    return True
+
+
+async def _background_sync(chat: Chat, bot: Bot) -> None:
+    """Синхронизирует группу в своей сессии БД."""
+    # Lazy import: фабрика сессий тянет за собой движок БД
+    from bot.database.session import get_session
+
+    group = None
+    try:
+        async with get_session() as session:
+            group = await ensure_group_exists(session, chat, bot, force=True)
+    except Exception as e:
+        logger.warning(f"⚠️ [AUTO_SYNC] Ошибка фоновой синхронизации группы {chat.id}: {e}")
+    finally:
+        _sync_in_progress.discard(chat.id)
+        if group is None:
+            _retry_after[chat.id] = time.monotonic() + SYNC_RETRY_DELAY
+        else:
+            _retry_after.pop(chat.id, None)
 
 
 async def ensure_group_exists(
     session: AsyncSession,
     chat: Chat,
     bot: Bot,
+    force: bool = False,
 ) -> Optional[Group]:
     """
     Проверяет, что группа есть в БД. Если нет - создаёт.
 
+    Args:
+        force: Синхронизировать даже если маркер в Redis ещё действует
+            (например, сменилось название группы)
+
     Returns:
         Group объект или None при ошибке
     """
@@ -50,7 +171,7 @@ async def ensure_group_exists(
     chat_id = chat.id
 
     # Проверяем кэш
-    if await _is_recently_synced(chat_id):
+    if not force and await _is_recently_synced(chat_id):
         # Группа недавно синхронизировалась, просто возвращаем из БД
         result = await session.execute(
             select(Group).where(Group.chat_id == chat_id)
@@ -87,7 +208,7 @@ async def ensure_group_exists(
         await sync_group_admins(session, chat_id, bot)
 
         await session.commit()
-        await _mark_as_synced(chat_id)
+        await _mark_as_synced(chat_id, chat.title)
 
         return group
 
@@ -110,6 +231,8 @@ async def sync_group_admins(
     """
     try:
         admins = await bot.get_chat_administrators(chat_id)
+        # Список уже получен — заодно обновляем кэш статуса админов
+        await get_admin_status_cache().store_admins(chat_id, admins)
         admin_count = 0
 
         for admin in admins:
@@ -9,6 +9,7 @@ from aiogram import Bot
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete
 from bot.database.models import GroupJournalChannel
+from bot.services.settings_cache import get_settings_cache
 from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
@@ -45,6 +46,26 @@ async def get_group_journal_channel(
         return None
 
 
+async def get_cached_group_journal_channel(
+    session: AsyncSession,
+    group_id: int
+) -> Optional[GroupJournalChannel]:
+    """
+    Получает канал журнала для группы через кэш настроек.
+    Возвращает отсоединённую копию — только для чтения.
+
+    Args:
+        session: Сессия БД
+        group_id: ID группы
+
+    Returns:
+        GroupJournalChannel или None если не привязан
+    """
+    return await get_settings_cache().get_or_load(
+        'journal_channel', group_id, lambda: get_group_journal_channel(session, group_id)
+    )
+
+
 async def link_journal_channel(
     session: AsyncSession,
     group_id: int,
@@ -166,8 +187,8 @@ async def send_journal_event(
         True если отправлено успешно, False если не привязан или ошибка
     """
     try:
-        # Получаем канал журнала
-        journal = await get_group_journal_channel(session, group_id)
+        # Получаем канал журнала (из кэша — вызывается на каждое событие)
+        journal = await get_cached_group_journal_channel(session, group_id)
         
         if not journal:
             # INFO уровень чтобы видеть в логах когда журнал не привязан
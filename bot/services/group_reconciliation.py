@@ -0,0 +1,459 @@
+# ============================================================
+# СВЕРКА ГРУПП ПРИ СТАРТЕ БОТА
+# ============================================================
+# После перезапуска бот проверяет все группы из БД: остался ли он
+# в группе, не сменилось ли название, все ли админы связаны с
+# группой (UserGroup — по этим связям работает /settings).
+#
+# Раньше сверка шла в main() до запуска polling: группы по одной,
+# 3 запроса к API + SELECT на каждого админа, паузы 0.1 с после
+# каждого запроса и 0.3 с после группы. На 2000 группах бот
+# не отвечал больше 15 минут после каждого деплоя.
+#
+# Теперь:
+# - сверка запускается фоновой задачей, когда бот уже принимает апдейты
+# - группы обрабатывает пул воркеров, запросы к API идут через общий
+#   token bucket (лимит на весь процесс сверки, а не пауза на запрос)
+# - TelegramRetryAfter ставит на паузу весь bucket, группа повторяется
+# - результаты пишутся в БД пачками: названия, админы (users и
+#   user_group через INSERT ... ON CONFLICT DO NOTHING), удаление
+#   связей исчезнувших групп
+# - после записи пачки её chat_id добавляются в SET в Redis;
+#   перезапуск посреди сверки продолжает с оставшихся групп,
+#   завершённая сверка удаляет отметки
+# ============================================================
+
+# Импортируем asyncio для воркеров и очереди групп
+import asyncio
+# Импортируем логгер
+import logging
+# Импортируем dataclass для результата сверки группы
+from dataclasses import dataclass, field
+# Импортируем типы для аннотаций
+from typing import Dict, List, Optional, Set, Tuple
+
+# Импортируем Bot и исключения Telegram API
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+# Импортируем Redis для отметок прогресса
+from redis.asyncio import Redis
+# Импортируем SQLAlchemy для пакетной записи
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Импортируем модели
+from bot.database.models import Group, User as DbUser, UserGroup
+# Импортируем token bucket (общий лимит запросов к API)
+from bot.utils.token_bucket import TokenBucket
+
+
+# Создаём логгер
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# КОНСТАНТЫ
+# ============================================================
+
+# Количество воркеров по умолчанию
+DEFAULT_WORKERS = 4
+
+# Запросов к API в секунду на всю сверку (оставляем запас для апдейтов)
+DEFAULT_API_PER_SECOND = 10.0
+
+# Сколько групп записывать в БД одной транзакцией
+SAVE_BATCH_SIZE = 50
+
+# Сколько раз повторять группу после FloodWait
+MAX_FLOOD_RETRIES = 3
+
+# SET в Redis с chat_id уже сверенных групп текущего прохода
+CHECKPOINT_KEY = "group_reconcile:done"
+
+# Время жизни отметок: прерванный проход старше этого начнётся заново
+CHECKPOINT_TTL = 6 * 3600
+
+# Статусы бота, при которых он в группе
+_BOT_PRESENT = ("member", "administrator", "creator")
+
+# Статусы админов, по которым создаются связи UserGroup
+_ADMIN_STATUSES = ("administrator", "creator")
+
+
+# ============================================================
+# РЕЗУЛЬТАТ СВЕРКИ ГРУППЫ
+# ============================================================
+
+@dataclass
+class GroupCheck:
+    """
+    Что выяснилось о группе через API (в БД ещё не записано).
+
+    Attributes:
+        chat_id: ID группы
+        gone: Группа не найдена — связи UserGroup удаляются
+        title: Актуальное название (None — не удалось получить)
+        admins: Админы (user_id, username, full_name, is_bot)
+    """
+    chat_id: int
+    gone: bool = False
+    title: Optional[str] = None
+    admins: List[Tuple[int, Optional[str], str, bool]] = field(default_factory=list)
+
+
+# ============================================================
+# СВЕРКА
+# ============================================================
+
+class GroupReconciler:
+    """
+    Фоновая сверка всех групп из БД с Telegram.
+
+    Один проход: загрузить chat_id групп, пропустить уже отмеченные
+    в Redis, сверить остальные пулом воркеров, записать пачками.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        redis: Optional[Redis] = None,
+        workers: int = DEFAULT_WORKERS,
+        api_per_second: float = DEFAULT_API_PER_SECOND,
+        batch_size: int = SAVE_BATCH_SIZE,
+    ):
+        """
+        Args:
+            bot: Экземпляр бота
+            redis: Клиент Redis для отметок прогресса (None — без продолжения)
+            workers: Количество воркеров
+            api_per_second: Общий лимит запросов к API в секунду
+            batch_size: Сколько групп записывать в БД одной транзакцией
+        """
+        self._bot = bot
+        self._redis = redis
+        self._workers = max(1, workers)
+        self._bucket = TokenBucket(api_per_second)
+        self._batch_size = batch_size
+        self._pending: List[GroupCheck] = []
+        self._save_lock = asyncio.Lock()
+        self._bot_id: Optional[int] = None
+
+        # Статистика
+        self.metrics = {
+            'total': 0, 'resumed': 0, 'checked': 0, 'gone': 0,
+            'failed': 0, 'flood_waits': 0, 'saved': 0,
+        }
+
+    async def run(self) -> None:
+        """Выполняет проход сверки до конца."""
+        chat_ids = await self._load_group_ids()
+        done = await self._load_checkpoint()
+        todo = [chat_id for chat_id in chat_ids if chat_id not in done]
+
+        self.metrics['total'] = len(chat_ids)
+        self.metrics['resumed'] = len(chat_ids) - len(todo)
+        logger.info(
+            f"🔄 [RECONCILE] Сверка групп: {len(todo)} из {len(chat_ids)} "
+            f"(уже сверено: {self.metrics['resumed']}), воркеров: {self._workers}"
+        )
+
+        if todo:
+            self._bot_id = (await self._bot.me()).id
+            queue: asyncio.Queue = asyncio.Queue()
+            for chat_id in todo:
+                queue.put_nowait(chat_id)
+
+            workers = [
+                asyncio.create_task(self._worker(queue))
+                for _ in range(min(self._workers, len(todo)))
+            ]
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                for task in workers:
+                    task.cancel()
+            await self._save_pending()
+
+        await self._clear_checkpoint()
+        logger.info(f"✅ [RECONCILE] Сверка групп завершена: {self.metrics}")
+
+    # ─────────────────────────────────────────────────────────
+    # Воркеры и запросы к API
+    # ─────────────────────────────────────────────────────────
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        """Берёт группы из очереди, пока она не опустеет."""
+        while True:
+            try:
+                chat_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            check = await self._check_with_retries(chat_id)
+            if check is None:
+                continue
+
+            self._pending.append(check)
+            if len(self._pending) >= self._batch_size:
+                await self._save_pending()
+
+    async def _check_with_retries(self, chat_id: int) -> Optional[GroupCheck]:
+        """Сверяет группу, повторяя её после FloodWait."""
+        for attempt in range(MAX_FLOOD_RETRIES + 1):
+            try:
+                check = await self._check_group(chat_id)
+            except TelegramRetryAfter as e:
+                # FloodWait: все воркеры ждут, группа повторяется
+                self.metrics['flood_waits'] += 1
+                logger.warning(f"⚠️ [RECONCILE] FloodWait {e.retry_after}с на группе {chat_id}")
+                self._bucket.pause(e.retry_after)
+                continue
+            except Exception as e:
+                self.metrics['failed'] += 1
+                logger.warning(f"⚠️ [RECONCILE] Не удалось проверить группу {chat_id}: {e}")
+                return None
+
+            self.metrics['checked'] += 1
+            if check.gone:
+                self.metrics['gone'] += 1
+            return check
+
+        self.metrics['failed'] += 1
+        logger.warning(f"⚠️ [RECONCILE] Группа {chat_id} пропущена после {MAX_FLOOD_RETRIES} FloodWait")
+        return None
+
+    async def _call(self, method, *args):
+        """Запрос к API через общий лимит."""
+        await self._bucket.acquire()
+        return await method(*args)
+
+    async def _check_group(self, chat_id: int) -> GroupCheck:
+        """
+        Сверяет одну группу через API (без записи в БД).
+
+        TelegramRetryAfter пробрасывается для повтора.
+        """
+        bot = self._bot
+        try:
+            member = await self._call(bot.get_chat_member, chat_id, self._bot_id)
+        except TelegramRetryAfter:
+            raise
+        except TelegramAPIError as e:
+            # Бот не в группе или группа удалена — связи будут удалены
+            error_str = str(e).lower()
+            if "chat not found" in error_str or "user not found" in error_str:
+                logger.warning(f"⚠️ [RECONCILE] Группа {chat_id} не найдена, удаляем связи")
+                return GroupCheck(chat_id=chat_id, gone=True)
+            raise
+
+        check = GroupCheck(chat_id=chat_id)
+        if member.status not in _BOT_PRESENT:
+            logger.warning(f"⚠️ [RECONCILE] Бот не является участником группы {chat_id}")
+            return check
+
+        # Название группы могло измениться
+        try:
+            chat = await self._call(bot.get_chat, chat_id)
+            check.title = chat.title
+        except TelegramRetryAfter:
+            raise
+        except TelegramAPIError as e:
+            logger.warning(f"⚠️ [RECONCILE] Не удалось обновить название группы {chat_id}: {e}")
+
+        # Админы группы (заодно прогреваем кэш статуса админов)
+        try:
+            admins = await self._call(bot.get_chat_administrators, chat_id)
+        except TelegramRetryAfter:
+            raise
+        except TelegramAPIError as e:
+            logger.warning(f"⚠️ [RECONCILE] Не удалось получить админов группы {chat_id}: {e}")
+            return check
+
+        await self._store_admin_cache(chat_id, admins)
+        for admin in admins:
+            if admin.status not in _ADMIN_STATUSES:
+                continue
+            user = admin.user
+            full_name = f"{user.first_name or ''} {user.last_name or ''}".strip()
+            check.admins.append((user.id, user.username, full_name, user.is_bot))
+        return check
+
+    async def _store_admin_cache(self, chat_id: int, admins) -> None:
+        """Кладёт полученный список админов в кэш статуса админов."""
+        try:
+            # Lazy import: кэш использует глобальный Redis
+            from bot.services.admin_status_cache import get_admin_status_cache
+            await get_admin_status_cache().store_admins(chat_id, admins)
+        except Exception as e:
+            logger.debug(f"[RECONCILE] Ошибка записи кэша админов {chat_id}: {e}")
+
+    # ─────────────────────────────────────────────────────────
+    # БД
+    # ─────────────────────────────────────────────────────────
+
+    async def _load_group_ids(self) -> List[int]:
+        """chat_id всех групп из БД (без служебной записи chat_id=0)."""
+        # Lazy import: фабрика сессий тянет за собой движок БД
+        from bot.database.session import get_session
+
+        async with get_session() as session:
+            result = await session.execute(
+                select(Group.chat_id).where(Group.chat_id != 0).order_by(Group.chat_id)
+            )
+            return list(result.scalars().all())
+
+    async def _save_pending(self) -> None:
+        """Записывает накопленные результаты и отмечает группы в Redis."""
+        async with self._save_lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+
+            try:
+                # Lazy import: фабрика сессий тянет за собой движок БД
+                from bot.database.session import get_session
+
+                async with get_session() as session:
+                    await save_group_checks(session, batch)
+                    await session.commit()
+            except Exception as e:
+                # Группы не отмечены — следующий проход сверит их снова
+                self.metrics['failed'] += len(batch)
+                logger.error(f"❌ [RECONCILE] Ошибка записи пачки из {len(batch)} групп: {e}")
+                return
+
+            self.metrics['saved'] += len(batch)
+            await self._mark_done([check.chat_id for check in batch])
+
+    # ─────────────────────────────────────────────────────────
+    # Отметки прогресса в Redis
+    # ─────────────────────────────────────────────────────────
+
+    async def _load_checkpoint(self) -> Set[int]:
+        """chat_id групп, сверенных прерванным проходом."""
+        if self._redis is None:
+            return set()
+        try:
+            members = await self._redis.smembers(CHECKPOINT_KEY)
+        except Exception as e:
+            logger.warning(f"⚠️ [RECONCILE] Ошибка чтения отметок сверки: {e}")
+            return set()
+        return {int(member) for member in members}
+
+    async def _mark_done(self, chat_ids: List[int]) -> None:
+        """Отмечает группы сверенными."""
+        if self._redis is None or not chat_ids:
+            return
+        try:
+            pipe = self._redis.pipeline()
+            pipe.sadd(CHECKPOINT_KEY, *chat_ids)
+            pipe.expire(CHECKPOINT_KEY, CHECKPOINT_TTL)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ [RECONCILE] Ошибка записи отметок сверки: {e}")
+
+    async def _clear_checkpoint(self) -> None:
+        """Удаляет отметки после завершённого прохода."""
+        if self._redis is None:
+            return
+        try:
+            await self._redis.delete(CHECKPOINT_KEY)
+        except Exception as e:
+            logger.warning(f"⚠️ [RECONCILE] Ошибка удаления отметок сверки: {e}")
+
+
+async def save_group_checks(session: AsyncSession, checks: List[GroupCheck]) -> None:
+    """
+    Записывает пачку результатов сверки (без commit).
+
+    - исчезнувшие группы: удаляются их связи UserGroup
+    - название: UPDATE только если изменилось
+    - админы: users и user_group вставляются одним INSERT на таблицу,
+      существующие записи не трогаются (ON CONFLICT DO NOTHING)
+    """
+    gone = [check.chat_id for check in checks if check.gone]
+    if gone:
+        await session.execute(delete(UserGroup).where(UserGroup.group_id.in_(gone)))
+
+    for check in checks:
+        if check.title:
+            await session.execute(
+                update(Group)
+                .where(Group.chat_id == check.chat_id, Group.title != check.title)
+                .values(title=check.title)
+            )
+
+    users: Dict[int, dict] = {}
+    links: Set[Tuple[int, int]] = set()
+    for check in checks:
+        for user_id, username, full_name, is_bot in check.admins:
+            users[user_id] = {
+                'user_id': user_id,
+                'username': username,
+                'full_name': full_name,
+                'is_bot': is_bot,
+            }
+            links.add((user_id, check.chat_id))
+
+    if users:
+        # Пользователь нужен для внешнего ключа user_group.user_id
+        await session.execute(
+            insert(DbUser)
+            .values(list(users.values()))
+            .on_conflict_do_nothing(index_elements=['user_id'])
+        )
+        await session.execute(
+            insert(UserGroup)
+            .values([{'user_id': user_id, 'group_id': chat_id} for user_id, chat_id in sorted(links)])
+            .on_conflict_do_nothing(index_elements=['user_id', 'group_id'])
+        )
+
+
+# ============================================================
+# ГЛОБАЛЬНАЯ ФОНОВАЯ ЗАДАЧА
+# ============================================================
+
+_reconcile_task: Optional[asyncio.Task] = None
+
+
+async def _run_reconciler(reconciler: GroupReconciler) -> None:
+    """Выполняет проход, не роняя задачу при ошибке."""
+    try:
+        await reconciler.run()
+    except asyncio.CancelledError:
+        logger.info("ℹ️ [RECONCILE] Сверка групп прервана, продолжится при следующем запуске")
+        raise
+    except Exception as e:
+        logger.error(f"❌ [RECONCILE] Ошибка сверки групп: {e}", exc_info=True)
+
+
+async def start_group_reconciliation(bot: Bot) -> None:
+    """
+    Запускает сверку групп в фоне (регистрируется в dp.startup —
+    выполняется, когда бот уже принимает апдейты).
+    """
+    global _reconcile_task
+    if _reconcile_task is not None and not _reconcile_task.done():
+        return
+
+    # Lazy import: общий Redis и настройки из конфига
+    from bot.services.redis_conn import redis
+    from bot.config import GROUP_RECONCILE_WORKERS, GROUP_RECONCILE_API_PER_SECOND
+
+    reconciler = GroupReconciler(
+        bot,
+        redis=redis,
+        workers=GROUP_RECONCILE_WORKERS,
+        api_per_second=GROUP_RECONCILE_API_PER_SECOND,
+    )
+    _reconcile_task = asyncio.create_task(_run_reconciler(reconciler))
+
+
+async def stop_group_reconciliation() -> None:
+    """Прерывает сверку (вызывается при остановке бота)."""
+    global _reconcile_task
+    if _reconcile_task is not None:
+        _reconcile_task.cancel()
+        await asyncio.gather(_reconcile_task, return_exceptions=True)
+        _reconcile_task = None
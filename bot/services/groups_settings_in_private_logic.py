@@ -1,3 +1,4 @@
+import asyncio
 from typing import List, Optional
 from aiogram import Bot
 from aiogram.exceptions import TelegramAPIError
@@ -5,6 +6,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete
 # Импортируем модели для работы с группами и журналами
 from bot.database.models import Group, UserGroup, CaptchaSettings, ChatSettings, GroupJournalChannel
+# Кэш прав админов групп (get_chat_administrators + сброс по chat_member)
+from bot.services.admin_status_cache import get_admin_status_cache
 import logging
 import inspect
 
@@ -114,6 +117,74 @@ async def _ensure_user_group_exists(
             pass
 
 
+# Сколько групп проверяется одновременно при открытии /settings
+ADMIN_GROUPS_CONCURRENCY = 10
+
+# Результаты проверки статуса пользователя в группе
+_ADMIN_OK = "admin"            # админ — показываем группу
+_ADMIN_REVOKED = "revoked"     # не админ / группа недоступна — чистим связь
+_ADMIN_SKIP = "skip"           # бот не состоит в группе — пропускаем
+_ADMIN_UNKNOWN = "unknown"     # временная ошибка — доверяем БД
+
+
+def _is_gone_error(error: Exception, markers) -> bool:
+    error_str = str(error).lower()
+    return any(marker in error_str for marker in markers)
+
+
+async def _resolve_admin_status(bot: Bot, chat_id: int, user_id: int):
+    """
+    Определяет, админ ли пользователь в группе (без обращений к БД).
+
+    Сначала — кэш прав админов (один get_chat_administrators на группу,
+    общий для всех пользователей). Если список недоступен — прежняя
+    проверка через get_chat_member бота и пользователя.
+
+    Returns:
+        (статус, user_info) — user_info только при проверке через get_chat_member
+    """
+    rights = await get_admin_status_cache().get_admin_rights(bot, chat_id)
+    if rights is not None:
+        # Список админов получен — значит бот в группе
+        if user_id in rights:
+            return _ADMIN_OK, None
+        logger.info(f"Пользователь {user_id} больше не админ в группе {chat_id}, чистим связь")
+        return _ADMIN_REVOKED, None
+
+    # Проверяем, что бот в группе
+    try:
+        bot_member = await bot.get_chat_member(chat_id, bot.id)
+        if bot_member.status not in ("member", "administrator", "creator"):
+            logger.info(f"Бот не состоит в группе {chat_id}, пропускаем")
+            return _ADMIN_SKIP, None
+    except Exception as e:
+        # ФИКС: Удаляем связь ТОЛЬКО если группа/пользователь не найдены
+        # При других ошибках (таймаут, rate limit) - просто пропускаем
+        if _is_gone_error(e, ("chat not found", "user not found", "kicked")):
+            logger.warning(f"Группа {chat_id} недоступна ({e}), чистим связь")
+            return _ADMIN_REVOKED, None
+        # При временных ошибках (таймаут, rate limit) - НЕ удаляем, доверяем данным из БД
+        logger.warning(f"Временная ошибка при проверке бота в группе {chat_id}: {e}")
+        return _ADMIN_UNKNOWN, None
+
+    # Проверяем, что пользователь сейчас админ
+    try:
+        user_member = await bot.get_chat_member(chat_id, user_id)
+        if user_member.status not in ("administrator", "creator"):
+            logger.info(f"Пользователь {user_id} больше не админ в группе {chat_id}, чистим связь")
+            return _ADMIN_REVOKED, None
+    except Exception as e:
+        # ФИКС: Удаляем связь ТОЛЬКО если пользователь точно не в группе
+        if _is_gone_error(e, ("user not found", "kicked")):
+            logger.warning(f"Пользователь {user_id} не найден в группе {chat_id}, чистим связь")
+            return _ADMIN_REVOKED, None
+        # При временных ошибках - доверяем БД
+        logger.warning(f"Временная ошибка при проверке прав {user_id} в группе {chat_id}: {e}")
+        return _ADMIN_UNKNOWN, None
+
+    return _ADMIN_OK, getattr(user_member, "user", None)
+
+
 async def get_admin_groups(user_id: int, session: AsyncSession, bot: Bot = None) -> List[Group]:
     """Возвращает список групп, где пользователь сейчас является админом.
     Если bot не передан — возвращает группы по данным БД без онлайн-проверки.
@@ -168,86 +239,59 @@ async def get_admin_groups(user_id: int, session: AsyncSession, bot: Bot = None)
             logger.warning("get_admin_groups: bot не передан, возврат групп без онлайн-проверки")
             return [g for g in all_groups if g.chat_id in group_ids]
 
-        valid_groups: List[Group] = []
+        # ─────────────────────────────────────────────────────────────────────
+        # Статус пользователя во всех группах проверяется параллельно
+        # (не больше ADMIN_GROUPS_CONCURRENCY запросов к API одновременно).
+        # Права берутся из кэша админов — повторное открытие меню
+        # обходится без запросов к Telegram. Сессия БД не используется
+        # параллельно: изменения UserGroup применяются после проверки.
+        # ─────────────────────────────────────────────────────────────────────
+        semaphore = asyncio.Semaphore(ADMIN_GROUPS_CONCURRENCY)
 
-        # Итерируемся по ВСЕМ группам в БД (не только по UserGroup)
-        for group in all_groups:
-            try:
-                # Проверяем, что бот в группе
-                try:
-                    bot_member = await bot.get_chat_member(group.chat_id, bot.id)
-                    if bot_member.status not in ("member", "administrator", "creator"):
-                        logger.info(f"Бот не состоит в группе {group.chat_id}, пропускаем")
-                        continue
-                except Exception as e:
-                    error_str = str(e).lower()
-                    # ФИКС: Удаляем связь ТОЛЬКО если группа/пользователь не найдены
-                    # При других ошибках (таймаут, rate limit) - просто пропускаем
-                    if "chat not found" in error_str or "user not found" in error_str or "kicked" in error_str:
-                        logger.warning(f"Группа {group.chat_id} недоступна ({e}), чистим связь")
-                        await session.execute(
-                            delete(UserGroup).where(
-                                UserGroup.user_id == user_id,
-                                UserGroup.group_id == group.chat_id,
-                            )
-                        )
-                        await session.commit()
-                    else:
-                        # При временных ошибках (таймаут, rate limit) - НЕ удаляем, но восстанавливаем UserGroup
-                        logger.warning(f"Временная ошибка при проверке бота в группе {group.chat_id}: {e}")
-                        # Доверяем данным из БД при временных ошибках
-                        # ФИКС: Восстанавливаем UserGroup чтобы группа не пропала при следующем вызове
-                        await _ensure_user_group_exists(session, user_id, group.chat_id, None)
-                        valid_groups.append(group)
-                    continue
-
-                # Проверяем, что пользователь сейчас админ
+        async def _resolve(group: Group):
+            async with semaphore:
                 try:
-                    user_member = await bot.get_chat_member(group.chat_id, user_id)
-                    if user_member.status not in ("administrator", "creator"):
-                        logger.info(f"Пользователь {user_id} больше не админ в группе {group.chat_id}, чистим связь")
-                        await session.execute(
-                            delete(UserGroup).where(
-                                UserGroup.user_id == user_id,
-                                UserGroup.group_id == group.chat_id,
-                            )
-                        )
-                        await session.commit()
-                        continue
+                    return await _resolve_admin_status(bot, group.chat_id, user_id)
                 except Exception as e:
-                    error_str = str(e).lower()
-                    # ФИКС: Удаляем связь ТОЛЬКО если пользователь точно не в группе
-                    if "user not found" in error_str or "kicked" in error_str:
-                        logger.warning(f"Пользователь {user_id} не найден в группе {group.chat_id}, чистим связь")
-                        await session.execute(
-                            delete(UserGroup).where(
-                                UserGroup.user_id == user_id,
-                                UserGroup.group_id == group.chat_id,
-                            )
-                        )
-                        await session.commit()
-                    else:
-                        # При временных ошибках - доверяем БД, но восстанавливаем UserGroup
-                        logger.warning(f"Временная ошибка при проверке прав {user_id} в группе {group.chat_id}: {e}")
-                        # ФИКС: Восстанавливаем UserGroup чтобы группа не пропала при следующем вызове
-                        await _ensure_user_group_exists(session, user_id, group.chat_id, None)
-                        valid_groups.append(group)
-                    continue
-
-                # ФИКС: Восстанавливаем UserGroup если пользователь снова админ
-                # Это решает проблему "исчезающих групп"
-                await _ensure_user_group_exists(session, user_id, group.chat_id, user_member.user)
-                valid_groups.append(group)
-            except Exception as e:
-                # КРИТИЧЕСКИЙ ФИКС: При неожиданных ошибках - доверяем БД и добавляем группу!
-                # Раньше группа просто терялась при любом exception
-                logger.error(f"Ошибка обработки группы {group.chat_id}: {e}, но доверяем БД")
-                try:
-                    await _ensure_user_group_exists(session, user_id, group.chat_id, None)
-                    valid_groups.append(group)
-                except Exception:
-                    pass
+                    # КРИТИЧЕСКИЙ ФИКС: При неожиданных ошибках - доверяем БД и добавляем группу!
+                    # Раньше группа просто терялась при любом exception
+                    logger.error(f"Ошибка обработки группы {group.chat_id}: {e}, но доверяем БД")
+                    return _ADMIN_UNKNOWN, None
+
+        statuses = await asyncio.gather(*(_resolve(group) for group in all_groups))
+
+        # Текущие связи пользователя — одним запросом вместо запроса на группу
+        linked_result = await session.execute(
+            select(UserGroup.group_id).where(UserGroup.user_id == user_id)
+        )
+        linked_ids = {row[0] for row in linked_result.fetchall()}
+
+        valid_groups: List[Group] = []
+        stale_ids: List[int] = []
+
+        for group, (status, user_info) in zip(all_groups, statuses):
+            if status == _ADMIN_SKIP:
                 continue
+            if status == _ADMIN_REVOKED:
+                # Группа недоступна или пользователь больше не админ — чистим связь
+                if group.chat_id in linked_ids:
+                    stale_ids.append(group.chat_id)
+                continue
+
+            # ФИКС: Восстанавливаем UserGroup если пользователь снова админ
+            # (или при временной ошибке — доверяем БД, чтобы группа не пропала)
+            if group.chat_id not in linked_ids:
+                await _ensure_user_group_exists(session, user_id, group.chat_id, user_info)
+            valid_groups.append(group)
+
+        if stale_ids:
+            await session.execute(
+                delete(UserGroup).where(
+                    UserGroup.user_id == user_id,
+                    UserGroup.group_id.in_(stale_ids),
+                )
+            )
+            await session.commit()
 
         return valid_groups
 
@@ -311,28 +355,21 @@ async def _check_permissions_via_admin_list(
         logger.warning(f"⚠️ Неизвестное разрешение: {required_permission}")
         return False
 
-    try:
-        admins = await bot.get_chat_administrators(chat_id)
-    except TelegramAPIError as e:
-        logger.error(f"Ошибка получения администраторов чата {chat_id}: {e}")
-        return None
-    except Exception as e:
-        logger.error(f"Неизвестная ошибка получения администраторов чата {chat_id}: {e}")
+    # Права админов из кэша (get_chat_administrators не чаще раза в TTL)
+    admins = await get_admin_status_cache().get_admin_rights(bot, chat_id)
+    if admins is None:
+        logger.error(f"Не удалось получить администраторов чата {chat_id}")
         return None
 
-    for admin in admins:
-        status = getattr(admin, 'status', '')
-        if status == 'creator':
+    for rights in admins.values():
+        if rights.status == 'creator':
             logger.info(f"✅ Создатель найден в get_chat_administrators для {chat_id}")
             return True
-        if status != 'administrator':
-            continue
 
-        has_perm = getattr(admin, attr_name, False)
-        if not has_perm:
+        if not rights.has(attr_name):
             continue
 
-        if getattr(admin, 'is_anonymous', False):
+        if rights.is_anonymous:
             logger.info(f"✅ Найден анонимный админ с правом '{required_permission}' в чате {chat_id}")
             return True
 
@@ -419,7 +456,29 @@ async def check_granular_permissions(
             logger.warning(f"❌ Нет user_id/sender_chat_id для проверки прав в группе {chat_id}")
             return False
 
-        # 4. Получаем информацию о члене группы через Telegram API
+        attr = PERMISSION_ATTRIBUTE_MAP.get(required_permission)
+
+        # 4. Права из кэша админов группы (без запроса на каждый callback)
+        admins = await get_admin_status_cache().get_admin_rights(bot, chat_id)
+        if admins is not None:
+            rights = admins.get(user_id)
+            if rights is None:
+                logger.warning(f"❌ Пользователь {user_id} не является администратором в группе {chat_id}")
+                return False
+            if rights.status == "creator":
+                logger.info(f"✅ Пользователь {user_id} - creator группы {chat_id}, разрешаем доступ")
+                return True
+            if not attr:
+                logger.warning(f"⚠️ Неизвестное разрешение: {required_permission}")
+                return False
+            has_permission = rights.has(attr)
+            if has_permission:
+                logger.info(f"✅ Пользователь {user_id} имеет право '{required_permission}' в группе {chat_id}")
+            else:
+                logger.warning(f"❌ Пользователь {user_id} НЕ имеет права '{required_permission}' в группе {chat_id}")
+            return has_permission
+
+        # Список админов недоступен — получаем информацию о члене группы через Telegram API
         try:
             member = await bot.get_chat_member(chat_id, user_id)
         except TelegramAPIError as e:
@@ -439,7 +498,6 @@ async def check_granular_permissions(
             logger.warning(f"❌ Пользователь {user_id} не является администратором в группе {chat_id}")
             return False
         
-        attr = PERMISSION_ATTRIBUTE_MAP.get(required_permission)
         if not attr:
             logger.warning(f"⚠️ Неизвестное разрешение: {required_permission}")
             return False
@@ -0,0 +1,687 @@
+# ============================================================
+# JOB SCHEDULER - ОТЛОЖЕННЫЕ ЗАДАЧИ В REDIS
+# ============================================================
+# Этот модуль выполняет отложенные действия (удалить сообщение
+# через N секунд, напомнить о капче, обработать таймаут капчи).
+#
+# Раньше каждое такое действие было отдельной задачей:
+#   asyncio.create_task(sleep(delay) → действие)
+# Задачи жили только в памяти процесса (терялись при перезапуске),
+# а во время рейда их накапливались десятки тысяч.
+#
+# Теперь:
+# - задача = запись в Redis: sorted set (время → job_id) + hash с данными
+# - несколько воркеров забирают наступившие задачи пачками (Lua, атомарно),
+#   не больше, чем свободных воркеров — аренда идёт только пока задача
+#   выполняется, а не пока она ждёт во внутренней очереди
+# - job_id идемпотентен: повторное планирование переносит задачу,
+#   а не создаёт дубликат; по job_id задачу можно отменить
+# - забранная задача держится в processing с арендой: если процесс
+#   упал, после истечения аренды задача возвращается в очередь
+# - при ошибке обработчика задача повторяется с паузой (до max_attempts)
+#
+# Обработчики регистрируются по типу задачи (kind):
+#   register_job_handler("delete_message", handler)
+#   handler(bot, payload) — payload это JSON-словарь
+#
+# Если планировщик не запущен (тесты, Redis недоступен) — задача
+# выполняется в процессе через asyncio (как раньше), с той же отменой.
+# ============================================================
+
+# Импортируем asyncio для воркеров и локального режима
+import asyncio
+# Импортируем json для сериализации данных задачи
+import json
+# Импортируем логгер
+import logging
+# Импортируем time для расчёта времени выполнения
+import time
+# Импортируем типы для аннотаций
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Импортируем Bot для аннотаций обработчиков
+from aiogram import Bot
+# Импортируем Redis для хранения задач
+from redis.asyncio import Redis
+
+# Импортируем пакетное удаление сообщений
+from bot.services.message_deletion import delete_messages
+
+# Создаём логгер
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# КОНСТАНТЫ
+# ============================================================
+
+# Префикс ключей Redis
+REDIS_KEY_PREFIX = "jobs"
+
+# Количество воркеров по умолчанию
+DEFAULT_WORKERS = 4
+
+# Максимальная пауза опроса Redis (секунды)
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Сколько задач забирать за один запрос
+DEFAULT_BATCH_SIZE = 100
+
+# Аренда задачи: через сколько секунд незавершённая задача вернётся в очередь
+DEFAULT_LEASE_SECONDS = 60
+
+# Максимальное время выполнения обработчика (секунды)
+DEFAULT_JOB_TIMEOUT = 30
+
+# Максимум попыток выполнения задачи
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Пауза перед повтором (умножается на номер попытки)
+DEFAULT_RETRY_DELAY = 5
+
+# Тип обработчика задачи: (bot, payload) → None
+JobHandler = Callable[[Bot, Dict[str, Any]], Awaitable[None]]
+
+
+# ============================================================
+# LUA СКРИПТЫ
+# ============================================================
+
+# Забрать наступившие задачи: due → processing (с арендой)
+# KEYS: due, processing, data; ARGV: now, limit, lease_until
+# Возвращает плоский список [job_id, data, job_id, data, ...]
+_CLAIM_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+local result = {}
+for _, id in ipairs(ids) do
+    redis.call('ZREM', KEYS[1], id)
+    local data = redis.call('HGET', KEYS[3], id)
+    if data then
+        redis.call('ZADD', KEYS[2], ARGV[3], id)
+        table.insert(result, id)
+        table.insert(result, data)
+    end
+end
+return result
+"""
+
+# Вернуть задачи с истёкшей арендой в очередь: processing → due
+# KEYS: processing, due; ARGV: now
+_RECOVER_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+for _, id in ipairs(ids) do
+    redis.call('ZREM', KEYS[1], id)
+    redis.call('ZADD', KEYS[2], ARGV[1], id)
+end
+return #ids
+"""
+
+# Завершить задачу: убрать из processing и удалить данные,
+# если за время выполнения её не запланировали заново (тот же job_id)
+# KEYS: processing, due, data; ARGV: job_id
+_COMPLETE_SCRIPT = """
+redis.call('ZREM', KEYS[1], ARGV[1])
+if not redis.call('ZSCORE', KEYS[2], ARGV[1]) then
+    redis.call('HDEL', KEYS[3], ARGV[1])
+end
+return 1
+"""
+
+
+# ============================================================
+# РЕЕСТР ОБРАБОТЧИКОВ
+# ============================================================
+
+_handlers: Dict[str, JobHandler] = {}
+
+
+def register_job_handler(kind: str, handler: JobHandler) -> None:
+    """
+    Регистрирует обработчик задач типа kind.
+
+    Вызывается при импорте модуля, который планирует такие задачи,
+    поэтому задачи, восстановленные после перезапуска, находят обработчик.
+
+    Args:
+        kind: Тип задачи
+        handler: async функция (bot, payload)
+    """
+    _handlers[kind] = handler
+
+
+# ============================================================
+# ПЛАНИРОВЩИК
+# ============================================================
+
+class JobScheduler:
+    """
+    Планировщик отложенных задач на Redis sorted set.
+
+    Пример использования:
+        scheduler = JobScheduler(redis)
+        await scheduler.start(bot)
+        await scheduler.schedule(bot, "delete_message", {...}, delay=60,
+                                 job_id="delete_message:-100:42")
+        await scheduler.cancel("delete_message:-100:42")
+    """
+
+    def __init__(
+        self,
+        redis: Optional[Redis] = None,
+        workers: int = DEFAULT_WORKERS,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        lease_seconds: int = DEFAULT_LEASE_SECONDS,
+        job_timeout: int = DEFAULT_JOB_TIMEOUT,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        retry_delay: int = DEFAULT_RETRY_DELAY,
+    ):
+        """
+        Args:
+            redis: Клиент Redis (None = только локальный режим)
+            workers: Количество воркеров
+            poll_interval: Максимальная пауза опроса Redis
+            batch_size: Сколько задач забирать за раз
+            lease_seconds: Аренда забранной задачи
+            job_timeout: Таймаут обработчика
+            max_attempts: Максимум попыток
+            retry_delay: Базовая пауза перед повтором
+        """
+        self._redis = redis
+        self._workers = max(1, workers)
+        self._poll_interval = poll_interval
+        self._batch_size = batch_size
+        self._lease_seconds = lease_seconds
+        self._job_timeout = job_timeout
+        self._max_attempts = max_attempts
+        self._retry_delay = retry_delay
+
+        self._bot: Optional[Bot] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # Сколько воркеров свободно (забранная задача занимает воркер сразу)
+        self._free_workers = self._workers
+        # Сигнал опросчику: воркер освободился
+        self._worker_freed = asyncio.Event()
+        # Сигнал опросчику: запланирована задача раньше текущего ожидания
+        self._wakeup = asyncio.Event()
+
+        # Локальный режим: job_id → задача asyncio
+        self._local: Dict[str, asyncio.Task] = {}
+
+        # Метрики
+        self.metrics: Dict[str, float] = {
+            "scheduled": 0,
+            "cancelled": 0,
+            "executed": 0,
+            "retried": 0,
+            "failed": 0,
+            "recovered": 0,
+            "local": 0,
+            "max_lag": 0.0,
+        }
+
+    # ─────────────────────────────────────────────────────────
+    # КЛЮЧИ REDIS
+    # ─────────────────────────────────────────────────────────
+
+    @property
+    def _due_key(self) -> str:
+        return f"{REDIS_KEY_PREFIX}:due"
+
+    @property
+    def _processing_key(self) -> str:
+        return f"{REDIS_KEY_PREFIX}:processing"
+
+    @property
+    def _data_key(self) -> str:
+        return f"{REDIS_KEY_PREFIX}:data"
+
+    @property
+    def running(self) -> bool:
+        """Запущены ли воркеры (задачи идут через Redis)."""
+        return self._bot is not None and self._redis is not None
+
+    # ─────────────────────────────────────────────────────────
+    # ПЛАНИРОВАНИЕ И ОТМЕНА
+    # ─────────────────────────────────────────────────────────
+
+    async def schedule(
+        self,
+        bot: Bot,
+        kind: str,
+        payload: Dict[str, Any],
+        delay: float,
+        job_id: Optional[str] = None,
+    ) -> str:
+        """
+        Планирует задачу.
+
+        Args:
+            bot: Экземпляр бота (нужен локальному режиму)
+            kind: Тип задачи (см. register_job_handler)
+            payload: JSON-сериализуемые данные задачи
+            delay: Через сколько секунд выполнить
+            job_id: Идемпотентный ID (повтор переносит задачу)
+
+        Returns:
+            job_id задачи
+        """
+        if job_id is None:
+            job_id = f"{kind}:{time.time_ns()}"
+        self.metrics["scheduled"] += 1
+
+        if self.running:
+            due = time.time() + max(0.0, delay)
+            data = json.dumps({"kind": kind, "payload": payload, "attempts": 0, "due": due})
+            try:
+                pipe = self._redis.pipeline(transaction=True)
+                pipe.hset(self._data_key, job_id, data)
+                pipe.zadd(self._due_key, {job_id: due})
+                await pipe.execute()
+                # Будим опросчик, если задача короче текущей паузы
+                if delay < self._poll_interval:
+                    self._wakeup.set()
+                return job_id
+            except Exception as e:
+                # Redis недоступен — не теряем задачу, выполняем в процессе
+                logger.warning(f"[JobScheduler] Ошибка планирования в Redis ({job_id}): {e}")
+
+        self._schedule_local(bot, kind, payload, delay, job_id)
+        return job_id
+
+    def _schedule_local(
+        self, bot: Bot, kind: str, payload: Dict[str, Any], delay: float, job_id: str
+    ) -> None:
+        """Планирует задачу в процессе (asyncio), заменяя задачу с тем же ID."""
+        self.metrics["local"] += 1
+        old = self._local.pop(job_id, None)
+        if old is not None and not old.done():
+            old.cancel()
+        self._local[job_id] = asyncio.create_task(
+            self._run_local(bot, kind, payload, delay, job_id)
+        )
+
+    async def _run_local(
+        self, bot: Bot, kind: str, payload: Dict[str, Any], delay: float, job_id: str
+    ) -> None:
+        """Ждёт delay и выполняет задачу в процессе."""
+        try:
+            await asyncio.sleep(max(0.0, delay))
+            await self._execute(bot, kind, payload, job_id)
+        finally:
+            if self._local.get(job_id) is asyncio.current_task():
+                del self._local[job_id]
+
+    async def cancel(self, job_id: str) -> bool:
+        """
+        Отменяет задачу по ID.
+
+        Returns:
+            True если задача была запланирована
+        """
+        cancelled = False
+
+        local = self._local.pop(job_id, None)
+        if local is not None and not local.done():
+            local.cancel()
+            cancelled = True
+
+        if self._redis is not None:
+            try:
+                pipe = self._redis.pipeline(transaction=True)
+                pipe.zrem(self._due_key, job_id)
+                pipe.hdel(self._data_key, job_id)
+                removed, _ = await pipe.execute()
+                cancelled = cancelled or bool(removed)
+            except Exception as e:
+                logger.warning(f"[JobScheduler] Ошибка отмены в Redis ({job_id}): {e}")
+
+        if cancelled:
+            self.metrics["cancelled"] += 1
+        return cancelled
+
+    # ─────────────────────────────────────────────────────────
+    # ВЫПОЛНЕНИЕ
+    # ─────────────────────────────────────────────────────────
+
+    async def _execute(self, bot: Bot, kind: str, payload: Dict[str, Any], job_id: str) -> bool:
+        """
+        Вызывает обработчик задачи.
+
+        Returns:
+            True если обработчик отработал без ошибки
+        """
+        handler = _handlers.get(kind)
+        if handler is None:
+            logger.error(f"[JobScheduler] Нет обработчика для задачи {kind} ({job_id})")
+            return False
+        try:
+            await asyncio.wait_for(handler(bot, payload), timeout=self._job_timeout)
+            self.metrics["executed"] += 1
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"[JobScheduler] Ошибка задачи {job_id}: {e}")
+            return False
+
+    async def _claim(self, limit: Optional[int] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Атомарно забирает пачку наступивших задач.
+
+        Args:
+            limit: Сколько задач забрать (по умолчанию batch_size)
+        """
+        now = time.time()
+        raw = await self._redis.eval(
+            _CLAIM_SCRIPT, 3,
+            self._due_key, self._processing_key, self._data_key,
+            now, limit or self._batch_size, now + self._lease_seconds,
+        )
+        jobs = []
+        for i in range(0, len(raw), 2):
+            try:
+                jobs.append((raw[i], json.loads(raw[i + 1])))
+            except (TypeError, ValueError) as e:
+                logger.error(f"[JobScheduler] Повреждённая задача {raw[i]}: {e}")
+                await self._complete(raw[i])
+        return jobs
+
+    async def recover(self) -> int:
+        """
+        Возвращает в очередь задачи с истёкшей арендой
+        (процесс упал или был перезапущен во время выполнения).
+
+        Returns:
+            Количество возвращённых задач
+        """
+        recovered = await self._redis.eval(
+            _RECOVER_SCRIPT, 2, self._processing_key, self._due_key, time.time()
+        )
+        if recovered:
+            self.metrics["recovered"] += recovered
+            logger.info(f"[JobScheduler] Возвращено задач после сбоя: {recovered}")
+        return recovered
+
+    async def _complete(self, job_id: str) -> None:
+        """Удаляет выполненную задачу из processing и данных."""
+        await self._redis.eval(
+            _COMPLETE_SCRIPT, 3,
+            self._processing_key, self._due_key, self._data_key, job_id,
+        )
+
+    async def _retry_or_drop(self, job_id: str, job: Dict[str, Any]) -> None:
+        """Планирует повтор задачи или удаляет её после max_attempts."""
+        attempts = job.get("attempts", 0) + 1
+        if attempts >= self._max_attempts:
+            self.metrics["failed"] += 1
+            logger.error(f"[JobScheduler] Задача {job_id} отброшена после {attempts} попыток")
+            await self._complete(job_id)
+            return
+
+        # Задачу уже запланировали заново (тот же job_id) — повтор не нужен
+        if await self._redis.zscore(self._due_key, job_id) is not None:
+            await self._redis.zrem(self._processing_key, job_id)
+            return
+
+        self.metrics["retried"] += 1
+        job["attempts"] = attempts
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.zrem(self._processing_key, job_id)
+        pipe.hset(self._data_key, job_id, json.dumps(job))
+        pipe.zadd(self._due_key, {job_id: time.time() + self._retry_delay * attempts})
+        await pipe.execute()
+
+    async def _process(self, job_id: str, job: Dict[str, Any]) -> None:
+        """Выполняет одну забранную задачу и фиксирует результат в Redis."""
+        # Задержка выполнения относительно запланированного времени
+        lag = time.time() - job.get("due", time.time())
+        self.metrics["max_lag"] = max(self.metrics["max_lag"], lag)
+
+        ok = await self._execute(self._bot, job.get("kind"), job.get("payload") or {}, job_id)
+        try:
+            if ok:
+                await self._complete(job_id)
+            else:
+                await self._retry_or_drop(job_id, job)
+        except Exception as e:
+            # Аренда истечёт и задача вернётся в очередь
+            logger.warning(f"[JobScheduler] Ошибка фиксации задачи {job_id}: {e}")
+
+    # ─────────────────────────────────────────────────────────
+    # ВОРКЕРЫ
+    # ─────────────────────────────────────────────────────────
+
+    async def _next_wait(self) -> float:
+        """Пауза до ближайшей задачи (не больше poll_interval)."""
+        nearest = await self._redis.zrange(self._due_key, 0, 0, withscores=True)
+        if not nearest:
+            return self._poll_interval
+        return min(self._poll_interval, max(0.0, nearest[0][1] - time.time()))
+
+    async def _poll_loop(self) -> None:
+        """Забирает наступившие задачи и раздаёт их воркерам."""
+        last_recover = 0.0
+        while True:
+            try:
+                now = time.time()
+                if now - last_recover >= self._lease_seconds / 2:
+                    await self.recover()
+                    last_recover = now
+
+                # Все воркеры заняты — ждём освобождения, не забирая задачи:
+                # иначе аренда истечёт, пока задача стоит в очереди,
+                # и recover вернёт её в Redis для повторного выполнения
+                if self._free_workers == 0:
+                    self._worker_freed.clear()
+                    await self._worker_freed.wait()
+                    continue
+
+                limit = min(self._batch_size, self._free_workers)
+                jobs = await self._claim(limit)
+                self._free_workers -= len(jobs)
+                for job_id, job in jobs:
+                    self._queue.put_nowait((job_id, job))
+
+                if len(jobs) >= limit:
+                    continue
+
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=await self._next_wait())
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[JobScheduler] Ошибка опроса очереди: {e}")
+                await asyncio.sleep(self._poll_interval)
+
+    async def _worker_loop(self) -> None:
+        """Выполняет задачи из внутренней очереди."""
+        while True:
+            job_id, job = await self._queue.get()
+            try:
+                await self._process(job_id, job)
+            finally:
+                self._queue.task_done()
+                self._free_workers += 1
+                self._worker_freed.set()
+
+    async def start(self, bot: Bot) -> None:
+        """
+        Запускает опросчик и воркеры.
+
+        Задачи, оставшиеся в Redis с прошлого запуска, выполняются сразу
+        (если их время прошло) — так переживается перезапуск бота.
+        """
+        if self._redis is None:
+            logger.info("[JobScheduler] Redis не задан — задачи выполняются в процессе")
+            return
+        if self._tasks:
+            return
+
+        try:
+            pending = await self._redis.zcard(self._due_key)
+        except Exception as e:
+            logger.error(f"[JobScheduler] Redis недоступен — задачи выполняются в процессе: {e}")
+            return
+
+        self._bot = bot
+        # В очереди не больше задач, чем воркеров (см. _poll_loop)
+        self._queue = asyncio.Queue()
+        self._free_workers = self._workers
+        self._worker_freed = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._poll_loop())]
+        self._tasks += [asyncio.create_task(self._worker_loop()) for _ in range(self._workers)]
+
+        logger.info(f"[JobScheduler] Запущен: воркеров={self._workers}, ожидает задач={pending}")
+
+    async def stop(self) -> None:
+        """
+        Останавливает воркеры.
+
+        Незавершённые задачи остаются в Redis и будут выполнены
+        после запуска (после истечения аренды).
+        """
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self._bot = None
+
+        for task in list(self._local.values()):
+            task.cancel()
+        self._local.clear()
+
+        logger.info(f"[JobScheduler] Остановлен: {self.metrics}")
+
+    # ─────────────────────────────────────────────────────────
+    # МЕТРИКИ
+    # ─────────────────────────────────────────────────────────
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """
+        Возвращает метрики планировщика.
+
+        Returns:
+            Счётчики + размеры очередей в Redis; lag — насколько
+            просрочена ближайшая задача, max_lag — наибольшая задержка
+            выполнения (секунды)
+        """
+        stats: Dict[str, Any] = dict(self.metrics)
+        stats["local_pending"] = len(self._local)
+        if self._redis is not None:
+            try:
+                pipe = self._redis.pipeline(transaction=False)
+                pipe.zcard(self._due_key)
+                pipe.zcard(self._processing_key)
+                pipe.zrange(self._due_key, 0, 0, withscores=True)
+                due, processing, nearest = await pipe.execute()
+                stats["pending"] = due
+                stats["processing"] = processing
+                lag = time.time() - nearest[0][1] if nearest else 0.0
+                stats["lag"] = max(0.0, lag)
+            except Exception as e:
+                logger.warning(f"[JobScheduler] Ошибка чтения метрик: {e}")
+        return stats
+
+
+# ============================================================
+# ГЛОБАЛЬНЫЙ ЭКЗЕМПЛЯР
+# ============================================================
+
+_job_scheduler: Optional[JobScheduler] = None
+
+
+def get_job_scheduler() -> JobScheduler:
+    """
+    Возвращает глобальный планировщик.
+
+    До start_job_scheduler задачи выполняются в процессе (asyncio).
+    """
+    global _job_scheduler
+    if _job_scheduler is None:
+        _job_scheduler = JobScheduler()
+    return _job_scheduler
+
+
+async def start_job_scheduler(bot: Bot, redis: Optional[Redis], workers: int = DEFAULT_WORKERS) -> None:
+    """
+    Запускает глобальный планировщик (вызывается при старте бота).
+
+    Args:
+        bot: Экземпляр бота (передаётся обработчикам)
+        redis: Клиент Redis (None = задачи в процессе)
+        workers: Количество воркеров
+    """
+    global _job_scheduler
+    if _job_scheduler is not None:
+        await _job_scheduler.stop()
+    _job_scheduler = JobScheduler(redis, workers=workers)
+    await _job_scheduler.start(bot)
+
+
+async def stop_job_scheduler() -> None:
+    """Останавливает глобальный планировщик (вызывается при остановке бота)."""
+    if _job_scheduler is not None:
+        await _job_scheduler.stop()
+
+
+async def schedule_job(
+    bot: Bot,
+    kind: str,
+    payload: Dict[str, Any],
+    delay: float,
+    job_id: Optional[str] = None,
+) -> str:
+    """Планирует задачу в глобальном планировщике (см. JobScheduler.schedule)."""
+    return await get_job_scheduler().schedule(bot, kind, payload, delay, job_id)
+
+
+async def cancel_job(job_id: str) -> bool:
+    """Отменяет задачу глобального планировщика по ID."""
+    return await get_job_scheduler().cancel(job_id)
+
+
+# ============================================================
+# ОБЩАЯ ЗАДАЧА: УДАЛЕНИЕ СООБЩЕНИЯ
+# ============================================================
+
+DELETE_MESSAGE_JOB = "delete_message"
+
+
+async def _delete_message_job(bot: Bot, payload: Dict[str, Any]) -> None:
+    """
+    Удаляет сообщение через пакетное удаление: задачи, наступившие
+    одновременно в одном чате, уходят одним вызовом deleteMessages.
+    Уже удалённое сообщение — не ошибка.
+    """
+    await delete_messages(bot, payload["chat_id"], [payload["message_id"]])
+
+
+register_job_handler(DELETE_MESSAGE_JOB, _delete_message_job)
+
+
+async def schedule_delete_message(bot: Bot, chat_id: int, message_id: int, delay: float) -> str:
+    """
+    Планирует удаление сообщения через delay секунд.
+
+    Повторный вызов для того же сообщения переносит удаление.
+
+    Returns:
+        job_id задачи (для cancel_job)
+    """
+    return await schedule_job(
+        bot,
+        DELETE_MESSAGE_JOB,
+        {"chat_id": chat_id, "message_id": message_id},
+        delay,
+        job_id=f"{DELETE_MESSAGE_JOB}:{chat_id}:{message_id}",
+    )
@@ -25,6 +25,7 @@ from bot.services.manual_commands.mute_service import (
     format_user_link,
     format_user_link_by_id,
     MuteResult,
+    CrossMuteProgress,
 )
 
 # Экспортируем функции бана
@@ -55,6 +56,7 @@ __all__ = [
     'format_user_link',
     'format_user_link_by_id',
     'MuteResult',
+    'CrossMuteProgress',
     # Ban service
     'apply_ban',
     'apply_unban',
@@ -12,6 +12,7 @@
 
 import logging
 import html
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional, List, NamedTuple
 from dataclasses import dataclass
@@ -31,6 +32,10 @@ from bot.services.spammer_registry import (
 )
 # Импортируем функцию кросс-группового мута
 from bot.services.mute_by_reaction_service import mute_across_groups
+# Импортируем результат группы и тип колбэка рассылки мута
+from bot.services.mute_fanout import FanoutResult, ResultCallback
+# Импортируем пакетное удаление сообщений
+from bot.services.message_deletion import delete_messages
 
 # Настраиваем логгер
 logger = logging.getLogger(__name__)
@@ -63,6 +68,61 @@ class MuteResult:
             self.muted_groups = []
 
 
+# ═══════════════════════════════════════════════════════════════════════════
+# ХОД КРОСС-ГРУППОВОГО МУТА
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Интервал правок сообщения о ходе кросс-группового мута (секунды)
+CROSS_MUTE_PROGRESS_INTERVAL = 3.0
+
+
+class CrossMuteProgress:
+    """
+    Сообщение о ходе кросс-группового мута в группе команды.
+
+    На сотнях групп мут идёт долго — админ видит, сколько групп уже
+    обработано. Сообщение появляется, только если мут идёт дольше
+    interval, правится не чаще раза в interval и удаляется в close()
+    (итог показывает уведомление о муте).
+    """
+
+    def __init__(self, bot: Bot, chat_id: int, interval: float = CROSS_MUTE_PROGRESS_INTERVAL):
+        self._bot = bot
+        self._chat_id = chat_id
+        self._interval = interval
+        self._last_update = time.monotonic()
+        self._message_id: Optional[int] = None
+        self.processed = 0
+        self.muted = 0
+
+    async def on_result(self, result: FanoutResult) -> None:
+        """Колбэк рассылки (см. mute_across_groups)."""
+        self.processed += 1
+        if result.muted:
+            self.muted += 1
+
+        now = time.monotonic()
+        if now - self._last_update < self._interval:
+            return
+        # Отмечаем до запроса: параллельные воркеры не отправят дубликат
+        self._last_update = now
+
+        text = f"⏳ Мут по группам: обработано {self.processed}, замучен в {self.muted}"
+        if self._message_id is None:
+            message = await self._bot.send_message(self._chat_id, text)
+            self._message_id = message.message_id
+        else:
+            await self._bot.edit_message_text(
+                text, chat_id=self._chat_id, message_id=self._message_id
+            )
+
+    async def close(self) -> None:
+        """Удаляет сообщение о ходе мута."""
+        if self._message_id is not None:
+            await delete_messages(self._bot, self._chat_id, [self._message_id])
+            self._message_id = None
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # ПОЛУЧЕНИЕ/СОЗДАНИЕ НАСТРОЕК
 # ═══════════════════════════════════════════════════════════════════════════
@@ -139,6 +199,7 @@ async def apply_mute(
     duration_minutes: Optional[int],
     reason: Optional[str] = None,
     is_forever: bool = False,
+    on_result: Optional[ResultCallback] = None,
 ) -> MuteResult:
     """
     Применяет мут к пользователю.
@@ -156,6 +217,8 @@ async def apply_mute(
         duration_minutes: Длительность в минутах (None = навсегда)
         reason: Причина мута
         is_forever: True если мут навсегда
+        on_result: Колбэк результата каждой группы кросс-группового мута
+            (например, CrossMuteProgress.on_result)
 
     Returns:
         MuteResult: Результат операции
@@ -249,6 +312,7 @@ async def apply_mute(
                 reason=reason or "Ручной мут навсегда (кросс-групповой)",
                 session=session,
                 bot=bot,
+                on_result=on_result,
             )
 
             # Собираем список успешных групп
@@ -0,0 +1,259 @@
+# ============================================================
+# MESSAGE DELETION - ПАКЕТНОЕ УДАЛЕНИЕ СООБЩЕНИЙ
+# ============================================================
+# Этот модуль удаляет сообщения через Bot API deleteMessages
+# (до 100 ID за один вызов) вместо deleteMessage на каждое сообщение.
+#
+# Раньше очистка за спамером выглядела так:
+#   for msg_id in message_ids: await bot.delete_message(chat_id, msg_id)
+# 60 сообщений = 60 запросов к API (и быстрый FloodWait во время рейда).
+#
+# Теперь:
+# - запросы на удаление копятся по чатам в течение короткого окна
+#   (window), параллельные очистки одного чата объединяются
+# - пачка уходит одним delete_messages (чанки по 100)
+# - на TelegramRetryAfter (FloodWait) ждём указанное время и повторяем
+# - если пачка не удалилась (TelegramBadRequest) — удаляем по одному,
+#   чтобы одно проблемное сообщение не оставило остальные
+#
+# Используется для:
+# - profile_monitor delete_user_messages
+# - content_filter: удаление флуд-сообщений
+# - координатор: очистка кросс-сообщений
+# - cross_group.action_service: удаление сообщений скамера
+# - job_scheduler: отложенное удаление (одновременные задачи сливаются)
+# ============================================================
+
+# Импортируем asyncio для окна объединения и ожидания FloodWait
+import asyncio
+# Импортируем логгер
+import logging
+# Импортируем типы для аннотаций
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Импортируем Bot для аннотаций
+from aiogram import Bot
+# Импортируем ошибки Telegram API
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramRetryAfter,
+)
+
+# Создаём логгер
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# КОНСТАНТЫ
+# ============================================================
+
+# Максимум ID в одном вызове deleteMessages (ограничение Bot API)
+MAX_BATCH_SIZE = 100
+
+# Окно объединения запросов на удаление (секунды)
+DEFAULT_WINDOW = 0.1
+
+# Сколько раз повторять пачку после FloodWait
+MAX_FLOOD_RETRIES = 3
+
+
+# ============================================================
+# УДАЛЕНИЕ ПАЧКАМИ
+# ============================================================
+
+async def _call_with_flood_retry(coro_factory) -> None:
+    """
+    Выполняет запрос к API, повторяя его после FloodWait.
+
+    Args:
+        coro_factory: Функция без аргументов, возвращающая корутину запроса
+    """
+    for attempt in range(MAX_FLOOD_RETRIES + 1):
+        try:
+            await coro_factory()
+            return
+        except TelegramRetryAfter as e:
+            if attempt >= MAX_FLOOD_RETRIES:
+                raise
+            logger.warning(f"[MessageDeletion] FloodWait {e.retry_after}с, повтор {attempt + 1}")
+            await asyncio.sleep(e.retry_after)
+
+
+async def delete_messages_now(bot: Bot, chat_id: int, message_ids: Iterable[int]) -> Set[int]:
+    """
+    Удаляет сообщения чата пачками по 100 (без окна объединения).
+
+    Args:
+        bot: Экземпляр бота
+        chat_id: ID чата
+        message_ids: ID сообщений
+
+    Returns:
+        Множество ID, удаление которых прошло успешно
+    """
+    ids = sorted(set(message_ids))
+    deleted: Set[int] = set()
+
+    for i in range(0, len(ids), MAX_BATCH_SIZE):
+        chunk = ids[i:i + MAX_BATCH_SIZE]
+        try:
+            await _call_with_flood_retry(
+                lambda: bot.delete_messages(chat_id=chat_id, message_ids=chunk)
+            )
+            deleted.update(chunk)
+        except TelegramForbiddenError as e:
+            # Бота удалили из чата / нет прав — дальше пробовать бессмысленно
+            logger.warning(f"[MessageDeletion] Нет доступа к чату {chat_id}: {e}")
+            break
+        except TelegramBadRequest as e:
+            # Пачка не прошла — удаляем по одному, чтобы не оставить остальные
+            logger.debug(f"[MessageDeletion] delete_messages не удалось ({e}), удаляем по одному")
+            for msg_id in chunk:
+                try:
+                    await _call_with_flood_retry(
+                        lambda: bot.delete_message(chat_id=chat_id, message_id=msg_id)
+                    )
+                    deleted.add(msg_id)
+                except TelegramAPIError:
+                    # Сообщение уже удалено или недоступно
+                    pass
+        except TelegramAPIError as e:
+            logger.warning(f"[MessageDeletion] Ошибка удаления в чате {chat_id}: {e}")
+
+    return deleted
+
+
+# ============================================================
+# ОБЪЕДИНЕНИЕ ЗАПРОСОВ ПО ЧАТАМ
+# ============================================================
+
+class _PendingBatch:
+    """Накопленные запросы на удаление в одном чате."""
+
+    def __init__(self, bot: Bot):
+        self.bot = bot
+        self.message_ids: Set[int] = set()
+        # Результат: множество удалённых ID (для всех ожидающих)
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class MessageDeleter:
+    """
+    Пакетное удаление сообщений с объединением запросов по чатам.
+
+    Пример использования:
+        deleter = MessageDeleter(window=0.1)
+        deleted = await deleter.delete(bot, chat_id, [101, 102, 103])
+    """
+
+    def __init__(self, window: float = DEFAULT_WINDOW):
+        """
+        Args:
+            window: Окно объединения запросов в секундах (0 = без ожидания)
+        """
+        self._window = window
+        self._pending: Dict[Tuple[int, int], _PendingBatch] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+        # Статистика
+        self.api_calls_saved = 0
+
+    async def delete(self, bot: Bot, chat_id: int, message_ids: Iterable[int]) -> int:
+        """
+        Ставит сообщения в пачку чата и ждёт её удаления.
+
+        Args:
+            bot: Экземпляр бота
+            chat_id: ID чата
+            message_ids: ID сообщений
+
+        Returns:
+            Сколько из переданных сообщений удалено
+        """
+        ids = set(message_ids)
+        if not ids:
+            return 0
+
+        key = (id(bot), chat_id)
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = _PendingBatch(bot)
+            self._pending[key] = batch
+            if self._window > 0:
+                batch.timer = asyncio.get_running_loop().call_later(
+                    self._window, self._start_flush, key
+                )
+
+        batch.message_ids.update(ids)
+
+        # Полная пачка или окно выключено — удаляем сразу
+        if self._window <= 0 or len(batch.message_ids) >= MAX_BATCH_SIZE:
+            self._start_flush(key)
+
+        deleted = await asyncio.shield(batch.future)
+        return len(ids & deleted)
+
+    def _start_flush(self, key: Tuple[int, int]) -> None:
+        """Забирает пачку чата и запускает её удаление."""
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        task = asyncio.create_task(self._flush(key[1], batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, chat_id: int, batch: _PendingBatch) -> None:
+        """Удаляет пачку и отдаёт результат всем ожидающим."""
+        try:
+            deleted = await delete_messages_now(batch.bot, chat_id, batch.message_ids)
+            calls = -(-len(batch.message_ids) // MAX_BATCH_SIZE)
+            self.api_calls_saved += len(batch.message_ids) - calls
+            if not batch.future.done():
+                batch.future.set_result(deleted)
+        except Exception as e:
+            logger.error(f"[MessageDeletion] Ошибка пакетного удаления в чате {chat_id}: {e}")
+            if not batch.future.done():
+                batch.future.set_result(set())
+
+    async def flush_all(self) -> None:
+        """Удаляет все накопленные пачки (вызывается при остановке бота)."""
+        for key in list(self._pending):
+            self._start_flush(key)
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+# ============================================================
+# ГЛОБАЛЬНЫЙ ЭКЗЕМПЛЯР
+# ============================================================
+
+_message_deleter: Optional[MessageDeleter] = None
+
+
+def get_message_deleter() -> MessageDeleter:
+    """Возвращает глобальный MessageDeleter."""
+    global _message_deleter
+    if _message_deleter is None:
+        _message_deleter = MessageDeleter()
+    return _message_deleter
+
+
+async def delete_messages(bot: Bot, chat_id: int, message_ids: List[int]) -> int:
+    """
+    Удаляет сообщения чата через глобальный MessageDeleter.
+
+    Returns:
+        Количество удалённых сообщений
+    """
+    return await get_message_deleter().delete(bot, chat_id, message_ids)
+
+
+async def flush_message_deleter() -> None:
+    """Дожидается удаления накопленных пачек (вызывается при остановке бота)."""
+    if _message_deleter is not None:
+        await _message_deleter.flush_all()
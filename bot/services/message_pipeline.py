@@ -0,0 +1,227 @@
+# ============================================================
+# MESSAGE PIPELINE - ПОЭТАПНОЕ ВЫПОЛНЕНИЕ ШАГОВ КООРДИНАТОРА
+# ============================================================
+# Координатор сообщений раньше выполнял шаги строго по очереди:
+# статистика → кэш автора → трекинг → кросс-группа → CF → ScamMedia
+# → Antispam → ProfileMonitor. Задержка = СУММА всех шагов.
+#
+# Этот модуль описывает шаги декларативно:
+# - depends_on: какие шаги должны завершиться раньше
+# - skip_if_triggered: шаг не выполняется, если сработал указанный
+# - priority: кто "побеждает", если сработало несколько детекторов
+#
+# Шаги без взаимных зависимостей выполняются одной волной через
+# asyncio.gather, каждый в СВОЕЙ сессии БД (AsyncSession нельзя
+# использовать из нескольких корутин одновременно). Задержка ≈ самый
+# медленный шаг волны.
+#
+# Коммитит владелец сессии: step_session (своя сессия шага) — после
+# успешного шага, общую сессию — DbSessionMiddleware после хендлера.
+# При ошибке шага сессия откатывается, чтобы следующие шаги в общей
+# сессии не получали "transaction has been rolled back".
+# ============================================================
+
+# Импортируем asyncio для параллельного выполнения
+import asyncio
+# Импортируем логгер
+import logging
+# Импортируем time для замера длительности шагов
+import time
+# Импортируем contextlib для "общей" сессии в последовательном режиме
+from contextlib import asynccontextmanager
+# Импортируем dataclass для описания шагов
+from dataclasses import dataclass, field
+# Импортируем типы для аннотаций
+from typing import Any, AsyncContextManager, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Импортируем типы SQLAlchemy
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Импортируем фабрику сессий
+from bot.database.session import get_session
+
+# Создаём логгер
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# ОПИСАНИЕ ШАГА И РЕЗУЛЬТАТА
+# ============================================================
+
+@dataclass
+class PipelineStep:
+    """
+    Один шаг обработки сообщения.
+
+    Attributes:
+        name: Уникальное имя шага
+        run: Корутина шага. Получает сессию (или None если uses_session=False),
+             возвращает True если шаг "сработал" (применил действие)
+        depends_on: Шаги, которые должны завершиться до этого
+        skip_if_triggered: Если любой из этих шагов сработал — шаг пропускается
+                           (они автоматически считаются зависимостями)
+        priority: Приоритет при разрешении "кто сработал первым"
+                  (меньше = важнее; None = шаг не детектор)
+        uses_session: Нужна ли шагу сессия БД
+    """
+    name: str
+    run: Callable[[Optional[AsyncSession]], Awaitable[Any]]
+    depends_on: Tuple[str, ...] = ()
+    skip_if_triggered: Tuple[str, ...] = ()
+    priority: Optional[int] = None
+    uses_session: bool = True
+
+    @property
+    def requires(self) -> Tuple[str, ...]:
+        """Все шаги, которые должны завершиться раньше."""
+        return tuple(dict.fromkeys(self.depends_on + self.skip_if_triggered))
+
+
+@dataclass
+class PipelineResult:
+    """
+    Результат выполнения шагов.
+
+    Attributes:
+        triggered: Имена сработавших шагов
+        skipped: Имена пропущенных шагов
+        failed: Имена шагов, упавших с исключением
+        winner: Сработавший детектор с наивысшим приоритетом
+        durations: Длительность каждого шага (секунды)
+    """
+    triggered: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    winner: Optional[str] = None
+    durations: Dict[str, float] = field(default_factory=dict)
+
+
+# ============================================================
+# СЕССИИ ДЛЯ ШАГОВ
+# ============================================================
+
+SessionFactory = Callable[[], AsyncContextManager[AsyncSession]]
+
+
+@asynccontextmanager
+async def step_session():
+    """
+    Своя сессия шага (параллельный режим): коммит после успешного шага.
+
+    Раньше все шаги писали в одну сессию и незакоммиченные изменения
+    (например, flush статистики) фиксировал коммит следующего шага —
+    теперь сессию шага коммитит эта фабрика, её владелец.
+    """
+    async with get_session() as session:
+        yield session
+        await session.commit()
+
+
+def shared_session_factory(session: AsyncSession) -> SessionFactory:
+    """
+    Фабрика, отдающая одну и ту же сессию (последовательный режим).
+    Сессию не коммитит и не закрывает — ей владеет вызывающий (middleware).
+    """
+    @asynccontextmanager
+    async def factory():
+        yield session
+    return factory
+
+
+# ============================================================
+# ВЫПОЛНЕНИЕ
+# ============================================================
+
+def _build_waves(steps: List[PipelineStep]) -> List[List[PipelineStep]]:
+    """
+    Раскладывает шаги на волны: в волне только шаги, все зависимости
+    которых выполнены в предыдущих волнах. Порядок внутри волны —
+    порядок объявления.
+    """
+    names = {step.name for step in steps}
+    for step in steps:
+        unknown = set(step.requires) - names
+        if unknown:
+            raise ValueError(f"Шаг {step.name} зависит от неизвестных шагов: {sorted(unknown)}")
+
+    waves: List[List[PipelineStep]] = []
+    done: set = set()
+    pending = list(steps)
+    while pending:
+        wave = [step for step in pending if set(step.requires) <= done]
+        if not wave:
+            raise ValueError(f"Циклическая зависимость шагов: {[s.name for s in pending]}")
+        waves.append(wave)
+        done.update(step.name for step in wave)
+        pending = [step for step in pending if step.name not in done]
+    return waves
+
+
+async def run_pipeline(
+    steps: List[PipelineStep],
+    session_factory: SessionFactory = step_session,
+    parallel: bool = True,
+    log_prefix: str = "[PIPELINE]"
+) -> PipelineResult:
+    """
+    Выполняет шаги волнами с учётом зависимостей.
+
+    Args:
+        steps: Шаги в порядке объявления (он же порядок в последовательном режиме)
+        session_factory: Фабрика сессий (по умолчанию — новая сессия на шаг
+                         с коммитом после успешного шага)
+        parallel: True — шаги волны через asyncio.gather,
+                  False — строго по очереди (как раньше)
+        log_prefix: Префикс для логов
+
+    Returns:
+        PipelineResult с итогами выполнения
+    """
+    result = PipelineResult()
+    by_name = {step.name: step for step in steps}
+
+    async def execute(step: PipelineStep) -> None:
+        # Шаг пропускается если сработал любой из "глушащих" шагов
+        blockers = [name for name in step.skip_if_triggered if name in result.triggered]
+        if blockers:
+            logger.info(f"{log_prefix} {step.name} пропущен: сработал {blockers[0]}")
+            result.skipped.append(step.name)
+            return
+
+        started = time.monotonic()
+        try:
+            if step.uses_session:
+                async with session_factory() as session:
+                    try:
+                        triggered = await step.run(session)
+                    except Exception:
+                        # Откат: иначе общая сессия остаётся в состоянии
+                        # ошибки и все следующие шаги падают вместе с этим
+                        await session.rollback()
+                        raise
+            else:
+                triggered = await step.run(None)
+        except Exception as e:
+            # Ошибка шага не ломает остальные
+            logger.exception(f"{log_prefix} Ошибка шага {step.name}: {e}")
+            result.failed.append(step.name)
+            triggered = False
+        finally:
+            result.durations[step.name] = time.monotonic() - started
+
+        if triggered:
+            result.triggered.append(step.name)
+
+    for wave in _build_waves(steps):
+        if parallel and len(wave) > 1:
+            await asyncio.gather(*(execute(step) for step in wave))
+        else:
+            for step in wave:
+                await execute(step)
+
+    # "Первый сработавший" определяется приоритетом, а не временем завершения
+    detectors = [name for name in result.triggered if by_name[name].priority is not None]
+    if detectors:
+        result.winner = min(detectors, key=lambda name: by_name[name].priority)
+
+    return result
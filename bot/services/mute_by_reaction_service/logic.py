@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import logging
 import inspect
 from dataclasses import dataclass
@@ -27,6 +26,8 @@ from bot.database.mute_models import GroupMute, UserScore
 from bot.database.models import UserGroup
 from bot.services.redis_conn import redis
 from bot.services.global_mute_policy import get_global_mute_flag
+from bot.services.admin_status_cache import get_admin_status_cache
+from bot.services.job_scheduler import schedule_delete_message
 import json
 
 # ФИКС №8: Ключ для счетчика негативных реакций по сообщению
@@ -422,6 +423,9 @@ async def _delete_message_with_delay(
     """
     Удаляет сообщение с опциональной задержкой.
 
+    С задержкой удаление планируется задачей планировщика
+    (переживает перезапуск бота) и функция возвращается сразу.
+
     Args:
         bot: Объект бота
         chat_id: ID чата
@@ -429,11 +433,12 @@ async def _delete_message_with_delay(
         delay_seconds: Задержка перед удалением (в секундах)
 
     Returns:
-        True если сообщение успешно удалено
+        True если сообщение удалено (или удаление запланировано)
     """
     try:
         if delay_seconds > 0:
-            await asyncio.sleep(delay_seconds)
+            await schedule_delete_message(bot, chat_id, message_id, delay_seconds)
+            return True
         await bot.delete_message(chat_id=chat_id, message_id=message_id)
         logger.info(f"✅ Сообщение {message_id} в чате {chat_id} удалено")
         return True
@@ -460,16 +465,8 @@ async def _schedule_notification_delete(
     if delay_seconds <= 0:
         return
 
-    async def delete_later():
-        await asyncio.sleep(delay_seconds)
-        try:
-            await bot.delete_message(chat_id=chat_id, message_id=message_id)
-            logger.info(f"✅ Уведомление {message_id} автоудалено через {delay_seconds} сек")
-        except Exception as e:
-            logger.warning(f"⚠️ Не удалось автоудалить уведомление {message_id}: {e}")
-
-    # Запускаем в фоне без ожидания
-    asyncio.create_task(delete_later())
+    # Задача планировщика (переживает перезапуск бота)
+    await schedule_delete_message(bot, chat_id, message_id, delay_seconds)
 
 
 async def _ensure_chat_settings(session: AsyncSession, chat_id: int) -> ChatSettings:
@@ -563,8 +560,7 @@ async def handle_reaction_mute(
     # если пришел actor_chat, Telegram гарантирует что это админ группы
     if not is_anonymous:
         try:
-            admin_member = await bot.get_chat_member(chat_id, admin.id)
-            if getattr(admin_member, "status", None) not in ("administrator", "creator"):
+            if not await get_admin_status_cache().is_admin(bot, chat_id, admin.id):
                 return ReactionMuteResult(success=False, skip_reason="actor_not_admin", global_mute_state=global_mute_state)
         except Exception as exc:
             logger.error("Ошибка при проверке прав администратора: %s", exc)
@@ -685,10 +681,8 @@ async def handle_reaction_mute(
     # ─────────────────────────────────────────────────────────
     if delete_message and message_id:
         if delete_delay > 0:
-            # Удаление с задержкой - запускаем в фоне
-            asyncio.create_task(
-                _delete_message_with_delay(bot, chat_id, message_id, delete_delay)
-            )
+            # Удаление с задержкой - задача планировщика
+            await _delete_message_with_delay(bot, chat_id, message_id, delete_delay)
             logger.info(f"📅 Запланировано удаление сообщения {message_id} через {delete_delay} сек")
         else:
             # Удаление сразу
@@ -11,6 +11,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.database.models import UserGroup
+from bot.services.mute_fanout import STATUS_SKIPPED, ResultCallback, get_mute_fanout
 
 logger = logging.getLogger(__name__)
 
@@ -47,53 +48,43 @@ async def mute_across_groups(
     reason: str,
     session: AsyncSession,
     bot: Bot,
+    on_result: Optional[ResultCallback] = None,
 ) -> List[MultiGroupMuteResult]:
     """
     Применяет mute во всех группах, где администратор и бот обладают правами.
     Возвращает список chat_id, где удалось применить ограничение.
+
+    Группы обрабатываются параллельно через MuteFanoutExecutor: права
+    бота и админа берутся из кэша админов, запросы идут через общий лимит.
+    on_result получает результат каждой группы по мере готовности.
     """
     result = await session.execute(
         select(UserGroup.group_id).where(UserGroup.user_id == admin_id)
     )
-    candidate_group_ids = {row[0] for row in result.fetchall()}
-
-    results: List[MultiGroupMuteResult] = []
-    until_date = _calc_until(duration)
-    permissions = _build_permissions()
-
-    for group_id in candidate_group_ids:
-        try:
-            bot_member = await bot.get_chat_member(group_id, bot.id)
-            if getattr(bot_member, "status", None) not in ("administrator", "creator"):
-                continue
-            if not getattr(bot_member, "can_restrict_members", True):
-                continue
-
-            admin_member = await bot.get_chat_member(group_id, admin_id)
-            if getattr(admin_member, "status", None) not in ("administrator", "creator"):
-                continue
-
-            await bot.restrict_chat_member(
-                chat_id=group_id,
-                user_id=target_id,
-                permissions=permissions,
-                until_date=until_date,
-            )
-            results.append(MultiGroupMuteResult(chat_id=group_id, success=True))
-        except Exception as exc:
-            logger.warning(
-                "Не удалось замьютить пользователя %s в группе %s: %s",
-                target_id,
-                group_id,
-                exc,
-            )
-            results.append(
-                MultiGroupMuteResult(
-                    chat_id=group_id,
-                    success=False,
-                    reason=str(exc),
-                )
-            )
-
-    return results
+    candidate_group_ids = sorted({row[0] for row in result.fetchall()})
+
+    # Срок входит в ID: мут с другим сроком — отдельная рассылка
+    term = int(duration.total_seconds()) if duration is not None else "forever"
+    fanout_id = f"admin:{admin_id}:{target_id}:{term}"
+
+    fanout_results = await get_mute_fanout().run(
+        bot,
+        fanout_id,
+        target_id,
+        candidate_group_ids,
+        permissions=_build_permissions(),
+        until_date=_calc_until(duration),
+        admin_id=admin_id,
+        on_result=on_result,
+    )
 
+    # Пропущенные группы (нет прав у бота или админа) в результат не попадают
+    return [
+        MultiGroupMuteResult(
+            chat_id=fanout_result.chat_id,
+            success=fanout_result.muted,
+            reason=fanout_result.reason,
+        )
+        for fanout_result in fanout_results
+        if fanout_result.status != STATUS_SKIPPED
+    ]
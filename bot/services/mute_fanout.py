@@ -0,0 +1,642 @@
+# ============================================================
+# MUTE FANOUT - МУТ ПОЛЬЗОВАТЕЛЯ ВО МНОГИХ ГРУППАХ
+# ============================================================
+# Мут подтверждённого скамера во всех группах бота (автомут) и
+# кросс-групповой мут от админа (реакция 💩, /amute навсегда).
+#
+# Раньше обе функции шли по группам по одной: два get_chat_member
+# (бот и админ/пользователь) и restrict_chat_member на группу, плюс
+# у автомута bot.me(), чтение настроек и sleep(0.5) на каждую группу.
+# На 300 группах мут занимал минуты, а скамер продолжал писать.
+#
+# Теперь:
+# - права бота и админа берутся из кэша админов (AdminStatusCache):
+#   один get_chat_administrators на группу, и то только при промахе
+# - группы обрабатывает пул воркеров, запросы к API идут через общий
+#   token bucket всех рассылок мута; FloodWait ставит bucket на паузу,
+#   группа повторяется
+# - результат по каждой группе сразу передаётся в on_result (например,
+#   чтобы обновлять сообщение о ходе мута)
+# - повторный вызов с тем же ID и тем же мутом ждёт идущую рассылку;
+#   другой мут под тем же ID (например, другой срок) выполняется после неё
+# - прогресс пишется в Redis (HASH группа → статус, ключ включает хэш
+#   параметров мута — другой мут под тем же ID не берёт чужой прогресс); пока рассылка
+#   идёт, в планировщике задач (job_scheduler) висит задача
+#   продолжения. Если процесс упал, после перезапуска задача
+#   продолжает рассылку с необработанных групп
+#
+# Пример использования:
+#     results = await get_mute_fanout().run(
+#         bot, f"scammer:{user_id}", user_id, chat_ids,
+#         permissions=permissions, until_date=until_date,
+#         require_member=True,
+#     )
+# ============================================================
+
+# Импортируем asyncio для воркеров
+import asyncio
+# Импортируем hashlib для хэша параметров мута
+import hashlib
+# Импортируем json для хэша параметров мута
+import json
+# Импортируем логгер
+import logging
+# Импортируем dataclass для параметров и результатов
+from dataclasses import dataclass, field, replace
+# Импортируем datetime для срока мута
+from datetime import datetime, timezone
+# Импортируем типы для аннотаций
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+# Импортируем Bot и типы из aiogram
+from aiogram import Bot
+from aiogram.types import ChatPermissions
+# Импортируем исключения Telegram API
+from aiogram.exceptions import TelegramRetryAfter
+
+# Импортируем Redis клиент (для аннотаций)
+from redis.asyncio import Redis
+
+# Импортируем token bucket (общий лимит запросов к API)
+from bot.utils.token_bucket import TokenBucket
+# Импортируем планировщик задач для продолжения после перезапуска
+from bot.services.job_scheduler import cancel_job, register_job_handler, schedule_job
+
+
+# Создаём логгер
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# КОНСТАНТЫ
+# ============================================================
+
+# Количество воркеров одной рассылки по умолчанию
+DEFAULT_WORKERS = 8
+
+# Общий лимит запросов к API всех рассылок в секунду (Bot API ~30/с)
+DEFAULT_API_PER_SECOND = 20.0
+
+# Сколько раз повторять группу после FloodWait
+MAX_FLOOD_RETRIES = 3
+
+# HASH прогресса рассылки: chat_id → статус (digest — хэш параметров мута)
+PROGRESS_KEY = "mute_fanout:{fanout_id}:{digest}"
+
+# Время жизни прогресса незавершённой рассылки (секунды)
+PROGRESS_TTL = 3600
+
+# Через сколько секунд задача продолжения сработает, если процесс упал
+# (пока рассылка идёт, срок задачи переносится)
+RESUME_DELAY = 120
+
+# Тип задачи продолжения в планировщике
+RESUME_JOB = "mute_fanout_resume"
+
+# Статусы группы
+STATUS_MUTED = "muted"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+
+# Статусы, которые при продолжении не повторяются
+_FINAL_STATUSES = (STATUS_MUTED, STATUS_SKIPPED)
+
+# Статусы участника, который не в группе
+_NOT_MEMBER_STATUSES = ("left", "kicked")
+
+
+# ============================================================
+# СТРУКТУРЫ
+# ============================================================
+
+@dataclass(frozen=True)
+class FanoutResult:
+    """
+    Результат мута в одной группе.
+
+    Attributes:
+        chat_id: ID группы
+        status: STATUS_MUTED, STATUS_SKIPPED или STATUS_FAILED
+        reason: Причина пропуска или текст ошибки
+        resumed: Результат взят из прогресса прерванной рассылки
+    """
+    chat_id: int
+    status: str
+    reason: Optional[str] = None
+    resumed: bool = False
+
+    @property
+    def muted(self) -> bool:
+        return self.status == STATUS_MUTED
+
+
+@dataclass(frozen=True)
+class _FanoutSpec:
+    """Параметры рассылки (хранятся в задаче продолжения)."""
+    fanout_id: str
+    user_id: int
+    permissions: ChatPermissions
+    until_date: Optional[datetime]
+    admin_id: Optional[int]
+    require_member: bool
+    restriction_reason: Optional[str] = None
+
+    def same_mute(self, other: "_FanoutSpec") -> bool:
+        """
+        Тот же мут, что и other.
+
+        Точный срок не сравнивается (у «мута на 10 лет» он отличается
+        на секунды между вызовами), важно только — навсегда или до даты.
+        """
+        if (self.until_date is None) != (other.until_date is None):
+            return False
+        return replace(self, until_date=None) == replace(other, until_date=None)
+
+    @property
+    def digest(self) -> str:
+        """
+        Хэш параметров мута (без ID рассылки).
+
+        Как и в same_mute, от срока учитывается только «навсегда или до даты».
+        """
+        params = self.to_payload([])
+        del params["fanout_id"], params["chat_ids"]
+        params["until"] = params["until"] is not None
+        raw = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+    @property
+    def progress_key(self) -> str:
+        """Ключ прогресса рассылки в Redis."""
+        return PROGRESS_KEY.format(fanout_id=self.fanout_id, digest=self.digest)
+
+    def to_payload(self, chat_ids: List[int]) -> Dict[str, Any]:
+        return {
+            "fanout_id": self.fanout_id,
+            "user_id": self.user_id,
+            "chat_ids": chat_ids,
+            "permissions": self.permissions.model_dump(exclude_none=True),
+            "until": _to_timestamp(self.until_date),
+            "admin_id": self.admin_id,
+            "require_member": self.require_member,
+            "restriction_reason": self.restriction_reason,
+        }
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> "_FanoutSpec":
+        until = payload.get("until")
+        return cls(
+            fanout_id=payload["fanout_id"],
+            user_id=payload["user_id"],
+            permissions=ChatPermissions(**payload["permissions"]),
+            until_date=datetime.fromtimestamp(until, tz=timezone.utc) if until else None,
+            admin_id=payload.get("admin_id"),
+            require_member=payload.get("require_member", False),
+            restriction_reason=payload.get("restriction_reason"),
+        )
+
+
+def _to_timestamp(value: Optional[datetime]) -> Optional[float]:
+    """Срок мута в timestamp (naive datetime считается UTC)."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+# Колбэк результата группы (вызывается по мере готовности)
+ResultCallback = Callable[[FanoutResult], Awaitable[None]]
+
+
+@dataclass
+class _RunningFanout:
+    """Идущая рассылка: параметры, задача, готовые результаты и колбэки."""
+    spec: _FanoutSpec
+    results: List[FanoutResult] = field(default_factory=list)
+    listeners: List[ResultCallback] = field(default_factory=list)
+    task: Optional[asyncio.Task] = None
+
+    async def publish(self, result: FanoutResult) -> None:
+        """Запоминает результат и передаёт его колбэкам."""
+        self.results.append(result)
+        for listener in list(self.listeners):
+            await _notify(listener, result)
+
+
+async def _notify(listener: ResultCallback, result: FanoutResult) -> None:
+    """Передаёт результат колбэку (ошибка колбэка не ломает рассылку)."""
+    try:
+        await listener(result)
+    except Exception as e:
+        logger.error(f"[MuteFanout] Ошибка обработчика результата: {e}")
+
+
+class _RateLimitedBot:
+    """Бот для кэша админов: get_chat_administrators через общий лимит."""
+
+    def __init__(self, bot: Bot, bucket: TokenBucket):
+        self._bot = bot
+        self._bucket = bucket
+
+    async def get_chat_administrators(self, chat_id: int):
+        await self._bucket.acquire()
+        return await self._bot.get_chat_administrators(chat_id)
+
+
+# ============================================================
+# ИСПОЛНИТЕЛЬ
+# ============================================================
+
+class MuteFanoutExecutor:
+    """
+    Мут пользователя в списке групп: пул воркеров, общий лимит API,
+    прогресс в Redis.
+    """
+
+    def __init__(
+        self,
+        redis: Optional[Redis] = None,
+        workers: int = DEFAULT_WORKERS,
+        api_per_second: float = DEFAULT_API_PER_SECOND,
+    ):
+        """
+        Args:
+            redis: Клиент Redis для прогресса (None — без продолжения)
+            workers: Количество воркеров одной рассылки
+            api_per_second: Общий лимит запросов к API в секунду
+        """
+        self._redis = redis
+        self._workers = max(1, workers)
+        self._bucket = TokenBucket(api_per_second)
+        # fanout_id → идущая рассылка (повторный вызов ждёт её)
+        self._running: Dict[str, _RunningFanout] = {}
+
+        # Статистика
+        self.metrics = {'muted': 0, 'skipped': 0, 'failed': 0, 'flood_waits': 0, 'resumed': 0}
+
+    async def run(
+        self,
+        bot: Bot,
+        fanout_id: str,
+        user_id: int,
+        chat_ids: Iterable[int],
+        permissions: ChatPermissions,
+        until_date: Optional[datetime] = None,
+        admin_id: Optional[int] = None,
+        require_member: bool = False,
+        restriction_reason: Optional[str] = None,
+        on_result: Optional[ResultCallback] = None,
+    ) -> List[FanoutResult]:
+        """
+        Мутит пользователя во всех группах списка.
+
+        Группа пропускается, если бот в ней не админ с правом
+        ограничивать, admin_id (если задан) в ней не админ или
+        пользователь не участник (require_member).
+
+        Args:
+            bot: Экземпляр бота
+            fanout_id: ID рассылки (прогресс и задача продолжения)
+            user_id: Кого мутить
+            chat_ids: Группы
+            permissions: Права на время мута
+            until_date: Срок мута (None — навсегда)
+            admin_id: Админ, от имени которого мут
+            require_member: Мутить только там, где пользователь участник
+            restriction_reason: Сохранить муты в user_restrictions с этой
+                причиной (для восстановления после повторного входа)
+            on_result: Вызывается с результатом каждой группы по готовности
+                (при присоединении к идущей рассылке — и с уже готовыми)
+
+        Returns:
+            Результаты по всем группам
+        """
+        spec = _FanoutSpec(
+            fanout_id, user_id, permissions, until_date,
+            admin_id, require_member, restriction_reason,
+        )
+        chat_ids = list(dict.fromkeys(chat_ids))
+
+        while fanout_id in self._running:
+            running = self._running[fanout_id]
+            if running.spec.same_mute(spec):
+                # Та же рассылка уже идёт (например, скамер вошёл в две группы подряд)
+                if on_result is not None:
+                    for result in list(running.results):
+                        await _notify(on_result, result)
+                    running.listeners.append(on_result)
+                return await asyncio.shield(running.task)
+            # Под тем же ID идёт другой мут — наш выполняется после него,
+            # иначе вызывающий получил бы чужие параметры (например, срок)
+            logger.info(f"[MuteFanout] {fanout_id}: ждём окончания рассылки с другими параметрами")
+            await asyncio.wait([running.task])
+
+        return await asyncio.shield(self._start(bot, spec, chat_ids, on_result))
+
+    def _start(
+        self,
+        bot: Bot,
+        spec: _FanoutSpec,
+        chat_ids: List[int],
+        on_result: Optional[ResultCallback] = None,
+    ) -> asyncio.Task:
+        """Запускает рассылку в фоне и запоминает её как идущую."""
+        running = _RunningFanout(spec, listeners=[on_result] if on_result is not None else [])
+        task = asyncio.create_task(self._run(bot, running, chat_ids))
+        running.task = task
+        self._running[spec.fanout_id] = running
+
+        def _forget(_: asyncio.Task) -> None:
+            current = self._running.get(spec.fanout_id)
+            if current is not None and current.task is task:
+                del self._running[spec.fanout_id]
+
+        task.add_done_callback(_forget)
+        return task
+
+    def is_running(self, fanout_id: str) -> bool:
+        """Идёт ли рассылка в этом процессе."""
+        return fanout_id in self._running
+
+    async def _run(
+        self,
+        bot: Bot,
+        running: _RunningFanout,
+        chat_ids: List[int],
+    ) -> List[FanoutResult]:
+        """Выполняет рассылку до конца."""
+        spec = running.spec
+        results = running.results
+        done = await self._load_progress(spec)
+        todo = []
+        for chat_id in chat_ids:
+            status = done.get(chat_id)
+            if status in _FINAL_STATUSES:
+                await running.publish(FanoutResult(chat_id, status, resumed=True))
+            else:
+                todo.append(chat_id)
+        self.metrics['resumed'] += len(results)
+
+        if results:
+            logger.info(
+                f"[MuteFanout] {spec.fanout_id}: продолжение, уже обработано {len(results)} групп"
+            )
+
+        if not todo:
+            await self._save_restrictions(bot, spec, results)
+            await self._finish(spec)
+            return list(results)
+
+        await self._schedule_resume(bot, spec, chat_ids)
+        rights_bot = _RateLimitedBot(bot, self._bucket)
+        queue: asyncio.Queue = asyncio.Queue()
+        for chat_id in todo:
+            queue.put_nowait(chat_id)
+
+        async def worker() -> None:
+            while True:
+                try:
+                    chat_id = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                result = await self._process_group(bot, rights_bot, spec, chat_id)
+                self.metrics[result.status] += 1
+                await self._save_progress(spec, result)
+                await running.publish(result)
+
+        heartbeat = asyncio.create_task(self._heartbeat(bot, spec, chat_ids))
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(self._workers, len(todo)))))
+        finally:
+            heartbeat.cancel()
+
+        await self._save_restrictions(bot, spec, results)
+        await self._finish(spec)
+        muted = sum(1 for result in results if result.muted)
+        logger.info(
+            f"[MuteFanout] {spec.fanout_id}: замучен в {muted} из {len(chat_ids)} групп"
+        )
+        return list(results)
+
+    # ─────────────────────────────────────────────────────────
+    # Одна группа
+    # ─────────────────────────────────────────────────────────
+
+    async def _process_group(
+        self,
+        bot: Bot,
+        rights_bot: _RateLimitedBot,
+        spec: _FanoutSpec,
+        chat_id: int,
+    ) -> FanoutResult:
+        """Проверяет права и мутит пользователя в группе."""
+        for attempt in range(MAX_FLOOD_RETRIES + 1):
+            try:
+                return await self._mute_in_group(bot, rights_bot, spec, chat_id)
+            except TelegramRetryAfter as e:
+                # FloodWait: все рассылки ждут, группа повторяется
+                self.metrics['flood_waits'] += 1
+                logger.warning(f"[MuteFanout] FloodWait {e.retry_after}с в группе {chat_id}")
+                self._bucket.pause(e.retry_after)
+            except Exception as e:
+                logger.warning(
+                    f"[MuteFanout] Не удалось замутить {spec.user_id} в группе {chat_id}: {e}"
+                )
+                return FanoutResult(chat_id, STATUS_FAILED, reason=str(e))
+        return FanoutResult(chat_id, STATUS_FAILED, reason="flood_wait")
+
+    async def _mute_in_group(
+        self,
+        bot: Bot,
+        rights_bot: _RateLimitedBot,
+        spec: _FanoutSpec,
+        chat_id: int,
+    ) -> FanoutResult:
+        """
+        Одна попытка мута в группе.
+
+        TelegramRetryAfter пробрасывается для повтора.
+        """
+        # Lazy import: кэш использует глобальный Redis
+        from bot.services.admin_status_cache import get_admin_status_cache
+
+        # FloodWait при загрузке списка админов — повтор группы в _process_group
+        rights = await get_admin_status_cache().get_admin_rights(
+            rights_bot, chat_id, raise_retry_after=True
+        )
+        if rights is None:
+            return FanoutResult(chat_id, STATUS_FAILED, reason="admins_unavailable")
+
+        bot_rights = rights.get(bot.id)
+        if bot_rights is None or not bot_rights.has('can_restrict_members'):
+            return FanoutResult(chat_id, STATUS_SKIPPED, reason="bot_not_admin")
+        if spec.admin_id is not None and spec.admin_id not in rights:
+            return FanoutResult(chat_id, STATUS_SKIPPED, reason="not_admin")
+
+        if spec.require_member:
+            # Пользователя нет в группе — заранее не мутим
+            await self._bucket.acquire()
+            try:
+                member = await bot.get_chat_member(chat_id, spec.user_id)
+            except TelegramRetryAfter:
+                raise
+            except Exception:
+                return FanoutResult(chat_id, STATUS_SKIPPED, reason="not_member")
+            if member.status in _NOT_MEMBER_STATUSES:
+                return FanoutResult(chat_id, STATUS_SKIPPED, reason="not_member")
+
+        await self._bucket.acquire()
+        await bot.restrict_chat_member(
+            chat_id=chat_id,
+            user_id=spec.user_id,
+            permissions=spec.permissions,
+            until_date=spec.until_date,
+        )
+        logger.info(f"[MuteFanout] {spec.fanout_id}: замучен в группе {chat_id}")
+        return FanoutResult(chat_id, STATUS_MUTED)
+
+    async def _save_restrictions(
+        self,
+        bot: Bot,
+        spec: _FanoutSpec,
+        results: List[FanoutResult],
+    ) -> None:
+        """Сохраняет муты в БД одной сессией (после всех запросов к API)."""
+        muted = [result.chat_id for result in results if result.muted]
+        if spec.restriction_reason is None or not muted:
+            return
+
+        # Lazy import: сессия БД нужна только при сохранении
+        from bot.database.session import get_session
+        from bot.services.restriction_service import save_restriction
+
+        try:
+            async with get_session() as session:
+                for chat_id in muted:
+                    await save_restriction(
+                        session=session,
+                        chat_id=chat_id,
+                        user_id=spec.user_id,
+                        restriction_type="mute",
+                        reason=spec.restriction_reason,
+                        restricted_by=bot.id,
+                        until_date=spec.until_date,
+                    )
+        except Exception as e:
+            logger.error(f"[MuteFanout] Ошибка сохранения мутов {spec.fanout_id}: {e}")
+
+    # ─────────────────────────────────────────────────────────
+    # Прогресс и продолжение
+    # ─────────────────────────────────────────────────────────
+
+    async def _load_progress(self, spec: _FanoutSpec) -> Dict[int, str]:
+        """Статусы групп прерванной рассылки с теми же параметрами мута."""
+        if self._redis is None:
+            return {}
+        try:
+            raw = await self._redis.hgetall(spec.progress_key)
+        except Exception as e:
+            logger.warning(f"[MuteFanout] Ошибка чтения прогресса {spec.fanout_id}: {e}")
+            return {}
+        return {
+            int(chat_id): status.decode() if isinstance(status, bytes) else status
+            for chat_id, status in raw.items()
+        }
+
+    async def _save_progress(self, spec: _FanoutSpec, result: FanoutResult) -> None:
+        """Запоминает статус группы."""
+        if self._redis is None:
+            return
+        key = spec.progress_key
+        try:
+            pipe = self._redis.pipeline()
+            pipe.hset(key, str(result.chat_id), result.status)
+            pipe.expire(key, PROGRESS_TTL)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"[MuteFanout] Ошибка записи прогресса {spec.fanout_id}: {e}")
+
+    async def _schedule_resume(self, bot: Bot, spec: _FanoutSpec, chat_ids: List[int]) -> None:
+        """Планирует (или переносит) задачу продолжения."""
+        if self._redis is None:
+            return
+        try:
+            await schedule_job(
+                bot,
+                RESUME_JOB,
+                spec.to_payload(chat_ids),
+                RESUME_DELAY,
+                job_id=f"{RESUME_JOB}:{spec.fanout_id}",
+            )
+        except Exception as e:
+            logger.warning(f"[MuteFanout] Не удалось запланировать продолжение {spec.fanout_id}: {e}")
+
+    async def _heartbeat(self, bot: Bot, spec: _FanoutSpec, chat_ids: List[int]) -> None:
+        """Переносит задачу продолжения, пока рассылка идёт."""
+        while True:
+            await asyncio.sleep(RESUME_DELAY / 2)
+            await self._schedule_resume(bot, spec, chat_ids)
+
+    async def _finish(self, spec: _FanoutSpec) -> None:
+        """Рассылка завершена: отменяет продолжение и удаляет прогресс."""
+        if self._redis is None:
+            return
+        try:
+            await cancel_job(f"{RESUME_JOB}:{spec.fanout_id}")
+            await self._redis.delete(spec.progress_key)
+        except Exception as e:
+            logger.warning(f"[MuteFanout] Ошибка завершения рассылки {spec.fanout_id}: {e}")
+
+    async def resume(self, bot: Bot, payload: Dict[str, Any]) -> None:
+        """
+        Продолжает прерванную рассылку (задача планировщика).
+
+        Рассылка запускается в фоне, чтобы не упираться в таймаут
+        обработчика задачи; пока она идёт, задача переносится.
+        """
+        spec = _FanoutSpec.from_payload(payload)
+        if self.is_running(spec.fanout_id):
+            await self._schedule_resume(bot, spec, payload["chat_ids"])
+            return
+
+        logger.info(f"[MuteFanout] Продолжение прерванной рассылки {spec.fanout_id}")
+        self._start(bot, spec, payload["chat_ids"])
+        # Пока рассылка не закончилась, задача продолжения не должна пропасть
+        await self._schedule_resume(bot, spec, payload["chat_ids"])
+
+
+# ============================================================
+# ГЛОБАЛЬНЫЙ ЭКЗЕМПЛЯР (СИНГЛТОН)
+# ============================================================
+
+_mute_fanout: Optional[MuteFanoutExecutor] = None
+
+
+def get_mute_fanout() -> MuteFanoutExecutor:
+    """
+    Возвращает глобальный MuteFanoutExecutor (синглтон).
+
+    Returns:
+        Экземпляр MuteFanoutExecutor
+    """
+    global _mute_fanout
+    if _mute_fanout is None:
+        # Lazy import: общий Redis и лимиты из конфига
+        from bot.services.redis_conn import redis
+        from bot.config import MUTE_FANOUT_WORKERS, MUTE_FANOUT_API_PER_SECOND
+
+        _mute_fanout = MuteFanoutExecutor(
+            redis=redis,
+            workers=MUTE_FANOUT_WORKERS,
+            api_per_second=MUTE_FANOUT_API_PER_SECOND,
+        )
+    return _mute_fanout
+
+
+async def _resume_job(bot: Bot, payload: Dict[str, Any]) -> None:
+    """Задача планировщика: продолжение прерванной рассылки."""
+    await get_mute_fanout().resume(bot, payload)
+
+
+register_job_handler(RESUME_JOB, _resume_job)
@@ -0,0 +1,226 @@
+# ============================================================
+# PROFILE INFO CACHE - КЭШ ДАННЫХ ПРОФИЛЯ ИЗ MTPROTO
+# ============================================================
+# Фото профиля и возраст аккаунта через Pyrogram — это запросы
+# к MTProto (get_users, get_chat_photos с полной пагинацией).
+#
+# Раньше PyrogramService хранил фото в обычном dict на 100 записей
+# (чистка полным проходом, при перезапуске всё терялось), а возраст
+# аккаунта не кэшировался вовсе. При волне вступлений
+# EnhancedProfileAnalyzer и profile_monitor одновременно запрашивали
+# одного и того же пользователя.
+#
+# Теперь:
+# - память процесса: LRU (OrderedDict) с TTL и ограничением размера
+# - второй уровень — Redis (JSON), переживает перезапуск
+# - одновременные запросы одного user_id ждут одну загрузку
+#   (single-flight), а не делают каждый свой запрос к MTProto
+# - загрузчик может вернуть None (ошибка) или выбросить исключение
+#   (его получат все ожидающие) — такой результат не кэшируется
+#
+# Пример использования:
+#     cache = ProfileInfoCache("photos", redis, ttl=60, encode=..., decode=...)
+#     value = await cache.get_or_load(user_id, lambda: load(user_id))
+# ============================================================
+
+# Импортируем asyncio для объединения одновременных загрузок
+import asyncio
+# Импортируем json для хранения в Redis
+import json
+# Импортируем логгер
+import logging
+# Импортируем time для TTL в памяти
+import time
+# Импортируем OrderedDict для LRU
+from collections import OrderedDict
+# Импортируем типы для аннотаций
+from typing import Any, Awaitable, Callable, Dict, Generic, Optional, Tuple, TypeVar
+
+# Импортируем Redis для второго уровня кэша
+from redis.asyncio import Redis
+
+
+# Создаём логгер
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# КОНСТАНТЫ
+# ============================================================
+
+# Максимум записей в памяти процесса по умолчанию
+DEFAULT_MAX_ENTRIES = 10000
+
+# Ключ Redis: profile_info:{namespace}:{user_id} → JSON
+REDIS_KEY = "profile_info:{namespace}:{user_id}"
+
+# Тип кэшируемого значения
+T = TypeVar("T")
+
+
+# ============================================================
+# КЭШ
+# ============================================================
+
+class ProfileInfoCache(Generic[T]):
+    """
+    Двухуровневый LRU+TTL кэш (память + Redis) по user_id
+    с объединением одновременных загрузок.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        redis: Optional[Redis] = None,
+        ttl: float = 60,
+        redis_ttl: Optional[int] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        encode: Callable[[T], Any] = lambda value: value,
+        decode: Callable[[Any], T] = lambda raw: raw,
+    ):
+        """
+        Args:
+            namespace: Часть ключа Redis (разные данные — разные ключи)
+            redis: Клиент Redis (None = только память процесса)
+            ttl: TTL в памяти (секунды)
+            redis_ttl: TTL в Redis (секунды, по умолчанию как в памяти)
+            max_entries: Максимум записей в памяти (старые вытесняются)
+            encode: Значение → JSON-сериализуемый объект
+            decode: Обратное преобразование
+        """
+        self._namespace = namespace
+        self._redis = redis
+        self._ttl = ttl
+        self._redis_ttl = int(redis_ttl if redis_ttl is not None else ttl)
+        self._max_entries = max_entries
+        self._encode = encode
+        self._decode = decode
+
+        # user_id → (время истечения, значение); порядок — от давно использованных
+        self._entries: "OrderedDict[int, Tuple[float, T]]" = OrderedDict()
+        # user_id → идущая загрузка (её ждут все одновременные запросы)
+        self._inflight: Dict[int, asyncio.Task] = {}
+
+        # Статистика
+        self.metrics = {'hits': 0, 'redis_hits': 0, 'loads': 0, 'coalesced': 0, 'evicted': 0}
+
+    # ─────────────────────────────────────────────────────────
+    # Чтение
+    # ─────────────────────────────────────────────────────────
+
+    async def get_or_load(
+        self,
+        user_id: int,
+        loader: Callable[[], Awaitable[Optional[T]]],
+    ) -> Optional[T]:
+        """
+        Возвращает значение из кэша или загружает его.
+
+        Память → Redis → loader. Пока идёт загрузка, остальные
+        запросы того же user_id ждут её результат.
+
+        Args:
+            user_id: ID пользователя
+            loader: Загрузка значения (None или исключение — не кэшировать)
+
+        Returns:
+            Значение или None
+        """
+        cached = self._get_from_memory(user_id)
+        if cached is not None:
+            self.metrics['hits'] += 1
+            return cached
+
+        task = self._inflight.get(user_id)
+        if task is not None:
+            self.metrics['coalesced'] += 1
+            return await asyncio.shield(task)
+
+        task = asyncio.create_task(self._load(user_id, loader))
+        self._inflight[user_id] = task
+        task.add_done_callback(lambda _: self._inflight.pop(user_id, None))
+        return await asyncio.shield(task)
+
+    async def _load(
+        self,
+        user_id: int,
+        loader: Callable[[], Awaitable[Optional[T]]],
+    ) -> Optional[T]:
+        """Redis → loader; результат кладётся в оба уровня."""
+        cached = await self._get_from_redis(user_id)
+        if cached is not None:
+            self.metrics['redis_hits'] += 1
+            self._set_memory(user_id, cached)
+            return cached
+
+        self.metrics['loads'] += 1
+        value = await loader()
+        if value is not None:
+            await self.set(user_id, value)
+        return value
+
+    def _get_from_memory(self, user_id: int) -> Optional[T]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return value
+
+    async def _get_from_redis(self, user_id: int) -> Optional[T]:
+        if self._redis is None:
+            return None
+        try:
+            raw = await self._redis.get(self._key(user_id))
+            if raw is None:
+                return None
+            return self._decode(json.loads(raw))
+        except Exception as e:
+            logger.debug(f"[ProfileInfoCache] Ошибка чтения {self._namespace}:{user_id} из Redis: {e}")
+            return None
+
+    # ─────────────────────────────────────────────────────────
+    # Запись и инвалидация
+    # ─────────────────────────────────────────────────────────
+
+    async def set(self, user_id: int, value: T) -> None:
+        """Кладёт значение в память и Redis."""
+        self._set_memory(user_id, value)
+        if self._redis is None:
+            return
+        try:
+            await self._redis.setex(
+                self._key(user_id), self._redis_ttl, json.dumps(self._encode(value))
+            )
+        except Exception as e:
+            logger.debug(f"[ProfileInfoCache] Ошибка записи {self._namespace}:{user_id} в Redis: {e}")
+
+    def _set_memory(self, user_id: int, value: T) -> None:
+        self._entries[user_id] = (time.monotonic() + self._ttl, value)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.metrics['evicted'] += 1
+
+    async def invalidate(self, user_id: int) -> None:
+        """Удаляет значение из памяти и Redis."""
+        self._entries.pop(user_id, None)
+        if self._redis is None:
+            return
+        try:
+            await self._redis.delete(self._key(user_id))
+        except Exception as e:
+            logger.debug(f"[ProfileInfoCache] Ошибка удаления {self._namespace}:{user_id} из Redis: {e}")
+
+    def clear(self) -> None:
+        """Очищает память процесса (Redis не трогает)."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _key(self, user_id: int) -> str:
+        return REDIS_KEY.format(namespace=self._namespace, user_id=user_id)
@@ -15,6 +15,7 @@
 
 from bot.services.profile_monitor.profile_monitor_service import (
     get_profile_monitor_settings,
+    get_cached_profile_monitor_settings,
     create_or_update_settings,
     create_profile_snapshot,
     create_snapshot_on_join,
@@ -31,6 +32,7 @@ from bot.services.profile_monitor.profile_monitor_service import (
 
 __all__ = [
     'get_profile_monitor_settings',
+    'get_cached_profile_monitor_settings',
     'create_or_update_settings',
     'create_profile_snapshot',
     'create_snapshot_on_join',
@@ -32,10 +32,15 @@ from bot.services.pyrogram_client import pyrogram_service
 from bot.services.restriction_service import save_restriction
 from bot.services.group_journal_service import send_journal_event
 from bot.services.redis_conn import redis
+from bot.services.message_deletion import delete_messages
+from bot.services.settings_cache import get_settings_cache, register_cached_model
 
 # Логгер для модуля
 logger = logging.getLogger(__name__)
 
+# Изменения настроек сбрасывают кэш настроек (settings_cache)
+register_cached_model(ProfileMonitorSettings, 'profile_monitor')
+
 # Redis ключ для хранения message_id пользователей
 # Формат: user_messages:{chat_id}:{user_id} -> список message_id
 USER_MESSAGES_KEY_PREFIX = "user_messages"
@@ -134,6 +139,27 @@ async def get_profile_monitor_settings(
     return result.scalar_one_or_none()
 
 
+async def get_cached_profile_monitor_settings(
+    session: AsyncSession,
+    chat_id: int,
+) -> Optional[ProfileMonitorSettings]:
+    """
+    Получает настройки мониторинга через кэш настроек (путь сообщений).
+
+    Возвращает отсоединённую копию — только для чтения.
+
+    Args:
+        session: AsyncSession для работы с БД
+        chat_id: ID группы
+
+    Returns:
+        ProfileMonitorSettings или None если не настроено
+    """
+    return await get_settings_cache().get_or_load(
+        'profile_monitor', chat_id, lambda: get_profile_monitor_settings(session, chat_id)
+    )
+
+
 async def create_or_update_settings(
     session: AsyncSession,
     chat_id: int,
@@ -942,19 +968,8 @@ async def delete_user_messages(
         # Ограничиваем количество
         message_ids = message_ids[-limit:]
 
-        for message_id in message_ids:
-            try:
-                await bot.delete_message(
-                    chat_id=chat_id,
-                    message_id=message_id,
-                )
-                deleted_count += 1
-            except Exception as e:
-                # Пропускаем ошибки удаления отдельных сообщений
-                # (сообщение могло быть уже удалено)
-                logger.debug(
-                    f"[PROFILE_MONITOR] Failed to delete message {message_id}: {e}"
-                )
+        # Одна пачка deleteMessages вместо запроса на каждое сообщение
+        deleted_count = await delete_messages(bot, chat_id, message_ids)
 
         # Очищаем трекер после удаления
         await clear_tracked_messages(chat_id, user_id)
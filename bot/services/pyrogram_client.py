@@ -18,6 +18,12 @@ PYROGRAM CLIENT - СЕРВИС ДЛЯ ПОЛУЧЕНИЯ РАСШИРЕННОЙ
    - Детальная информация о пользователе
    - История изменений профиля
 
+Фото и возраст аккаунта кэшируются (ProfileInfoCache: LRU+TTL в памяти,
+Redis вторым уровнем, одна загрузка на одновременные запросы одного
+пользователя). Запросы к MTProto идут через token bucket: если токен
+не получить за MTPROTO_MAX_WAIT_SECONDS или пришёл FloodWait, проверка
+возвращает пустой результат (как при недоступном Pyrogram), а не ждёт.
+
 ВАЖНО: Pyrogram требует API_ID и API_HASH из https://my.telegram.org
 """
 
@@ -26,15 +32,37 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone, timedelta
 from pyrogram import Client
 from pyrogram.errors import FloodWait, PeerIdInvalid, UserIdInvalid
-import asyncio
 
 # Импортируем настройки из конфига
-from bot.config import PYROGRAM_API_ID, PYROGRAM_API_HASH, PYROGRAM_SESSION_NAME, BOT_TOKEN
+from bot.config import (
+    PYROGRAM_API_ID,
+    PYROGRAM_API_HASH,
+    PYROGRAM_SESSION_NAME,
+    PYROGRAM_REQUESTS_PER_SECOND,
+    BOT_TOKEN,
+)
+from bot.services.profile_info_cache import ProfileInfoCache
+from bot.services.redis_conn import redis
+from bot.utils.token_bucket import TokenBucket
 
 # Настройка логгера для этого модуля
 logger = logging.getLogger(__name__)
 
 
+class MtprotoRateLimited(Exception):
+    """Запрос к MTProto не сделан: лимит исчерпан или идёт FloodWait (не кэшируется)."""
+
+
+def _encode_photos(photos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Фото профиля → JSON для Redis."""
+    return [dict(photo, date=photo['date'].isoformat()) for photo in photos]
+
+
+def _decode_photos(raw: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """JSON из Redis → фото профиля."""
+    return [dict(photo, date=datetime.fromisoformat(photo['date'])) for photo in raw]
+
+
 class PyrogramService:
     """
     Сервис для работы с Pyrogram (MTProto API)
@@ -43,9 +71,19 @@ class PyrogramService:
     о пользователях Telegram через MTProto API.
     """
 
-    # TTL кэша в секундах (60 секунд - достаточно для обработки одного сообщения)
+    # TTL кэша фото в секундах (60 секунд - достаточно для обработки одного сообщения,
+    # profile_monitor замечает смену фото не позже чем через TTL)
     CACHE_TTL_SECONDS = 60
 
+    # TTL кэша даты создания аккаунта (самое старое фото меняется редко)
+    ACCOUNT_AGE_TTL_SECONDS = 3600
+
+    # Максимум пользователей в каждом кэше в памяти процесса
+    CACHE_MAX_ENTRIES = 10000
+
+    # Сколько ждать токен лимита MTProto, прежде чем обойтись без запроса
+    MTPROTO_MAX_WAIT_SECONDS = 2.0
+
     def __init__(self):
         """
         Инициализация Pyrogram клиента
@@ -55,9 +93,29 @@ class PyrogramService:
         """
         self.client: Optional[Client] = None  # Клиент Pyrogram (будет инициализирован при старте)
         self._initialized = False  # Флаг инициализации (чтобы не инициализировать дважды)
-        # Кэш для результатов get_profile_photos_dates
-        # Формат: {user_id: {'data': [...], 'timestamp': datetime}}
-        self._photo_cache: Dict[int, Dict[str, Any]] = {}
+        # Кэш фото профиля: [{'date', 'file_id', 'file_unique_id'}, ...]
+        # (age_days считается при выдаче)
+        self._photo_cache: ProfileInfoCache[List[Dict[str, Any]]] = ProfileInfoCache(
+            "photos",
+            redis=redis,
+            ttl=self.CACHE_TTL_SECONDS,
+            max_entries=self.CACHE_MAX_ENTRIES,
+            encode=_encode_photos,
+            decode=_decode_photos,
+        )
+        # Кэш даты создания аккаунта (для get_account_age)
+        self._age_cache: ProfileInfoCache[datetime] = ProfileInfoCache(
+            "account_age",
+            redis=redis,
+            ttl=self.ACCOUNT_AGE_TTL_SECONDS,
+            max_entries=self.CACHE_MAX_ENTRIES,
+            encode=lambda value: value.isoformat(),
+            decode=datetime.fromisoformat,
+        )
+        # Лимит запросов к MTProto (FloodWait ставит его на паузу)
+        self._limiter = TokenBucket(PYROGRAM_REQUESTS_PER_SECOND)
+        # Статистика: сколько проверок обошлись без MTProto из-за лимита
+        self.metrics = {'degraded': 0, 'flood_waits': 0}
 
     async def initialize(self):
         """
@@ -137,29 +195,32 @@ class PyrogramService:
         logger.debug(f"🔍 [PYROGRAM] is_available() результат: {result}")
         return result
 
-    def _is_cache_valid(self, user_id: int) -> bool:
-        """Проверяет, валиден ли кэш для пользователя"""
-        if user_id not in self._photo_cache:
-            return False
-        cache_entry = self._photo_cache[user_id]
-        age = (datetime.now(timezone.utc) - cache_entry['timestamp']).total_seconds()
-        return age < self.CACHE_TTL_SECONDS
+    async def invalidate_cache(self, user_id: int):
+        """Принудительно инвалидирует кэш фото и возраста для пользователя"""
+        await self._photo_cache.invalidate(user_id)
+        await self._age_cache.invalidate(user_id)
+        logger.debug(f"🗑️ Кэш фото инвалидирован для user_id={user_id}")
 
-    def _cleanup_cache(self):
-        """Удаляет устаревшие записи из кэша"""
-        now = datetime.now(timezone.utc)
-        expired_keys = [
-            user_id for user_id, entry in self._photo_cache.items()
-            if (now - entry['timestamp']).total_seconds() >= self.CACHE_TTL_SECONDS
-        ]
-        for key in expired_keys:
-            del self._photo_cache[key]
-
-    def invalidate_cache(self, user_id: int):
-        """Принудительно инвалидирует кэш для пользователя"""
-        if user_id in self._photo_cache:
-            del self._photo_cache[user_id]
-            logger.debug(f"🗑️ Кэш фото инвалидирован для user_id={user_id}")
+    async def _acquire_mtproto(self):
+        """
+        Берёт токен лимита MTProto (один токен на одну проверку).
+
+        Raises:
+            MtprotoRateLimited: токен не получить за MTPROTO_MAX_WAIT_SECONDS
+                (лимит исчерпан или идёт FloodWait) — запрос не делаем
+        """
+        if await self._limiter.try_acquire(self.MTPROTO_MAX_WAIT_SECONDS):
+            return
+        self.metrics['degraded'] += 1
+        logger.warning("⚠️ [PYROGRAM] Лимит запросов MTProto исчерпан, проверка без MTProto")
+        raise MtprotoRateLimited()
+
+    def _on_flood_wait(self, e: FloodWait) -> MtprotoRateLimited:
+        """FloodWait: запросы к MTProto приостанавливаются на указанное время."""
+        self.metrics['flood_waits'] += 1
+        self._limiter.pause(e.value)
+        logger.warning(f"⚠️ FloodWait: запросы к MTProto приостановлены на {e.value} секунд")
+        return MtprotoRateLimited()
 
     async def get_profile_photos_dates(self, user_id: int) -> List[Dict[str, Any]]:
         """
@@ -168,8 +229,8 @@ class PyrogramService:
         Эта функция получает ВСЕ фото из профиля пользователя и их даты загрузки.
         Это недоступно через Bot API и возможно только через MTProto.
 
-        ОПТИМИЗАЦИЯ: Результаты кэшируются на 60 секунд для избежания
-        множественных запросов к Telegram API при обработке одного сообщения.
+        ОПТИМИЗАЦИЯ: Результаты кэшируются на CACHE_TTL_SECONDS (память + Redis),
+        одновременные запросы одного пользователя ждут одну загрузку.
 
         Args:
             user_id: ID пользователя Telegram
@@ -186,32 +247,60 @@ class PyrogramService:
             ]
 
         ЛОГИКА:
-        1. Проверяем кэш - если есть свежие данные, возвращаем их
-        2. Проверяем доступность клиента
-        3. Получаем ВСЕ фото профиля через get_chat_photos()
-        4. Для каждого фото извлекаем дату загрузки
-        5. Вычисляем возраст фото в днях
-        6. Сохраняем в кэш и возвращаем список
+        1. Проверяем кэш (память → Redis) - если есть свежие данные, берём их
+        2. Иначе загружаем через get_chat_photos() (с учётом лимита MTProto)
+        3. Вычисляем возраст каждого фото в днях
         """
-        # ─────────────────────────────────────────────────────────
-        # ПРОВЕРКА КЭША
-        # ─────────────────────────────────────────────────────────
-        if self._is_cache_valid(user_id):
-            logger.debug(f"📸 [CACHE HIT] Возвращаем кэшированные фото для user_id={user_id}")
-            return self._photo_cache[user_id]['data']
+        try:
+            photos = await self._photo_cache.get_or_load(user_id, lambda: self._load_photos(user_id))
+        except MtprotoRateLimited:
+            return []
+        if photos is None:
+            return []
+
+        result = []
+        now = datetime.now(timezone.utc)
+        for photo in photos:
+            # Вычисляем возраст фото в днях
+            # (текущее время - дата фото).days - разница в днях
+            age_days = (now - photo['date']).days
+
+            # Защита от отрицательных значений (ошибки таймзоны/серверного времени)
+            if age_days < 0:
+                logger.warning(
+                    f"⚠️ Обнаружен отрицательный возраст фото (age_days={age_days}) для пользователя {user_id}, "
+                    f"photo_date={photo['date'].isoformat()}. Принудительно устанавливаем 0."
+                )
+                age_days = 0
+
+            result.append(dict(photo, age_days=age_days))
+        return result
+
+    async def _load_photos(self, user_id: int, acquire: bool = True) -> Optional[List[Dict[str, Any]]]:
+        """
+        Загружает фото профиля через MTProto.
+
+        Args:
+            user_id: ID пользователя
+            acquire: Брать токен лимита (False — токен уже взят вызывающим)
 
-        # Периодически чистим устаревшие записи
-        if len(self._photo_cache) > 100:
-            self._cleanup_cache()
+        Returns:
+            Список фото (пустой — фото нет) или None, если загрузить
+            не удалось (такой результат не кэшируется)
 
+        Raises:
+            MtprotoRateLimited: запрос не сделан из-за лимита или FloodWait
+        """
         # Проверяем, инициализирован ли клиент
         if not self.is_available():
             logger.warning("⚠️ Pyrogram клиент недоступен, не могу получить даты фото")
-            return []
+            return None
+
+        if acquire:
+            await self._acquire_mtproto()
 
         try:
             # Получаем ВСЕ фото профиля пользователя
-            # limit=0 означает "получить все фото"
             photos = []
             async for photo in self.client.get_chat_photos(user_id):
                 # photo.date - это datetime объект с датой загрузки фото
@@ -222,65 +311,33 @@ class PyrogramService:
                 if photo_date.tzinfo is None:
                     photo_date = photo_date.replace(tzinfo=timezone.utc)
 
-                # Вычисляем возраст фото в днях
-                # datetime.now(timezone.utc) - текущее время в UTC
-                # (текущее время - дата фото).days - разница в днях
-                age_days = (datetime.now(timezone.utc) - photo_date).days
-
-                # Защита от отрицательных значений (ошибки таймзоны/серверного времени)
-                if age_days < 0:
-                    logger.warning(
-                        f"⚠️ Обнаружен отрицательный возраст фото (age_days={age_days}) для пользователя {user_id}, "
-                        f"photo_date={photo_date.isoformat()}. Принудительно устанавливаем 0."
-                    )
-                    age_days = 0
-
-                # Добавляем информацию о фото в список
                 photos.append({
                     'date': photo_date,  # Дата загрузки фото
-                    'age_days': age_days,  # Возраст фото в днях
                     'file_id': photo.file_id,  # ID файла фото (нестабильный)
                     'file_unique_id': photo.file_unique_id  # Уникальный ID (стабильный, для сравнения)
                 })
 
-            # ─────────────────────────────────────────────────────────
-            # СОХРАНЕНИЕ В КЭШ
-            # ─────────────────────────────────────────────────────────
-            self._photo_cache[user_id] = {
-                'data': photos,
-                'timestamp': datetime.now(timezone.utc)
-            }
-
             logger.info(f"📸 [API] Получено {len(photos)} фото профиля для пользователя {user_id}")
 
             # Выводим информацию о каждом фото в лог
             for i, photo_info in enumerate(photos, 1):
-                logger.info(f"   📸 Фото #{i}: загружено {photo_info['date'].strftime('%Y-%m-%d')} ({photo_info['age_days']} дней назад)")
+                logger.info(f"   📸 Фото #{i}: загружено {photo_info['date'].strftime('%Y-%m-%d')}")
 
             return photos
 
         except (UserIdInvalid, PeerIdInvalid) as e:
             # Пользователь не найден в Telegram или некорректный ID
             logger.warning(f"⚠️ Пользователь {user_id} не найден или некорректный ID: {e}")
-            return []
+            return None
 
         except FloodWait as e:
-            # Telegram просит подождать из-за лимита запросов
-            logger.warning(f"⚠️ FloodWait: нужно подождать {e.value} секунд")
-            # Ждём указанное время
-            await asyncio.sleep(e.value)
-            # Повторяем запрос (кэш уже проверили выше, так что это реальный retry)
-            return await self.get_profile_photos_dates(user_id)
-
-        except PeerIdInvalid:
-            # Некорректный ID пользователя
-            logger.warning(f"⚠️ Некорректный ID пользователя: {user_id}")
-            return []
+            # Не ждём: проверка обходится без фото, лимит на паузе
+            raise self._on_flood_wait(e)
 
         except Exception as e:
             # Любая другая ошибка
             logger.error(f"❌ Ошибка получения фото профиля для {user_id}: {e}")
-            return []
+            return None
 
     async def check_all_photos_young(self, user_id: int, max_age_days: int = 15) -> Dict[str, Any]:
         """
@@ -388,29 +445,25 @@ class PyrogramService:
             }
 
         try:
-            # Получаем полную информацию о пользователе через MTProto
-            user = await self.client.get_users(user_id)
-
-            # ВАЖНО: Telegram не предоставляет прямую дату создания аккаунта
-            # Но мы можем получить дату первого сообщения или другую информацию
-            # Для простоты используем приблизительную оценку через первое фото
-            photos = await self.get_profile_photos_dates(user_id)
-
-            if photos:
-                # Берём самое старое фото как приблизительную дату создания
-                # (аккаунт НЕ МОЖЕТ быть моложе самого старого фото)
-                oldest_photo = max(photos, key=lambda p: p['age_days'])
-                creation_date = oldest_photo['date']
-                account_age_days = oldest_photo['age_days']
-            else:
-                # ВАЖНО: Telegram API НЕ предоставляет точную дату регистрации!
-                # Если фото нет - используем ДИНАМИЧЕСКИЙ расчёт по USER ID
-                # ИСПРАВЛЕНО: Заменён устаревший статический маппинг на динамический расчёт
-                from bot.services.account_age_estimator import account_age_estimator
-                from bot.services.redis_conn import redis as redis_client
-                account_age_days = await account_age_estimator.get_dynamic_age_days(redis_client, user_id)
-                # Вычисляем примерную дату создания на основе возраста
-                creation_date = datetime.now(timezone.utc) - timedelta(days=account_age_days)
+            # Дата создания из кэша или через MTProto (одна загрузка на пользователя)
+            try:
+                creation_date = await self._age_cache.get_or_load(
+                    user_id, lambda: self._load_creation_date(user_id)
+                )
+            except MtprotoRateLimited:
+                # Лимит запросов MTProto — проверка без точного возраста
+                return {
+                    'account_age_days': None,
+                    'creation_date': None,
+                    'is_young': False,
+                    'risk_score': 0,
+                    'reason': 'Лимит запросов MTProto'
+                }
+            if creation_date is None:
+                # Фото получить не удалось — оценка по USER ID (не кэшируется,
+                # при следующей проверке фото запросятся снова)
+                creation_date = await self._estimate_creation_date(user_id)
+            account_age_days = max(0, (datetime.now(timezone.utc) - creation_date).days)
 
             # ГЛАВНАЯ ПРОВЕРКА: Аккаунт моложе 30 дней?
             is_young = account_age_days <= 30
@@ -448,6 +501,54 @@ class PyrogramService:
             }
 
 
+    async def _load_creation_date(self, user_id: int) -> Optional[datetime]:
+        """
+        Определяет дату создания аккаунта через MTProto.
+
+        get_users и get_chat_photos одной проверки расходуют один токен лимита.
+        Ошибки get_users (кроме FloodWait) пробрасываются в get_account_age.
+
+        Returns:
+            Дата создания или None, если фото получить не удалось
+            (не кэшируется, get_account_age использует оценку по ID)
+
+        Raises:
+            MtprotoRateLimited: запрос не сделан из-за лимита или FloodWait
+        """
+        await self._acquire_mtproto()
+        try:
+            # Получаем полную информацию о пользователе через MTProto
+            # (ошибка, если пользователь не существует)
+            await self.client.get_users(user_id)
+        except FloodWait as e:
+            raise self._on_flood_wait(e)
+
+        # ВАЖНО: Telegram не предоставляет прямую дату создания аккаунта
+        # Для простоты используем приблизительную оценку через первое фото
+        photos = await self._photo_cache.get_or_load(
+            user_id, lambda: self._load_photos(user_id, acquire=False)
+        )
+        if photos is None:
+            return None
+
+        if photos:
+            # Берём самое старое фото как приблизительную дату создания
+            # (аккаунт НЕ МОЖЕТ быть моложе самого старого фото)
+            return min(photo['date'] for photo in photos)
+
+        # Фото нет — оценка по USER ID (кэшируется вместе с датой)
+        return await self._estimate_creation_date(user_id)
+
+    async def _estimate_creation_date(self, user_id: int) -> datetime:
+        """Примерная дата создания аккаунта по USER ID."""
+        # ВАЖНО: Telegram API НЕ предоставляет точную дату регистрации!
+        # Используем ДИНАМИЧЕСКИЙ расчёт по USER ID
+        from bot.services.account_age_estimator import account_age_estimator
+        account_age_days = await account_age_estimator.get_dynamic_age_days(redis, user_id)
+        # Вычисляем примерную дату создания на основе возраста
+        return datetime.now(timezone.utc) - timedelta(days=account_age_days)
+
+
 # ==============================================================================
 # ГЛОБАЛЬНЫЙ ЭКЗЕМПЛЯР СЕРВИСА
 # ==============================================================================
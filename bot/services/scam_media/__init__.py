@@ -8,6 +8,8 @@
 # - hash_service.py: вычисление и сравнение хешей изображений
 # - filter_manager.py: координация фильтрации и применение действий
 # - db_service.py: операции с базой данных хешей
+# - hash_index.py: индекс запрещённых хешей в памяти (BK-tree)
+# - media_cache.py: кэш хешей и вердиктов по file_unique_id (Redis)
 #
 # Интеграция:
 # - Вызывается из group_message_coordinator.py
@@ -22,10 +24,25 @@ from .hash_service import (
     compare_hashes,
     compute_logo_hash,
     get_available_logo_regions,
+    compute_hashes_off_loop,
+    configure_hash_executor,
+    shutdown_hash_executor,
     ImageHashes,
     LOGO_REGIONS,
 )
 
+# Экспортируем индекс запрещённых хешей
+from .hash_index import (
+    BannedHashIndex,
+    get_banned_hash_index,
+)
+
+# Экспортируем кэш хешей и вердиктов по file_unique_id
+from .media_cache import (
+    MediaVerdictCache,
+    get_media_verdict_cache,
+)
+
 # Экспортируем сервисы работы с БД
 from .db_service import (
     SettingsService,
@@ -38,4 +55,28 @@ from .filter_manager import (
     ScamMediaFilterManager,
     MatchResult,
     FilterResult,
-)
\ No newline at end of file
+)
+
+# Публичный API пакета
+__all__ = [
+    "HashService",
+    "compute_image_hash",
+    "compare_hashes",
+    "compute_logo_hash",
+    "get_available_logo_regions",
+    "compute_hashes_off_loop",
+    "configure_hash_executor",
+    "shutdown_hash_executor",
+    "ImageHashes",
+    "LOGO_REGIONS",
+    "BannedHashIndex",
+    "get_banned_hash_index",
+    "MediaVerdictCache",
+    "get_media_verdict_cache",
+    "SettingsService",
+    "BannedHashService",
+    "ViolationService",
+    "ScamMediaFilterManager",
+    "MatchResult",
+    "FilterResult",
+]
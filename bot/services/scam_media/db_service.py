@@ -24,6 +24,14 @@ from bot.database.models_scam_media import (
     BannedImageHash,
     ScamMediaViolation,
 )
+# Импорт буфера счётчиков срабатываний (сброс в БД пачкой)
+from bot.services.trigger_counters import banned_hash_counter
+# Импорт индекса запрещённых хешей (обновляется при добавлении/удалении)
+from .hash_index import get_banned_hash_index
+# Импорт кэша вердиктов по file_unique_id (сбрасывается при изменении хешей)
+from .media_cache import get_media_verdict_cache
+# Импорт кэша настроек (чтение на пути обработки сообщений)
+from bot.services.settings_cache import get_settings_cache, register_cached_model
 
 
 # ============================================================
@@ -32,6 +40,9 @@ from bot.database.models_scam_media import (
 # Создаём логгер для этого модуля
 logger = logging.getLogger(__name__)
 
+# Изменения настроек сбрасывают кэш настроек (settings_cache)
+register_cached_model(ScamMediaSettings, 'scam_media')
+
 
 # ============================================================
 # СЕРВИС НАСТРОЕК ГРУППЫ
@@ -66,6 +77,26 @@ class SettingsService:
         # Возвращаем первую запись или None
         return result.scalar_one_or_none()
 
+    @staticmethod
+    async def get_cached_settings(
+        session: AsyncSession,
+        chat_id: int
+    ) -> Optional[ScamMediaSettings]:
+        """
+        Получает настройки модуля через кэш настроек.
+        Возвращает отсоединённую копию — только для чтения.
+
+        Args:
+            session: Сессия SQLAlchemy
+            chat_id: ID группы
+
+        Returns:
+            ScamMediaSettings или None если не найдено
+        """
+        return await get_settings_cache().get_or_load(
+            'scam_media', chat_id, lambda: SettingsService.get_settings(session, chat_id)
+        )
+
     @staticmethod
     async def get_or_create_settings(
         session: AsyncSession,
@@ -197,6 +228,10 @@ class BannedHashService:
         session.add(hash_entry)
         await session.commit()
         await session.refresh(hash_entry)
+        # Новый хеш сразу участвует в проверках
+        get_banned_hash_index().add(hash_entry)
+        # Сохранённые вердикты по file_unique_id больше не действительны
+        await get_media_verdict_cache().bump_version()
         return hash_entry
 
     @staticmethod
@@ -301,6 +336,9 @@ class BannedHashService:
             delete(BannedImageHash).where(BannedImageHash.id == hash_id)
         )
         await session.commit()
+        # Убираем хеш из индекса проверок
+        get_banned_hash_index().remove(hash_id)
+        await get_media_verdict_cache().bump_version()
         return result.rowcount > 0
 
     @staticmethod
@@ -325,6 +363,9 @@ class BannedHashService:
             query = query.where(BannedImageHash.chat_id == chat_id)
         result = await session.execute(query)
         await session.commit()
+        # Убираем хеши из индекса проверок
+        get_banned_hash_index().remove_by_phash(phash, chat_id)
+        await get_media_verdict_cache().bump_version()
         return result.rowcount
 
     @staticmethod
@@ -334,22 +375,14 @@ class BannedHashService:
     ) -> None:
         """
         Увеличивает счётчик срабатываний хеша.
+        Счётчик буферизуется и сбрасывается в БД фоново (trigger_counters).
 
         Args:
-            session: Сессия SQLAlchemy
+            session: Сессия SQLAlchemy (не используется, сохранена для совместимости)
             hash_id: ID хеша
         """
-        # Обновляем счётчик и время последнего срабатывания
-        # Используем utcnow() без timezone для совместимости с колонкой DateTime
-        await session.execute(
-            update(BannedImageHash)
-            .where(BannedImageHash.id == hash_id)
-            .values(
-                matches_count=BannedImageHash.matches_count + 1,
-                last_match_at=datetime.utcnow()
-            )
-        )
-        await session.commit()
+        # Копим в буфере: matches_count и last_match_at уйдут одним UPDATE
+        await banned_hash_counter.record(hash_id)
 
     @staticmethod
     async def get_inactive_hashes(
@@ -3,8 +3,8 @@
 # ============================================================
 # Этот файл координирует логику фильтрации скам-изображений:
 # 1. Проверяет включён ли модуль для группы
-# 2. Вычисляет хеш входящего изображения
-# 3. Сравнивает с базой запрещённых хешей
+# 2. Вычисляет хеш входящего изображения (в пуле процессов)
+# 3. Сравнивает с индексом запрещённых хешей (BK-tree в памяти)
 # 4. Применяет действие (delete, warn, mute, ban)
 # 5. Логирует нарушение
 # 6. Добавляет в БД скаммеров (опционально)
@@ -13,7 +13,7 @@
 # Импорт для работы с датами
 from datetime import datetime, timezone, timedelta
 # Импорт для аннотации типов
-from typing import Optional, NamedTuple, List
+from typing import Awaitable, Callable, Optional, NamedTuple, List, Union
 # Импорт для логирования
 import logging
 
@@ -25,9 +25,18 @@ from aiogram import Bot
 from aiogram.types import Message, ChatPermissions
 
 # Импорт локальных сервисов
-from .hash_service import HashService, ImageHashes, compute_image_hash, compute_logo_hash
+from .hash_service import (
+    HashService,
+    ImageHashes,
+    compute_hashes_off_loop,
+    required_source_side,
+)
+from .hash_index import get_banned_hash_index
+from .media_cache import CachedVerdict, get_media_verdict_cache
 from .db_service import SettingsService, BannedHashService, ViolationService
 from bot.database.models_scam_media import ScamMediaSettings, BannedImageHash
+# Импорт планировщика отложенных задач
+from bot.services.job_scheduler import schedule_delete_message
 
 
 # ============================================================
@@ -40,6 +49,13 @@ logger = logging.getLogger(__name__)
 # ============================================================
 # ТИПЫ ДАННЫХ
 # ============================================================
+# Загрузчик изображения: минимальная короткая сторона -> байты (или None).
+# Вызывается только при промахе кэша, чтобы повтор не скачивался
+ImageLoader = Callable[[int], Awaitable[Optional[bytes]]]
+# Байты изображения или загрузчик
+ImageSource = Union[bytes, ImageLoader]
+
+
 class MatchResult(NamedTuple):
     """
     Результат проверки изображения на совпадение.
@@ -101,80 +117,112 @@ class ScamMediaFilterManager:
         self,
         session: AsyncSession,
         chat_id: int,
-        image_data: bytes
+        image_data: ImageSource,
+        file_unique_id: Optional[str] = None
     ) -> MatchResult:
         """
         Проверяет изображение на совпадение с базой.
 
+        Хеши считаются вне event loop, сравнение идёт по индексу
+        в памяти (BK-tree), а не по всем строкам из БД.
+
+        Если передан file_unique_id, хеши и вердикт берутся из кэша:
+        повтор той же картинки не скачивается и не хешируется.
+
         Args:
             session: Сессия SQLAlchemy
             chat_id: ID группы
-            image_data: Байты изображения
+            image_data: Байты изображения или загрузчик
+                (async функция: минимальная сторона -> байты)
+            file_unique_id: Уникальный ID файла Telegram (ключ кэша)
 
         Returns:
             MatchResult с результатом проверки
         """
+        no_match = MatchResult(matched=False, hash_entry=None, distance=64)
+
         # Получаем настройки группы
-        settings = await SettingsService.get_settings(session, chat_id)
+        settings = await SettingsService.get_cached_settings(session, chat_id)
         # Если настроек нет или модуль выключен - не фильтруем
         if settings is None or not settings.enabled:
-            return MatchResult(matched=False, hash_entry=None, distance=64)
-
-        # Вычисляем хеш изображения
-        image_hashes = compute_image_hash(image_data)
-        if image_hashes is None:
-            # Не удалось вычислить хеш - пропускаем
-            return MatchResult(matched=False, hash_entry=None, distance=64)
+            return no_match
 
-        # Получаем все хеши для сравнения
+        # Индекс запрещённых хешей (загружается из БД один раз, далее в памяти)
+        index = get_banned_hash_index()
+        await index.ensure_loaded(session)
         include_global = settings.use_global_hashes
-        stored_hashes = await BannedHashService.get_hashes_for_group(
-            session, chat_id, include_global
+        regions = index.regions_for(chat_id, include_global)
+
+        # ─────────────────────────────────────────────────────────
+        # Кэш по file_unique_id: готовый вердикт или хеши
+        # ─────────────────────────────────────────────────────────
+        cache = get_media_verdict_cache() if file_unique_id else None
+        cached = await cache.lookup(file_unique_id, chat_id) if cache else None
+
+        if cached is not None:
+            verdict = cached.verdict_for(settings.threshold, include_global)
+            if verdict is not None:
+                if verdict.hash_id is None:
+                    return no_match
+                item = index.get(verdict.hash_id)
+                if item is not None:
+                    return MatchResult(matched=True, hash_entry=item.entry, distance=verdict.distance)
+
+        # Хеши, посчитанные сейчас (сохраняются в кэш вместе с вердиктом)
+        computed: Optional[ImageHashes] = None
+        if cached is not None and cached.image_hashes is not None and cached.has_regions(regions):
+            image_hashes = cached.image_hashes
+            region_hashes = {r: h for r, h in cached.region_hashes.items() if h is not None}
+        else:
+            # ─────────────────────────────────────────────────────────
+            # Промах: скачиваем (если нужно) и считаем хеши
+            # ─────────────────────────────────────────────────────────
+            if not isinstance(image_data, bytes):
+                image_data = await image_data(required_source_side(regions))
+                if image_data is None:
+                    return no_match
+
+            # Хеш изображения и хеши нужных регионов лого — за одно
+            # декодирование, в пуле процессов (не блокирует event loop)
+            image_hashes, region_hashes = await compute_hashes_off_loop(image_data, regions)
+            if image_hashes is None:
+                # Не удалось вычислить хеш - пропускаем
+                return no_match
+            computed = image_hashes
+
+        # Ищем ближайший хеш в радиусе порога
+        match = index.search(
+            chat_id, include_global, image_hashes, region_hashes, settings.threshold
         )
 
-        # Порог срабатывания из настроек
-        threshold = settings.threshold
-
-        # Ищем совпадения
-        best_match: Optional[BannedImageHash] = None
-        best_distance: int = 64
-
-        for stored_hash in stored_hashes:
-            # Проверяем тип хеша (полный или лого)
-            if stored_hash.logo_region:
-                # Это хеш области лого - вычисляем хеш той же области
-                logo_hashes = compute_logo_hash(image_data, stored_hash.logo_region)
-                if logo_hashes is None:
-                    continue
-                # Сравниваем
-                is_similar, distance = self._hash_service.is_similar(
-                    logo_hashes.phash, logo_hashes.dhash,
-                    stored_hash.phash, stored_hash.dhash,
-                    threshold
-                )
-            else:
-                # Обычный хеш всего изображения
-                is_similar, distance = self._hash_service.is_similar(
-                    image_hashes.phash, image_hashes.dhash,
-                    stored_hash.phash, stored_hash.dhash,
-                    threshold
-                )
-
-            # Запоминаем лучшее совпадение
-            if is_similar and distance < best_distance:
-                best_match = stored_hash
-                best_distance = distance
+        if cache is not None:
+            # Регионы, для которых область мала, тоже запоминаем (None)
+            await cache.store(
+                file_unique_id,
+                image_hashes=computed,
+                region_hashes={r: region_hashes.get(r) for r in regions} if computed else None,
+                chat_id=chat_id,
+                verdict=CachedVerdict(
+                    hash_id=match[0].id if match else None,
+                    distance=match[1] if match else 64,
+                ),
+                version=cached.version if cached is not None else 0,
+                threshold=settings.threshold,
+                include_global=include_global,
+            )
 
         # Возвращаем результат
-        if best_match is not None:
-            return MatchResult(matched=True, hash_entry=best_match, distance=best_distance)
-        return MatchResult(matched=False, hash_entry=None, distance=64)
+        if match is not None:
+            item, distance = match
+            return MatchResult(matched=True, hash_entry=item.entry, distance=distance)
+        return no_match
 
     async def filter_message(
         self,
         session: AsyncSession,
         message: Message,
-        image_data: bytes
+        image_data: ImageSource,
+        file_unique_id: Optional[str] = None
     ) -> FilterResult:
         """
         Фильтрует сообщение с изображением.
@@ -188,7 +236,8 @@ class ScamMediaFilterManager:
         Args:
             session: Сессия SQLAlchemy
             message: Сообщение Telegram
-            image_data: Байты изображения
+            image_data: Байты изображения или загрузчик (см. check_image)
+            file_unique_id: Уникальный ID файла Telegram (ключ кэша)
 
         Returns:
             FilterResult с результатом фильтрации
@@ -197,13 +246,13 @@ class ScamMediaFilterManager:
         user = message.from_user
 
         # Проверяем изображение
-        match_result = await self.check_image(session, chat_id, image_data)
+        match_result = await self.check_image(session, chat_id, image_data, file_unique_id)
 
         if not match_result.matched:
             return FilterResult(filtered=False, action=None, hash_id=None, distance=None)
 
         # Получаем настройки для действия
-        settings = await SettingsService.get_settings(session, chat_id)
+        settings = await SettingsService.get_cached_settings(session, chat_id)
         if settings is None:
             return FilterResult(filtered=False, action=None, hash_id=None, distance=None)
 
@@ -492,16 +541,8 @@ class ScamMediaFilterManager:
             message_id: ID сообщения
             delay: Задержка в секундах
         """
-        import asyncio
-        # Создаём задачу для отложенного удаления
-        async def delete_later():
-            await asyncio.sleep(delay)
-            try:
-                await self._bot.delete_message(chat_id, message_id)
-            except Exception:
-                pass  # Игнорируем ошибки удаления
-        # Запускаем в фоне
-        asyncio.create_task(delete_later())
+        # Задача планировщика (переживает перезапуск бота)
+        await schedule_delete_message(self._bot, chat_id, message_id, delay)
 
     @staticmethod
     def _format_user_mention(user) -> str:
@@ -0,0 +1,448 @@
+# ============================================================
+# ИНДЕКС ЗАПРЕЩЁННЫХ ХЕШЕЙ (BK-TREE ПО РАССТОЯНИЮ ХЭММИНГА)
+# ============================================================
+# Раньше check_image на каждое фото загружал из БД ВСЕ хеши группы
+# (+ глобальные) и сравнивал их по одному через imagehash.hex_to_hash.
+# Глобальная база растёт — время проверки росло линейно.
+#
+# Теперь хеши держатся в памяти как 64-битные int:
+# - расстояние Хэмминга = popcount(a ^ b)
+# - BK-tree на каждую область (группа / глобальные × регион лого)
+#   отсекает ветки по неравенству треугольника: поиск в радиусе
+#   threshold просматривает лишь часть дерева
+#
+# Актуальность:
+# - BannedHashService.add_hash / delete_hash / delete_hash_by_phash
+#   обновляют индекс сразу
+# - полная перезагрузка из БД раз в INDEX_TTL (изменения,
+#   сделанные другими репликами бота)
+# ============================================================
+
+# Импорт asyncio для блокировки загрузки
+import asyncio
+# Импорт для логирования
+import logging
+# Импорт time для TTL
+import time
+# Импорт dataclass для записи индекса
+from dataclasses import dataclass
+# Импорт для аннотации типов
+from typing import Dict, List, Optional, Set, Tuple
+
+# Импорт SQLAlchemy
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Импорт модели хешей
+from bot.database.models_scam_media import BannedImageHash
+# Импорт типа пары хешей
+from .hash_service import ImageHashes
+
+
+# ============================================================
+# НАСТРОЙКА ЛОГИРОВАНИЯ
+# ============================================================
+# Создаём логгер для этого модуля
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# КОНСТАНТЫ
+# ============================================================
+# Полная перезагрузка индекса из БД (секунды)
+INDEX_TTL: int = 300
+# Ключ области глобальных хешей
+GLOBAL_SCOPE = 'global'
+
+
+# ============================================================
+# РАССТОЯНИЕ ХЭММИНГА
+# ============================================================
+def hash_to_int(hex_hash: Optional[str]) -> Optional[int]:
+    """
+    Преобразует hex хеш (16 символов) в 64-битное число.
+
+    Returns:
+        int или None если хеш пустой/некорректный
+    """
+    if not hex_hash:
+        return None
+    try:
+        return int(hex_hash, 16)
+    except ValueError:
+        return None
+
+
+def hamming(a: int, b: int) -> int:
+    """Расстояние Хэмминга между двумя хешами-числами (popcount XOR)."""
+    return (a ^ b).bit_count()
+
+
+# ============================================================
+# BK-TREE
+# ============================================================
+class BKTree:
+    """
+    BK-tree для поиска хешей в радиусе по расстоянию Хэмминга.
+
+    Каждый узел хранит значение хеша и ID записей с этим значением;
+    потомки индексируются расстоянием до узла. При поиске в радиусе r
+    от запроса q обходятся только потомки с расстоянием в [d-r, d+r].
+    """
+
+    def __init__(self) -> None:
+        # Узел: [значение, список ID, {расстояние: узел}]
+        self._root: Optional[list] = None
+        # Количество ID в дереве (включая удалённые и заменённые в индексе)
+        self.size = 0
+
+    def add(self, value: int, item_id: int) -> None:
+        """Добавляет запись с хешем value."""
+        self.size += 1
+        if self._root is None:
+            self._root = [value, [item_id], {}]
+            return
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item_id)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item_id], {}]
+                return
+            node = child
+
+    def search(self, value: int, radius: int) -> List[Tuple[int, int]]:
+        """
+        Ищет записи в радиусе radius.
+
+        Returns:
+            Список (ID записи, расстояние)
+        """
+        found = []
+        if self._root is None:
+            return found
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= radius:
+                found.extend((item_id, distance) for item_id in node[1])
+            low, high = distance - radius, distance + radius
+            for child_distance, child in node[2].items():
+                if low <= child_distance <= high:
+                    stack.append(child)
+        return found
+
+
+# ============================================================
+# ЗАПИСЬ ИНДЕКСА
+# ============================================================
+@dataclass
+class IndexedHash:
+    """
+    Запрещённый хеш в индексе.
+
+    Attributes:
+        id: ID записи BannedImageHash
+        phash: pHash как 64-битное число
+        dhash: dHash как число (None если не задан)
+        logo_region: Регион лого (None = хеш всего изображения)
+        entry: Отсоединённая копия записи BannedImageHash
+    """
+    id: int
+    phash: int
+    dhash: Optional[int]
+    logo_region: Optional[str]
+    entry: BannedImageHash
+
+
+def _snapshot(row: BannedImageHash) -> BannedImageHash:
+    """Копия записи, не привязанная к сессии (только колонки)."""
+    values = {column.key: getattr(row, column.key) for column in BannedImageHash.__table__.columns}
+    return BannedImageHash(**values)
+
+
+def _scopes(row: BannedImageHash) -> List[object]:
+    """
+    Области, в которых ищется запись.
+
+    Как и в get_hashes_for_group: хеш группы виден в своей группе,
+    глобальный — во всех группах с use_global_hashes.
+    """
+    scopes = []
+    if row.chat_id is not None:
+        scopes.append(row.chat_id)
+    if row.is_global:
+        scopes.append(GLOBAL_SCOPE)
+    return scopes
+
+
+# ============================================================
+# ИНДЕКС
+# ============================================================
+class BannedHashIndex:
+    """
+    Индекс запрещённых хешей в памяти.
+
+    Деревья хранятся по (область, регион лого): область — chat_id
+    или GLOBAL_SCOPE, регион None — хеш всего изображения.
+    """
+
+    def __init__(self, ttl: int = INDEX_TTL) -> None:
+        """
+        Args:
+            ttl: Интервал полной перезагрузки из БД (секунды)
+        """
+        self._ttl = ttl
+        # ID → запись
+        self._entries: Dict[int, IndexedHash] = {}
+        # (область, регион) → дерево
+        self._trees: Dict[Tuple[object, Optional[str]], BKTree] = {}
+        # (область, регион) → ID актуальных записей дерева. Из BK-tree
+        # ничего не удаляется: узлы удалённых и заменённых записей остаются
+        # «надгробиями», поиск их пропускает, а когда надгробий больше
+        # половины — дерево перестраивается по этому множеству.
+        self._members: Dict[Tuple[object, Optional[str]], Set[int]] = {}
+        # Область → регионы, для которых есть деревья
+        self._regions: Dict[object, Set[Optional[str]]] = {}
+        # Момент следующей перезагрузки (0 = не загружен)
+        self._expires_at: float = 0.0
+        # Блокировка загрузки (один SELECT на все ожидающие проверки)
+        self._lock = asyncio.Lock()
+        # Изменения во время загрузки (применяются после неё)
+        self._pending: Optional[List[Tuple[str, object]]] = None
+
+    # ─────────────────────────────────────────────────────────
+    # ЗАГРУЗКА
+    # ─────────────────────────────────────────────────────────
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        """Загружает индекс из БД если он пуст или устарел."""
+        if self._expires_at > time.monotonic():
+            return
+        async with self._lock:
+            if self._expires_at > time.monotonic():
+                return
+            await self._reload(session)
+
+    async def _reload(self, session: AsyncSession) -> None:
+        """Полная перезагрузка всех хешей из БД."""
+        self._pending = []
+        try:
+            result = await session.execute(select(BannedImageHash))
+            rows = list(result.scalars().all())
+            self._clear_structures()
+            for row in rows:
+                self._add_row(row)
+            # Изменения, сделанные пока шёл SELECT (уже попавшие в снимок
+            # записи не добавляются повторно)
+            for op, arg in self._pending:
+                if op == 'add':
+                    if not self._is_current(arg):
+                        self._add_row(arg)
+                else:
+                    self._remove_id(arg)
+            self._expires_at = time.monotonic() + self._ttl
+            logger.info(f"[ScamMediaIndex] Загружено хешей: {len(self._entries)}")
+        finally:
+            self._pending = None
+
+    def _clear_structures(self) -> None:
+        self._entries.clear()
+        self._trees.clear()
+        self._members.clear()
+        self._regions.clear()
+
+    def clear(self) -> None:
+        """Очищает индекс (следующая проверка загрузит его заново)."""
+        self._clear_structures()
+        self._expires_at = 0.0
+
+    # ─────────────────────────────────────────────────────────
+    # ИЗМЕНЕНИЯ
+    # ─────────────────────────────────────────────────────────
+
+    def add(self, row: BannedImageHash) -> None:
+        """Добавляет (или заменяет) запись после add_hash."""
+        if self._pending is not None:
+            self._pending.append(('add', _snapshot(row)))
+        self._add_row(row)
+
+    def remove(self, hash_id: int) -> None:
+        """Удаляет запись после delete_hash."""
+        if self._pending is not None:
+            self._pending.append(('remove', hash_id))
+        self._remove_id(hash_id)
+
+    def remove_by_phash(self, phash: str, chat_id: Optional[int] = None) -> None:
+        """Удаляет записи по pHash после delete_hash_by_phash."""
+        value = hash_to_int(phash)
+        for item in list(self._entries.values()):
+            if item.phash == value and (chat_id is None or item.entry.chat_id == chat_id):
+                self.remove(item.id)
+
+    def _is_current(self, row: BannedImageHash) -> bool:
+        """Запись уже в индексе с теми же хешами, регионом и областями."""
+        item = self._entries.get(row.id)
+        return (
+            item is not None
+            and item.phash == hash_to_int(row.phash)
+            and item.dhash == hash_to_int(row.dhash)
+            and item.logo_region == (row.logo_region or None)
+            and _scopes(item.entry) == _scopes(row)
+        )
+
+    def _add_row(self, row: BannedImageHash) -> None:
+        phash = hash_to_int(row.phash)
+        if phash is None:
+            logger.warning(f"[ScamMediaIndex] Некорректный pHash у хеша #{row.id}: {row.phash!r}")
+            return
+        if row.id in self._entries:
+            # Замена: старый узел становится надгробием
+            self._remove_id(row.id)
+        item = IndexedHash(
+            id=row.id,
+            phash=phash,
+            dhash=hash_to_int(row.dhash),
+            logo_region=row.logo_region or None,
+            entry=_snapshot(row),
+        )
+        self._entries[item.id] = item
+        for scope in _scopes(row):
+            key = (scope, item.logo_region)
+            self._trees.setdefault(key, BKTree()).add(item.phash, item.id)
+            self._members.setdefault(key, set()).add(item.id)
+            self._regions.setdefault(scope, set()).add(item.logo_region)
+
+    def _remove_id(self, hash_id: int) -> None:
+        item = self._entries.pop(hash_id, None)
+        if item is None:
+            return
+        for scope in _scopes(item.entry):
+            key = (scope, item.logo_region)
+            members = self._members.get(key)
+            if members is None:
+                continue
+            members.discard(hash_id)
+            tree = self._trees.get(key)
+            # Надгробий больше половины — перестраиваем дерево
+            if tree is not None and len(members) * 2 < tree.size:
+                self._rebuild(key)
+
+    def _rebuild(self, key: Tuple[object, Optional[str]]) -> None:
+        scope, region = key
+        members = self._members.get(key)
+        if not members:
+            self._trees.pop(key, None)
+            self._members.pop(key, None)
+            regions = self._regions.get(scope)
+            if regions is not None:
+                regions.discard(region)
+                if not regions:
+                    del self._regions[scope]
+            return
+        tree = BKTree()
+        for item_id in members:
+            tree.add(self._entries[item_id].phash, item_id)
+        self._trees[key] = tree
+
+    # ─────────────────────────────────────────────────────────
+    # ПОИСК
+    # ─────────────────────────────────────────────────────────
+
+    def _scopes_for(self, chat_id: int, include_global: bool) -> List[object]:
+        return [chat_id, GLOBAL_SCOPE] if include_global else [chat_id]
+
+    def regions_for(self, chat_id: int, include_global: bool) -> Set[str]:
+        """
+        Регионы лого, хеши которых нужно посчитать для группы.
+        Каждый регион считается один раз, сколько бы хешей его ни использовало.
+        """
+        regions: Set[str] = set()
+        for scope in self._scopes_for(chat_id, include_global):
+            regions.update(r for r in self._regions.get(scope, ()) if r is not None)
+        return regions
+
+    def search(
+        self,
+        chat_id: int,
+        include_global: bool,
+        image_hashes: ImageHashes,
+        region_hashes: Dict[str, ImageHashes],
+        threshold: int
+    ) -> Optional[Tuple[IndexedHash, int]]:
+        """
+        Ищет самый близкий запрещённый хеш.
+
+        Совпадение — как в HashService.is_similar: pHash в пределах
+        порога; расстояние = min(pHash, dHash) если dHash есть у обоих.
+
+        Args:
+            chat_id: ID группы
+            include_global: Искать и среди глобальных хешей
+            image_hashes: Хеш всего изображения
+            region_hashes: Хеши регионов {region: ImageHashes}
+            threshold: Порог расстояния Хэмминга
+
+        Returns:
+            (запись, расстояние) или None
+        """
+        best: Optional[Tuple[IndexedHash, int]] = None
+        seen: Set[int] = set()
+
+        queries: List[Tuple[Optional[str], ImageHashes]] = [(None, image_hashes)]
+        queries.extend(region_hashes.items())
+
+        for scope in self._scopes_for(chat_id, include_global):
+            for region, hashes in queries:
+                tree = self._trees.get((scope, region))
+                if tree is None:
+                    continue
+                members = self._members[(scope, region)]
+                query_phash = hash_to_int(hashes.phash)
+                query_dhash = hash_to_int(hashes.dhash)
+                if query_phash is None:
+                    continue
+                for item_id, phash_distance in tree.search(query_phash, threshold):
+                    item = self._entries.get(item_id)
+                    if item is None or item_id in seen or item_id not in members:
+                        continue
+                    # Надгробие заменённой записи: узел хранит старый pHash
+                    if hamming(query_phash, item.phash) != phash_distance:
+                        continue
+                    seen.add(item_id)
+                    distance = phash_distance
+                    if item.dhash is not None and query_dhash is not None:
+                        distance = min(distance, hamming(query_dhash, item.dhash))
+                    if best is None or (distance, item_id) < (best[1], best[0].id):
+                        best = (item, distance)
+        return best
+
+    def get(self, hash_id: int) -> Optional[IndexedHash]:
+        """Запись по ID (None если хеш удалён)."""
+        return self._entries.get(hash_id)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# ============================================================
+# ГЛОБАЛЬНЫЙ ЭКЗЕМПЛЯР
+# ============================================================
+_banned_hash_index: Optional[BannedHashIndex] = None
+
+
+def get_banned_hash_index() -> BannedHashIndex:
+    """
+    Возвращает глобальный индекс запрещённых хешей.
+
+    Returns:
+        Экземпляр BannedHashIndex
+    """
+    global _banned_hash_index
+    if _banned_hash_index is None:
+        _banned_hash_index = BannedHashIndex()
+    return _banned_hash_index
@@ -15,9 +15,16 @@
 # Импорт стандартных библиотек
 from io import BytesIO
 # Импорт для аннотации типов
-from typing import Optional, Tuple, NamedTuple
+from typing import Dict, Iterable, Optional, Tuple, NamedTuple
 # Импорт для работы с логами
 import logging
+# Импорт asyncio для вычисления хешей вне event loop
+import asyncio
+# Импорт math для округления размеров
+import math
+# Импорт пула процессов (PIL + DCT нагружают CPU и держат GIL)
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 # Импорт библиотеки для работы с изображениями
 from PIL import Image
@@ -58,6 +65,13 @@ HASH_SIZE: int = 8
 # Максимальный размер изображения для обработки (пиксели)
 # Большие изображения ресайзятся для экономии памяти
 MAX_IMAGE_SIZE: int = 1024
+# Минимальная короткая сторона исходника для хеша всего изображения.
+# pHash всё равно сжимает картинку до 32x32 (hash_size * 4), поэтому
+# скачивать оригинал 1280+ не нужно: размер 320 даёт тот же хеш
+# с погрешностью в 1-2 бита (в пределах порога)
+MIN_SOURCE_SIDE: int = 320
+# Минимальная сторона вырезанной области лого (в _hash_region < 32 — отказ)
+MIN_REGION_SIDE: int = 64
 
 
 # ============================================================
@@ -82,6 +96,54 @@ LOGO_REGIONS = {
 }
 
 
+def required_source_side(regions: Iterable[str] = ()) -> int:
+    """
+    Минимальная короткая сторона изображения, достаточная для хешей.
+
+    Для хеша всего изображения хватает MIN_SOURCE_SIDE; области лого
+    занимают 12-20% кадра, поэтому для них нужен исходник крупнее.
+
+    Args:
+        regions: Регионы лого, хеши которых будут считаться
+
+    Returns:
+        Размер в пикселях
+    """
+    side = MIN_SOURCE_SIDE
+    for region in regions:
+        bounds = LOGO_REGIONS.get(region)
+        if bounds is None:
+            continue
+        left, top, right, bottom = bounds
+        fraction = min(right - left, bottom - top)
+        side = max(side, math.ceil(MIN_REGION_SIDE / fraction))
+    return side
+
+
+# ============================================================
+# ОТКРЫТИЕ ИЗОБРАЖЕНИЯ
+# ============================================================
+def _open_image(image_data: bytes) -> Image.Image:
+    """
+    Открывает изображение из байтов и приводит к RGB или L.
+
+    pHash работает с RGB, не с RGBA или P mode — прозрачные
+    изображения накладываются на белый фон.
+    """
+    # BytesIO создаёт файлоподобный объект из байтов
+    image = Image.open(BytesIO(image_data))
+    if image.mode not in ('RGB', 'L'):
+        # Создаём белый фон для прозрачных изображений
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        # Накладываем изображение на белый фон
+        if image.mode == 'RGBA':
+            background.paste(image, mask=image.split()[3])
+        else:
+            background.paste(image)
+        image = background
+    return image
+
+
 # ============================================================
 # КЛАСС СЕРВИСА ХЕШИРОВАНИЯ
 # ============================================================
@@ -123,48 +185,46 @@ class HashService:
             или None если изображение не удалось обработать
         """
         try:
-            # Открываем изображение из байтов
-            # BytesIO создаёт файлоподобный объект из байтов
-            image = Image.open(BytesIO(image_data))
-
-            # Конвертируем в RGB если нужно (для прозрачных PNG)
-            # pHash работает с RGB, не с RGBA или P mode
-            if image.mode not in ('RGB', 'L'):
-                # Создаём белый фон для прозрачных изображений
-                background = Image.new('RGB', image.size, (255, 255, 255))
-                # Накладываем изображение на белый фон
-                if image.mode == 'RGBA':
-                    background.paste(image, mask=image.split()[3])
-                else:
-                    background.paste(image)
-                image = background
-
-            # Ресайзим большие изображения для экономии памяти
-            # Это не влияет на качество хеша (pHash всё равно ресайзит)
-            if max(image.size) > MAX_IMAGE_SIZE:
-                # Вычисляем коэффициент масштабирования
-                ratio = MAX_IMAGE_SIZE / max(image.size)
-                # Новые размеры с сохранением пропорций
-                new_size = (int(image.width * ratio), int(image.height * ratio))
-                # Ресайзим с высоким качеством
-                image = image.resize(new_size, Image.Resampling.LANCZOS)
-
-            # Вычисляем pHash (perceptual hash)
-            # pHash использует DCT для выделения низкочастотных компонент
-            phash = imagehash.phash(image, hash_size=self._hash_size)
-
-            # Вычисляем dHash (difference hash)
-            # dHash анализирует градиенты яркости между соседними пикселями
-            dhash = imagehash.dhash(image, hash_size=self._hash_size)
-
-            # Возвращаем хеши в hex формате (строки по 16 символов)
-            return ImageHashes(phash=str(phash), dhash=str(dhash))
+            # Открываем изображение и приводим к RGB/L
+            image = _open_image(image_data)
+            return self._hash_full(image)
 
         except Exception as e:
             # Логируем ошибку но не падаем - возвращаем None
             logger.warning(f"Ошибка вычисления хеша изображения: {e}")
             return None
 
+    def _hash_full(self, image: Image.Image) -> ImageHashes:
+        """
+        Вычисляет pHash и dHash для уже открытого изображения.
+
+        Args:
+            image: Изображение после _open_image
+
+        Returns:
+            ImageHashes с phash и dhash в hex формате
+        """
+        # Ресайзим большие изображения для экономии памяти
+        # Это не влияет на качество хеша (pHash всё равно ресайзит)
+        if max(image.size) > MAX_IMAGE_SIZE:
+            # Вычисляем коэффициент масштабирования
+            ratio = MAX_IMAGE_SIZE / max(image.size)
+            # Новые размеры с сохранением пропорций
+            new_size = (int(image.width * ratio), int(image.height * ratio))
+            # Ресайзим с высоким качеством
+            image = image.resize(new_size, Image.Resampling.LANCZOS)
+
+        # Вычисляем pHash (perceptual hash)
+        # pHash использует DCT для выделения низкочастотных компонент
+        phash = imagehash.phash(image, hash_size=self._hash_size)
+
+        # Вычисляем dHash (difference hash)
+        # dHash анализирует градиенты яркости между соседними пикселями
+        dhash = imagehash.dhash(image, hash_size=self._hash_size)
+
+        # Возвращаем хеши в hex формате (строки по 16 символов)
+        return ImageHashes(phash=str(phash), dhash=str(dhash))
+
     def compare(self, hash1: str, hash2: str) -> int:
         """
         Вычисляет расстояние Хэмминга между двумя хешами.
@@ -261,47 +321,93 @@ class HashService:
                 logger.warning(f"Неизвестный регион: {region}")
                 return None
 
-            # Открываем изображение
-            image = Image.open(BytesIO(image_data))
-
-            # Конвертируем в RGB если нужно
-            if image.mode not in ('RGB', 'L'):
-                background = Image.new('RGB', image.size, (255, 255, 255))
-                if image.mode == 'RGBA':
-                    background.paste(image, mask=image.split()[3])
-                else:
-                    background.paste(image)
-                image = background
-
-            # Получаем координаты региона в процентах
-            left_pct, top_pct, right_pct, bottom_pct = LOGO_REGIONS[region]
-
-            # Преобразуем проценты в пиксели
-            width, height = image.size
-            left = int(width * left_pct)
-            top = int(height * top_pct)
-            right = int(width * right_pct)
-            bottom = int(height * bottom_pct)
-
-            # Вырезаем область
-            # crop() принимает (left, upper, right, lower)
-            cropped = image.crop((left, top, right, bottom))
-
-            # Проверяем что область достаточно большая
-            if cropped.width < 32 or cropped.height < 32:
-                logger.warning(f"Область слишком маленькая: {cropped.size}")
-                return None
-
-            # Вычисляем хеши для области
-            phash = imagehash.phash(cropped, hash_size=self._hash_size)
-            dhash = imagehash.dhash(cropped, hash_size=self._hash_size)
-
-            return ImageHashes(phash=str(phash), dhash=str(dhash))
+            # Открываем изображение и приводим к RGB/L
+            image = _open_image(image_data)
+            return self._hash_region(image, region)
 
         except Exception as e:
             logger.warning(f"Ошибка вычисления хеша области {region}: {e}")
             return None
 
+    def _hash_region(self, image: Image.Image, region: str) -> Optional[ImageHashes]:
+        """
+        Вычисляет хеш области уже открытого изображения.
+
+        Args:
+            image: Изображение после _open_image (без ресайза)
+            region: Название региона из LOGO_REGIONS
+
+        Returns:
+            ImageHashes для области или None если область мала
+        """
+        # Получаем координаты региона в процентах
+        left_pct, top_pct, right_pct, bottom_pct = LOGO_REGIONS[region]
+
+        # Преобразуем проценты в пиксели
+        width, height = image.size
+        left = int(width * left_pct)
+        top = int(height * top_pct)
+        right = int(width * right_pct)
+        bottom = int(height * bottom_pct)
+
+        # Вырезаем область
+        # crop() принимает (left, upper, right, lower)
+        cropped = image.crop((left, top, right, bottom))
+
+        # Проверяем что область достаточно большая
+        if cropped.width < 32 or cropped.height < 32:
+            logger.warning(f"Область слишком маленькая: {cropped.size}")
+            return None
+
+        # Вычисляем хеши для области
+        phash = imagehash.phash(cropped, hash_size=self._hash_size)
+        dhash = imagehash.dhash(cropped, hash_size=self._hash_size)
+
+        return ImageHashes(phash=str(phash), dhash=str(dhash))
+
+    def compute_hashes(
+        self,
+        image_data: bytes,
+        regions: Iterable[str] = ()
+    ) -> Tuple[Optional[ImageHashes], Dict[str, ImageHashes]]:
+        """
+        Вычисляет хеш всего изображения и хеши нужных регионов
+        за одно декодирование.
+
+        Args:
+            image_data: Байты изображения
+            regions: Регионы лого (каждый считается один раз)
+
+        Returns:
+            (хеш всего изображения или None, {region: ImageHashes})
+            Регионы с ошибками не включаются
+        """
+        try:
+            image = _open_image(image_data)
+        except Exception as e:
+            logger.warning(f"Ошибка вычисления хеша изображения: {e}")
+            return None, {}
+
+        try:
+            full = self._hash_full(image)
+        except Exception as e:
+            logger.warning(f"Ошибка вычисления хеша изображения: {e}")
+            full = None
+
+        region_hashes = {}
+        for region in set(regions):
+            if region not in LOGO_REGIONS:
+                logger.warning(f"Неизвестный регион: {region}")
+                continue
+            try:
+                hashes = self._hash_region(image, region)
+            except Exception as e:
+                logger.warning(f"Ошибка вычисления хеша области {region}: {e}")
+                continue
+            if hashes is not None:
+                region_hashes[region] = hashes
+        return full, region_hashes
+
     def compute_all_region_hashes(
         self,
         image_data: bytes
@@ -405,4 +511,82 @@ def get_available_logo_regions() -> list[str]:
         ['top_left', 'top_right', 'bottom_left', 'bottom_right',
          'top_center', 'bottom_center']
     """
-    return list(LOGO_REGIONS.keys())
\ No newline at end of file
+    return list(LOGO_REGIONS.keys())
+
+
+# ============================================================
+# ВЫЧИСЛЕНИЕ ХЕШЕЙ ВНЕ EVENT LOOP
+# ============================================================
+# Декодирование PIL и DCT занимают десятки миллисекунд CPU на фото.
+# В группах с большим потоком фото это блокировало event loop,
+# поэтому на пути обработки сообщений хеши считаются в пуле процессов.
+
+# Пул процессов (создаётся при первом использовании)
+_executor: Optional[ProcessPoolExecutor] = None
+# Количество процессов (0 = считать в потоке, без отдельных процессов)
+_executor_workers: int = 2
+
+
+def configure_hash_executor(workers: int) -> None:
+    """
+    Задаёт количество процессов для вычисления хешей.
+
+    Args:
+        workers: Количество процессов (0 = вычислять в потоке)
+    """
+    global _executor_workers
+    _executor_workers = workers
+
+
+def _get_executor() -> Optional[ProcessPoolExecutor]:
+    """Возвращает пул процессов (None если пул отключён)."""
+    global _executor
+    if _executor_workers <= 0:
+        return None
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=_executor_workers)
+    return _executor
+
+
+def _compute_hashes_job(
+    image_data: bytes,
+    regions: Tuple[str, ...]
+) -> Tuple[Optional[ImageHashes], Dict[str, ImageHashes]]:
+    """Задача для пула процессов (функция модуля — должна сериализоваться)."""
+    return _hash_service.compute_hashes(image_data, regions)
+
+
+async def compute_hashes_off_loop(
+    image_data: bytes,
+    regions: Iterable[str] = ()
+) -> Tuple[Optional[ImageHashes], Dict[str, ImageHashes]]:
+    """
+    Вычисляет хеш изображения и хеши регионов вне event loop.
+
+    Args:
+        image_data: Байты изображения
+        regions: Регионы лого (каждый считается один раз)
+
+    Returns:
+        (хеш всего изображения или None, {region: ImageHashes})
+    """
+    global _executor
+    loop = asyncio.get_running_loop()
+    regions = tuple(sorted(set(regions)))
+    executor = _get_executor()
+    if executor is not None:
+        try:
+            return await loop.run_in_executor(executor, _compute_hashes_job, image_data, regions)
+        except BrokenProcessPool as e:
+            # Процесс пула упал (OOM и т.п.) — пересоздадим пул при следующем вызове
+            logger.warning(f"Пул хеширования недоступен, считаем в потоке: {e}")
+            _executor = None
+    return await asyncio.to_thread(_compute_hashes_job, image_data, regions)
+
+
+def shutdown_hash_executor() -> None:
+    """Останавливает пул процессов (вызывается при остановке бота)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,261 @@
+# ============================================================
+# КЭШ ХЕШЕЙ И ВЕРДИКТОВ ПО file_unique_id
+# ============================================================
+# Волна спама — это одна и та же картинка, разосланная заново:
+# у неё тот же file_unique_id. Раньше каждое повторение заново
+# скачивалось (get_file + download_file) и хешировалось.
+#
+# Теперь по file_unique_id в Redis хранятся:
+# - хеш всего изображения и хеши регионов лого (не зависят от группы)
+# - вердикт для группы (совпадение / нет) с версией набора хешей
+#
+# Повтор картинки не требует ни скачивания, ни хеширования.
+# Вердикт действителен, только пока не изменились запрещённые хеши
+# (BannedHashService увеличивает версию) и настройки группы
+# (порог и use_global_hashes сохраняются вместе с вердиктом).
+# Индекс других реплик бота догоняет БД раз в INDEX_TTL, поэтому
+# вердикт живёт не дольше INDEX_TTL; хеши — до MEDIA_TTL.
+#
+# Redis ключи:
+# - scam_media:fu:{file_unique_id} — HASH full / r:{region} / v:{chat_id}
+# - scam_media:hashes_version — версия набора запрещённых хешей
+# ============================================================
+
+# Импорт для логирования
+import logging
+# Импорт time для возраста вердикта
+import time
+# Импорт для аннотации типов
+from typing import Dict, NamedTuple, Optional
+
+# Импорт Redis клиента
+from redis.asyncio import Redis
+
+# Импорт типа пары хешей
+from .hash_service import ImageHashes
+# Импорт интервала перезагрузки индекса
+from .hash_index import INDEX_TTL
+
+
+# ============================================================
+# НАСТРОЙКА ЛОГИРОВАНИЯ
+# ============================================================
+# Создаём логгер для этого модуля
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# КОНСТАНТЫ
+# ============================================================
+# Ключ записи по file_unique_id
+MEDIA_KEY = "scam_media:fu:{file_unique_id}"
+# Ключ версии набора запрещённых хешей
+VERSION_KEY = "scam_media:hashes_version"
+# Время жизни записи (продлевается при каждой записи)
+MEDIA_TTL: int = 24 * 60 * 60
+# Время жизни вердикта группы
+VERDICT_TTL: int = INDEX_TTL
+
+
+# ============================================================
+# ТИПЫ ДАННЫХ
+# ============================================================
+class CachedVerdict(NamedTuple):
+    """
+    Вердикт проверки картинки в группе.
+
+    Attributes:
+        hash_id: ID сработавшего хеша (None = совпадения нет)
+        distance: Расстояние Хэмминга
+    """
+    hash_id: Optional[int]
+    distance: int
+
+
+class CachedMedia(NamedTuple):
+    """
+    Данные кэша по file_unique_id.
+
+    Attributes:
+        version: Версия набора хешей на момент чтения
+        image_hashes: Хеш всего изображения (None = не в кэше)
+        region_hashes: Хеши регионов; None у региона — область слишком мала
+        verdict: Сырой вердикт группы
+            "версия:порог:глобальные:hash_id:расстояние:время"
+    """
+    version: int
+    image_hashes: Optional[ImageHashes]
+    region_hashes: Dict[str, Optional[ImageHashes]]
+    verdict: Optional[str]
+
+    def has_regions(self, regions) -> bool:
+        """Посчитаны ли все нужные регионы."""
+        return all(region in self.region_hashes for region in regions)
+
+    def verdict_for(self, threshold: int, include_global: bool) -> Optional[CachedVerdict]:
+        """
+        Вердикт, если он посчитан для текущих хешей и настроек группы.
+
+        Returns:
+            CachedVerdict или None если вердикта нет или он устарел
+        """
+        if not self.verdict:
+            return None
+        try:
+            version, cached_threshold, cached_global, hash_id, distance, created = (
+                int(part) for part in self.verdict.split(":")
+            )
+        except ValueError:
+            return None
+        if (version, cached_threshold, bool(cached_global)) != (self.version, threshold, include_global):
+            return None
+        if time.time() - created > VERDICT_TTL:
+            return None
+        return CachedVerdict(hash_id=hash_id or None, distance=distance)
+
+
+def _pack_hashes(hashes: Optional[ImageHashes]) -> str:
+    """ImageHashes -> "phash:dhash" (пустая строка = хеша нет)."""
+    if hashes is None:
+        return ""
+    return f"{hashes.phash}:{hashes.dhash}"
+
+
+def _unpack_hashes(raw: str) -> Optional[ImageHashes]:
+    """"phash:dhash" -> ImageHashes."""
+    if not raw:
+        return None
+    phash, _, dhash = raw.partition(":")
+    return ImageHashes(phash=phash, dhash=dhash)
+
+
+# ============================================================
+# КЭШ
+# ============================================================
+class MediaVerdictCache:
+    """
+    Хеши и вердикты картинок по file_unique_id.
+
+    Ошибки Redis не прерывают проверку: кэш просто считается пустым.
+    """
+
+    def __init__(self, redis: Optional[Redis], ttl: int = MEDIA_TTL) -> None:
+        """
+        Args:
+            redis: Клиент Redis (None = кэш отключён)
+            ttl: Время жизни записи (секунды)
+        """
+        self._redis = redis
+        self._ttl = ttl
+
+    async def lookup(self, file_unique_id: str, chat_id: int) -> Optional[CachedMedia]:
+        """
+        Читает хеши и вердикт группы одним запросом.
+
+        Args:
+            file_unique_id: Уникальный ID файла Telegram
+            chat_id: ID группы
+
+        Returns:
+            CachedMedia или None если Redis недоступен
+        """
+        if self._redis is None:
+            return None
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.get(VERSION_KEY)
+                pipe.hgetall(MEDIA_KEY.format(file_unique_id=file_unique_id))
+                version, fields = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"[ScamMediaCache] Ошибка чтения кэша: {e}")
+            return None
+
+        region_hashes = {
+            field[2:]: _unpack_hashes(value)
+            for field, value in fields.items()
+            if field.startswith("r:")
+        }
+        return CachedMedia(
+            version=int(version or 0),
+            image_hashes=_unpack_hashes(fields.get("full", "")),
+            region_hashes=region_hashes,
+            verdict=fields.get(f"v:{chat_id}"),
+        )
+
+    async def store(
+        self,
+        file_unique_id: str,
+        image_hashes: Optional[ImageHashes] = None,
+        region_hashes: Optional[Dict[str, Optional[ImageHashes]]] = None,
+        chat_id: Optional[int] = None,
+        verdict: Optional[CachedVerdict] = None,
+        version: int = 0,
+        threshold: int = 0,
+        include_global: bool = False
+    ) -> None:
+        """
+        Сохраняет хеши и/или вердикт группы.
+
+        Args:
+            file_unique_id: Уникальный ID файла Telegram
+            image_hashes: Хеш всего изображения
+            region_hashes: Посчитанные регионы (None у региона — область мала)
+            chat_id: ID группы (для вердикта)
+            verdict: Вердикт проверки
+            version: Версия набора хешей, с которой считался вердикт
+            threshold: Порог группы
+            include_global: use_global_hashes группы
+        """
+        if self._redis is None:
+            return
+        mapping = {}
+        if image_hashes is not None:
+            mapping["full"] = _pack_hashes(image_hashes)
+        for region, hashes in (region_hashes or {}).items():
+            mapping[f"r:{region}"] = _pack_hashes(hashes)
+        if verdict is not None and chat_id is not None:
+            mapping[f"v:{chat_id}"] = (
+                f"{version}:{threshold}:{int(include_global)}:"
+                f"{verdict.hash_id or 0}:{verdict.distance}:{int(time.time())}"
+            )
+        if not mapping:
+            return
+
+        key = MEDIA_KEY.format(file_unique_id=file_unique_id)
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.hset(key, mapping=mapping)
+                pipe.expire(key, self._ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"[ScamMediaCache] Ошибка записи кэша: {e}")
+
+    async def bump_version(self) -> None:
+        """Делает недействительными все вердикты (изменились запрещённые хеши)."""
+        if self._redis is None:
+            return
+        try:
+            await self._redis.incr(VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"[ScamMediaCache] Не удалось обновить версию хешей: {e}")
+
+
+# ============================================================
+# ГЛОБАЛЬНЫЙ ЭКЗЕМПЛЯР
+# ============================================================
+_media_verdict_cache: Optional[MediaVerdictCache] = None
+
+
+def get_media_verdict_cache() -> MediaVerdictCache:
+    """
+    Возвращает глобальный кэш хешей и вердиктов.
+
+    Returns:
+        Экземпляр MediaVerdictCache
+    """
+    global _media_verdict_cache
+    if _media_verdict_cache is None:
+        # Lazy import: общий Redis бота
+        from bot.services.redis_conn import redis
+        _media_verdict_cache = MediaVerdictCache(redis)
+    return _media_verdict_cache
@@ -0,0 +1,376 @@
+# ============================================================
+# SETTINGS CACHE - КЭШ НАСТРОЕК ГРУПП ДЛЯ ОБРАБОТКИ СООБЩЕНИЙ
+# ============================================================
+# Раньше одно сообщение в группе делало отдельный SELECT на:
+# - ContentFilterSettings, ScamMediaSettings, AntiSpamRule
+# - ProfileMonitorSettings, CrossGroupScammerSettings (+ исключения)
+# - канал журнала группы, TTL предупреждений антиспама (ChatSettings)
+#
+# Теперь горячий путь читает настройки через этот кэш:
+#   settings = await get_settings_cache().get_or_load(
+#       'content_filter', chat_id, lambda: self._get_settings(chat_id, session)
+#   )
+#
+# Как кэш узнаёт об изменениях:
+# - SQLAlchemy события (after_flush / do_orm_execute) собирают
+#   изменённые строки кэшируемых моделей в рамках сессии
+#   (модели модулей регистрируются через register_cached_model)
+# - после COMMIT записи сбрасываются локально и публикуется
+#   сообщение в Redis канал settings_changed
+# - другие реплики бота слушают канал и сбрасывают у себя
+# - TTL — страховка на случай потерянного сообщения pub/sub
+#
+# Поэтому хендлеры настроек и settings_export.import_group_settings
+# не вызывают инвалидацию вручную — достаточно закоммитить.
+#
+# Версии: каждый сброс увеличивает версию (kind, chat_id);
+# загрузка, начатая до сброса, не записывает устаревший результат.
+# ============================================================
+
+# Импортируем asyncio для фоновых задач
+import asyncio
+# Импортируем json для сообщений pub/sub
+import json
+# Импортируем логгер
+import logging
+# Импортируем time для TTL
+import time
+# Импортируем uuid для идентификатора реплики
+import uuid
+# Импортируем типы для аннотаций
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+# Импортируем SQLAlchemy события и сессию
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.orm import Session
+# Импортируем Redis для pub/sub
+from redis.asyncio import Redis
+
+# Импортируем базовые кэшируемые модели
+# (модели модулей регистрируются их сервисами через register_cached_model)
+from bot.database.models import ChatSettings, GroupJournalChannel
+
+# Создаём логгер
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# КОНСТАНТЫ
+# ============================================================
+
+# Канал Redis для уведомлений об изменении настроек
+SETTINGS_CHANGED_CHANNEL = "settings_changed"
+
+# TTL записи в кэше (секунды) — страховка от потерянных уведомлений
+DEFAULT_TTL = 300
+
+# Пауза перед переподключением к pub/sub (секунды)
+RECONNECT_DELAY = 5
+
+# chat_id для глобальных (не групповых) настроек
+GLOBAL_CHAT_ID = 0
+
+# Модель → (вид настроек, колонка с ID группы)
+# Колонка None = глобальные настройки (одна запись на бота)
+CACHED_MODELS = {
+    GroupJournalChannel: ('journal_channel', 'group_id'),
+    ChatSettings: ('chat_settings', 'chat_id'),
+}
+
+# Ключ в session.info для изменений, ожидающих COMMIT
+_PENDING_KEY = '_settings_cache_changes'
+
+
+def register_cached_model(model, kind: str, chat_column: Optional[str] = 'chat_id') -> None:
+    """
+    Регистрирует модель настроек: её изменения сбрасывают кэш вида kind.
+    Вызывается сервисом модуля при импорте (рядом с функциями чтения).
+
+    Args:
+        model: SQLAlchemy модель
+        kind: Вид настроек (ключ кэша)
+        chat_column: Колонка с ID группы (None = глобальные настройки)
+    """
+    CACHED_MODELS[model] = (kind, chat_column)
+
+
+def snapshot(obj: Any) -> Any:
+    """
+    Создаёт отсоединённую копию ORM объекта (только колонки).
+
+    Копия — transient экземпляр той же модели: методы и isinstance
+    работают, но объект не привязан ни к одной сессии и не
+    загружает связи. Скаляры и None возвращаются как есть.
+    """
+    if obj is None or type(obj) not in CACHED_MODELS:
+        return obj
+    mapper = sa_inspect(type(obj))
+    values = {attr.key: getattr(obj, attr.key) for attr in mapper.column_attrs}
+    return type(obj)(**values)
+
+
+# ============================================================
+# КЭШ
+# ============================================================
+
+class SettingsCache:
+    """
+    Read-through кэш настроек с версиями и инвалидацией через pub/sub.
+
+    Записи хранятся по (kind, chat_id) и дополнительному ключу
+    (например, тип правила антиспама).
+    """
+
+    def __init__(self, ttl: int = DEFAULT_TTL, redis: Optional[Redis] = None):
+        """
+        Args:
+            ttl: Время жизни записи (секунды)
+            redis: Клиент Redis для pub/sub (None = только эта реплика)
+        """
+        self._ttl = ttl
+        self._redis = redis
+        # ID реплики: свои же уведомления из канала игнорируем
+        self.instance_id = uuid.uuid4().hex
+
+        # (kind, chat_id) → {extra: (время истечения, значение)}
+        self._entries: Dict[Tuple[str, int], Dict[Any, Tuple[float, Any]]] = {}
+        # Версии (kind, chat_id) и kind целиком
+        self._versions: Dict[Tuple[str, int], int] = {}
+        self._kind_versions: Dict[str, int] = {}
+
+        # Задача подписки на канал
+        self._listener_task: Optional[asyncio.Task] = None
+
+        # Статистика
+        self.hits = 0
+        self.misses = 0
+
+    # ─────────────────────────────────────────────────────────
+    # ЧТЕНИЕ
+    # ─────────────────────────────────────────────────────────
+
+    async def get_or_load(
+        self,
+        kind: str,
+        chat_id: int,
+        loader: Callable[[], Awaitable[Any]],
+        extra: Any = None
+    ) -> Any:
+        """
+        Возвращает настройки из кэша или загружает через loader.
+
+        Args:
+            kind: Вид настроек (см. CACHED_MODELS)
+            chat_id: ID группы (GLOBAL_CHAT_ID для глобальных)
+            loader: Корутина-фабрика загрузки из БД
+            extra: Дополнительный ключ (например, тип правила)
+
+        Returns:
+            Отсоединённая копия настроек, скаляр или None
+        """
+        key = (kind, chat_id)
+        entry = self._entries.get(key, {}).get(extra)
+        if entry is not None and entry[0] >= time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        version = self._version(key)
+        value = snapshot(await loader())
+
+        # Пока грузили, настройки могли измениться — не кэшируем устаревшее
+        if self._version(key) == version:
+            self._entries.setdefault(key, {})[extra] = (time.monotonic() + self._ttl, value)
+        return value
+
+    def _version(self, key: Tuple[str, int]) -> Tuple[int, int]:
+        return self._versions.get(key, 0), self._kind_versions.get(key[0], 0)
+
+    # ─────────────────────────────────────────────────────────
+    # ИНВАЛИДАЦИЯ
+    # ─────────────────────────────────────────────────────────
+
+    def invalidate_local(self, kind: str, chat_id: Optional[int] = None) -> None:
+        """
+        Сбрасывает записи в этой реплике.
+
+        Args:
+            kind: Вид настроек
+            chat_id: ID группы (None = все группы этого вида)
+        """
+        if chat_id is None:
+            self._kind_versions[kind] = self._kind_versions.get(kind, 0) + 1
+            for key in [key for key in self._entries if key[0] == kind]:
+                del self._entries[key]
+        else:
+            key = (kind, chat_id)
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._entries.pop(key, None)
+
+    async def invalidate(self, kind: str, chat_id: Optional[int] = None) -> None:
+        """Сбрасывает записи локально и уведомляет остальные реплики."""
+        self.invalidate_local(kind, chat_id)
+        await self._publish(kind, chat_id)
+
+    def clear(self) -> None:
+        """Полностью очищает кэш этой реплики."""
+        for kind, _ in CACHED_MODELS.values():
+            self._kind_versions[kind] = self._kind_versions.get(kind, 0) + 1
+        self._entries.clear()
+
+    def set_redis(self, redis: Optional[Redis]) -> None:
+        """Устанавливает клиент Redis для pub/sub."""
+        self._redis = redis
+
+    # ─────────────────────────────────────────────────────────
+    # PUB/SUB
+    # ─────────────────────────────────────────────────────────
+
+    async def _publish(self, kind: str, chat_id: Optional[int]) -> None:
+        if self._redis is None:
+            return
+        try:
+            await self._redis.publish(
+                SETTINGS_CHANGED_CHANNEL,
+                json.dumps({'origin': self.instance_id, 'kind': kind, 'chat_id': chat_id})
+            )
+        except Exception as e:
+            logger.warning(f"[SettingsCache] Ошибка публикации {kind}:{chat_id}: {e}")
+
+    def handle_message(self, raw: str) -> None:
+        """Обрабатывает сообщение из канала settings_changed."""
+        try:
+            data = json.loads(raw)
+        except (TypeError, ValueError):
+            logger.warning(f"[SettingsCache] Некорректное сообщение: {raw!r}")
+            return
+        if data.get('origin') == self.instance_id:
+            return
+        self.invalidate_local(data.get('kind'), data.get('chat_id'))
+
+    async def _listen(self) -> None:
+        """Слушает канал и сбрасывает записи, изменённые другими репликами."""
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(SETTINGS_CHANGED_CHANNEL)
+                # Пока не были подписаны, могли пропустить изменения
+                self.clear()
+                async for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        self.handle_message(message.get('data'))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[SettingsCache] Потеряна подписка на {SETTINGS_CHANGED_CHANNEL}: {e}")
+                await asyncio.sleep(RECONNECT_DELAY)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def start(self, redis: Redis) -> None:
+        """Запускает подписку на канал settings_changed."""
+        self._redis = redis
+        if self._listener_task is None or self._listener_task.done():
+            self._listener_task = asyncio.create_task(self._listen())
+        logger.info(f"[SettingsCache] Подписка на {SETTINGS_CHANGED_CHANNEL} запущена")
+
+    async def stop(self) -> None:
+        """Останавливает подписку."""
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+
+
+# ============================================================
+# ГЛОБАЛЬНЫЙ ЭКЗЕМПЛЯР
+# ============================================================
+
+_settings_cache: Optional[SettingsCache] = None
+
+
+def get_settings_cache() -> SettingsCache:
+    """
+    Возвращает глобальный экземпляр кэша настроек.
+
+    Returns:
+        Экземпляр SettingsCache
+    """
+    global _settings_cache
+    if _settings_cache is None:
+        _settings_cache = SettingsCache()
+    return _settings_cache
+
+
+async def start_settings_cache(redis: Redis) -> None:
+    """Подключает кэш к Redis pub/sub (вызывается при старте бота)."""
+    await get_settings_cache().start(redis)
+
+
+async def stop_settings_cache() -> None:
+    """Отключает подписку (вызывается при остановке бота)."""
+    await get_settings_cache().stop()
+
+
+# ============================================================
+# SQLALCHEMY СОБЫТИЯ
+# ============================================================
+# Собираем изменения кэшируемых моделей в session.info и
+# сбрасываем кэш только после успешного COMMIT.
+
+def _pending(session: Session) -> Set[Tuple[str, Optional[int]]]:
+    return session.info.setdefault(_PENDING_KEY, set())
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session: Session, flush_context) -> None:
+    """Запоминает (kind, chat_id) добавленных/изменённых/удалённых строк."""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        spec = CACHED_MODELS.get(type(obj))
+        if spec is None:
+            continue
+        kind, chat_column = spec
+        # Читаем из state без lazy load; неизвестный chat_id = сброс всего вида
+        chat_id = sa_inspect(obj).dict.get(chat_column) if chat_column else GLOBAL_CHAT_ID
+        _pending(session).add((kind, chat_id))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk(orm_execute_state) -> None:
+    """Запоминает bulk UPDATE/DELETE/INSERT по кэшируемым моделям (весь вид)."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    mapper = orm_execute_state.bind_mapper
+    spec = CACHED_MODELS.get(mapper.class_) if mapper is not None else None
+    if spec is None:
+        return
+    kind, chat_column = spec
+    _pending(orm_execute_state.session).add((kind, None if chat_column else GLOBAL_CHAT_ID))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    """После COMMIT сбрасывает кэш и уведомляет остальные реплики."""
+    changes = session.info.pop(_PENDING_KEY, None)
+    if not changes:
+        return
+    cache = get_settings_cache()
+    for kind, chat_id in changes:
+        cache.invalidate_local(kind, chat_id)
+        try:
+            asyncio.get_running_loop().create_task(cache._publish(kind, chat_id))
+        except RuntimeError:
+            # Нет event loop (синхронный код, миграции) — публиковать некуда
+            pass
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    """Откат: изменений не было, сбрасывать нечего."""
+    session.info.pop(_PENDING_KEY, None)
@@ -91,6 +91,10 @@ from bot.database.models_manual_commands import (  # noqa: F401
     ManualCommandSettings,
 )
 
+# Кэши скомпилированных индексов разделов и слов (сбрасываем после импорта)
+from bot.services.content_filter.section_matcher import get_section_matcher_cache
+from bot.services.content_filter.word_index import get_word_index_cache
+
 # Создаём логгер для отслеживания операций экспорта/импорта
 logger = logging.getLogger(__name__)
 
@@ -617,6 +621,10 @@ async def import_group_settings(
     # Сохраняем изменения
     await session.commit()
 
+    # Импорт мог заменить разделы, паттерны и слова — сбрасываем скомпилированные индексы
+    get_section_matcher_cache().invalidate_chat(chat_id)
+    get_word_index_cache().invalidate_chat(chat_id)
+
     # Логируем завершение импорта
     total_imported = sum(stats.values())
     logger.info(f"📥 [IMPORT] Импорт завершён: {total_imported} записей в {len(stats)} таблиц")
@@ -0,0 +1,382 @@
+# ============================================================
+# TRIGGER COUNTERS - БУФЕР СЧЁТЧИКОВ СРАБАТЫВАНИЙ
+# ============================================================
+# Этот модуль копит счётчики срабатываний в памяти процесса
+# (или в Redis hash) и сбрасывает их в PostgreSQL пачкой.
+#
+# Раньше каждое срабатывание паттерна/хеша делало:
+#   UPDATE ... SET triggers_count = triggers_count + 1; COMMIT
+# Спам-волна с 8 паттернами на сообщение = 8 коммитов на сообщение
+# прямо на горячем пути обработки.
+#
+# Теперь:
+# - record(id) только увеличивает счётчик в буфере
+# - flush() пишет все накопленные счётчики ОДНИМ bulk UPDATE
+# - flush вызывается по интервалу, по размеру буфера и при остановке бота
+#
+# Используется для:
+# - CustomSectionPattern.triggers_count / last_triggered_at
+# - ScamPattern.triggers_count / last_triggered_at
+# - BannedImageHash.matches_count / last_match_at
+# ============================================================
+
+# Импортируем asyncio для фоновой задачи и блокировки
+import asyncio
+# Импортируем логгер
+import logging
+# Импортируем time для времени срабатывания (epoch, без часового пояса)
+import time
+# Импортируем datetime для времени последнего срабатывания
+from datetime import datetime, timezone
+# Импортируем типы для аннотаций
+from typing import Dict, List, Optional, Tuple
+
+# Импортируем SQLAlchemy компоненты
+from sqlalchemy import case, update
+# Импортируем Redis для опционального хранения буфера
+from redis.asyncio import Redis
+
+# Импортируем модели со счётчиками
+from bot.database.models_content_filter import CustomSectionPattern, ScamPattern
+from bot.database.models_scam_media import BannedImageHash
+# Импортируем фабрику сессий (сброс идёт в отдельной сессии, не в сессии апдейта)
+from bot.database.session import get_session
+
+# Создаём логгер
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# КОНСТАНТЫ
+# ============================================================
+
+# Интервал фонового сброса в секундах
+DEFAULT_FLUSH_INTERVAL = 30
+
+# Сбрасываем досрочно когда накопилось столько срабатываний
+DEFAULT_FLUSH_SIZE = 500
+
+# Префикс ключей Redis: trigger_counters:{name}:counts / :last
+REDIS_KEY_PREFIX = "trigger_counters"
+
+
+def _utc_naive(timestamp: float) -> datetime:
+    """UTC время без tzinfo (колонки DateTime без timezone) из epoch."""
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).replace(tzinfo=None)
+
+
+# ============================================================
+# БУФЕР СЧЁТЧИКОВ ОДНОЙ ТАБЛИЦЫ
+# ============================================================
+
+class TriggerCounterBuffer:
+    """
+    Буфер счётчиков срабатываний для одной таблицы.
+
+    Хранит агрегат (id → количество, время последнего срабатывания)
+    и сбрасывает его в БД одним UPDATE с CASE по id.
+
+    Пример использования:
+        buffer = TriggerCounterBuffer(
+            name='section_patterns',
+            model=CustomSectionPattern,
+            counter_column='triggers_count',
+            timestamp_column='last_triggered_at'
+        )
+        await buffer.record(pattern_id)
+        await buffer.flush()
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model,
+        counter_column: str,
+        timestamp_column: str,
+        flush_size: int = DEFAULT_FLUSH_SIZE,
+        redis: Optional[Redis] = None
+    ):
+        """
+        Args:
+            name: Имя буфера (для логов и ключей Redis)
+            model: SQLAlchemy модель со счётчиком
+            counter_column: Имя колонки счётчика
+            timestamp_column: Имя колонки времени последнего срабатывания
+            flush_size: Досрочный сброс при таком числе срабатываний
+            redis: Клиент Redis (None = буфер в памяти процесса)
+        """
+        self.name = name
+        self._model = model
+        self._counter_column = counter_column
+        self._timestamp_column = timestamp_column
+        self._flush_size = flush_size
+        self._redis = redis
+
+        # Буфер в памяти: id → (количество, последнее срабатывание)
+        self._pending: Dict[int, Tuple[int, datetime]] = {}
+        # Сколько срабатываний записано с последнего сброса
+        self._recorded_since_flush = 0
+        # Блокировка: один сброс за раз
+        self._flush_lock = asyncio.Lock()
+        # Задача досрочного сброса (чтобы не запускать несколько)
+        self._size_flush_task: Optional[asyncio.Task] = None
+
+    # ─────────────────────────────────────────────────────────
+    # КЛЮЧИ REDIS
+    # ─────────────────────────────────────────────────────────
+
+    @property
+    def _counts_key(self) -> str:
+        return f"{REDIS_KEY_PREFIX}:{self.name}:counts"
+
+    @property
+    def _last_key(self) -> str:
+        return f"{REDIS_KEY_PREFIX}:{self.name}:last"
+
+    def set_redis(self, redis: Optional[Redis]) -> None:
+        """Переключает буфер на Redis hash (None = память процесса)."""
+        self._redis = redis
+
+    def set_flush_size(self, flush_size: int) -> None:
+        """Меняет порог досрочного сброса (число срабатываний в буфере)."""
+        self._flush_size = flush_size
+
+    # ─────────────────────────────────────────────────────────
+    # ЗАПИСЬ СРАБАТЫВАНИЯ
+    # ─────────────────────────────────────────────────────────
+
+    async def record(self, item_id: int) -> None:
+        """
+        Записывает одно срабатывание в буфер.
+
+        Args:
+            item_id: ID записи (паттерна/хеша)
+        """
+        # В Redis — epoch секунды: не зависят от часового пояса процесса
+        now = time.time()
+
+        if self._redis is not None:
+            try:
+                # Один round trip без транзакции БД
+                pipe = self._redis.pipeline(transaction=False)
+                pipe.hincrby(self._counts_key, item_id, 1)
+                pipe.hset(self._last_key, item_id, now)
+                await pipe.execute()
+            except Exception as e:
+                # Redis недоступен — не теряем срабатывание, копим в памяти
+                logger.warning(f"[TriggerCounters:{self.name}] Ошибка записи в Redis: {e}")
+                self._add_pending(item_id, 1, _utc_naive(now))
+        else:
+            self._add_pending(item_id, 1, _utc_naive(now))
+
+        # Досрочный сброс при большом количестве срабатываний
+        self._recorded_since_flush += 1
+        if self._recorded_since_flush >= self._flush_size:
+            if self._size_flush_task is None or self._size_flush_task.done():
+                self._size_flush_task = asyncio.create_task(self.flush())
+
+    def _add_pending(self, item_id: int, count: int, last_at: datetime) -> None:
+        """Добавляет срабатывания в буфер в памяти."""
+        old_count, old_last = self._pending.get(item_id, (0, last_at))
+        self._pending[item_id] = (old_count + count, max(old_last, last_at))
+
+    # ─────────────────────────────────────────────────────────
+    # СБРОС В БД
+    # ─────────────────────────────────────────────────────────
+
+    async def flush(self) -> int:
+        """
+        Сбрасывает накопленные счётчики в БД одним UPDATE.
+
+        Returns:
+            Количество обновлённых записей (id)
+        """
+        async with self._flush_lock:
+            self._recorded_since_flush = 0
+
+            # Забираем буфер из памяти
+            batch = self._pending
+            self._pending = {}
+
+            # Забираем буфер из Redis (атомарно через MULTI/EXEC)
+            if self._redis is not None:
+                try:
+                    for item_id, count, last_at in await self._take_from_redis():
+                        old_count, old_last = batch.get(item_id, (0, last_at))
+                        batch[item_id] = (old_count + count, max(old_last, last_at))
+                except Exception as e:
+                    logger.warning(f"[TriggerCounters:{self.name}] Ошибка чтения из Redis: {e}")
+
+            if not batch:
+                return 0
+
+            try:
+                await self._write_batch(batch)
+            except Exception as e:
+                # Не потеряли — вернём в буфер памяти, следующий сброс повторит
+                logger.error(f"[TriggerCounters:{self.name}] Ошибка сброса в БД: {e}")
+                for item_id, (count, last_at) in batch.items():
+                    self._add_pending(item_id, count, last_at)
+                return 0
+
+            logger.debug(
+                f"[TriggerCounters:{self.name}] Сброшено {len(batch)} счётчиков "
+                f"(+{sum(count for count, _ in batch.values())})"
+            )
+            return len(batch)
+
+    async def wait_size_flush(self) -> None:
+        """Дожидается досрочного сброса, запущенного из record()."""
+        task = self._size_flush_task
+        if task is not None and not task.done():
+            try:
+                await task
+            except Exception as e:
+                logger.error(f"[TriggerCounters:{self.name}] Ошибка досрочного сброса: {e}")
+
+    async def _take_from_redis(self) -> List[Tuple[int, int, datetime]]:
+        """Атомарно читает и очищает hash-и счётчиков в Redis."""
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.hgetall(self._counts_key)
+        pipe.hgetall(self._last_key)
+        pipe.delete(self._counts_key, self._last_key)
+        counts, lasts, _ = await pipe.execute()
+
+        items = []
+        for raw_id, raw_count in counts.items():
+            item_id = int(raw_id)
+            raw_last = lasts.get(raw_id)
+            last_at = _utc_naive(float(raw_last) if raw_last else time.time())
+            items.append((item_id, int(raw_count), last_at))
+        return items
+
+    async def _write_batch(self, batch: Dict[int, Tuple[int, datetime]]) -> None:
+        """
+        Пишет пачку счётчиков одним запросом:
+
+            UPDATE t SET
+                counter = counter + CASE id WHEN 1 THEN 3 WHEN 2 THEN 1 END,
+                last_at = CASE id WHEN 1 THEN ... WHEN 2 THEN ... END
+            WHERE id IN (1, 2)
+        """
+        model = self._model
+        counter = getattr(model, self._counter_column)
+        timestamp = getattr(model, self._timestamp_column)
+
+        query = update(model).where(
+            model.id.in_(list(batch.keys()))
+        ).values({
+            self._counter_column: counter + case(
+                {item_id: count for item_id, (count, _) in batch.items()},
+                value=model.id
+            ),
+            self._timestamp_column: case(
+                {item_id: last_at for item_id, (_, last_at) in batch.items()},
+                value=model.id,
+                else_=timestamp
+            )
+        }).execution_options(synchronize_session=False)
+
+        async with get_session() as session:
+            await session.execute(query)
+            await session.commit()
+
+
+# ============================================================
+# ГЛОБАЛЬНЫЕ БУФЕРЫ
+# ============================================================
+
+# Паттерны кастомных разделов
+section_pattern_counter = TriggerCounterBuffer(
+    name='section_patterns',
+    model=CustomSectionPattern,
+    counter_column='triggers_count',
+    timestamp_column='last_triggered_at'
+)
+
+# Кастомные паттерны скама
+scam_pattern_counter = TriggerCounterBuffer(
+    name='scam_patterns',
+    model=ScamPattern,
+    counter_column='triggers_count',
+    timestamp_column='last_triggered_at'
+)
+
+# Забаненные хеши изображений
+banned_hash_counter = TriggerCounterBuffer(
+    name='banned_hashes',
+    model=BannedImageHash,
+    counter_column='matches_count',
+    timestamp_column='last_match_at'
+)
+
+ALL_COUNTERS = (section_pattern_counter, scam_pattern_counter, banned_hash_counter)
+
+
+# ============================================================
+# ФОНОВЫЙ СБРОС
+# ============================================================
+
+_flush_task: Optional[asyncio.Task] = None
+
+
+async def flush_all_counters() -> None:
+    """Сбрасывает все буферы в БД."""
+    for counter in ALL_COUNTERS:
+        await counter.flush()
+
+
+async def _flush_loop(interval: int) -> None:
+    """Периодически сбрасывает все буферы."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await flush_all_counters()
+        except Exception as e:
+            logger.error(f"[TriggerCounters] Ошибка периодического сброса: {e}")
+
+
+async def start_trigger_counters(
+    redis: Optional[Redis] = None,
+    flush_interval: int = DEFAULT_FLUSH_INTERVAL,
+    flush_size: int = DEFAULT_FLUSH_SIZE
+) -> None:
+    """
+    Запускает фоновый сброс счётчиков.
+
+    Args:
+        redis: Клиент Redis для хранения буфера (None = память процесса)
+        flush_interval: Интервал сброса в секундах
+        flush_size: Досрочный сброс при таком числе срабатываний
+    """
+    global _flush_task
+    for counter in ALL_COUNTERS:
+        counter.set_redis(redis)
+        counter.set_flush_size(flush_size)
+
+    if _flush_task is None or _flush_task.done():
+        _flush_task = asyncio.create_task(_flush_loop(flush_interval))
+
+    logger.info(
+        f"[TriggerCounters] Запущен сброс счётчиков: интервал={flush_interval}с, "
+        f"размер={flush_size}, хранилище={'redis' if redis is not None else 'memory'}"
+    )
+
+
+async def stop_trigger_counters() -> None:
+    """Останавливает фоновый сброс и сбрасывает остатки в БД."""
+    global _flush_task
+    if _flush_task is not None:
+        _flush_task.cancel()
+        try:
+            await _flush_task
+        except asyncio.CancelledError:
+            pass
+        _flush_task = None
+
+    # Досрочный сброс мог ещё идти — дожидаемся, чтобы не оборвать его
+    for counter in ALL_COUNTERS:
+        await counter.wait_size_flush()
+
+    await flush_all_counters()
+    logger.info("[TriggerCounters] Счётчики сброшены при остановке")
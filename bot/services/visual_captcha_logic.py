@@ -3,18 +3,17 @@ import asyncio
 import random
 import logging
 import re
-from io import BytesIO
 from typing import Dict, Optional, Any, Tuple
 
 from aiogram import Bot
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, BufferedInputFile, Chat, Message, CallbackQuery, ChatJoinRequest
 from aiogram.utils.deep_linking import create_start_link
-from PIL import Image, ImageDraw, ImageFont
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 
 from bot.services.redis_conn import redis
+from bot.services.job_scheduler import register_job_handler, schedule_delete_message, schedule_job
 import inspect
 
 
@@ -32,58 +31,12 @@ from bot.services.restriction_service import check_and_restore_restriction
 
 logger = logging.getLogger(__name__)
 
-# БАГ #14 ФИКС: Кэширование шрифтов
-_FONT_CACHE = None
-
-def _load_fonts_cached():
-    """БАГ #14: Загружает шрифты один раз и кэширует результат"""
-    global _FONT_CACHE
-    if _FONT_CACHE is not None:
-        logger.debug("✅ Используем кэшированные шрифты")
-        return _FONT_CACHE
-    
-    # БАГ #14: Оптимизируем порядок проверки для Windows
-    font_paths = [
-        "C:\\Windows\\Fonts\\arial.ttf",  # Windows первым (раз бот на Windows)
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
-        "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
-        "/System/Library/Fonts/Arial.ttf",  # macOS
-        "arial.ttf",
-        "Arial.ttf"
-    ]
-    
-    fonts = []
-    logger.info(f"🔍 [FONT_LOAD] Загрузка шрифтов из {len(font_paths)} путей")
-    
-    for i, path in enumerate(font_paths):
-        try:
-            fonts = [ImageFont.truetype(path, size) for size in (120, 130, 140, 150)]
-            logger.info(f"✅ [FONT_LOAD] Успешно загружен шрифт: {path}")
-            _FONT_CACHE = fonts
-            return fonts
-        except (IOError, OSError):
-            continue
-    
-    # Fallback на стандартный шрифт
-    logger.warning("⚠️ [FONT_LOAD] Не удалось загрузить системные шрифты, используем стандартный")
-    default_font = ImageFont.load_default()
-    _FONT_CACHE = [default_font] * 4
-    return _FONT_CACHE
-
-
 async def generate_visual_captcha() -> Tuple[str, BufferedInputFile]:
-    """Генерация улучшенной визуальной капчи с защитой от ботов."""
-    width, height = 1200, 500  # Увеличиваем размер для более сложных искажений
-    img = Image.new("RGB", (width, height), color=(255, 255, 255))
-    d = ImageDraw.Draw(img)
-
-    # БАГ #14 ФИКС: Используем кэшированные шрифты вместо загрузки каждый раз
-    try:
-        fonts = _load_fonts_cached()
-    except Exception as e:
-        logger.error(f"Ошибка загрузки шрифтов: {e}")
-        fonts = [ImageFont.load_default()]
+    """Генерация улучшенной визуальной капчи с защитой от ботов.
 
+    Изображение рисуется в пуле процессов (render_service), шум и
+    искажения считаются массивами NumPy — event loop не блокируется.
+    """
     # Упрощаем капчу - делаем только простые и читаемые варианты
     captcha_type = random.choices(
         ["simple_number", "simple_math", "simple_text"], 
@@ -113,146 +66,12 @@ async def generate_visual_captcha() -> Tuple[str, BufferedInputFile]:
         answer = "".join(random.choice(chars) for _ in range(3))  # только 3 символа
         text_to_draw = answer
 
-    # Создаем сложный фон с градиентом
-    for y in range(height):
-        for x in range(width):
-            # Создаем градиент от белого к светло-серому
-            intensity = int(255 - (y / height) * 20)
-            img.putpixel((x, y), (intensity, intensity, intensity))
-
-    # Добавляем цветные полосы для усложнения
-    for _ in range(8):
-        y = random.randint(0, height - 1)  # Исправлено: height-1 вместо height
-        d.line([(0, y), (width, y)],
-               fill=(random.randint(200, 240), random.randint(200, 240), random.randint(200, 240)),
-               width=random.randint(2, 5))
-
-    # Сложные фоновые линии с разными углами
-    for _ in range(25):
-        x1, y1 = random.randint(0, width - 1), random.randint(0, height - 1)  # Исправлено
-        x2, y2 = random.randint(0, width - 1), random.randint(0, height - 1)  # Исправлено
-        # Разные цвета для линий
-        color = (random.randint(120, 200), random.randint(120, 200), random.randint(120, 200))
-        d.line([(x1, y1), (x2, y2)], fill=color, width=random.randint(1, 4))
-
-    # Увеличиваем количество точечного шума
-    for _ in range(1500):
-        x = random.randint(0, width - 1)  # Исправлено: width-1 вместо width
-        y = random.randint(0, height - 1)  # Исправлено: height-1 вместо height
-        color = (random.randint(200, 255), random.randint(200, 255), random.randint(200, 255))
-        img.putpixel((x, y), color)
-
-    # Добавляем более сложные кривые линии
-    for _ in range(5):
-        points = []
-        for i in range(8):
-            x = i * width // 7
-            y = random.randint(height // 3, 2 * height // 3)
-            points.append((x, y))
-        color = (random.randint(170, 230), random.randint(170, 230), random.randint(170, 230))
-        d.line(points, fill=color, width=random.randint(1, 3))
-
-    # Добавляем цветовые искажения
-    pixels = img.load()
-    for y in range(height):
-        for x in range(width):
-            r, g, b = pixels[x, y]
-            # Добавляем случайные цветовые сдвиги
-            if random.random() < 0.1:  # 10% пикселей
-                r = min(255, r + random.randint(-30, 30))
-                g = min(255, g + random.randint(-30, 30))
-                b = min(255, b + random.randint(-30, 30))
-                pixels[x, y] = (max(0, r), max(0, g), max(0, b))
-
-    # Посимвольный вывод с искажениями для защиты от ботов
-    spacing = width // (len(text_to_draw) + 2)
-    x_offset = spacing
-    
-    # БАГ #15 ФИКС: DEBUG логи только если LOG_LEVEL=DEBUG
-    if logger.isEnabledFor(logging.DEBUG):
-        logger.debug(f"🔍 [DEBUG] Начинаем отрисовку текста: '{text_to_draw}', длина={len(text_to_draw)}")
-        logger.debug(f"🔍 [DEBUG] Массив шрифтов: длина={len(fonts)}, содержимое={[str(f) for f in fonts[:2]]}")
-    
-    for i, ch in enumerate(text_to_draw):
-        # БАГ #15 ФИКС: DEBUG логи только если LOG_LEVEL=DEBUG
-        if logger.isEnabledFor(logging.DEBUG):
-            logger.debug(f"🔍 [DEBUG] Обрабатываем символ {i+1}/{len(text_to_draw)}: '{ch}'")
-        
-        # Угол поворота до ±30 градусов (уменьшили для читаемости)
-        angle = random.randint(-30, 30)
-        
-        # ДОПОЛНИТЕЛЬНАЯ ПРОВЕРКА
-        if not fonts or len(fonts) == 0:
-            logger.error("❌ Критическая ошибка: массив шрифтов пуст!")
-            default_font = ImageFont.load_default()
-            fonts = [default_font] * 4
-        
-        # Безопасный выбор шрифта в цикле
-        try:
-            # БАГ #15 ФИКС: DEBUG логи только если LOG_LEVEL=DEBUG
-            if logger.isEnabledFor(logging.DEBUG):
-                logger.debug(f"🔍 [DEBUG] Выбираем шрифт из массива длиной {len(fonts)}")
-            if fonts and len(fonts) > 0:
-                font = random.choice(fonts)
-                if logger.isEnabledFor(logging.DEBUG):
-                    logger.debug(f"🔍 [DEBUG] Выбран шрифт: {font}")
-            else:
-                font = ImageFont.load_default()
-                if logger.isEnabledFor(logging.DEBUG):
-                    logger.debug(f"🔍 [DEBUG] Используем стандартный шрифт")
-        except (IndexError, ValueError) as e:
-            logger.error(f"Ошибка при выборе шрифта: {e}")
-            font = ImageFont.load_default()
-
-        char_img = Image.new("RGBA", (250, 300), (255, 255, 255, 0))
-        char_draw = ImageDraw.Draw(char_img)
-        
-        # Используем разные цвета для символов
-        if i % 2 == 0:
-            color = (random.randint(10, 60), random.randint(10, 60), random.randint(10, 60))
-        else:
-            color = (random.randint(40, 90), random.randint(40, 90), random.randint(40, 90))
+    # Рисуем вне event loop (ленивый импорт: пакет captcha импортирует этот модуль)
+    from bot.services.captcha.render_service import render_legacy_captcha_image, render_off_loop
+    image = await render_off_loop(render_legacy_captcha_image, text_to_draw)
+    file = BufferedInputFile(image, filename="captcha.png")
 
-        # Рисуем текст с отступом
-        char_draw.text((25, 25), ch, font=font, fill=color)
-        
-        # Масштабируем если нужно
-        if font == ImageFont.load_default():
-            char_img = char_img.resize((750, 900), Image.Resampling.LANCZOS)
-        
-        # Применяем поворот
-        rotated = char_img.rotate(angle, expand=1, fillcolor=(255, 255, 255, 0))
-        
-        # Случайное позиционирование
-        y_pos = random.randint(height // 4, height // 2)
-        img.paste(rotated, (x_offset, y_pos), rotated)
-        x_offset += spacing + random.randint(-20, 20)
-
-    # Добавляем искажающие линии поверх текста
-    for _ in range(8):
-        start_y = random.randint(height // 5, 4 * height // 5)
-        end_y = random.randint(height // 5, 4 * height // 5)
-        # Разные цвета и толщина линий
-        color = (random.randint(150, 220), random.randint(150, 220), random.randint(150, 220))
-        d.line([(0, start_y), (width, end_y)], fill=color, width=random.randint(2, 4))
-    
-    # Добавляем волнообразные линии
-    for _ in range(5):
-        points = []
-        for i in range(8):
-            x = i * width // 7
-            y = random.randint(height // 3, 2 * height // 3)
-            points.append((x, y))
-        color = (random.randint(170, 230), random.randint(170, 230), random.randint(170, 230))
-        d.line(points, fill=color, width=random.randint(1, 3))
-
-    # В байты
-    img_byte_arr = BytesIO()
-    img.save(img_byte_arr, format="PNG")
-    img_byte_arr.seek(0)
-    file = BufferedInputFile(img_byte_arr.getvalue(), filename="captcha.png")
-    
-    logger.info(f"✅ Капча успешно сгенерирована: тип={captcha_type}, ответ={answer}, шрифтов={len(fonts)}")
+    logger.info(f"✅ Капча успешно сгенерирована: тип={captcha_type}")
     return answer, file
 
 
@@ -262,14 +81,8 @@ async def create_group_invite_link(bot: Bot, group_name: str) -> str:
 
 
 async def delete_message_after_delay(bot: Bot, chat_id: int, message_id: int, delay: float):
-    """Удаляет сообщение через delay секунд."""
-    await asyncio.sleep(delay)
-    try:
-        await bot.delete_message(chat_id=chat_id, message_id=message_id)
-    except Exception as e:
-        if "message to delete not found" in str(e).lower():
-            return
-        logger.error(f"Не удалось удалить сообщение {message_id}: {e}")
+    """Удаляет сообщение через delay секунд (задача планировщика)."""
+    await schedule_delete_message(bot, chat_id, message_id, delay)
 
 
 async def send_captcha_reminder(bot: Bot, chat_id: int, user_id: int, group_name: str) -> Optional[int]:
@@ -361,34 +174,64 @@ async def send_captcha_reminder(bot: Bot, chat_id: int, user_id: int, group_name
         return None
 
 
+# Задачи планировщика: напоминание и финальный таймаут капчи
+CAPTCHA_REMINDER_JOB = "visual_captcha_reminder"
+CAPTCHA_TIMEOUT_JOB = "visual_captcha_timeout"
+
+
 async def schedule_captcha_reminder(bot: Bot, user_id: int, group_name: str, delay_minutes: int = 2, reminder_count: int = 0):
     """Планирует отправку напоминания о капче через указанное количество минут. Максимум 2 повтора."""
-    await asyncio.sleep(delay_minutes * 60)  # Конвертируем минуты в секунды
-    
+    await schedule_job(
+        bot,
+        CAPTCHA_REMINDER_JOB,
+        {"user_id": user_id, "group_name": group_name, "reminder_count": reminder_count},
+        delay_minutes * 60,  # Конвертируем минуты в секунды
+        job_id=f"{CAPTCHA_REMINDER_JOB}:{user_id}:{group_name}",
+    )
+
+
+async def _captcha_reminder_job(bot: Bot, payload: dict):
+    """Задача планировщика: отправка напоминания о капче."""
+    user_id = payload["user_id"]
+    group_name = payload["group_name"]
+    reminder_count = payload.get("reminder_count", 0)
+
     # ФИКС №12: Проверяем, начал ли пользователь решать капчу
     captcha_started = await redis.get(f"captcha_started:{user_id}:{group_name}")
     if captcha_started:
         logger.info(f"✅ Пользователь {user_id} начал решать капчу, напоминание отменено")
-        return None
+        return
     
     # Проверяем, что пользователь все еще не решил капчу (не нажал на кнопку "Пройти капчу")
     captcha_data = await get_captcha_data(user_id)
     if captcha_data and captcha_data["group_name"] == group_name:
         # Отправляем напоминание
-        reminder_msg_id = await send_captcha_reminder(bot, user_id, user_id, group_name)
+        await send_captcha_reminder(bot, user_id, user_id, group_name)
         
         # Если еще можно повторить (меньше 2 повторов)
         if reminder_count < 1:  # 0 = первое напоминание, 1 = второе (итого 2)
             # Планируем следующее напоминание через 2 минуты
-            asyncio.create_task(schedule_captcha_reminder(bot, user_id, group_name, 2, reminder_count + 1))
+            await schedule_captcha_reminder(bot, user_id, group_name, 2, reminder_count + 1)
         else:
             # Это было финальное напоминание (reminder_count == 1)
             # Пользователь так и не нажал на кнопку "Пройти капчу"
             # Планируем финальную обработку через 2 минуты
-            asyncio.create_task(handle_captcha_timeout_final(bot, user_id, group_name))
-        
-        return reminder_msg_id
-    return None
+            await schedule_job(
+                bot,
+                CAPTCHA_TIMEOUT_JOB,
+                {"user_id": user_id, "group_name": group_name},
+                2 * 60,  # Ждем 2 минуты после последнего напоминания
+                job_id=f"{CAPTCHA_TIMEOUT_JOB}:{user_id}:{group_name}",
+            )
+
+
+async def _captcha_timeout_job(bot: Bot, payload: dict):
+    """Задача планировщика: финальный таймаут капчи."""
+    await handle_captcha_timeout_final(bot, payload["user_id"], payload["group_name"])
+
+
+register_job_handler(CAPTCHA_REMINDER_JOB, _captcha_reminder_job)
+register_job_handler(CAPTCHA_TIMEOUT_JOB, _captcha_timeout_job)
 
 
 async def handle_captcha_timeout_final(bot: Bot, user_id: int, group_name: str):
@@ -396,9 +239,9 @@ async def handle_captcha_timeout_final(bot: Bot, user_id: int, group_name: str):
     ФИКС №7: Обработка финального таймаута - пользователь не решил капчу.
     - Если join_request: отклоняем запрос
     - Если уже в группе: кикаем пользователя
+
+    Вызывается задачей планировщика через 2 минуты после последнего напоминания.
     """
-    await asyncio.sleep(2 * 60)  # Ждем 2 минуты после последнего напоминания
-    
     # ФИКС №12: Проверяем, что пользователь ВСЕ ЕЩЕ не решил капчу
     captcha_data = await get_captcha_data(user_id)
     if not captcha_data or captcha_data["group_name"] != group_name:
@@ -0,0 +1,87 @@
+# ============================================================
+# TOKEN BUCKET - ОГРАНИЧЕНИЕ СКОРОСТИ ЗАПРОСОВ К API
+# ============================================================
+# Общий ограничитель для фоновых массовых операций: очередь
+# действий Anti-Raid, сверка групп при старте, мут во многих
+# группах. При FloodWait (TelegramRetryAfter) вызывающий ставит
+# bucket на паузу — ждут все, кто берёт из него токены.
+# ============================================================
+
+import asyncio
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Token bucket: не больше rate действий в секунду, всплеск до capacity.
+
+    pause() блокирует выдачу токенов на время FloodWait.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Токенов в секунду
+            capacity: Максимум накопленных токенов (по умолчанию rate)
+        """
+        self._rate = rate
+        self._capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self._capacity
+        self._updated = 0.0
+        self._paused_until = 0.0
+
+    async def acquire(self) -> None:
+        """Ждёт и забирает один токен."""
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+
+            # Пополняем токены за прошедшее время
+            if self._updated:
+                self._tokens = min(
+                    self._capacity, self._tokens + (now - self._updated) * self._rate
+                )
+            self._updated = now
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    async def try_acquire(self, timeout: float) -> bool:
+        """
+        Забирает токен, если его можно дождаться за timeout секунд.
+
+        Returns:
+            False если ждать дольше (или bucket на паузе дольше) —
+            вызывающий обходится без запроса
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            now = loop.time()
+            if now < self._paused_until:
+                wait = self._paused_until - now
+            else:
+                if self._updated:
+                    self._tokens = min(
+                        self._capacity, self._tokens + (now - self._updated) * self._rate
+                    )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self._rate
+
+            if now + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Не выдавать токены ближайшие seconds секунд."""
+        loop = asyncio.get_running_loop()
+        self._paused_until = max(self._paused_until, loop.time() + seconds)
+        self._tokens = 0
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Замер накладных расходов диспетчеризации апдейтов.
+
+Сравнивает полный обход роутеров bot/handlers и быстрый путь
+FastPathMiddleware для обычных сообщений в группе. Хендлер координатора
+заменяется пустым, поэтому замеряется только маршрутизация
+(middleware aiogram + фильтры роутеров), без БД и Telegram API.
+
+Запуск:
+    python scripts/bench_dispatch.py
+    python scripts/bench_dispatch.py --updates 50000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+
+# Настройка путей для запуска из корня репозитория
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram import Bot, Dispatcher
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Chat, Message, Update, User
+
+from bot.handlers import handlers_router
+from bot.handlers.group_message_coordinator import group_message_coordinator_router
+from bot.middleware.fast_path_middleware import FastPathMiddleware, KIND_GROUP_MESSAGE
+
+
+CHAT = Chat(id=-1001234567890, type="supergroup", title="Bench")
+
+
+async def _noop_handler(message: Message, session=None) -> None:
+    """Вместо координатора (та же сигнатура): замеряем только маршрутизацию."""
+
+
+def _updates(count: int) -> list:
+    """Обычные текстовые сообщения разных пользователей в одной группе."""
+    now = datetime.now()
+    return [
+        Update(
+            update_id=i,
+            message=Message(
+                message_id=i,
+                date=now,
+                chat=CHAT,
+                from_user=User(id=1000 + i % 100, is_bot=False, first_name="User"),
+                text=f"обычное сообщение {i}",
+            ),
+        )
+        for i in range(count)
+    ]
+
+
+async def _measure(dp: Dispatcher, bot: Bot, updates: list) -> float:
+    """Среднее время обработки апдейта (микросекунды)."""
+    # Прогрев
+    for update in updates[:500]:
+        await dp.feed_update(bot, update, session=None)
+    start = time.perf_counter()
+    for update in updates:
+        await dp.feed_update(bot, update, session=None)
+    return (time.perf_counter() - start) / len(updates) * 1_000_000
+
+
+async def main(count: int) -> None:
+    for handler in group_message_coordinator_router.message.handlers:
+        handler.callback = _noop_handler
+
+    bot = Bot(token="42:BENCHMARK")
+    dp = Dispatcher(storage=MemoryStorage())
+    dp.include_router(handlers_router)
+    updates = _updates(count)
+
+    full = await _measure(dp, bot, updates)
+
+    fast_path = FastPathMiddleware({KIND_GROUP_MESSAGE: group_message_coordinator_router})
+    dp.update.middleware(fast_path)
+    fast = await _measure(dp, bot, updates)
+
+    await bot.session.close()
+
+    print(f"Апдейтов: {count}")
+    print(f"Полный обход роутеров: {full:8.1f} мкс/апдейт")
+    print(f"Быстрый путь:          {fast:8.1f} мкс/апдейт")
+    print(f"Ускорение:             {full / fast:8.2f}x")
+    print(f"Метрики: {fast_path.metrics}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--updates", type=int, default=20000, help="Количество апдейтов")
+    args = parser.parse_args()
+    asyncio.run(main(args.updates))
@@ -183,6 +183,62 @@ async def _reset_redis_client():
             pass
 
 
+def _memory_only(cache, monkeypatch) -> None:
+    """Отключает Redis у кэша-синглтона и очищает его память."""
+    monkeypatch.setattr(cache, "_redis", None)
+    if hasattr(cache, "clear"):
+        cache.clear()
+
+
+def _clear(cache, monkeypatch) -> None:
+    """Очищает память кэша-синглтона (ID чатов переиспользуются между тестами)."""
+    cache.clear()
+
+
+def _reset_pyrogram_caches(module, monkeypatch) -> None:
+    """Кэши PyrogramService без Redis и пустые."""
+    for cache in (module.pyrogram_service._photo_cache, module.pyrogram_service._age_cache):
+        _memory_only(cache, monkeypatch)
+
+
+# Глобальные синглтоны сервисов: модуль → сброс перед тестом и после.
+# Состояние (память, Redis прогресса/версий) не должно утекать между тестами.
+_SINGLETON_RESETS = {
+    "bot.services.admin_status_cache":
+        lambda module, mp: _memory_only(module.get_admin_status_cache(), mp),
+    "bot.services.settings_cache":
+        lambda module, mp: _clear(module.get_settings_cache(), mp),
+    "bot.services.content_filter.word_index":
+        lambda module, mp: _clear(module.get_word_index_cache(), mp),
+    "bot.services.scam_media.hash_index":
+        lambda module, mp: _clear(module.get_banned_hash_index(), mp),
+    "bot.services.scam_media.media_cache":
+        lambda module, mp: _memory_only(module.get_media_verdict_cache(), mp),
+    "bot.services.mute_fanout":
+        lambda module, mp: _memory_only(module.get_mute_fanout(), mp),
+    "bot.services.pyrogram_client": _reset_pyrogram_caches,
+}
+
+
+@pytest.fixture(autouse=True)
+def _isolate_singletons(monkeypatch):
+    """
+    Изолирует глобальные синглтоны сервисов между тестами.
+
+    Сбрасываются только уже импортированные модули: фикстура сама
+    ничего не импортирует (тесты импортируют сервисы при сборе).
+    """
+    def reset() -> None:
+        for name, reset_module in _SINGLETON_RESETS.items():
+            module = sys.modules.get(name)
+            if module is not None:
+                reset_module(module, monkeypatch)
+
+    reset()
+    yield
+    reset()
+
+
 @pytest.fixture(scope="session")
 async def _setup_test_database():
     """Create database schema and patch global session factory to use test database."""
@@ -0,0 +1,131 @@
+"""
+Unit тесты для быстрой маршрутизации апдейтов (FastPathMiddleware).
+
+Проверяет, что:
+1. Апдейты классифицируются по типу, чату, команде и FSM-состоянию
+2. Обычное сообщение в группе попадает сразу в роутер координатора,
+   фильтры остальных роутеров не вызываются
+3. Команды, служебные сообщения и ввод в FSM-состоянии идут полным обходом
+"""
+from datetime import datetime
+
+import pytest
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.filters import Command, StateFilter
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import CallbackQuery, Chat, Message, PhotoSize, Update, User
+
+from bot.middleware.fast_path_middleware import (
+    KIND_CALLBACK,
+    KIND_GROUP_COMMAND,
+    KIND_GROUP_MESSAGE,
+    KIND_GROUP_SERVICE,
+    KIND_GROUP_STATE,
+    KIND_OTHER,
+    KIND_PRIVATE,
+    FastPathMiddleware,
+    classify_update,
+)
+
+
+GROUP = Chat(id=-1001234567890, type="supergroup", title="Test Group")
+PRIVATE = Chat(id=555, type="private")
+USER = User(id=555, is_bot=False, first_name="User")
+PHOTO = [PhotoSize(file_id="photo", file_unique_id="photo", width=90, height=90)]
+
+
+def _update(chat: Chat = GROUP, **fields) -> Update:
+    """Апдейт с сообщением пользователя."""
+    return Update(
+        update_id=1,
+        message=Message(message_id=1, date=datetime.now(), chat=chat, from_user=USER, **fields),
+    )
+
+
+class TestClassifyUpdate:
+    """Тесты классификации апдейтов."""
+
+    def test_kinds(self):
+        """Каждый вид апдейта получает свой класс."""
+        callback = Update(
+            update_id=1,
+            callback_query=CallbackQuery(id="1", from_user=USER, chat_instance="1", data="x"),
+        )
+
+        assert classify_update(_update(text="привет")) == KIND_GROUP_MESSAGE
+        assert classify_update(_update(photo=PHOTO, caption="фото")) == KIND_GROUP_MESSAGE
+        assert classify_update(_update(text="/stat")) == KIND_GROUP_COMMAND
+        assert classify_update(_update(photo=PHOTO, caption="/scamrm")) == KIND_GROUP_COMMAND
+        assert classify_update(_update(new_chat_members=[USER])) == KIND_GROUP_SERVICE
+        assert classify_update(_update(text="привет"), raw_state="S:waiting") == KIND_GROUP_STATE
+        assert classify_update(_update(chat=PRIVATE, text="привет")) == KIND_PRIVATE
+        assert classify_update(callback) == KIND_CALLBACK
+        assert classify_update(Update(update_id=1)) == KIND_OTHER
+
+
+class TestFastPathDispatch:
+    """Тесты маршрутизации через Dispatcher."""
+
+    @pytest.fixture
+    def tree(self):
+        """Роутеры: команды, FSM-ввод, роутер со счётчиком фильтров, координатор."""
+        calls = []
+        filter_checks = []
+
+        commands = Router()
+        other = Router()
+        coordinator = Router()
+
+        @commands.message(Command("stat"))
+        async def on_stat(message: Message):
+            calls.append("stat")
+
+        @commands.message(StateFilter("S:waiting"))
+        async def on_state(message: Message):
+            calls.append("state")
+
+        def counting_filter(message: Message) -> bool:
+            filter_checks.append(message.message_id)
+            return False
+
+        @other.message(counting_filter)
+        async def never(message: Message):
+            calls.append("other")
+
+        @coordinator.message(F.chat.type.in_({"group", "supergroup"}))
+        async def on_group(message: Message):
+            calls.append("coordinator")
+
+        dp = Dispatcher(storage=MemoryStorage())
+        dp.include_routers(commands, other, coordinator)
+        middleware = FastPathMiddleware({KIND_GROUP_MESSAGE: coordinator})
+        dp.update.middleware(middleware)
+        return dp, middleware, calls, filter_checks
+
+    async def test_group_message_skips_other_routers(self, tree):
+        """Обычное сообщение — сразу координатор, другие фильтры не проверяются."""
+        dp, middleware, calls, filter_checks = tree
+        bot = Bot(token="42:TEST")
+
+        await dp.feed_update(bot, _update(text="привет"))
+
+        assert calls == ["coordinator"]
+        assert filter_checks == []
+        assert middleware.metrics["fast_path"] == 1
+
+    async def test_command_and_state_use_full_traversal(self, tree):
+        """Команда и ввод в FSM-состоянии проходят обычный обход роутеров."""
+        dp, middleware, calls, filter_checks = tree
+        bot = Bot(token="42:TEST")
+
+        await dp.feed_update(bot, _update(text="/stat"))
+        await dp.storage.set_state(
+            StorageKey(bot_id=bot.id, chat_id=GROUP.id, user_id=USER.id), "S:waiting"
+        )
+        await dp.feed_update(bot, _update(text="30"))
+
+        assert calls == ["stat", "state"]
+        assert middleware.metrics["fast_path"] == 0
+        assert middleware.metrics[KIND_GROUP_COMMAND] == 1
+        assert middleware.metrics[KIND_GROUP_STATE] == 1
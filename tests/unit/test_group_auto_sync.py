@@ -5,7 +5,10 @@ Unit тесты для автоматической синхронизации 
 1. Группа автоматически создаётся в БД при первом событии
 2. Админы синхронизируются при создании группы
 3. Кэш предотвращает слишком частую синхронизацию
+4. Известные группы проходят middleware без обращения к БД
 """
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from aiogram import Bot
@@ -246,3 +249,79 @@ class TestGroupAutoSync:
         result = await ensure_user_admin_link(db_session, user_id, chat_id, bot)
 
         assert result is False
+
+
+class TestKnownGroupsFastPath:
+    """Тесты кэша известных групп в GroupAutoSyncMiddleware"""
+
+    @staticmethod
+    def _chat(chat_id: int, title: str):
+        chat = MagicMock()
+        chat.id = chat_id
+        chat.title = title
+        chat.type = ChatType.SUPERGROUP
+        return chat
+
+    @staticmethod
+    def _update(chat):
+        update = MagicMock()
+        update.message.chat = chat
+        return update
+
+    @pytest.mark.asyncio
+    async def test_fresh_group_skips_db(self, fake_redis, monkeypatch):
+        """
+        Тест: Недавно синхронизированная группа не открывает сессию БД
+        и не читает Redis повторно.
+        """
+        from bot.services import group_auto_sync
+        from bot.middleware import group_auto_sync_middleware
+        from bot.middleware.group_auto_sync_middleware import GroupAutoSyncMiddleware
+
+        monkeypatch.setattr(group_auto_sync, "redis", fake_redis)
+        group_auto_sync.clear_known_groups()
+        get_session = MagicMock(side_effect=AssertionError("БД не должна использоваться"))
+        monkeypatch.setattr(group_auto_sync_middleware, "get_session", get_session)
+
+        chat = self._chat(-1002302638470, "Known Group")
+        await group_auto_sync._mark_as_synced(chat.id, chat.title)
+        handler = AsyncMock(return_value="ok")
+
+        # Маркер в Redis пропадает — но память процесса ещё действует
+        await fake_redis.delete(f"group_synced:{chat.id}")
+        result = await GroupAutoSyncMiddleware()(handler, self._update(chat), {"bot": AsyncMock(spec=Bot)})
+
+        assert result == "ok"
+        get_session.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_title_change_syncs_in_background(self, fake_redis, monkeypatch):
+        """
+        Тест: Смена названия — синхронизация в фоне, один раз на группу.
+        """
+        from bot.services import group_auto_sync
+
+        monkeypatch.setattr(group_auto_sync, "redis", fake_redis)
+        group_auto_sync.clear_known_groups()
+        ensure = AsyncMock(return_value=MagicMock())
+        monkeypatch.setattr(group_auto_sync, "ensure_group_exists", ensure)
+        session_cm = MagicMock()
+        session_cm.__aenter__ = AsyncMock(return_value=MagicMock())
+        session_cm.__aexit__ = AsyncMock(return_value=False)
+        monkeypatch.setattr("bot.database.session.get_session", MagicMock(return_value=session_cm))
+
+        chat_id = -1002302638471
+        await group_auto_sync._mark_as_synced(chat_id, "Old Title")
+        renamed = self._chat(chat_id, "New Title")
+
+        assert await group_auto_sync.get_sync_state(self._chat(chat_id, "Old Title")) == group_auto_sync.SYNC_FRESH
+        assert await group_auto_sync.get_sync_state(renamed) == group_auto_sync.SYNC_STALE
+        assert await group_auto_sync.get_sync_state(self._chat(-1, "Never seen")) == group_auto_sync.SYNC_UNKNOWN
+
+        bot = AsyncMock(spec=Bot)
+        assert group_auto_sync.schedule_group_sync(renamed, bot) is True
+        assert group_auto_sync.schedule_group_sync(renamed, bot) is False
+        await asyncio.gather(*group_auto_sync._sync_tasks)
+
+        ensure.assert_awaited_once()
+        assert ensure.await_args.kwargs["force"] is True
@@ -0,0 +1,178 @@
+# ============================================================
+# UNIT-ТЕСТЫ ДЛЯ ADMIN STATUS CACHE
+# ============================================================
+# Тестирует кэш статуса админов:
+# - один get_chat_administrators на чат вместо get_chat_member на сообщение
+# - второй уровень в Redis
+# - запасной путь через get_chat_member
+# - инвалидацию через AdminCacheMiddleware
+# - хранение прав каждого админа (AdminRights)
+# ============================================================
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from bot.middleware.admin_cache_middleware import AdminCacheMiddleware
+from bot.services.admin_status_cache import AdminRights, AdminStatusCache, get_admin_status_cache
+
+
+CHAT_ID = -1001234567890
+
+
+def _admin(user_id: int, status: str = 'administrator'):
+    """Создаёт объект с полями ChatMember."""
+    return SimpleNamespace(status=status, user=SimpleNamespace(id=user_id))
+
+
+def _make_bot(admin_ids=(1, 2)):
+    """Создаёт бота с заданным списком админов."""
+    bot = AsyncMock()
+    bot.get_chat_administrators = AsyncMock(
+        return_value=[_admin(user_id) for user_id in admin_ids]
+    )
+    return bot
+
+
+def _chat_member_update(old_status: str, new_status: str, chat_id: int = CHAT_ID):
+    """Создаёт Update с событием chat_member."""
+    return SimpleNamespace(
+        chat_member=SimpleNamespace(
+            chat=SimpleNamespace(id=chat_id),
+            old_chat_member=SimpleNamespace(status=old_status),
+            new_chat_member=SimpleNamespace(status=new_status),
+        ),
+        my_chat_member=None,
+    )
+
+
+class TestAdminStatusCache:
+    """Тесты кэша админов."""
+
+    async def test_single_api_call_per_chat(self):
+        """Для разных пользователей чата список админов запрашивается один раз."""
+        cache = AdminStatusCache()
+        bot = _make_bot(admin_ids=(1, 2))
+
+        assert await cache.is_admin(bot, CHAT_ID, 1) is True
+        assert await cache.is_admin(bot, CHAT_ID, 3) is False
+        assert await cache.is_admin(bot, CHAT_ID, 2) is True
+
+        assert bot.get_chat_administrators.await_count == 1
+        bot.get_chat_member.assert_not_awaited()
+
+    async def test_concurrent_requests_coalesced(self):
+        """Одновременные проверки в одном чате делают один запрос."""
+        cache = AdminStatusCache()
+        bot = _make_bot()
+
+        results = await asyncio.gather(*(cache.is_admin(bot, CHAT_ID, 1) for _ in range(10)))
+
+        assert all(results)
+        assert bot.get_chat_administrators.await_count == 1
+
+    async def test_redis_second_tier(self, fake_redis):
+        """Новый процесс (пустая память) берёт список из Redis."""
+        await AdminStatusCache(redis=fake_redis).is_admin(_make_bot(), CHAT_ID, 1)
+
+        other_process_bot = _make_bot()
+        cache = AdminStatusCache(redis=fake_redis)
+
+        assert await cache.is_admin(other_process_bot, CHAT_ID, 2) is True
+        other_process_bot.get_chat_administrators.assert_not_awaited()
+
+    async def test_fallback_to_get_chat_member(self):
+        """Если список админов недоступен — проверяется один пользователь."""
+        cache = AdminStatusCache()
+        bot = AsyncMock()
+        bot.get_chat_administrators = AsyncMock(side_effect=RuntimeError("no rights"))
+        bot.get_chat_member = AsyncMock(return_value=_admin(5, status='creator'))
+
+        assert await cache.is_admin(bot, CHAT_ID, 5) is True
+        bot.get_chat_member.assert_awaited_once_with(CHAT_ID, 5)
+
+    async def test_invalidate(self, fake_redis):
+        """После сброса список запрашивается заново (и из Redis тоже удалён)."""
+        cache = AdminStatusCache(redis=fake_redis)
+        await cache.is_admin(_make_bot(admin_ids=(1,)), CHAT_ID, 1)
+
+        await cache.invalidate(CHAT_ID)
+        bot = _make_bot(admin_ids=(1, 7))
+
+        assert await cache.is_admin(bot, CHAT_ID, 7) is True
+        assert bot.get_chat_administrators.await_count == 1
+
+    async def test_store_admins(self):
+        """Уже полученный список админов используется без запроса."""
+        cache = AdminStatusCache()
+        await cache.store_admins(CHAT_ID, [_admin(42)])
+        bot = _make_bot()
+
+        assert await cache.is_admin(bot, CHAT_ID, 42) is True
+        bot.get_chat_administrators.assert_not_awaited()
+
+
+class TestAdminRights:
+    """Тесты прав админов в кэше."""
+
+    async def test_rights_cached_with_redis_roundtrip(self, fake_redis):
+        """Права сохраняются в памяти и переживают чтение из Redis."""
+        admins = [
+            SimpleNamespace(status='creator', user=SimpleNamespace(id=1)),
+            SimpleNamespace(
+                status='administrator', user=SimpleNamespace(id=2),
+                can_restrict_members=True, can_change_info=False, is_anonymous=True,
+            ),
+        ]
+        bot = AsyncMock()
+        bot.get_chat_administrators = AsyncMock(return_value=admins)
+        rights = await AdminStatusCache(redis=fake_redis).get_admin_rights(bot, CHAT_ID)
+
+        other_process_bot = _make_bot()
+        from_redis = await AdminStatusCache(redis=fake_redis).get_admin_rights(other_process_bot, CHAT_ID)
+
+        assert from_redis == rights
+        assert rights[1].has('can_change_info')
+        assert rights[2].has('can_restrict_members')
+        assert not rights[2].has('can_change_info')
+        assert rights[2] == AdminRights('administrator', frozenset({'can_restrict_members'}), True)
+        other_process_bot.get_chat_administrators.assert_not_awaited()
+
+
+class TestAdminCacheMiddleware:
+    """Тесты инвалидации кэша по апдейтам."""
+
+    @pytest.mark.parametrize(
+        "old_status,new_status,invalidated",
+        [
+            ('member', 'administrator', True),
+            ('administrator', 'member', True),
+            ('creator', 'left', True),
+            ('member', 'restricted', False),
+        ],
+    )
+    async def test_chat_member_update(self, old_status, new_status, invalidated):
+        """Сброс только при смене админского статуса."""
+        cache = get_admin_status_cache()
+        await cache.store_admins(CHAT_ID, [_admin(1)])
+        handler = AsyncMock(return_value="ok")
+
+        result = await AdminCacheMiddleware()(handler, _chat_member_update(old_status, new_status), {})
+
+        assert result == "ok"
+        assert (cache._get_from_memory(CHAT_ID) is None) is invalidated
+
+    async def test_my_chat_member_update(self):
+        """Изменение прав бота сбрасывает список админов чата."""
+        cache = get_admin_status_cache()
+        await cache.store_admins(CHAT_ID, [_admin(1)])
+        event = SimpleNamespace(
+            chat_member=None,
+            my_chat_member=SimpleNamespace(chat=SimpleNamespace(id=CHAT_ID)),
+        )
+
+        await AdminCacheMiddleware()(AsyncMock(), event, {})
+
+        assert cache._get_from_memory(CHAT_ID) is None
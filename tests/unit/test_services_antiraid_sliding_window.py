@@ -0,0 +1,121 @@
+# ============================================================
+# UNIT-ТЕСТЫ ДЛЯ СКОЛЬЗЯЩЕГО ОКНА ANTI-RAID
+# ============================================================
+# Тестирует:
+# - подсчёт событий и удаление старых записей
+# - однократное включение protection mode при параллельных вступлениях
+# - трекеры входов/выходов, инвайтов и реакций поверх общего окна
+# ============================================================
+
+import asyncio
+
+import pytest
+from fakeredis import aioredis as fakeredis_aioredis
+
+from bot.services.antiraid.sliding_window import record_window_event
+from bot.services.antiraid.mass_join_tracker import MassJoinTracker
+from bot.services.antiraid.join_exit_tracker import JoinExitTracker
+from bot.services.antiraid.mass_invite_tracker import MassInviteTracker
+from bot.services.antiraid.mass_reaction_tracker import MassReactionTracker
+
+
+CHAT_ID = -100123
+
+
+@pytest.fixture
+async def redis_client():
+    """Отдельный fakeredis с поддержкой Lua."""
+    client = fakeredis_aioredis.FakeRedis(decode_responses=True)
+    yield client
+    await client.flushall()
+
+
+class TestRecordWindowEvent:
+    """Тесты Lua-примитива."""
+
+    async def test_counts_and_expires_old(self, redis_client):
+        """Старые записи удаляются, повторный member не увеличивает счёт."""
+        key = "test:window"
+        await redis_client.zadd(key, {"old": 1.0})
+
+        hit = await record_window_event(redis_client, key, "a", window_seconds=60)
+        assert hit.count == 1
+        hit = await record_window_event(redis_client, key, "a", window_seconds=60)
+        assert hit.count == 1
+        hit = await record_window_event(redis_client, key, "b", window_seconds=60, threshold=2)
+        assert hit.count == 2
+        assert hit.triggered is True
+        assert 0 < await redis_client.ttl(key) <= 120
+
+    async def test_zero_threshold_reached(self, redis_client):
+        """threshold=0 считается достигнутым (как сравнение count >= threshold в трекерах)."""
+        hit = await record_window_event(redis_client, "test:zero", "a", window_seconds=60, threshold=0)
+        assert hit.triggered is True
+
+    async def test_protection_triggers_once(self, redis_client):
+        """Защита включается одним событием, остальные видят её активной."""
+        hits = await asyncio.gather(*[
+            record_window_event(
+                redis_client, "test:joins", str(user_id), window_seconds=60,
+                threshold=3, protection_key="test:protection",
+                protection_duration=180, members_limit=100
+            )
+            for user_id in range(10)
+        ])
+
+        triggered = [hit for hit in hits if hit.triggered]
+        assert len(triggered) == 1
+        assert len(triggered[0].members) == 3
+        assert sum(hit.protection_active for hit in hits) == 7
+        assert 0 < await redis_client.ttl("test:protection") <= 180
+
+
+class TestTrackers:
+    """Трекеры на общем окне."""
+
+    async def test_mass_join_detects_raid_once(self, redis_client):
+        """Параллельные вступления — один рейд, остальные в protection mode."""
+        tracker = MassJoinTracker(redis_client)
+
+        results = await asyncio.gather(*[
+            tracker.record_and_check(CHAT_ID, user_id, threshold=5, window_seconds=60)
+            for user_id in range(1, 21)
+        ])
+
+        detected = [r for r in results if r.is_raid_detected]
+        assert len(detected) == 1
+        assert len(detected[0].recent_user_ids) == 5
+        assert detected[0].protection_remaining_seconds == 180
+        assert sum(r.is_protection_mode for r in results) == 16
+        assert await tracker.is_protection_active(CHAT_ID)
+
+    async def test_join_exit_abuse(self, redis_client):
+        """Третье событие в окне — злоупотребление."""
+        tracker = JoinExitTracker(redis_client)
+
+        first = await tracker.record_and_check(CHAT_ID, 1, "join", threshold=3)
+        await tracker.record_and_check(CHAT_ID, 1, "exit", threshold=3)
+        third = await tracker.record_and_check(CHAT_ID, 1, "join", threshold=3)
+
+        assert not first.is_abuse
+        assert third.is_abuse and third.event_count == 3
+        assert await tracker.get_event_count(CHAT_ID, 1) == 3
+
+    async def test_mass_invite(self, redis_client):
+        """Порог инвайтов от одного пользователя."""
+        tracker = MassInviteTracker(redis_client, window_seconds=300, threshold=2)
+
+        assert not (await tracker.record_and_check(CHAT_ID, 7, 100)).is_abuse
+        result = await tracker.record_and_check(CHAT_ID, 7, 101)
+        assert result.is_abuse and result.invite_count == 2
+
+    async def test_mass_reaction_returns_message_ids(self, redis_client):
+        """При срабатывании возвращаются message_id из окна."""
+        tracker = MassReactionTracker(redis_client, window_seconds=60, threshold=3)
+
+        for message_id in (10, 11):
+            assert not (await tracker.record_and_check(CHAT_ID, 5, message_id)).is_abuse
+        result = await tracker.record_and_check(CHAT_ID, 5, 12)
+
+        assert result.is_abuse
+        assert result.message_ids == [10, 11, 12]
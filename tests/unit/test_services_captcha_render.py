@@ -0,0 +1,117 @@
+# ============================================================
+# UNIT-ТЕСТЫ ДЛЯ ОТРИСОВКИ И ПУЛА КАПЧ
+# ============================================================
+# Тестирует:
+# - векторные фон/шум совпадают с прежним попиксельным вариантом
+# - отрисовку в пуле процессов
+# - пул готовых капч: ответы только в виде хэша, выдача без ожидания
+# ============================================================
+
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
+# Пакет bot.services.captcha импортируется без циклов только через bot.handlers
+import bot.handlers  # noqa: F401
+from bot.services.captcha import render_service
+from bot.services.captcha.dm_flow_service import generate_visual_captcha
+from bot.services.captcha.pool_service import CaptchaPool, build_dm_captcha
+from bot.services.captcha.verification_service import hash_answer
+
+
+@pytest.fixture(autouse=True)
+def _render_in_thread():
+    """По умолчанию капча в тестах рисуется в потоке (без пула процессов)."""
+    render_service.configure_render_executor(0)
+    yield
+    render_service.shutdown_render_executor()
+    render_service.configure_render_executor(2)
+
+
+class TestRender:
+    """Тесты отрисовки."""
+
+    def test_gradient_matches_per_pixel(self):
+        """Векторный градиент совпадает с прежней формулой."""
+        width, height = 40, 500
+        img = render_service._gradient_background(width, height)
+
+        arr = np.array(img)
+        for y in (0, 1, 250, 499):
+            expected = int(255 - (y / height) * 20)
+            assert (arr[y] == expected).all()
+
+    def test_color_distortion_bounds(self):
+        """Цветовой шум затрагивает ~10% пикселей и не выходит за 0..255."""
+        img = Image.new("RGB", (200, 200), (250, 5, 128))
+        rng = np.random.default_rng(1)
+
+        out = np.array(render_service._add_color_distortion(img, rng)).astype(int)
+
+        changed = (out != np.array(img)).any(axis=-1).mean()
+        assert 0.05 < changed < 0.15
+        assert out.min() >= 0 and out.max() <= 255
+
+    def test_same_seed_same_image(self):
+        """Изображение определяется зерном (процессы пула не повторяют шум)."""
+        first = render_service.render_dm_captcha_image("7 + 3", seed=5)
+
+        assert first == render_service.render_dm_captcha_image("7 + 3", seed=5)
+        assert first != render_service.render_dm_captcha_image("7 + 3", seed=6)
+
+    async def test_process_pool(self):
+        """Отрисовка в пуле процессов возвращает корректный PNG."""
+        render_service.configure_render_executor(1)
+
+        data = await render_service.render_off_loop(render_service.render_legacy_captcha_image, "AB3")
+
+        image = Image.open(BytesIO(data))
+        assert image.size == (render_service.CAPTCHA_WIDTH, render_service.CAPTCHA_HEIGHT)
+
+
+class TestCaptchaPool:
+    """Тесты пула готовых капч."""
+
+    async def test_build_stores_only_hash(self):
+        """В готовой капче ответ хранится хэшем, правильный вариант один."""
+        captcha = await build_dm_captcha(button_count=12)
+
+        assert len(captcha.options) == 12
+        assert all("is_correct" not in opt for opt in captcha.options)
+        flags = [opt["is_correct"] for opt in captcha.options_with_flags()]
+        assert flags.count(True) == 1
+        assert hash_answer(captcha.correct_answer()) == captcha.answer_hash
+
+    async def test_take_from_pool(self, monkeypatch):
+        """generate_visual_captcha отдаёт капчу из пула и пул дорисовывается."""
+        pool = CaptchaPool(size=2, button_counts=(4,))
+        await pool.fill_once()
+        assert pool.size(4) == 2
+
+        from bot.services.captcha import pool_service
+        monkeypatch.setattr(pool_service, "_captcha_pool", pool)
+        pooled = pool._queues[4][0]
+
+        answer, image, options = await generate_visual_captcha(button_count=4)
+
+        assert answer == pooled.correct_answer()
+        assert image.data == pooled.image
+        assert pool.hits == 1 and pool.size(4) == 1
+
+        await pool.fill_once()
+        assert pool.size(4) == 2
+
+    async def test_empty_pool_falls_back(self, monkeypatch):
+        """Пустой пул режима — капча рисуется по запросу, режим регистрируется."""
+        pool = CaptchaPool(size=1, button_counts=())
+        from bot.services.captcha import pool_service
+        monkeypatch.setattr(pool_service, "_captcha_pool", pool)
+
+        answer, image, options = await generate_visual_captcha(button_count=6)
+
+        assert len(options) == 6
+        assert pool.misses == 1
+        await pool.fill_once()
+        assert pool.size(6) == 1
@@ -0,0 +1,155 @@
+# ============================================================
+# UNIT-ТЕСТЫ ДЛЯ КЛИЕНТА CAS
+# ============================================================
+# Тестирует:
+# - разбор ответа CAS и кэширование результатов
+# - объединение параллельных проверок одного пользователя
+# - отказ от кэширования ошибок и circuit breaker
+# - зеркало выгрузки CAS (локальный файл вместо export.csv)
+# Вместо api.cas.chat — локальный aiohttp сервер
+# ============================================================
+
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from bot.services import cas_service
+from bot.services.cas_service import CASBanSet, CASClient, CASExportMirror
+
+
+BANNED_USER = 111
+CLEAN_USER = 222
+
+
+class _StubCAS:
+    """Локальная заглушка CAS API со счётчиком запросов."""
+
+    def __init__(self):
+        self.calls = 0
+        self.delay = 0.0
+        self.status = 200
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return web.Response(status=self.status)
+        if int(request.query["user_id"]) == BANNED_USER:
+            return web.json_response({"ok": True, "result": {"offenses": 3, "time_added": "2024-01-15"}})
+        return web.json_response({"ok": False, "description": "Record not found."})
+
+
+@pytest.fixture
+async def cas_server():
+    """Запускает заглушку CAS и возвращает (stub, url)."""
+    stub = _StubCAS()
+    app = web.Application()
+    app.router.add_get("/check", stub.handle)
+    server = TestServer(app)
+    await server.start_server()
+    yield stub, str(server.make_url("/check"))
+    await server.close()
+
+
+class TestCASClient:
+    """Тесты клиента CAS."""
+
+    async def test_parses_and_caches(self, cas_server):
+        """Повторная проверка берётся из кэша."""
+        stub, url = cas_server
+        client = CASClient(api_url=url)
+
+        banned = await client.check(BANNED_USER)
+        clean = await client.check(CLEAN_USER)
+        again = await client.check(BANNED_USER)
+        await client.close()
+
+        assert banned["is_banned"] and banned["offenses"] == 3
+        assert not clean["is_banned"] and clean["error"] is None
+        assert again == banned
+        assert stub.calls == 2
+        assert client.metrics["memory_hits"] == 1
+
+    async def test_coalesces_concurrent_lookups(self, cas_server):
+        """Параллельные проверки одного user_id — один запрос к CAS."""
+        stub, url = cas_server
+        stub.delay = 0.05
+        client = CASClient(api_url=url)
+
+        results = await asyncio.gather(*[client.check(BANNED_USER) for _ in range(10)])
+        await client.close()
+
+        assert stub.calls == 1
+        assert all(r["is_banned"] for r in results)
+        assert client.metrics["coalesced"] == 9
+
+    async def test_errors_not_cached_and_breaker_opens(self, cas_server):
+        """Ошибки не кэшируются, после порога CAS не опрашивается."""
+        stub, url = cas_server
+        stub.status = 502
+        client = CASClient(api_url=url, breaker_threshold=2, breaker_cooldown=60)
+
+        first = await client.check(CLEAN_USER)
+        await client.check(CLEAN_USER)
+        rejected = await client.check(CLEAN_USER)
+        await client.close()
+
+        assert first["error"] == "HTTP 502"
+        assert rejected["error"] == "circuit_open"
+        assert stub.calls == 2
+        assert client.is_open
+
+    async def test_timeout_counts_as_failure(self, cas_server):
+        """Медленный CAS — таймаут и размыкание breaker."""
+        stub, url = cas_server
+        stub.delay = 0.5
+        client = CASClient(api_url=url, timeout=0.05, breaker_threshold=1)
+
+        result = await client.check(CLEAN_USER)
+        await client.close()
+
+        assert result["error"] == "timeout"
+        assert client.is_open
+
+
+class TestCASExportMirror:
+    """Тесты зеркала выгрузки CAS на локальном файле."""
+
+    def test_ban_set_lookup(self):
+        """Заголовок и мусор пропускаются, поиск через bisect."""
+        bans = CASBanSet.from_export("user_id\n300\n100,extra\n\nbad\n200\n100\n")
+
+        assert len(bans) == 3
+        assert 100 in bans and 200 in bans and 300 in bans
+        assert 150 not in bans and 0 not in bans and 400 not in bans
+
+    async def test_refresh_from_file_and_keep_on_failure(self, tmp_path):
+        """Набор заменяется целиком; неудачное обновление не стирает его."""
+        export = tmp_path / "export.csv"
+        export.write_text(f"{BANNED_USER}\n")
+        mirror = CASExportMirror(source=str(export))
+
+        assert mirror.contains(BANNED_USER) is None
+        assert await mirror.refresh()
+        assert mirror.contains(BANNED_USER) is True
+        assert mirror.contains(CLEAN_USER) is False
+
+        export.write_text("")
+        assert not await mirror.refresh()
+        assert mirror.contains(BANNED_USER) is True
+
+    async def test_is_cas_banned_uses_mirror(self, tmp_path, monkeypatch):
+        """При загруженном зеркале API не вызывается."""
+        export = tmp_path / "export.csv"
+        export.write_text(f"{BANNED_USER}\n")
+        mirror = CASExportMirror(source=str(export))
+        await mirror.refresh()
+        monkeypatch.setattr(cas_service, "_cas_mirror", mirror)
+        monkeypatch.setattr(cas_service, "get_cas_client", lambda: pytest.fail("API не должен вызываться"))
+
+        assert await cas_service.is_cas_banned(BANNED_USER) is True
+        assert await cas_service.is_cas_banned(CLEAN_USER) is False
+        assert (await cas_service.check_cas_ban(BANNED_USER))["is_banned"] is True
@@ -1262,9 +1262,10 @@ async def test_flood_detector_empty_text():
     from unittest.mock import AsyncMock
     redis_mock = AsyncMock()
     detector = FloodDetector(redis=redis_mock)
-    result = await detector.check("", chat_id=-100123, user_id=111)
+    result = await detector.check("", chat_id=-100123, user_id=111, message_id=1)
     assert result.is_flood is False
     assert result.repeat_count == 0
+    redis_mock.eval.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -1273,9 +1274,9 @@ async def test_flood_detector_first_message():
     from bot.services.content_filter.flood_detector import FloodDetector
     from unittest.mock import AsyncMock
     redis_mock = AsyncMock()
-    redis_mock.incr.return_value = 1  # Первый раз
+    redis_mock.eval.return_value = [1]  # Первый раз
     detector = FloodDetector(redis=redis_mock)
-    result = await detector.check("тест", chat_id=-100123, user_id=111)
+    result = await detector.check("тест", chat_id=-100123, user_id=111, message_id=1)
     assert result.is_flood is False
     assert result.repeat_count == 1
 
@@ -1286,9 +1287,9 @@ async def test_flood_detector_second_message():
     from bot.services.content_filter.flood_detector import FloodDetector
     from unittest.mock import AsyncMock
     redis_mock = AsyncMock()
-    redis_mock.incr.return_value = 2
+    redis_mock.eval.return_value = [2]
     detector = FloodDetector(redis=redis_mock)
-    result = await detector.check("тест", chat_id=-100123, user_id=111, max_repeats=2)
+    result = await detector.check("тест", chat_id=-100123, user_id=111, message_id=2, max_repeats=2)
     assert result.is_flood is False
     assert result.repeat_count == 2
 
@@ -1299,11 +1300,12 @@ async def test_flood_detector_third_message_is_flood():
     from bot.services.content_filter.flood_detector import FloodDetector
     from unittest.mock import AsyncMock
     redis_mock = AsyncMock()
-    redis_mock.incr.return_value = 3  # Третий раз
+    redis_mock.eval.return_value = [3, "1", "2", "3"]  # Третий раз
     detector = FloodDetector(redis=redis_mock)
-    result = await detector.check("тест", chat_id=-100123, user_id=111, max_repeats=2)
+    result = await detector.check("тест", chat_id=-100123, user_id=111, message_id=3, max_repeats=2)
     assert result.is_flood is True
     assert result.repeat_count == 3
+    assert result.flood_message_ids == [1, 2, 3]
 
 
 @pytest.mark.asyncio
@@ -1312,12 +1314,56 @@ async def test_flood_detector_redis_error():
     from bot.services.content_filter.flood_detector import FloodDetector
     from unittest.mock import AsyncMock
     redis_mock = AsyncMock()
-    redis_mock.incr.side_effect = Exception("Redis error")
+    redis_mock.eval.side_effect = Exception("Redis error")
     detector = FloodDetector(redis=redis_mock)
-    result = await detector.check("тест", chat_id=-100123, user_id=111)
+    result = await detector.check("тест", chat_id=-100123, user_id=111, message_id=1)
     assert result.is_flood is False
 
 
+@pytest.mark.asyncio
+async def test_flood_detector_lua_collects_and_resets():
+    """Lua-скрипт возвращает все ID при флуде и сбрасывает счётчик."""
+    from fakeredis import aioredis as fakeredis_aioredis
+    from bot.services.content_filter.flood_detector import FloodDetector
+    redis_client = fakeredis_aioredis.FakeRedis(decode_responses=True)
+    detector = FloodDetector(redis=redis_client)
+
+    results = [
+        await detector.check_any_messages(-100123, 111, message_id=i, max_messages=2)
+        for i in (10, 11, 12, 13)
+    ]
+
+    assert [r.is_flood for r in results] == [False, False, True, False]
+    assert results[2].flood_message_ids == [10, 11, 12]
+    # После срабатывания окно начинается заново
+    assert results[3].repeat_count == 1
+    await redis_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cross_message_add_score_concurrent():
+    """Параллельные add_score (альбом) не теряют баллы."""
+    import asyncio
+    from fakeredis import aioredis as fakeredis_aioredis
+    from bot.services.content_filter.cross_message_service import CrossMessageService
+    redis_client = fakeredis_aioredis.FakeRedis(decode_responses=True)
+    service = CrossMessageService(redis_client)
+
+    results = await asyncio.gather(*[
+        service.add_score(-100123, 111, score=10, window_seconds=60,
+                          threshold=50, message_id=i)
+        for i in range(1, 6)
+    ])
+
+    assert max(r.total_score for r in results) == 50
+    assert sum(r.threshold_exceeded for r in results) == 1
+    last = max(results, key=lambda r: r.total_score)
+    assert sorted(last.message_ids) == [1, 2, 3, 4, 5]
+    assert last.messages_count == 5
+    assert await redis_client.ttl(service._get_score_key(-100123, 111)) > 0
+    await redis_client.aclose()
+
+
 # ============================================================
 # ТЕСТЫ ДЛЯ ReferralDetector (PHASE 2)
 # ============================================================
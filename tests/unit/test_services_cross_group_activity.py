@@ -0,0 +1,129 @@
+# ============================================================
+# UNIT-ТЕСТЫ ДЛЯ ХРАНИЛИЩА КРОСС-ГРУППОВОЙ АКТИВНОСТИ
+# ============================================================
+# Тестирует:
+# - счётчики групп в окнах входов и сообщений
+# - выпадение старых групп из окна (со сбросом first/count/message_id)
+# - сбор groups_involved при срабатывании
+# - детекцию без обращения к БД пока критерии не выполнены
+# ============================================================
+
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from fakeredis import aioredis as fakeredis_aioredis
+
+from bot.services.cross_group import detection_service
+from bot.services.cross_group.activity_store import CrossGroupActivityStore
+
+
+USER_ID = 42
+WINDOWS = dict(join_interval=3600, message_interval=600)
+
+
+@pytest.fixture
+async def store():
+    """Хранилище поверх fakeredis с поддержкой Lua."""
+    client = fakeredis_aioredis.FakeRedis(decode_responses=True)
+    yield CrossGroupActivityStore(client)
+    await client.flushall()
+
+
+class TestActivityStore:
+    """Тесты Redis-хранилища."""
+
+    async def test_counts_groups_not_messages(self, store):
+        """Повторные сообщения в одной группе не увеличивают число групп."""
+        await store.record_join(USER_ID, -1, "A", **WINDOWS)
+        counts = await store.record_join(USER_ID, -2, "B", **WINDOWS)
+        assert counts.join_groups == 2 and counts.message_groups == 0
+
+        for message_id in (1, 2, 3):
+            counts = await store.record_message(USER_ID, -1, message_id, **WINDOWS)
+        assert counts.message_groups == 1
+
+        counts = await store.record_message(USER_ID, -2, 10, **WINDOWS)
+        assert counts.meets(2)
+        assert await store.get_counts(USER_ID, **WINDOWS) == counts
+
+    async def test_old_groups_leave_window(self, store):
+        """Группа с сообщением старше окна не считается."""
+        await store.redis.zadd(f"cg:{USER_ID}:msgs", {"-1": time.time() - 700})
+
+        counts = await store.record_message(USER_ID, -2, 1, **WINDOWS)
+
+        assert counts.message_groups == 1
+        assert await store.redis.zscore(f"cg:{USER_ID}:msgs", "-1") is None
+        assert 0 < await store.redis.ttl(f"cg:{USER_ID}:msgs") <= 3660
+
+    async def test_return_to_group_starts_fresh(self, store):
+        """Возвращение в группу после выпадения из окна не наследует старые данные."""
+        old = time.time() - 700
+        await store.redis.zadd(f"cg:{USER_ID}:msgs", {"-1": old, "-3": old})
+        await store.redis.hset(f"cg:{USER_ID}:meta", mapping={
+            "-1:first": old, "-1:count": 50, "-3:first": old, "-3:count": 7,
+        })
+        await store.redis.rpush(f"cg:{USER_ID}:mids:-1", 1, 2, 3)
+        await store.redis.rpush(f"cg:{USER_ID}:mids:-3", 4)
+
+        await store.record_message(USER_ID, -1, 99, **WINDOWS)
+
+        groups = await store.get_groups_involved(USER_ID, **WINDOWS)
+        assert groups["-1"]["message_count"] == 1
+        assert groups["-1"]["message_ids"] == [99]
+        assert datetime.fromisoformat(groups["-1"]["first_message_at"]) > datetime.utcfromtimestamp(old)
+        # Другая выпавшая группа тоже очищена
+        assert await store.redis.hget(f"cg:{USER_ID}:meta", "-3:count") is None
+        assert await store.redis.exists(f"cg:{USER_ID}:mids:-3") == 0
+
+    async def test_groups_involved(self, store):
+        """Данные по группам в формате прежнего JSONB."""
+        await store.record_join(USER_ID, -1, "Группа A", **WINDOWS)
+        for message_id in range(105):
+            await store.record_message(USER_ID, -1, message_id, **WINDOWS)
+
+        groups = await store.get_groups_involved(USER_ID, **WINDOWS)
+
+        group = groups["-1"]
+        assert group["group_title"] == "Группа A"
+        assert group["message_count"] == 105
+        assert group["message_ids"] == list(range(5, 105))
+        assert datetime.fromisoformat(group["joined_at"]) <= datetime.fromisoformat(group["first_message_at"])
+
+
+class TestDetection:
+    """Детекция поверх счётчиков."""
+
+    async def test_db_untouched_until_counts_met(self, store, monkeypatch):
+        """Пока групп мало — get_user_activity не вызывается."""
+        settings = SimpleNamespace(
+            enabled=True, excluded_groups=[], min_groups=2,
+            join_interval_seconds=3600, message_interval_seconds=600,
+            profile_change_window_seconds=3600,
+        )
+        activity = SimpleNamespace(
+            is_flagged=False, action_taken=False,
+            profile_changed_at=datetime.utcnow() - timedelta(minutes=5),
+            profile_change_type=None, original_name="Old", original_photo_id=None,
+        )
+        get_activity = AsyncMock(return_value=activity)
+        session = SimpleNamespace(commit=AsyncMock())
+        monkeypatch.setattr(detection_service, "get_cached_cross_group_settings", AsyncMock(return_value=settings))
+        monkeypatch.setattr(detection_service, "is_group_excluded", AsyncMock(return_value=False))
+        monkeypatch.setattr(detection_service, "get_user_activity", get_activity)
+        monkeypatch.setattr(detection_service, "get_activity_store", lambda: store)
+
+        await detection_service.track_user_join(session, USER_ID, -1, "A")
+        await detection_service.track_user_join(session, USER_ID, -2, "B")
+        _, result = await detection_service.track_user_message(session, USER_ID, -1, 1)
+        assert result is None
+        get_activity.assert_not_called()
+
+        _, result = await detection_service.track_user_message(session, USER_ID, -2, 2)
+        assert result is not None
+        assert set(result["groups_involved"]) == {"-1", "-2"}
+        assert result["groups_involved"]["-2"]["message_ids"] == [2]
+        assert activity.is_flagged
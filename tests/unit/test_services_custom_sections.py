@@ -17,6 +17,7 @@ from bot.services.content_filter.scam_pattern_service import (
     CustomSectionService,
     get_section_service,
 )
+from bot.services.trigger_counters import section_pattern_counter
 
 
 # ============================================================
@@ -793,13 +794,11 @@ class TestSectionPatterns:
         assert pattern.triggers_count == 0
         assert pattern.last_triggered_at is None
 
-        # Увеличиваем счётчик
+        # Увеличиваем счётчик (буферизуется до сброса)
         await section_service.increment_pattern_trigger(pattern_id, db_session)
+        await section_pattern_counter.flush()
 
-        pattern = await section_service.get_section_pattern_by_id(
-            pattern_id,
-            db_session
-        )
+        await db_session.refresh(pattern)
         assert pattern.triggers_count == 1
         assert pattern.last_triggered_at is not None
 
@@ -0,0 +1,127 @@
+# ============================================================
+# UNIT-ТЕСТЫ ДЛЯ СВЕРКИ ГРУПП ПРИ СТАРТЕ
+# ============================================================
+# Тестирует:
+# - продолжение прерванного прохода по отметкам в Redis
+# - отметку групп после записи пачки и очистку в конце прохода
+# - повтор группы после TelegramRetryAfter
+# - исчезнувшие группы и сбор админов
+# ============================================================
+
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+
+from bot.services import group_reconciliation
+from bot.services.group_reconciliation import CHECKPOINT_KEY, GroupReconciler
+
+
+BOT_ID = 42
+
+
+def _member(status: str, user_id: int = BOT_ID, is_bot: bool = False) -> SimpleNamespace:
+    """ChatMember с нужным статусом."""
+    user = SimpleNamespace(
+        id=user_id, username=f"user{user_id}", first_name="Name", last_name=None, is_bot=is_bot
+    )
+    return SimpleNamespace(status=status, user=user)
+
+
+def _bot() -> MagicMock:
+    """Бот: в каждой группе админ, один создатель и один админ."""
+    bot = MagicMock()
+    bot.me = AsyncMock(return_value=SimpleNamespace(id=BOT_ID))
+    bot.get_chat_member = AsyncMock(return_value=_member("administrator"))
+    bot.get_chat = AsyncMock(side_effect=lambda chat_id: SimpleNamespace(title=f"Group {chat_id}"))
+    bot.get_chat_administrators = AsyncMock(return_value=[
+        _member("creator", user_id=1),
+        _member("administrator", user_id=2),
+    ])
+    return bot
+
+
+@pytest.fixture
+def saved(monkeypatch):
+    """Перехватывает запись пачек в БД (список пачек chat_id)."""
+    batches = []
+
+    @asynccontextmanager
+    async def fake_session():
+        yield MagicMock(commit=AsyncMock())
+
+    async def fake_save(session, checks):
+        batches.append(checks)
+
+    monkeypatch.setattr("bot.database.session.get_session", fake_session)
+    monkeypatch.setattr(group_reconciliation, "save_group_checks", fake_save)
+    return batches
+
+
+def _reconciler(bot, redis, chat_ids, **kwargs) -> GroupReconciler:
+    reconciler = GroupReconciler(bot, redis=redis, api_per_second=1000, **kwargs)
+    reconciler._load_group_ids = AsyncMock(return_value=chat_ids)
+    return reconciler
+
+
+class TestGroupReconciler:
+    """Тесты прохода сверки."""
+
+    async def test_resume_skips_checkpointed(self, fake_redis, saved):
+        """Группы, отмеченные прерванным проходом, не проверяются повторно."""
+        await fake_redis.sadd(CHECKPOINT_KEY, -1, -2)
+        bot = _bot()
+        reconciler = _reconciler(bot, fake_redis, [-1, -2, -3, -4])
+
+        await reconciler.run()
+
+        checked = sorted(call.args[0] for call in bot.get_chat_member.await_args_list)
+        assert checked == [-4, -3]
+        assert sorted(check.chat_id for batch in saved for check in batch) == [-4, -3]
+        assert reconciler.metrics['resumed'] == 2
+        # Проход завершён — отметки удалены
+        assert await fake_redis.exists(CHECKPOINT_KEY) == 0
+
+    async def test_batches_marked_after_save(self, fake_redis, saved, monkeypatch):
+        """Группа отмечается в Redis только после записи её пачки."""
+        marked_before_save = []
+        record = group_reconciliation.save_group_checks
+
+        async def save_and_inspect(session, checks):
+            marked_before_save.append(await fake_redis.smembers(CHECKPOINT_KEY))
+            await record(session, checks)
+
+        monkeypatch.setattr(group_reconciliation, "save_group_checks", save_and_inspect)
+        reconciler = _reconciler(_bot(), fake_redis, [-1, -2, -3], workers=1, batch_size=1)
+
+        await reconciler.run()
+
+        assert marked_before_save == [set(), {"-1"}, {"-1", "-2"}]
+        assert reconciler.metrics['saved'] == 3
+
+    async def test_flood_wait_and_gone_group(self, fake_redis, saved):
+        """После FloodWait группа повторяется; ненайденная группа помечается."""
+        bot = _bot()
+        flood = TelegramRetryAfter(method=MagicMock(), message="Flood", retry_after=0)
+        not_found = TelegramBadRequest(method=MagicMock(), message="Bad Request: chat not found")
+
+        async def get_chat_member(chat_id, user_id):
+            if chat_id == -2:
+                raise not_found
+            if bot.get_chat_member.await_count == 1:
+                raise flood
+            return _member("administrator")
+
+        bot.get_chat_member.side_effect = get_chat_member
+        reconciler = _reconciler(bot, fake_redis, [-1, -2], workers=1)
+
+        await reconciler.run()
+
+        checks = {check.chat_id: check for batch in saved for check in batch}
+        assert checks[-2].gone and not checks[-2].admins
+        assert checks[-1].title == "Group -1"
+        assert [admin[0] for admin in checks[-1].admins] == [1, 2]
+        assert reconciler.metrics['flood_waits'] == 1
+        assert reconciler.metrics['gone'] == 1
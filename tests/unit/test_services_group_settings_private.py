@@ -185,3 +185,51 @@ async def test_get_linked_journals_includes_inactive_journals(db_session):
     assert len(journals) == 1
     assert journals[0]['is_active'] is False
 
+
+
+@pytest.mark.asyncio
+async def test_get_admin_groups_uses_admin_rights_cache(db_session):
+    """Группы проверяются по списку админов; повторный вызов — без запросов к API"""
+    from types import SimpleNamespace
+    from unittest.mock import AsyncMock
+
+    user = User(user_id=126, first_name="Admin4")
+    admin_group = Group(chat_id=-3010, title="Admin here")
+    demoted_group = Group(chat_id=-3011, title="Demoted")
+    db_session.add_all([
+        user, admin_group, demoted_group,
+        UserGroup(user_id=user.user_id, group_id=demoted_group.chat_id),
+    ])
+    await db_session.commit()
+
+    def admins(chat_id):
+        ids = [user.user_id] if chat_id == admin_group.chat_id else [999]
+        return [
+            SimpleNamespace(status="administrator", user=SimpleNamespace(id=uid), can_change_info=True)
+            for uid in ids
+        ]
+
+    bot = AsyncMock()
+    bot.id = 1
+    bot.get_chat_administrators = AsyncMock(side_effect=admins)
+
+    groups = await group_settings_logic.get_admin_groups(user.user_id, db_session, bot=bot)
+    again = await group_settings_logic.get_admin_groups(user.user_id, db_session, bot=bot)
+
+    assert [g.chat_id for g in groups] == [admin_group.chat_id]
+    assert [g.chat_id for g in again] == [admin_group.chat_id]
+    assert bot.get_chat_administrators.await_count == 2
+    bot.get_chat_member.assert_not_awaited()
+
+    # Связь восстановлена для группы, где пользователь админ, и удалена там, где нет
+    assert await group_settings_logic.check_admin_rights(db_session, user.user_id, admin_group.chat_id)
+    assert not await group_settings_logic.check_admin_rights(db_session, user.user_id, demoted_group.chat_id)
+
+    # Гранулярные права тоже берутся из кэша
+    assert await group_settings_logic.check_granular_permissions(
+        bot, user.user_id, admin_group.chat_id, 'change_info'
+    )
+    assert not await group_settings_logic.check_granular_permissions(
+        bot, user.user_id, admin_group.chat_id, 'restrict_members'
+    )
+    assert bot.get_chat_administrators.await_count == 2
@@ -0,0 +1,197 @@
+# ============================================================
+# UNIT-ТЕСТЫ ДЛЯ ПЛАНИРОВЩИКА ОТЛОЖЕННЫХ ЗАДАЧ
+# ============================================================
+# Тестирует:
+# - выполнение задачи из Redis sorted set после задержки
+# - идемпотентный job_id и отмену по ключу
+# - восстановление задач после перезапуска (истёкшая аренда)
+# - повтор задачи после ошибки обработчика
+# - задачи, ждущие свободного воркера дольше аренды, выполняются один раз
+# - локальный режим без Redis
+# ============================================================
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fakeredis import aioredis as fakeredis_aioredis
+
+from bot.services import job_scheduler
+from bot.services.job_scheduler import JobScheduler, register_job_handler
+
+
+TEST_JOB = "test_job"
+
+
+@pytest.fixture
+async def redis_client():
+    """Отдельный fakeredis с поддержкой Lua."""
+    client = fakeredis_aioredis.FakeRedis(decode_responses=True)
+    yield client
+    await client.flushall()
+
+
+@pytest.fixture
+def calls():
+    """Регистрирует тестовый обработчик, возвращает список вызовов."""
+    received = []
+
+    async def handler(bot, payload):
+        received.append(payload)
+
+    register_job_handler(TEST_JOB, handler)
+    yield received
+    job_scheduler._handlers.pop(TEST_JOB, None)
+
+
+def _scheduler(redis, **kwargs) -> JobScheduler:
+    """Планировщик с быстрым опросом для тестов."""
+    kwargs.setdefault("poll_interval", 0.05)
+    kwargs.setdefault("retry_delay", 0)
+    return JobScheduler(redis, workers=2, **kwargs)
+
+
+async def _wait_for(predicate, timeout: float = 3.0) -> None:
+    """Ждёт выполнения условия."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "условие не выполнено"
+        await asyncio.sleep(0.02)
+
+
+class TestJobScheduler:
+    """Тесты планировщика на Redis."""
+
+    async def test_runs_after_delay(self, redis_client, calls):
+        """Задача выполняется после задержки, данные удаляются из Redis."""
+        scheduler = _scheduler(redis_client)
+        bot = MagicMock()
+        await scheduler.start(bot)
+        try:
+            await scheduler.schedule(bot, TEST_JOB, {"n": 1}, delay=0.1, job_id="a")
+            assert calls == []
+
+            await _wait_for(lambda: calls == [{"n": 1}])
+            await _wait_for(lambda: scheduler.metrics["executed"] == 1)
+            assert await redis_client.hlen("jobs:data") == 0
+            stats = await scheduler.get_stats()
+            assert stats["pending"] == 0 and stats["processing"] == 0
+        finally:
+            await scheduler.stop()
+
+    async def test_same_id_reschedules(self, redis_client, calls):
+        """Повторное планирование с тем же ID не создаёт дубликат."""
+        scheduler = _scheduler(redis_client)
+        bot = MagicMock()
+
+        await scheduler.start(bot)
+        try:
+            await scheduler.schedule(bot, TEST_JOB, {"n": 1}, delay=0.1, job_id="same")
+            await scheduler.schedule(bot, TEST_JOB, {"n": 2}, delay=0.1, job_id="same")
+            await _wait_for(lambda: len(calls) == 1)
+            await asyncio.sleep(0.2)
+            assert calls == [{"n": 2}]
+        finally:
+            await scheduler.stop()
+
+    async def test_cancel(self, redis_client, calls):
+        """Отменённая задача не выполняется."""
+        scheduler = _scheduler(redis_client)
+        bot = MagicMock()
+        await scheduler.start(bot)
+        try:
+            await scheduler.schedule(bot, TEST_JOB, {"n": 1}, delay=0.2, job_id="c")
+            assert await scheduler.cancel("c") is True
+            assert await scheduler.cancel("c") is False
+
+            await asyncio.sleep(0.4)
+            assert calls == []
+        finally:
+            await scheduler.stop()
+
+    async def test_recovers_after_crash(self, redis_client, calls):
+        """Задача, забранная упавшим процессом, выполняется после истечения аренды."""
+        bot = MagicMock()
+        # Процесс без запущенных воркеров: запланировал и забрал задачу, но упал
+        crashed = _scheduler(redis_client, lease_seconds=0.2)
+        crashed._bot = bot
+        await crashed.schedule(bot, TEST_JOB, {"n": 1}, delay=0, job_id="r")
+        assert len(await crashed._claim()) == 1
+
+        restarted = _scheduler(redis_client, lease_seconds=0.2)
+        await restarted.start(bot)
+        try:
+            await _wait_for(lambda: calls == [{"n": 1}])
+            assert restarted.metrics["recovered"] == 1
+        finally:
+            await restarted.stop()
+
+    async def test_retry_after_error(self, redis_client):
+        """Ошибка обработчика — задача повторяется."""
+        handler = AsyncMock(side_effect=[RuntimeError("boom"), None])
+        register_job_handler(TEST_JOB, handler)
+        scheduler = _scheduler(redis_client)
+        bot = MagicMock()
+        await scheduler.start(bot)
+        try:
+            await scheduler.schedule(bot, TEST_JOB, {"n": 1}, delay=0, job_id="e")
+            await _wait_for(lambda: scheduler.metrics["executed"] == 1)
+            assert handler.await_count == 2
+            assert scheduler.metrics["retried"] == 1
+        finally:
+            await scheduler.stop()
+            job_scheduler._handlers.pop(TEST_JOB, None)
+
+    async def test_backlog_longer_than_lease_runs_once(self, redis_client):
+        """Очередь дольше аренды: задачи не возвращаются recover и не дублируются."""
+        runs = []
+
+        async def slow_handler(bot, payload):
+            runs.append(payload["n"])
+            await asyncio.sleep(0.1)
+
+        register_job_handler(TEST_JOB, slow_handler)
+        # 2 воркера × 12 задач × 0.1 с ≈ 0.6 с — втрое дольше аренды
+        scheduler = _scheduler(redis_client, lease_seconds=0.2)
+        bot = MagicMock()
+        await scheduler.start(bot)
+        try:
+            for n in range(12):
+                await scheduler.schedule(bot, TEST_JOB, {"n": n}, delay=0, job_id=f"b{n}")
+            await _wait_for(lambda: scheduler.metrics["executed"] == 12)
+            await asyncio.sleep(0.3)
+
+            assert sorted(runs) == list(range(12))
+            assert scheduler.metrics["recovered"] == 0
+        finally:
+            await scheduler.stop()
+            job_scheduler._handlers.pop(TEST_JOB, None)
+
+
+class TestLocalMode:
+    """Тесты режима без Redis."""
+
+    async def test_local_schedule_and_cancel(self, calls):
+        """Без Redis задача ждёт в процессе и отменяется по ID."""
+        scheduler = JobScheduler(None)
+        bot = MagicMock()
+
+        await scheduler.schedule(bot, TEST_JOB, {"n": 1}, delay=0.05, job_id="x")
+        await scheduler.schedule(bot, TEST_JOB, {"n": 2}, delay=0.05, job_id="y")
+        assert await scheduler.cancel("y") is True
+
+        await _wait_for(lambda: calls == [{"n": 1}])
+        await asyncio.sleep(0.1)
+        assert calls == [{"n": 1}]
+
+    async def test_delete_message_job(self, monkeypatch):
+        """schedule_delete_message удаляет сообщение через планировщик."""
+        monkeypatch.setattr(job_scheduler, "_job_scheduler", JobScheduler(None))
+        bot = MagicMock()
+        bot.delete_messages = AsyncMock()
+
+        job_id = await job_scheduler.schedule_delete_message(bot, -100, 42, delay=0)
+
+        assert job_id == "delete_message:-100:42"
+        await _wait_for(lambda: bot.delete_messages.await_count == 1)
+        bot.delete_messages.assert_awaited_once_with(chat_id=-100, message_ids=[42])
@@ -0,0 +1,92 @@
+# ============================================================
+# UNIT-ТЕСТЫ ДЛЯ MESSAGE ANALYSIS
+# ============================================================
+# Тестирует:
+# - совпадение представлений текста с прежними вычислениями детекторов
+# - однократную нормализацию при нескольких обращениях
+# - ссылки из текста и entities без дубликатов
+# - передачу готового разбора в ScamDetector
+# ============================================================
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from bot.services.content_filter.message_analysis import MessageAnalysis
+from bot.services.content_filter.scam_detector import ScamDetector, extract_ngrams
+from bot.services.content_filter.text_normalizer import TextNormalizer
+
+
+class TestMessageAnalysis:
+    """Тесты общего разбора текста."""
+
+    def test_views_match_direct_computation(self):
+        """Свойства совпадают с тем, что раньше считал каждый детектор."""
+        normalizer = TextNormalizer()
+        text = "Купи ШИШКИ, k0kain — Alice Demidova"
+        analysis = MessageAnalysis(text, normalizer=normalizer)
+
+        normalized = normalizer.normalize(text)
+        assert analysis.lower == text.lower()
+        assert analysis.normalized == normalized
+        assert analysis.normalized_lower == normalized.lower()
+        assert analysis.normalized_words == normalizer.get_words_from_text(text)
+        assert analysis.normalized_no_spaces == normalized.replace(' ', '')
+        assert analysis.words_lower == ['купи', 'шишки', 'k0kain', 'alice', 'demidova']
+        assert analysis.bigrams == extract_ngrams(normalized, n=2)
+        assert analysis.trigrams == extract_ngrams(normalized, n=3)
+
+    def test_normalizes_once(self):
+        """Нормализация выполняется один раз на сообщение."""
+        normalizer = MagicMock()
+        normalizer.normalize.return_value = "купи шишки тут"
+        analysis = MessageAnalysis("kupi shishki tut", normalizer=normalizer)
+
+        _ = analysis.normalized_lower
+        _ = analysis.bigrams
+        _ = analysis.trigrams
+        _ = analysis.normalized_no_spaces
+
+        normalizer.normalize.assert_called_once_with("kupi shishki tut")
+
+    def test_lazy_until_requested(self):
+        """Без обращения к свойствам нормализатор не вызывается."""
+        normalizer = MagicMock()
+        analysis = MessageAnalysis("текст", normalizer=normalizer)
+
+        assert analysis.lower == "текст"
+        normalizer.normalize.assert_not_called()
+
+    def test_empty_text(self):
+        """None и пробелы дают пустой разбор."""
+        assert MessageAnalysis(None).is_empty
+        assert MessageAnalysis("   ").is_empty
+        assert not MessageAnalysis("привет").is_empty
+
+    def test_from_message_uses_caption_and_entities(self):
+        """Текст берётся из caption, ссылки — из текста и entities."""
+        entity = SimpleNamespace(type="text_link", url="https://spam.example/x", offset=0, length=4)
+        message = SimpleNamespace(
+            text=None,
+            caption="жми https://spam.example/x и https://other.example",
+            entities=None,
+            caption_entities=[entity],
+        )
+        analysis = MessageAnalysis.from_message(message)
+
+        assert analysis.text == message.caption
+        assert analysis.links.count("https://spam.example/x") == 1
+        assert "https://other.example" in analysis.links
+
+
+class TestScamDetectorWithAnalysis:
+    """Детекторы принимают готовый разбор."""
+
+    def test_check_same_result_with_analysis(self):
+        """Результат ScamDetector не зависит от того, кто разобрал текст."""
+        detector = ScamDetector()
+        text = "Заработок от 5000$ в день, пиши в лс @manager"
+
+        direct = detector.check(text, sensitivity=40)
+        shared = detector.check(text, sensitivity=40, analysis=MessageAnalysis(text))
+
+        assert direct == shared
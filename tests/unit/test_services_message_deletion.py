@@ -0,0 +1,92 @@
+# ============================================================
+# UNIT-ТЕСТЫ ДЛЯ ПАКЕТНОГО УДАЛЕНИЯ СООБЩЕНИЙ
+# ============================================================
+# Тестирует:
+# - удаление пачками по 100 через delete_messages
+# - повтор после FloodWait (TelegramRetryAfter)
+# - удаление по одному, если пачка не прошла
+# - объединение параллельных запросов одного чата в одну пачку
+# ============================================================
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+
+from bot.services.message_deletion import MessageDeleter, delete_messages_now
+
+
+def _bot() -> MagicMock:
+    """Бот с замоканными методами удаления."""
+    bot = MagicMock()
+    bot.delete_messages = AsyncMock(return_value=True)
+    bot.delete_message = AsyncMock(return_value=True)
+    return bot
+
+
+class TestDeleteNow:
+    """Тесты удаления пачками."""
+
+    async def test_chunks_of_100(self):
+        """250 сообщений удаляются тремя вызовами deleteMessages."""
+        bot = _bot()
+
+        deleted = await delete_messages_now(bot, -100, range(1, 251))
+
+        assert len(deleted) == 250
+        assert bot.delete_messages.await_count == 3
+        sizes = [len(call.kwargs["message_ids"]) for call in bot.delete_messages.await_args_list]
+        assert sizes == [100, 100, 50]
+        bot.delete_message.assert_not_awaited()
+
+    async def test_flood_wait_retry(self, monkeypatch):
+        """После FloodWait пачка повторяется."""
+        bot = _bot()
+        bot.delete_messages.side_effect = [
+            TelegramRetryAfter(method=MagicMock(), message="flood", retry_after=1),
+            True,
+        ]
+        monkeypatch.setattr(asyncio, "sleep", AsyncMock())
+
+        deleted = await delete_messages_now(bot, -100, [1, 2, 3])
+
+        assert deleted == {1, 2, 3}
+        assert bot.delete_messages.await_count == 2
+        asyncio.sleep.assert_awaited_once_with(1)
+
+    async def test_fallback_one_by_one(self):
+        """Пачка не прошла — сообщения удаляются по одному, ошибки пропускаются."""
+        bot = _bot()
+        bot.delete_messages.side_effect = TelegramBadRequest(method=MagicMock(), message="bad")
+        bot.delete_message.side_effect = [
+            True,
+            TelegramBadRequest(method=MagicMock(), message="message to delete not found"),
+            True,
+        ]
+
+        deleted = await delete_messages_now(bot, -100, [1, 2, 3])
+
+        assert deleted == {1, 3}
+        assert bot.delete_message.await_count == 3
+
+
+class TestMessageDeleter:
+    """Тесты объединения запросов."""
+
+    async def test_coalesces_per_chat(self):
+        """Параллельные запросы одного чата уходят одним вызовом."""
+        bot = _bot()
+        deleter = MessageDeleter(window=0.05)
+
+        results = await asyncio.gather(
+            deleter.delete(bot, -100, [1, 2]),
+            deleter.delete(bot, -100, [3]),
+            deleter.delete(bot, -200, [1]),
+        )
+
+        assert results == [2, 1, 1]
+        assert bot.delete_messages.await_count == 2
+        chats = {call.kwargs["chat_id"]: sorted(call.kwargs["message_ids"])
+                 for call in bot.delete_messages.await_args_list}
+        assert chats == {-100: [1, 2, 3], -200: [1]}
+        assert deleter.api_calls_saved == 2
@@ -0,0 +1,175 @@
+# ============================================================
+# UNIT-ТЕСТЫ ДЛЯ MESSAGE PIPELINE
+# ============================================================
+# Тестирует поэтапное выполнение шагов координатора:
+# - параллельное выполнение независимых шагов
+# - зависимости и пропуск по skip_if_triggered
+# - выбор "первого" сработавшего по приоритету
+# - отдельную сессию на шаг, изоляцию ошибок и откат сессии упавшего шага
+# ============================================================
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from bot.services.message_pipeline import PipelineStep, run_pipeline, shared_session_factory
+
+
+class _FakeSession:
+    """Сессия-заглушка: запоминает коммиты."""
+
+    def __init__(self):
+        self.committed = False
+        self.rolled_back = False
+        # Как у SQLAlchemy: после ошибки flush сессия непригодна до rollback
+        self.failed = False
+
+    async def commit(self):
+        self.committed = True
+
+    async def rollback(self):
+        self.rolled_back = True
+        self.failed = False
+
+
+def _session_factory(created: list):
+    """Фабрика, создающая новую сессию на каждый шаг."""
+    @asynccontextmanager
+    async def factory():
+        session = _FakeSession()
+        created.append(session)
+        yield session
+    return factory
+
+
+def _step(name: str, result=False, delay: float = 0.0, log: list = None, **kwargs):
+    """Создаёт шаг, который ждёт delay и возвращает result."""
+    async def run(session):
+        if log is not None:
+            log.append(('start', name))
+        await asyncio.sleep(delay)
+        if log is not None:
+            log.append(('end', name))
+        return result
+    return PipelineStep(name, run, uses_session=False, **kwargs)
+
+
+class TestRunPipeline:
+    """Тесты выполнения шагов."""
+
+    async def test_independent_steps_run_concurrently(self):
+        """Независимые шаги стартуют до завершения друг друга."""
+        log = []
+        await run_pipeline([_step('a', delay=0.05, log=log), _step('b', delay=0.05, log=log)])
+
+        assert log[:2] == [('start', 'a'), ('start', 'b')]
+
+    async def test_sequential_mode_keeps_order(self):
+        """parallel=False выполняет шаги строго по очереди."""
+        log = []
+        await run_pipeline(
+            [_step('a', delay=0.01, log=log), _step('b', log=log)],
+            parallel=False
+        )
+
+        assert log == [('start', 'a'), ('end', 'a'), ('start', 'b'), ('end', 'b')]
+
+    async def test_dependency_waits(self):
+        """Шаг с depends_on стартует после завершения зависимости."""
+        log = []
+        await run_pipeline([
+            _step('b', log=log, depends_on=('a',)),
+            _step('a', delay=0.01, log=log),
+        ])
+
+        assert log.index(('end', 'a')) < log.index(('start', 'b'))
+
+    async def test_skip_if_triggered(self):
+        """Шаг пропускается, если сработал указанный шаг."""
+        result = await run_pipeline([
+            _step('antispam', result=True, priority=3),
+            _step('profile_monitor', result=True, skip_if_triggered=('antispam',), priority=4),
+        ])
+
+        assert result.triggered == ['antispam']
+        assert result.skipped == ['profile_monitor']
+
+    async def test_winner_by_priority_not_finish_time(self):
+        """"Первым" считается детектор с высшим приоритетом, а не быстрейший."""
+        result = await run_pipeline([
+            _step('content_filter', result=True, delay=0.03, priority=1),
+            _step('antispam', result=True, priority=3),
+            _step('stats', result=True),
+        ])
+
+        assert set(result.triggered) == {'content_filter', 'antispam', 'stats'}
+        assert result.winner == 'content_filter'
+
+    async def test_failed_step_isolated(self):
+        """Ошибка шага не мешает остальным и не считается срабатыванием."""
+        async def broken(session):
+            raise RuntimeError("boom")
+
+        result = await run_pipeline([
+            PipelineStep('broken', broken, uses_session=False, priority=0),
+            _step('ok', result=True, priority=1),
+        ])
+
+        assert result.failed == ['broken']
+        assert result.winner == 'ok'
+
+    async def test_session_per_step_rolled_back_on_error(self):
+        """Каждый шаг получает свою сессию; сессия упавшего шага откатывается."""
+        created = []
+        seen = []
+
+        async def uses_db(session):
+            seen.append(session)
+            return False
+
+        async def broken(session):
+            raise RuntimeError("boom")
+
+        await run_pipeline(
+            [
+                PipelineStep('a', uses_db),
+                PipelineStep('b', uses_db),
+                PipelineStep('c', broken),
+            ],
+            session_factory=_session_factory(created)
+        )
+
+        assert len(created) == 3
+        assert seen[0] is not seen[1]
+        assert [s.rolled_back for s in created] == [False, False, True]
+        # Коммит — дело владельца сессии (фабрики), не шага
+        assert not any(s.committed for s in created)
+
+    async def test_shared_session_usable_after_failed_step(self):
+        """Ошибка БД в шаге общей сессии не ломает следующий шаг."""
+        session = _FakeSession()
+
+        async def failing_flush(s):
+            s.failed = True
+            raise RuntimeError("IntegrityError")
+
+        async def next_step(s):
+            if s.failed:
+                raise RuntimeError("transaction has been rolled back")
+            return True
+
+        result = await run_pipeline(
+            [PipelineStep('stats', failing_flush), PipelineStep('antispam', next_step)],
+            session_factory=shared_session_factory(session),
+            parallel=False,
+        )
+
+        assert result.failed == ['stats']
+        assert result.triggered == ['antispam']
+        assert session.rolled_back and not session.committed
+
+    async def test_unknown_dependency_rejected(self):
+        """Зависимость от несуществующего шага — ошибка описания."""
+        with pytest.raises(ValueError):
+            await run_pipeline([_step('a', depends_on=('missing',))])
@@ -0,0 +1,242 @@
+# ============================================================
+# UNIT-ТЕСТЫ ДЛЯ МУТА ВО МНОГИХ ГРУППАХ (MUTE FANOUT)
+# ============================================================
+# Тестирует:
+# - проверку прав бота и админа по кэшу админов
+# - мут только участников (require_member)
+# - повтор группы после TelegramRetryAfter (и при загрузке списка админов)
+# - продолжение прерванной рассылки по прогрессу в Redis
+# - повторный вызов с тем же ID: присоединение или своя рассылка
+# - on_result по мере готовности групп, ход /amute (CrossMuteProgress)
+# ============================================================
+
+import asyncio
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.types import ChatPermissions
+
+from bot.services.manual_commands import CrossMuteProgress
+from bot.services.mute_fanout import (
+    STATUS_FAILED,
+    STATUS_MUTED,
+    STATUS_SKIPPED,
+    FanoutResult,
+    MuteFanoutExecutor,
+    _FanoutSpec,
+)
+
+
+BOT_ID = 42
+ADMIN_ID = 7
+TARGET_ID = 999
+PERMISSIONS = ChatPermissions(can_send_messages=False)
+
+
+def _admin(user_id: int, status: str = "administrator", **rights) -> SimpleNamespace:
+    """ChatMemberAdministrator с нужными правами."""
+    return SimpleNamespace(status=status, user=SimpleNamespace(id=user_id), **rights)
+
+
+def _bot(admins_by_chat: dict) -> MagicMock:
+    """Бот со списками админов по группам."""
+    bot = MagicMock()
+    bot.id = BOT_ID
+    bot.get_chat_administrators = AsyncMock(side_effect=lambda chat_id: admins_by_chat[chat_id])
+    bot.get_chat_member = AsyncMock(return_value=SimpleNamespace(status="member"))
+    bot.restrict_chat_member = AsyncMock()
+    return bot
+
+
+def _executor(redis=None) -> MuteFanoutExecutor:
+    return MuteFanoutExecutor(redis=redis, workers=4, api_per_second=1000)
+
+
+class TestMuteFanout:
+    """Тесты рассылки мута."""
+
+    async def test_rights_from_admin_list(self):
+        """Права бота и админа берутся из списка админов, без get_chat_member."""
+        bot = _bot({
+            -1: [_admin(BOT_ID, can_restrict_members=True), _admin(ADMIN_ID)],
+            -2: [_admin(BOT_ID, can_restrict_members=False), _admin(ADMIN_ID)],
+            -3: [_admin(BOT_ID, can_restrict_members=True)],
+            -4: [_admin(BOT_ID, status="creator"), _admin(ADMIN_ID)],
+        })
+
+        results = await _executor().run(
+            bot, "admin:test", TARGET_ID, [-1, -2, -3, -4],
+            permissions=PERMISSIONS, admin_id=ADMIN_ID,
+        )
+
+        statuses = {result.chat_id: result.status for result in results}
+        assert statuses == {
+            -1: STATUS_MUTED, -2: STATUS_SKIPPED, -3: STATUS_SKIPPED, -4: STATUS_MUTED,
+        }
+        bot.get_chat_member.assert_not_awaited()
+        assert sorted(call.kwargs["chat_id"] for call in bot.restrict_chat_member.await_args_list) == [-4, -1]
+
+    async def test_require_member_and_flood_wait(self):
+        """Не участник пропускается; после FloodWait группа повторяется."""
+        bot = _bot({chat_id: [_admin(BOT_ID, can_restrict_members=True)] for chat_id in (-1, -2)})
+        bot.get_chat_member.side_effect = lambda chat_id, user_id: SimpleNamespace(
+            status="left" if chat_id == -2 else "member"
+        )
+        flood = TelegramRetryAfter(method=MagicMock(), message="Flood", retry_after=0)
+        bot.restrict_chat_member.side_effect = [flood, None]
+
+        executor = _executor()
+        results = await executor.run(
+            bot, "scammer:test", TARGET_ID, [-1, -2],
+            permissions=PERMISSIONS, require_member=True,
+        )
+
+        statuses = {result.chat_id: result.status for result in results}
+        assert statuses == {-1: STATUS_MUTED, -2: STATUS_SKIPPED}
+        assert bot.restrict_chat_member.await_count == 2
+        assert executor.metrics['flood_waits'] == 1
+
+    async def test_flood_wait_on_admin_list(self):
+        """FloodWait при загрузке списка админов ставит лимит на паузу и повторяет группу."""
+        bot = _bot({})
+        flood = TelegramRetryAfter(method=MagicMock(), message="Flood", retry_after=0)
+        bot.get_chat_administrators = AsyncMock(
+            side_effect=[flood, [_admin(BOT_ID, can_restrict_members=True)]]
+        )
+
+        executor = _executor()
+        results = await executor.run(bot, "scammer:test", TARGET_ID, [-1], permissions=PERMISSIONS)
+
+        assert results[0].status == STATUS_MUTED
+        assert bot.get_chat_administrators.await_count == 2
+        assert executor.metrics['flood_waits'] == 1
+
+    async def test_resume_from_progress(self, fake_redis, monkeypatch):
+        """Группы из прогресса прерванной рассылки не повторяются, ошибки — повторяются."""
+        monkeypatch.setattr("bot.services.mute_fanout.schedule_job", AsyncMock())
+        monkeypatch.setattr("bot.services.mute_fanout.cancel_job", AsyncMock())
+        key = _FanoutSpec("scammer:test", TARGET_ID, PERMISSIONS, None, None, False).progress_key
+        await fake_redis.hset(key, mapping={"-1": STATUS_MUTED, "-2": STATUS_FAILED})
+        bot = _bot({chat_id: [_admin(BOT_ID, can_restrict_members=True)] for chat_id in (-1, -2, -3)})
+
+        results = await _executor(fake_redis).run(
+            bot, "scammer:test", TARGET_ID, [-1, -2, -3], permissions=PERMISSIONS,
+        )
+
+        by_chat = {result.chat_id: result for result in results}
+        assert by_chat[-1].resumed and by_chat[-1].muted
+        assert by_chat[-2].muted and by_chat[-3].muted
+        assert sorted(call.kwargs["chat_id"] for call in bot.restrict_chat_member.await_args_list) == [-3, -2]
+        # Рассылка завершена — прогресс удалён
+        assert await fake_redis.exists(key) == 0
+
+    async def test_same_id_different_mute_not_joined(self):
+        """Мут с другим сроком под тем же ID не получает срок идущей рассылки."""
+        bot = _bot({-1: [_admin(BOT_ID, can_restrict_members=True)]})
+        executor = _executor()
+        soon = datetime.now(timezone.utc) + timedelta(hours=1)
+
+        first = asyncio.create_task(executor.run(
+            bot, "admin:test", TARGET_ID, [-1], permissions=PERMISSIONS, until_date=soon,
+        ))
+        joined = asyncio.create_task(executor.run(
+            bot, "admin:test", TARGET_ID, [-1], permissions=PERMISSIONS,
+            until_date=soon + timedelta(seconds=1),
+        ))
+        forever = asyncio.create_task(executor.run(
+            bot, "admin:test", TARGET_ID, [-1], permissions=PERMISSIONS,
+        ))
+        await asyncio.gather(first, joined, forever)
+
+        until_dates = [call.kwargs["until_date"] for call in bot.restrict_chat_member.await_args_list]
+        assert until_dates == [soon, None]
+
+    async def test_progress_of_other_mute_ignored(self, fake_redis, monkeypatch):
+        """Прогресс мута с другими параметрами под тем же ID не пропускает группы."""
+        monkeypatch.setattr("bot.services.mute_fanout.schedule_job", AsyncMock())
+        monkeypatch.setattr("bot.services.mute_fanout.cancel_job", AsyncMock())
+        soon = datetime.now(timezone.utc) + timedelta(hours=1)
+        temporary = _FanoutSpec("admin:test", TARGET_ID, PERMISSIONS, soon, None, False)
+        forever = replace(temporary, until_date=None)
+        assert temporary.progress_key != forever.progress_key
+        assert temporary.progress_key == replace(temporary, until_date=soon + timedelta(seconds=5)).progress_key
+
+        await fake_redis.hset(temporary.progress_key, "-1", STATUS_MUTED)
+        bot = _bot({-1: [_admin(BOT_ID, can_restrict_members=True)]})
+
+        results = await _executor(fake_redis).run(
+            bot, "admin:test", TARGET_ID, [-1], permissions=PERMISSIONS,
+        )
+
+        assert not results[0].resumed
+        assert bot.restrict_chat_member.await_args.kwargs["until_date"] is None
+
+    async def test_on_result_streams_and_replays_to_joiner(self):
+        """on_result получает группы по готовности; присоединившийся — и уже готовые."""
+        bot = _bot({chat_id: [_admin(BOT_ID, can_restrict_members=True)] for chat_id in (-1, -2, -3)})
+        release = asyncio.Event()
+
+        async def restrict(**kwargs):
+            if kwargs["chat_id"] != -1:
+                await release.wait()
+
+        bot.restrict_chat_member.side_effect = restrict
+        executor = _executor()
+        first_seen, joined_seen = [], []
+
+        async def first_cb(result):
+            first_seen.append(result.chat_id)
+
+        async def joined_cb(result):
+            joined_seen.append(result.chat_id)
+
+        first = asyncio.create_task(executor.run(
+            bot, "scammer:test", TARGET_ID, [-1, -2, -3],
+            permissions=PERMISSIONS, on_result=first_cb,
+        ))
+        while first_seen != [-1]:
+            await asyncio.sleep(0)
+        joined = asyncio.create_task(executor.run(
+            bot, "scammer:test", TARGET_ID, [-1, -2, -3],
+            permissions=PERMISSIONS, on_result=joined_cb,
+        ))
+        await asyncio.sleep(0)
+        assert joined_seen == [-1]
+
+        release.set()
+        await asyncio.gather(first, joined)
+        assert sorted(first_seen) == sorted(joined_seen) == [-3, -2, -1]
+
+    async def test_cross_mute_progress_message(self, monkeypatch):
+        """Сообщение о ходе мута: не чаще интервала, удаляется в конце."""
+        delete = AsyncMock()
+        monkeypatch.setattr("bot.services.manual_commands.mute_service.delete_messages", delete)
+        bot = MagicMock()
+        bot.send_message = AsyncMock(return_value=SimpleNamespace(message_id=77))
+        bot.edit_message_text = AsyncMock()
+
+        progress = CrossMuteProgress(bot, -1, interval=0)
+        await progress.on_result(FanoutResult(-2, STATUS_MUTED))
+        await progress.on_result(FanoutResult(-3, STATUS_SKIPPED))
+        await progress.close()
+
+        bot.send_message.assert_awaited_once()
+        assert "замучен в 1" in bot.edit_message_text.await_args.args[0]
+        delete.assert_awaited_once_with(bot, -1, [77])
+
+        quiet = CrossMuteProgress(bot, -1, interval=60)
+        await quiet.on_result(FanoutResult(-2, STATUS_MUTED))
+        await quiet.close()
+        assert bot.send_message.await_count == 1
+
+    def test_spec_payload_roundtrip(self):
+        """Параметры рассылки переживают сериализацию в задачу продолжения."""
+        until = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=1)
+        spec = _FanoutSpec("admin:1:2", 2, PERMISSIONS, until, 1, True, "risk_gate")
+
+        restored = _FanoutSpec.from_payload(spec.to_payload([-1]))
+
+        assert restored == spec
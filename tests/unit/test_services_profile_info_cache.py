@@ -0,0 +1,199 @@
+# ============================================================
+# UNIT-ТЕСТЫ ДЛЯ КЭША ДАННЫХ ПРОФИЛЯ (PROFILE INFO CACHE)
+# ============================================================
+# Тестирует:
+# - вытеснение давно использованных записей (LRU) и TTL
+# - второй уровень в Redis
+# - объединение одновременных загрузок одного user_id
+# - None от загрузчика не кэшируется
+# - PyrogramService: кэш фото и отказ от запроса при FloodWait
+# - PyrogramService: оценка возраста по ID при ошибке загрузки фото
+# ============================================================
+
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from pyrogram.errors import FloodWait
+
+from bot.services.profile_info_cache import ProfileInfoCache
+from bot.services.pyrogram_client import PyrogramService, _decode_photos, _encode_photos
+from bot.utils.token_bucket import TokenBucket
+
+
+def _loader(value):
+    """Загрузчик, считающий вызовы."""
+    return AsyncMock(return_value=value)
+
+
+class TestProfileInfoCache:
+    """Тесты двухуровневого кэша."""
+
+    async def test_lru_eviction(self):
+        """При переполнении вытесняется давно использованная запись."""
+        cache = ProfileInfoCache("test", max_entries=2)
+        await cache.set(1, "a")
+        await cache.set(2, "b")
+        # Обращение к 1 делает её свежей — вытеснится 2
+        assert await cache.get_or_load(1, _loader("x")) == "a"
+        await cache.set(3, "c")
+
+        assert len(cache) == 2
+        loader = _loader("b2")
+        assert await cache.get_or_load(2, loader) == "b2"
+        loader.assert_awaited_once()
+        assert cache.metrics['evicted'] >= 1
+
+    async def test_ttl_expiry(self):
+        """Истёкшая запись загружается заново."""
+        cache = ProfileInfoCache("test", ttl=0)
+        await cache.set(1, "old")
+
+        loader = _loader("new")
+        assert await cache.get_or_load(1, loader) == "new"
+        loader.assert_awaited_once()
+
+    async def test_redis_tier(self, fake_redis):
+        """Значение из Redis доступно другому процессу без загрузки."""
+        first = ProfileInfoCache("test", redis=fake_redis, ttl=60)
+        await first.get_or_load(5, _loader({"days": 10}))
+
+        second = ProfileInfoCache("test", redis=fake_redis, ttl=60)
+        loader = _loader({"days": 99})
+        assert await second.get_or_load(5, loader) == {"days": 10}
+        loader.assert_not_awaited()
+        assert second.metrics['redis_hits'] == 1
+
+        await second.invalidate(5)
+        assert await fake_redis.exists("profile_info:test:5") == 0
+
+    async def test_single_flight(self):
+        """Одновременные запросы одного user_id ждут одну загрузку."""
+        cache = ProfileInfoCache("test")
+        release = asyncio.Event()
+        calls = 0
+
+        async def slow_loader():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "value"
+
+        tasks = [asyncio.create_task(cache.get_or_load(1, slow_loader)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(*tasks) == ["value"] * 5
+        assert calls == 1
+        assert cache.metrics['coalesced'] == 4
+
+    async def test_none_not_cached(self):
+        """Неудачная загрузка (None) повторяется при следующем запросе."""
+        cache = ProfileInfoCache("test")
+        assert await cache.get_or_load(1, _loader(None)) is None
+
+        loader = _loader("ok")
+        assert await cache.get_or_load(1, loader) == "ok"
+        loader.assert_awaited_once()
+
+
+class TestTokenBucketTryAcquire:
+    """Тесты try_acquire."""
+
+    async def test_gives_up_when_paused(self):
+        """На паузе дольше timeout токен не выдаётся."""
+        bucket = TokenBucket(100)
+        assert await bucket.try_acquire(0.1)
+        bucket.pause(10)
+        assert not await bucket.try_acquire(0.1)
+
+
+class TestPyrogramServiceCache:
+    """Тесты кэша и лимита в PyrogramService."""
+
+    def _service(self, get_chat_photos) -> PyrogramService:
+        service = PyrogramService()
+        service.client = MagicMock()
+        service.client.get_chat_photos = get_chat_photos
+        service.is_available = lambda: True
+        return service
+
+    async def test_photos_loaded_once(self):
+        """Повторный запрос фото берётся из кэша; возраст считается при выдаче."""
+        calls = 0
+
+        async def get_chat_photos(user_id):
+            nonlocal calls
+            calls += 1
+            yield SimpleNamespace(
+                date=datetime(2020, 1, 1), file_id="f", file_unique_id="u"
+            )
+
+        service = self._service(get_chat_photos)
+
+        first = await service.get_profile_photos_dates(1)
+        second = await service.get_profile_photos_dates(1)
+
+        assert calls == 1
+        assert first == second
+        assert first[0]['file_unique_id'] == "u"
+        assert first[0]['date'].tzinfo is not None
+        assert first[0]['age_days'] > 0
+
+    async def test_flood_wait_degrades(self):
+        """FloodWait не усыпляет проверку: пустой результат, лимит на паузе."""
+        async def get_chat_photos(user_id):
+            raise FloodWait(value=30)
+            yield  # pragma: no cover
+
+        service = self._service(get_chat_photos)
+
+        assert await service.get_profile_photos_dates(1) == []
+        assert service.metrics['flood_waits'] == 1
+        # Пока лимит на паузе, запрос к MTProto не делается
+        assert await service.get_profile_photos_dates(2) == []
+        assert service.metrics['degraded'] == 1
+
+    async def test_account_age_falls_back_to_estimator(self, monkeypatch):
+        """Ошибка загрузки фото — возраст по оценке ID, а не «лимит запросов»."""
+        async def get_chat_photos(user_id):
+            raise RuntimeError("network")
+            yield  # pragma: no cover
+
+        estimator = AsyncMock(return_value=400)
+        monkeypatch.setattr(
+            "bot.services.account_age_estimator.account_age_estimator.get_dynamic_age_days", estimator
+        )
+        service = self._service(get_chat_photos)
+        service.client.get_users = AsyncMock()
+
+        result = await service.get_account_age(1)
+
+        assert result['account_age_days'] == 400
+        assert not result['is_young']
+        estimator.assert_awaited_once()
+        # Оценка при ошибке не кэшируется
+        assert len(service._age_cache) == 0
+
+    async def test_account_age_rate_limited(self):
+        """Лимит MTProto — результат «лимит запросов»; одна проверка = один токен."""
+        async def get_chat_photos(user_id):
+            yield SimpleNamespace(date=datetime(2020, 1, 1), file_id="f", file_unique_id="u")
+
+        service = self._service(get_chat_photos)
+        service.client.get_users = AsyncMock()
+        service._limiter = TokenBucket(1, capacity=1)
+        service.MTPROTO_MAX_WAIT_SECONDS = 0
+
+        first = await service.get_account_age(1)
+        second = await service.get_account_age(2)
+
+        assert first['account_age_days'] > 365
+        assert second['account_age_days'] is None
+        assert second['reason'] == 'Лимит запросов MTProto'
+
+    def test_photos_roundtrip(self):
+        """Фото переживают сериализацию в Redis."""
+        photos = [{'date': datetime(2020, 1, 1, tzinfo=timezone.utc), 'file_id': "f", 'file_unique_id': "u"}]
+        assert _decode_photos(_encode_photos(photos)) == photos
@@ -0,0 +1,136 @@
+# ============================================================
+# UNIT-ТЕСТЫ ДЛЯ ОЧЕРЕДИ МАССОВЫХ ДЕЙСТВИЙ ПРИ РЕЙДЕ
+# ============================================================
+# Тестирует:
+# - выполнение очереди и дедупликацию действий
+# - повтор действия после TelegramRetryAfter
+# - объединение правок журнала
+# - продолжение очереди после неожиданной ошибки, удаление простаивающих чатов
+# - ограничение скорости token bucket
+# ============================================================
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from bot.services.antiraid.raid_executor import (
+    RaidAction,
+    RaidActionExecutor,
+    TokenBucket,
+)
+
+
+CHAT_ID = -100500
+
+
+def _bot() -> MagicMock:
+    """Бот с замоканными методами модерации."""
+    bot = MagicMock()
+    bot.ban_chat_member = AsyncMock()
+    bot.unban_chat_member = AsyncMock()
+    bot.decline_chat_join_request = AsyncMock()
+    bot.restrict_chat_member = AsyncMock()
+    return bot
+
+
+async def _drain(executor: RaidActionExecutor) -> None:
+    """Ждёт завершения всех воркеров."""
+    for state in list(executor._chats.values()):
+        if state.worker is not None:
+            await state.worker
+
+
+class TestRaidActionExecutor:
+    """Тесты очереди действий."""
+
+    async def test_executes_and_deduplicates(self):
+        """Повторное действие для того же юзера не ставится в очередь."""
+        bot = _bot()
+        executor = RaidActionExecutor(global_rate=1000, chat_rate=1000)
+
+        added = executor.submit(bot, CHAT_ID, [
+            RaidAction('decline', 1),
+            RaidAction('ban', 1),
+            RaidAction('ban', 2),
+            RaidAction('ban', 1),
+        ])
+        await _drain(executor)
+
+        assert added == 3
+        bot.decline_chat_join_request.assert_awaited_once_with(chat_id=CHAT_ID, user_id=1)
+        assert bot.ban_chat_member.await_count == 2
+        assert executor.metrics['executed'] == 3
+
+    async def test_retry_after_pauses_and_retries(self):
+        """FloodWait — действие повторяется после паузы."""
+        bot = _bot()
+        flood = TelegramRetryAfter(method=MagicMock(), message="Flood", retry_after=0)
+        bot.ban_chat_member = AsyncMock(side_effect=[flood, None, None])
+        executor = RaidActionExecutor(global_rate=1000, chat_rate=1000)
+
+        executor.submit(bot, CHAT_ID, [RaidAction('ban', 1), RaidAction('ban', 2)])
+        await _drain(executor)
+
+        assert bot.ban_chat_member.await_count == 3
+        assert executor.metrics['flood_waits'] == 1
+        assert executor.metrics['executed'] == 2
+
+    async def test_journal_edits_coalesced(self):
+        """Много банов — одна правка журнала за интервал."""
+        bot = _bot()
+        executor = RaidActionExecutor(global_rate=1000, chat_rate=1000, journal_interval=0.2)
+        executor._edit_journal = AsyncMock()
+
+        executor.update_journal(bot, CHAT_ID, join_count=50, window_seconds=60)
+        executor.submit(bot, CHAT_ID, [RaidAction('ban', uid) for uid in range(50)])
+        await _drain(executor)
+        await asyncio.sleep(0.05)
+
+        assert executor._edit_journal.await_count == 1
+
+        # Новые баны после правки — следующая правка не раньше интервала
+        executor.submit(bot, CHAT_ID, [RaidAction('ban', 100)])
+        await _drain(executor)
+        await asyncio.sleep(0.05)
+        assert executor._edit_journal.await_count == 1
+        await asyncio.sleep(0.25)
+        assert executor._edit_journal.await_count == 2
+
+    async def test_unexpected_error_does_not_stop_queue(self):
+        """ValueError/ошибка Redis не останавливают воркер; юзера можно поставить снова."""
+        bot = _bot()
+        bot.ban_chat_member = AsyncMock(side_effect=[ValueError("bad"), None, None])
+        executor = RaidActionExecutor(global_rate=1000, chat_rate=1000, idle_ttl=0.05)
+        executor._count_ban = AsyncMock(side_effect=ConnectionError("redis down"))
+
+        executor.submit(bot, CHAT_ID, [RaidAction('ban', 1), RaidAction('ban', 2)])
+        await _drain(executor)
+
+        assert bot.ban_chat_member.await_count == 2
+        assert executor.metrics['failed'] == 1
+        assert executor.metrics['executed'] == 1
+        # Упавшее действие не «застряло» в дедупликации
+        assert executor.submit(bot, CHAT_ID, [RaidAction('ban', 1)]) == 1
+        await _drain(executor)
+        assert bot.ban_chat_member.await_count == 3
+
+        # Простаивающий чат удаляется
+        await asyncio.sleep(0.1)
+        assert CHAT_ID not in executor._chats
+
+
+class TestTokenBucket:
+    """Тесты ограничения скорости."""
+
+    async def test_rate_limit(self):
+        """После всплеска токены выдаются со скоростью rate."""
+        bucket = TokenBucket(rate=20, capacity=2)
+        loop = asyncio.get_running_loop()
+
+        start = loop.time()
+        for _ in range(6):
+            await bucket.acquire()
+
+        # 2 токена сразу, ещё 4 по 1/20 с
+        assert loop.time() - start >= 0.18
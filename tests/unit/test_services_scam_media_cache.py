@@ -0,0 +1,166 @@
+# ============================================================
+# UNIT-ТЕСТЫ ДЛЯ КЭША SCAM MEDIA ПО file_unique_id
+# ============================================================
+# Тестирует:
+# - выбор наименьшего достаточного размера фото
+# - хранение хешей и вердиктов в Redis
+# - сброс вердиктов при изменении хешей и настроек группы
+# - повтор картинки без скачивания и хеширования
+# ============================================================
+
+import random
+from io import BytesIO
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from PIL import Image
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.database.models import Group
+from bot.database.models_scam_media import ScamMediaSettings
+from bot.handlers.scam_media.filter_handler import _pick_size
+from bot.services.scam_media import BannedHashService, ScamMediaFilterManager
+from bot.services.scam_media import db_service, filter_manager, hash_service
+from bot.services.scam_media.hash_service import (
+    MIN_SOURCE_SIDE,
+    ImageHashes,
+    compute_image_hash,
+    required_source_side,
+)
+from bot.services.scam_media.media_cache import CachedVerdict, MediaVerdictCache
+
+
+CHAT_ID = -1001234567890
+FILE_UNIQUE_ID = "AQADscam"
+
+
+def _noise_image(seed: int, size: int = 256) -> bytes:
+    """Создаёт PNG со случайным шумом (разные seed — разные хеши)."""
+    rng = random.Random(seed)
+    image = Image.new('L', (size, size))
+    image.putdata([rng.randrange(256) for _ in range(size * size)])
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _photo_size(side: int) -> SimpleNamespace:
+    """PhotoSize 4:3 с короткой стороной side."""
+    return SimpleNamespace(file_id=f"id{side}", width=side * 4 // 3, height=side)
+
+
+@pytest.fixture(autouse=True)
+def _hash_in_thread():
+    """Хеши в тестах считаются в потоке (без пула процессов)."""
+    hash_service.configure_hash_executor(0)
+    yield
+    hash_service.shutdown_hash_executor()
+    hash_service.configure_hash_executor(2)
+
+
+@pytest.fixture
+def media_cache(fake_redis, monkeypatch) -> MediaVerdictCache:
+    """Кэш вердиктов на fakeredis вместо глобального."""
+    cache = MediaVerdictCache(fake_redis)
+    monkeypatch.setattr(filter_manager, "get_media_verdict_cache", lambda: cache)
+    monkeypatch.setattr(db_service, "get_media_verdict_cache", lambda: cache)
+    return cache
+
+
+class TestSourceSize:
+    """Тесты выбора размера для скачивания."""
+
+    def test_required_side(self):
+        """Для регионов лого нужен исходник крупнее, чем для всего кадра."""
+        assert required_source_side() == MIN_SOURCE_SIDE
+        assert required_source_side(['top_center']) > required_source_side(['top_left']) > MIN_SOURCE_SIDE
+
+    def test_pick_smallest_sufficient(self):
+        """Берётся наименьший подходящий размер, иначе самый крупный."""
+        sizes = [_photo_size(90), _photo_size(320), _photo_size(800), _photo_size(1280)]
+
+        assert _pick_size(sizes, 320).file_id == "id320"
+        assert _pick_size(sizes, 534).file_id == "id800"
+        assert _pick_size(sizes, 5000).file_id == "id1280"
+        # Документ без размеров — скачивается как есть
+        document = SimpleNamespace(file_id="doc")
+        assert _pick_size([document], 320) is document
+
+
+class TestMediaVerdictCache:
+    """Тесты хранения в Redis."""
+
+    async def test_hashes_and_verdict(self, media_cache):
+        """Хеши общие для всех групп, вердикт — только своей группы."""
+        hashes = ImageHashes(phash='ff00000000000000', dhash='00000000000000ff')
+        await media_cache.store(
+            FILE_UNIQUE_ID,
+            image_hashes=hashes,
+            region_hashes={'top_left': None},
+            chat_id=CHAT_ID,
+            verdict=CachedVerdict(hash_id=7, distance=2),
+            threshold=10,
+        )
+
+        cached = await media_cache.lookup(FILE_UNIQUE_ID, CHAT_ID)
+        assert cached.image_hashes == hashes
+        assert cached.has_regions(['top_left']) and not cached.has_regions(['top_right'])
+        assert cached.verdict_for(10, False) == CachedVerdict(hash_id=7, distance=2)
+        # Другие настройки группы — вердикт не подходит
+        assert cached.verdict_for(5, False) is None
+        assert cached.verdict_for(10, True) is None
+
+        other = await media_cache.lookup(FILE_UNIQUE_ID, CHAT_ID + 1)
+        assert other.image_hashes == hashes and other.verdict is None
+
+    async def test_version_bump_invalidates_verdicts(self, media_cache):
+        """Изменение запрещённых хешей сбрасывает вердикты, но не хеши."""
+        hashes = ImageHashes(phash='ff00000000000000', dhash='00000000000000ff')
+        await media_cache.store(
+            FILE_UNIQUE_ID, image_hashes=hashes, chat_id=CHAT_ID,
+            verdict=CachedVerdict(hash_id=None, distance=64), threshold=10,
+        )
+        await media_cache.bump_version()
+
+        cached = await media_cache.lookup(FILE_UNIQUE_ID, CHAT_ID)
+        assert cached.verdict_for(10, False) is None
+        assert cached.image_hashes == hashes
+
+
+class TestCheckImageCached:
+    """Тесты проверки повторной картинки через менеджер."""
+
+    @pytest.fixture
+    async def enabled_group(self, db_session: AsyncSession):
+        """Создаёт группу с включённым модулем."""
+        db_session.add(Group(chat_id=CHAT_ID, title="Test Group"))
+        await db_session.commit()
+        db_session.add(ScamMediaSettings(chat_id=CHAT_ID, enabled=True, threshold=10))
+        await db_session.commit()
+
+    async def test_repeat_skips_download(self, db_session: AsyncSession, enabled_group, media_cache):
+        """Повтор не скачивается; новый хеш находится по кэшированным хешам."""
+        manager = ScamMediaFilterManager(bot=None)
+        scam = _noise_image(10)
+        loader = AsyncMock(return_value=scam)
+
+        first = await manager.check_image(db_session, CHAT_ID, loader, FILE_UNIQUE_ID)
+        second = await manager.check_image(db_session, CHAT_ID, loader, FILE_UNIQUE_ID)
+
+        assert not first.matched and not second.matched
+        loader.assert_awaited_once_with(MIN_SOURCE_SIDE)
+
+        # Хеш добавлен — старый вердикт недействителен, но картинка не скачивается
+        hashes = compute_image_hash(scam)
+        entry = await BannedHashService.add_hash(
+            db_session, hashes.phash, hashes.dhash, added_by_user_id=1, chat_id=CHAT_ID
+        )
+        result = await manager.check_image(db_session, CHAT_ID, loader, FILE_UNIQUE_ID)
+
+        assert result.matched and result.hash_entry.id == entry.id
+        assert loader.await_count == 1
+
+        # Совпадение берётся из вердикта
+        again = await manager.check_image(db_session, CHAT_ID, loader, FILE_UNIQUE_ID)
+        assert again.matched and again.distance == 0
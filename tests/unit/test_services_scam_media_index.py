@@ -0,0 +1,224 @@
+# ============================================================
+# UNIT-ТЕСТЫ ДЛЯ ИНДЕКСА SCAM MEDIA
+# ============================================================
+# Тестирует проверку скам-изображений:
+# - BK-tree находит то же, что и полный перебор
+# - области поиска (группа / глобальные) и регионы лого
+# - обновление индекса при add_hash / delete_hash (замена и удаление хеша)
+# - перезагрузка без повторного добавления записей из снимка
+# - вычисление хешей за одно декодирование и в пуле процессов
+# ============================================================
+
+import random
+from io import BytesIO
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.database.models import Group
+from bot.database.models_scam_media import BannedImageHash, ScamMediaSettings
+from bot.services.scam_media import BannedHashService, ScamMediaFilterManager
+from bot.services.scam_media import hash_service
+from bot.services.scam_media.hash_index import BKTree, BannedHashIndex, hamming
+from bot.services.scam_media.hash_service import (
+    HashService,
+    ImageHashes,
+    compute_hashes_off_loop,
+    compute_image_hash,
+    compute_logo_hash,
+)
+
+
+CHAT_ID = -1001234567890
+OTHER_CHAT_ID = -1009876543210
+
+
+def _noise_image(seed: int, size: int = 256) -> bytes:
+    """Создаёт PNG со случайным шумом (разные seed — разные хеши)."""
+    rng = random.Random(seed)
+    image = Image.new('L', (size, size))
+    image.putdata([rng.randrange(256) for _ in range(size * size)])
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _row(hash_id: int, phash: str, chat_id=CHAT_ID, is_global=False, logo_region=None):
+    """Создаёт запись BannedImageHash без БД."""
+    return BannedImageHash(
+        id=hash_id, phash=phash, dhash=None, chat_id=chat_id,
+        is_global=is_global, logo_region=logo_region, added_by_user_id=1,
+    )
+
+
+@pytest.fixture(autouse=True)
+def _hash_in_thread():
+    """По умолчанию хеши в тестах считаются в потоке (без пула процессов)."""
+    hash_service.configure_hash_executor(0)
+    yield
+    hash_service.shutdown_hash_executor()
+    hash_service.configure_hash_executor(2)
+
+
+class TestBKTree:
+    """Тесты BK-tree."""
+
+    @pytest.mark.parametrize("radius", [0, 3, 10])
+    def test_matches_brute_force(self, radius):
+        """Поиск в радиусе совпадает с полным перебором."""
+        rng = random.Random(42)
+        values = [rng.getrandbits(64) for _ in range(300)]
+        # Добавляем близкие к запросу значения
+        query = values[0]
+        values += [query ^ (1 << bit) for bit in range(0, 64, 7)]
+
+        tree = BKTree()
+        for item_id, value in enumerate(values):
+            tree.add(value, item_id)
+
+        expected = {(i, hamming(query, v)) for i, v in enumerate(values) if hamming(query, v) <= radius}
+        assert set(tree.search(query, radius)) == expected
+
+
+class TestBannedHashIndex:
+    """Тесты индекса в памяти."""
+
+    def test_scopes(self):
+        """Хеш группы виден только в ней, глобальный — при use_global_hashes."""
+        index = BannedHashIndex()
+        index.add(_row(1, 'ffff000000000000'))
+        index.add(_row(2, '0000ffff00000000', chat_id=OTHER_CHAT_ID, is_global=True))
+        query = ImageHashes(phash='0000ffff00000000', dhash='0000000000000000')
+
+        assert index.search(OTHER_CHAT_ID, False, query, {}, 0)[0].id == 2
+        assert index.search(CHAT_ID, False, query, {}, 0) is None
+        assert index.search(CHAT_ID, True, query, {}, 0)[0].id == 2
+
+    def test_best_match_and_regions(self):
+        """Из совпадений выбирается ближайшее; регионы лого ищутся отдельно."""
+        index = BannedHashIndex()
+        index.add(_row(1, 'ff00000000000003'))
+        index.add(_row(2, 'ff00000000000001'))
+        index.add(_row(3, '00000000000000ff', logo_region='top_left'))
+
+        assert index.regions_for(CHAT_ID, False) == {'top_left'}
+
+        query = ImageHashes(phash='ff00000000000000', dhash='0000000000000000')
+        item, distance = index.search(CHAT_ID, False, query, {}, 5)
+        assert (item.id, distance) == (2, 1)
+
+        region = {'top_left': ImageHashes(phash='00000000000000ff', dhash='0000000000000000')}
+        far = ImageHashes(phash='0f0f0f0f0f0f0f0f', dhash='0000000000000000')
+        item, distance = index.search(CHAT_ID, False, far, region, 5)
+        assert (item.id, distance) == (3, 0)
+
+    def test_remove(self):
+        """Удалённые записи не находятся, дерево перестраивается."""
+        index = BannedHashIndex()
+        for hash_id in range(1, 5):
+            index.add(_row(hash_id, f'{hash_id:016x}'))
+        index.remove(1)
+        index.remove(2)
+        index.remove(3)
+        index.remove_by_phash(f'{4:016x}', CHAT_ID)
+
+        query = ImageHashes(phash='0000000000000000', dhash='0000000000000000')
+        assert index.search(CHAT_ID, False, query, {}, 10) is None
+        assert len(index) == 0
+        assert index.regions_for(CHAT_ID, False) == set()
+
+    def test_replaced_hash_not_matched_by_old_value(self):
+        """После замены pHash записи старое значение не находится."""
+        index = BannedHashIndex()
+        index.add(_row(1, 'ff00000000000000'))
+        index.add(_row(2, '00000000000000ff'))
+        index.add(_row(1, '0f0f0f0f0f0f0f0f'))
+
+        old = ImageHashes(phash='ff00000000000000', dhash='0000000000000000')
+        assert index.search(CHAT_ID, False, old, {}, 5) is None
+
+        new = ImageHashes(phash='0f0f0f0f0f0f0f0e', dhash='0000000000000000')
+        item, distance = index.search(CHAT_ID, False, new, {}, 5)
+        assert (item.id, distance) == (1, 1)
+
+        index.remove(1)
+        assert index.search(CHAT_ID, False, new, {}, 5) is None
+
+    async def test_reload_skips_pending_rows_in_snapshot(self):
+        """Изменения во время загрузки не дублируют записи, уже попавшие в снимок."""
+        index = BannedHashIndex()
+        rows = [_row(1, 'ff00000000000000'), _row(2, '00000000000000ff')]
+
+        class _Session:
+            async def execute(self, _):
+                # add_hash другой корутиной во время SELECT
+                index.add(_row(2, '00000000000000ff'))
+                return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: rows))
+
+        await index.ensure_loaded(_Session())
+
+        assert len(index) == 2
+        assert index._trees[(CHAT_ID, None)].size == 2
+
+
+class TestHashing:
+    """Тесты вычисления хешей."""
+
+    def test_single_decode_matches_separate_calls(self):
+        """compute_hashes даёт те же хеши, что и отдельные вызовы."""
+        data = _noise_image(1, size=512)
+
+        full, regions = HashService().compute_hashes(data, ['top_left', 'bottom_right', 'top_left'])
+
+        assert full == compute_image_hash(data)
+        assert regions == {
+            'top_left': compute_logo_hash(data, 'top_left'),
+            'bottom_right': compute_logo_hash(data, 'bottom_right'),
+        }
+
+    async def test_process_pool(self):
+        """Хеши из пула процессов совпадают с вычисленными в процессе."""
+        hash_service.configure_hash_executor(1)
+        data = _noise_image(2, size=512)
+
+        full, regions = await compute_hashes_off_loop(data, ['top_center'])
+
+        assert full == compute_image_hash(data)
+        assert regions == {'top_center': compute_logo_hash(data, 'top_center')}
+
+
+class TestCheckImage:
+    """Тесты проверки изображения через менеджер."""
+
+    @pytest.fixture
+    async def enabled_group(self, db_session: AsyncSession):
+        """Создаёт группу с включённым модулем."""
+        db_session.add(Group(chat_id=CHAT_ID, title="Test Group"))
+        await db_session.commit()
+        db_session.add(ScamMediaSettings(chat_id=CHAT_ID, enabled=True, threshold=10))
+        await db_session.commit()
+
+    async def test_add_and_delete_hash(self, db_session: AsyncSession, enabled_group):
+        """Добавленный хеш сразу находится, удалённый — нет."""
+        manager = ScamMediaFilterManager(bot=None)
+        scam = _noise_image(10)
+        other = _noise_image(11)
+
+        # Индекс прогревается до добавления — дальше обновляется add/delete
+        assert not (await manager.check_image(db_session, CHAT_ID, scam)).matched
+
+        hashes = compute_image_hash(scam)
+        entry = await BannedHashService.add_hash(
+            db_session, hashes.phash, hashes.dhash, added_by_user_id=1, chat_id=CHAT_ID
+        )
+
+        result = await manager.check_image(db_session, CHAT_ID, scam)
+        assert result.matched
+        assert result.hash_entry.id == entry.id
+        assert result.distance == 0
+        assert not (await manager.check_image(db_session, CHAT_ID, other)).matched
+
+        await BannedHashService.delete_hash(db_session, entry.id)
+        assert not (await manager.check_image(db_session, CHAT_ID, scam)).matched
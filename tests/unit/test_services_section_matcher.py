@@ -0,0 +1,231 @@
+# ============================================================
+# UNIT-ТЕСТЫ ДЛЯ SECTION MATCHER
+# ============================================================
+# Тестирует скомпилированный индекс паттернов кастомных разделов:
+# - AhoCorasick: поиск множества подстрок за один проход
+# - SectionPatternIndex: методы regex / phrase / ngram
+# - SectionMatcherCache: кэширование и инвалидация через CustomSectionService
+# ============================================================
+
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.database.models import Group
+from bot.services.content_filter.scam_pattern_service import CustomSectionService
+from bot.services.content_filter.section_matcher import (
+    AhoCorasick,
+    CompiledSection,
+    SectionPatternIndex,
+    SectionSnapshot,
+    compile_pattern,
+    get_section_matcher_cache,
+)
+
+
+# ============================================================
+# ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ
+# ============================================================
+
+def _make_section(section_id: int = 1, name: str = "Такси") -> SectionSnapshot:
+    """Создаёт снимок раздела с дефолтными полями."""
+    return SectionSnapshot(
+        id=section_id, chat_id=-100, name=name, threshold=50, action='delete',
+        mute_duration=None, forward_channel_id=None, forward_on_delete=False,
+        forward_on_mute=False, forward_on_ban=False, mute_text=None, ban_text=None,
+        delete_delay=None, notification_delete_delay=None, cas_enabled=False,
+        add_to_spammer_db=False
+    )
+
+
+def _make_pattern(pattern_id: int, pattern: str, normalized: str = None,
+                  pattern_type: str = 'phrase', weight: int = 25):
+    """Создаёт объект с полями CustomSectionPattern."""
+    return SimpleNamespace(
+        id=pattern_id, pattern=pattern, normalized=normalized or pattern,
+        pattern_type=pattern_type, weight=weight
+    )
+
+
+def _build_index(*patterns) -> SectionPatternIndex:
+    """Строит индекс из одного раздела с переданными паттернами."""
+    compiled = [compile_pattern(p) for p in patterns]
+    return SectionPatternIndex(
+        chat_id=-100,
+        sections=[CompiledSection(section=_make_section(), patterns=[c for c in compiled if c])]
+    )
+
+
+def _match(index: SectionPatternIndex, normalized_text: str, text: str = None):
+    """Возвращает {pattern_id: method} для текста."""
+    scan = index.scan(normalized_text, (text or normalized_text).lower())
+    return {m.pattern.id: m.method for m in index.match_section(index.sections[0], scan)}
+
+
+# ============================================================
+# ТЕСТЫ: AHO-CORASICK
+# ============================================================
+
+class TestAhoCorasick:
+    """Тесты автомата поиска подстрок."""
+
+    def test_finds_overlapping_keys(self):
+        """Находит все ключи, включая вложенные и перекрывающиеся."""
+        automaton = AhoCorasick(['he', 'she', 'his', 'hers'])
+        assert automaton.find_all('ushers') == {'he', 'she', 'hers'}
+
+    def test_ignores_empty_keys(self):
+        """Пустые ключи не попадают в результат."""
+        automaton = AhoCorasick(['', 'такси'])
+        assert automaton.find_all('вызови такси') == {'такси'}
+
+    def test_no_matches(self):
+        """Текст без ключей — пустое множество."""
+        automaton = AhoCorasick(['заработок'])
+        assert automaton.find_all('привет всем') == set()
+
+
+# ============================================================
+# ТЕСТЫ: МЕТОДЫ ПРОВЕРКИ ИНДЕКСА
+# ============================================================
+
+class TestSectionPatternIndex:
+    """Тесты проверки текста скомпилированным индексом."""
+
+    def test_long_phrase_substring(self):
+        """Длинная фраза находится как подстрока."""
+        index = _build_index(_make_pattern(1, 'заработок'))
+        assert _match(index, 'лёгкий заработок дома') == {1: 'phrase'}
+
+    def test_short_pattern_requires_word_boundary(self):
+        """Короткий паттерн не срабатывает внутри другого слова."""
+        index = _build_index(_make_pattern(1, 'вед'))
+        assert _match(index, 'ведущая программы') == {}
+        assert _match(index, 'купи вед тут') == {1: 'phrase'}
+
+    def test_original_text_fallback(self):
+        """Исходная форма паттерна ищется в исходном тексте."""
+        index = _build_index(_make_pattern(1, 'easy money', normalized='изи мани'))
+        assert _match(index, 'еаси монеу', text='Easy money here') == {1: 'phrase'}
+
+    def test_regex_pattern(self):
+        """Regex паттерн проверяется заранее скомпилированным выражением."""
+        index = _build_index(_make_pattern(1, r'\d+\s*\$', pattern_type='regex'))
+        assert _match(index, 'плачу 500 $ в день') == {1: 'regex'}
+
+    def test_invalid_regex_skipped(self):
+        """Некорректный regex не попадает в индекс."""
+        index = _build_index(
+            _make_pattern(1, '([', pattern_type='regex'),
+            _make_pattern(2, 'заработок')
+        )
+        assert [p.id for p in index.sections[0].patterns] == [2]
+
+    def test_ngram_word_reorder(self):
+        """Перестановка слов ловится через биграммы паттерна."""
+        index = _build_index(_make_pattern(1, 'работа на дому удалённо'))
+        assert _match(index, 'удалённо на дому работа на') == {1: 'ngram'}
+
+    def test_matches_keep_pattern_order(self):
+        """Совпадения возвращаются в порядке паттернов раздела."""
+        index = _build_index(
+            _make_pattern(1, 'заработок', weight=50),
+            _make_pattern(2, 'пиши в лс', weight=30)
+        )
+        scan = index.scan('пиши в лс про заработок', 'пиши в лс про заработок')
+        matches = index.match_section(index.sections[0], scan)
+        assert [m.pattern.id for m in matches] == [1, 2]
+
+
+# ============================================================
+# ТЕСТЫ: КЭШ И ИНВАЛИДАЦИЯ
+# ============================================================
+
+@pytest.fixture
+async def section_with_pattern(db_session: AsyncSession):
+    """Создаёт группу, раздел и один паттерн."""
+    group = Group(chat_id=-1001234567890, title="Test Group")
+    db_session.add(group)
+    await db_session.commit()
+
+    service = CustomSectionService()
+    _, section_id, _ = await service.create_section(
+        chat_id=group.chat_id, name="Такси", session=db_session
+    )
+    _, pattern_id, _ = await service.add_section_pattern(
+        section_id=section_id, pattern="вызови такси", session=db_session
+    )
+    get_section_matcher_cache().clear()
+    return service, group.chat_id, section_id, pattern_id
+
+
+class TestSectionMatcherCache:
+    """Тесты кэша индексов и его инвалидации."""
+
+    async def test_index_is_cached(self, db_session: AsyncSession, section_with_pattern):
+        """Повторный запрос возвращает тот же индекс."""
+        _, chat_id, _, _ = section_with_pattern
+        cache = get_section_matcher_cache()
+
+        first = await cache.get_index(chat_id, db_session)
+        second = await cache.get_index(chat_id, db_session)
+
+        assert first is second
+        assert first.patterns_count == 1
+
+    async def test_add_pattern_invalidates(self, db_session: AsyncSession, section_with_pattern):
+        """Добавление паттерна сбрасывает индекс."""
+        service, chat_id, section_id, _ = section_with_pattern
+        cache = get_section_matcher_cache()
+        first = await cache.get_index(chat_id, db_session)
+
+        await service.add_section_pattern(section_id, "пиши в лс", db_session)
+        second = await cache.get_index(chat_id, db_session)
+
+        assert second is not first
+        assert second.patterns_count == 2
+
+    async def test_toggle_pattern_invalidates(self, db_session: AsyncSession, section_with_pattern):
+        """Выключение паттерна убирает его из индекса."""
+        service, chat_id, _, pattern_id = section_with_pattern
+        cache = get_section_matcher_cache()
+        await cache.get_index(chat_id, db_session)
+
+        await service.toggle_section_pattern(pattern_id, db_session)
+        index = await cache.get_index(chat_id, db_session)
+
+        assert index.patterns_count == 0
+
+    async def test_update_weight_invalidates(self, db_session: AsyncSession, section_with_pattern):
+        """Изменение веса попадает в индекс."""
+        service, chat_id, _, pattern_id = section_with_pattern
+        cache = get_section_matcher_cache()
+        await cache.get_index(chat_id, db_session)
+
+        await service.update_pattern_weight(pattern_id, 77, db_session)
+        index = await cache.get_index(chat_id, db_session)
+
+        assert index.sections[0].patterns[0].weight == 77
+
+    async def test_delete_pattern_invalidates(self, db_session: AsyncSession, section_with_pattern):
+        """Удаление паттерна убирает его из индекса."""
+        service, chat_id, _, pattern_id = section_with_pattern
+        cache = get_section_matcher_cache()
+        await cache.get_index(chat_id, db_session)
+
+        await service.delete_section_pattern(pattern_id, db_session)
+        index = await cache.get_index(chat_id, db_session)
+
+        assert index.patterns_count == 0
+
+    async def test_enable_section_invalidates(self, db_session: AsyncSession, section_with_pattern):
+        """Включение ранее выключенного раздела попадает в индекс."""
+        service, chat_id, section_id, _ = section_with_pattern
+        cache = get_section_matcher_cache()
+
+        await service.toggle_section(section_id, db_session)
+        assert (await cache.get_index(chat_id, db_session)).sections == []
+
+        await service.update_section(section_id, db_session, enabled=True)
+        assert len((await cache.get_index(chat_id, db_session)).sections) == 1
@@ -0,0 +1,194 @@
+# ============================================================
+# UNIT-ТЕСТЫ ДЛЯ SETTINGS CACHE
+# ============================================================
+# Тестирует кэш настроек групп:
+# - read-through загрузку и отсоединённые копии
+# - сброс после COMMIT (ORM изменения и bulk UPDATE)
+# - защиту от записи устаревшего результата (версии)
+# - уведомления через Redis pub/sub
+# ============================================================
+
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.database.models import Group
+from bot.database.models_content_filter import ContentFilterSettings
+from bot.services.content_filter.filter_manager import FilterManager
+from bot.services.settings_cache import (
+    SETTINGS_CHANGED_CHANNEL,
+    SettingsCache,
+    get_settings_cache,
+)
+
+
+CHAT_ID = -1001234567890
+
+
+@pytest.fixture
+async def filter_settings(db_session: AsyncSession):
+    """Создаёт группу и настройки content_filter."""
+    db_session.add(Group(chat_id=CHAT_ID, title="Test Group"))
+    await db_session.commit()
+
+    settings = ContentFilterSettings(chat_id=CHAT_ID, enabled=True)
+    db_session.add(settings)
+    await db_session.commit()
+    return settings
+
+
+async def _load_cached(db_session: AsyncSession):
+    """Читает настройки content_filter через глобальный кэш."""
+    manager = FilterManager.__new__(FilterManager)
+    return await get_settings_cache().get_or_load(
+        'content_filter', CHAT_ID, lambda: manager._get_settings(CHAT_ID, db_session)
+    )
+
+
+class TestReadThrough:
+    """Тесты чтения через кэш."""
+
+    async def test_loader_called_once(self):
+        """Повторное чтение не вызывает загрузку."""
+        cache = SettingsCache()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            return 42
+
+        assert await cache.get_or_load('chat_settings', CHAT_ID, loader) == 42
+        assert await cache.get_or_load('chat_settings', CHAT_ID, loader) == 42
+        assert len(calls) == 1
+
+    async def test_none_is_cached(self):
+        """Отсутствие настроек тоже кэшируется."""
+        cache = SettingsCache()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            return None
+
+        await cache.get_or_load('content_filter', CHAT_ID, loader)
+        await cache.get_or_load('content_filter', CHAT_ID, loader)
+        assert len(calls) == 1
+
+    async def test_returns_detached_copy(self, db_session: AsyncSession, filter_settings):
+        """Из кэша возвращается копия, не привязанная к сессии."""
+        cached = await _load_cached(db_session)
+
+        assert isinstance(cached, ContentFilterSettings)
+        assert cached is not filter_settings
+        assert cached.enabled is True
+        assert cached not in db_session
+
+    async def test_stale_load_not_stored(self):
+        """Сброс во время загрузки не даёт закэшировать старое значение."""
+        cache = SettingsCache()
+
+        async def loader():
+            cache.invalidate_local('chat_settings', CHAT_ID)
+            return 'old'
+
+        await cache.get_or_load('chat_settings', CHAT_ID, loader)
+
+        async def fresh_loader():
+            return 'new'
+
+        assert await cache.get_or_load('chat_settings', CHAT_ID, fresh_loader) == 'new'
+
+
+class TestCommitInvalidation:
+    """Тесты сброса кэша после коммита."""
+
+    async def test_orm_change_invalidates(self, db_session: AsyncSession, filter_settings):
+        """Изменение атрибута и COMMIT сбрасывают запись."""
+        assert (await _load_cached(db_session)).enabled is True
+
+        filter_settings.enabled = False
+        await db_session.commit()
+
+        assert (await _load_cached(db_session)).enabled is False
+
+    async def test_bulk_update_invalidates(self, db_session: AsyncSession, filter_settings):
+        """Bulk UPDATE по модели сбрасывает весь вид настроек."""
+        await _load_cached(db_session)
+
+        await db_session.execute(
+            update(ContentFilterSettings)
+            .where(ContentFilterSettings.chat_id == CHAT_ID)
+            .values(enabled=False)
+        )
+        await db_session.commit()
+
+        assert (await _load_cached(db_session)).enabled is False
+
+    async def test_rollback_keeps_cache(self, db_session: AsyncSession, filter_settings):
+        """Откат не трогает кэш."""
+        first = await _load_cached(db_session)
+
+        filter_settings.enabled = False
+        await db_session.flush()
+        await db_session.rollback()
+
+        assert await _load_cached(db_session) is first
+
+
+class TestPubSub:
+    """Тесты уведомлений между репликами."""
+
+    async def test_invalidate_publishes(self, fake_redis):
+        """invalidate() публикует сообщение в канал."""
+        cache = SettingsCache(redis=fake_redis)
+        pubsub = fake_redis.pubsub()
+        await pubsub.subscribe(SETTINGS_CHANGED_CHANNEL)
+        await pubsub.get_message(timeout=1)  # подтверждение подписки
+
+        await cache.invalidate('content_filter', CHAT_ID)
+
+        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
+        payload = json.loads(message['data'])
+        assert payload['kind'] == 'content_filter'
+        assert payload['chat_id'] == CHAT_ID
+        await pubsub.aclose()
+
+    async def test_foreign_message_invalidates(self):
+        """Сообщение другой реплики сбрасывает запись, своё — игнорируется."""
+        cache = SettingsCache()
+
+        async def loader():
+            return 1
+
+        await cache.get_or_load('content_filter', CHAT_ID, loader)
+
+        own = json.dumps({'origin': cache.instance_id, 'kind': 'content_filter', 'chat_id': CHAT_ID})
+        cache.handle_message(own)
+        assert ('content_filter', CHAT_ID) in cache._entries
+
+        foreign = json.dumps({'origin': 'other', 'kind': 'content_filter', 'chat_id': CHAT_ID})
+        cache.handle_message(foreign)
+        assert ('content_filter', CHAT_ID) not in cache._entries
+
+    async def test_listener_receives_changes(self, fake_redis):
+        """Подписанная реплика сбрасывает запись по уведомлению другой."""
+        replica = SettingsCache()
+        await replica.start(fake_redis)
+        await asyncio.sleep(0.05)
+
+        async def loader():
+            return 1
+
+        await replica.get_or_load('profile_monitor', CHAT_ID, loader)
+        await SettingsCache(redis=fake_redis).invalidate('profile_monitor', CHAT_ID)
+
+        for _ in range(50):
+            if ('profile_monitor', CHAT_ID) not in replica._entries:
+                break
+            await asyncio.sleep(0.02)
+        await replica.stop()
+
+        assert ('profile_monitor', CHAT_ID) not in replica._entries
@@ -0,0 +1,100 @@
+# ============================================================
+# UNIT-ТЕСТЫ ДЛЯ TEXT NORMALIZER: ЭТАЛОННЫЕ РЕЗУЛЬТАТЫ
+# ============================================================
+# Фиксирует вывод normalize() на наборе обфусцированных текстов.
+# Эталоны получены прежней (построчной) реализацией нормализатора —
+# таблицы translate, проверка диграфов и однопроходное удаление
+# разделителей обязаны давать тот же результат.
+# ============================================================
+
+import pytest
+
+from bot.services.content_filter.text_normalizer import TextNormalizer
+
+
+# (исходный текст, ожидаемый результат normalize)
+GOLDEN_CORPUS = [
+    ('wИшKi', 'вишки'),
+    ('ko—k-a', 'кока'),
+    ('L s_D', 'л сд'),
+    ('КОКАИН', 'кокаин'),
+    ('ко\u200bкаин', 'кокаин'),
+    ('ш̶u̶ш̶к̶u̶', 'шушку'),
+    ('M͟n͟', 'мн'),
+    ('ⓚⓞⓚⓐ', 'кока'),
+    ('ｋｏｋａ', 'кока'),
+    ('Д.е́.t.С.k.ő.ē', 'детское'),
+    ('й и ё', 'йиё'),
+    ('shishki marochki ekstazi kokain', 'шишки марочки екстази кокаин'),
+    ('shchi', 'щи'),
+    ('tsh', 'тш'),
+    ('aya', 'ая'),
+    ('ssh', 'сш'),
+    ('К а з и н о', 'казино'),
+    ('ш и - ш - л - о', 'шишло'),
+    ('к о - к - а', 'кока'),
+    ('шиш - ло', 'шишло'),
+    ('добрый - день', 'добрый - день'),
+    ('лоооооо', 'ло'),
+    ('░C░o░c░o', '░сосо'),
+    ('к*о*к*а', 'кока'),
+    ('3акладка', 'закладка'),
+    ('n@рк0т1к', 'наркотик'),
+    ('$hishki', 'снишки'),
+    ('_-_-_', '_'),
+    ('а__б', 'аб'),
+    ('Привет, как дела?', 'привет, как дела?'),
+    ('пиши в лс @user_name', 'пиши в лс аусернаме'),
+    ('http://example.com/path?q=1', 'нтрехамрлесомратн?qи'),
+    ('+7 (999) 123-45-67', '+т (д) и2засбт'),
+    ('Hello World!', 'нело ворлди'),
+    ('💊💊 закладки 24/7 💊💊', '💊 закладки 2ат 💊'),
+    ('ᴋᴏᴋᴀ', 'кока'),
+    ('Ⓢⓟⓐⓜ', 'срам'),
+    ('Ткань • ворс • ковёр', 'ткань • ворс • ковёр'),
+    ('ĸoĸa', 'ĸоĸа'),
+    ('   ', ' '),
+    ('ё-маё', 'ёмаё'),
+    ('Ёлка-палка, ну и дела', 'ёлкапалка, ну и дела'),
+    ('AbC|dEf', 'абсидеф'),
+    ('x_x', 'х'),
+    ('1 2 3 4 5', 'и2зас'),
+]
+
+
+@pytest.fixture
+def normalizer() -> TextNormalizer:
+    """Отдельный экземпляр с пустым кэшем."""
+    return TextNormalizer()
+
+
+@pytest.mark.parametrize("text, expected", GOLDEN_CORPUS)
+def test_golden_output(normalizer: TextNormalizer, text: str, expected: str):
+    """Результат совпадает с эталоном."""
+    assert normalizer.normalize(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", GOLDEN_CORPUS)
+def test_cached_output_is_identical(normalizer: TextNormalizer, text: str, expected: str):
+    """Повторный вызов (из кэша) возвращает тот же результат."""
+    normalizer.normalize(text)
+    assert normalizer.normalize(text) == expected
+
+
+def test_repeated_text_hits_cache(normalizer: TextNormalizer):
+    """Один текст в рамках сообщения нормализуется один раз."""
+    text = 'Привет wишki! к-о-к-а и Ш и ш к и'
+    normalizer.normalize(text)
+    normalizer.get_words_from_text(text)
+    normalizer.get_words_from_text(text)
+
+    info = normalizer._normalize_cached.cache_info()
+    assert info.misses == 1
+    assert info.hits == 2
+
+
+def test_empty_text(normalizer: TextNormalizer):
+    """Пустой текст и None не нормализуются и не кэшируются."""
+    assert normalizer.normalize("") == ""
+    assert normalizer.normalize(None) == ""
+    assert normalizer._normalize_cached.cache_info().currsize == 0
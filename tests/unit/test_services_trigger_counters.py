@@ -0,0 +1,186 @@
+# ============================================================
+# UNIT-ТЕСТЫ ДЛЯ TRIGGER COUNTERS
+# ============================================================
+# Тестирует буфер счётчиков срабатываний:
+# - агрегацию срабатываний в памяти и в Redis hash
+# - сброс пачки одним UPDATE
+# - сохранение буфера при ошибке сброса
+# - досрочный сброс по размеру буфера
+# - время срабатывания в UTC независимо от часового пояса процесса
+# - остановка дожидается досрочного сброса
+# ============================================================
+
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.database.models import Group
+from bot.database.models_content_filter import CustomSectionPattern
+from bot.services.content_filter.scam_pattern_service import CustomSectionService
+from bot.services import trigger_counters
+from bot.services.trigger_counters import TriggerCounterBuffer, stop_trigger_counters
+
+
+# ============================================================
+# ФИКСТУРЫ
+# ============================================================
+
+@pytest.fixture
+async def two_patterns(db_session: AsyncSession):
+    """Создаёт группу, раздел и два паттерна. Возвращает их ID."""
+    group = Group(chat_id=-1001234567890, title="Test Group")
+    db_session.add(group)
+    await db_session.commit()
+
+    service = CustomSectionService()
+    _, section_id, _ = await service.create_section(
+        chat_id=group.chat_id, name="Такси", session=db_session
+    )
+    _, first_id, _ = await service.add_section_pattern(section_id, "вызови такси", db_session)
+    _, second_id, _ = await service.add_section_pattern(section_id, "пиши в лс", db_session)
+    return first_id, second_id
+
+
+def _make_buffer(**kwargs) -> TriggerCounterBuffer:
+    """Создаёт отдельный буфер для паттернов разделов."""
+    return TriggerCounterBuffer(
+        name='test_section_patterns',
+        model=CustomSectionPattern,
+        counter_column='triggers_count',
+        timestamp_column='last_triggered_at',
+        **kwargs
+    )
+
+
+async def _get_pattern(db_session: AsyncSession, pattern_id: int) -> CustomSectionPattern:
+    """Перечитывает паттерн из БД (сброс идёт в другой сессии)."""
+    pattern = await db_session.get(CustomSectionPattern, pattern_id)
+    await db_session.refresh(pattern)
+    return pattern
+
+
+# ============================================================
+# ТЕСТЫ
+# ============================================================
+
+class TestTriggerCounterBuffer:
+    """Тесты буферизации и сброса счётчиков."""
+
+    async def test_record_does_not_touch_db(self, db_session: AsyncSession, two_patterns):
+        """До сброса счётчик в БД не меняется."""
+        first_id, _ = two_patterns
+        buffer = _make_buffer()
+
+        await buffer.record(first_id)
+
+        pattern = await _get_pattern(db_session, first_id)
+        assert pattern.triggers_count == 0
+        assert pattern.last_triggered_at is None
+
+    async def test_flush_writes_aggregated_counts(self, db_session: AsyncSession, two_patterns):
+        """Сброс пишет суммы по каждому паттерну."""
+        first_id, second_id = two_patterns
+        buffer = _make_buffer()
+
+        for _ in range(3):
+            await buffer.record(first_id)
+        await buffer.record(second_id)
+
+        assert await buffer.flush() == 2
+
+        first = await _get_pattern(db_session, first_id)
+        second = await _get_pattern(db_session, second_id)
+        assert first.triggers_count == 3
+        assert second.triggers_count == 1
+        assert first.last_triggered_at is not None
+
+        # Повторный сброс — пустой буфер
+        assert await buffer.flush() == 0
+
+    async def test_flush_from_redis(self, db_session: AsyncSession, two_patterns, fake_redis):
+        """Буфер в Redis hash сбрасывается и очищается."""
+        first_id, _ = two_patterns
+        buffer = _make_buffer(redis=fake_redis)
+
+        await buffer.record(first_id)
+        await buffer.record(first_id)
+        assert await fake_redis.hget(buffer._counts_key, first_id) == '2'
+
+        await buffer.flush()
+
+        assert (await _get_pattern(db_session, first_id)).triggers_count == 2
+        assert not await fake_redis.exists(buffer._counts_key)
+
+    async def test_failed_flush_keeps_counts(
+        self, db_session: AsyncSession, two_patterns, monkeypatch
+    ):
+        """При ошибке БД срабатывания остаются в буфере до следующего сброса."""
+        first_id, _ = two_patterns
+        buffer = _make_buffer()
+        await buffer.record(first_id)
+
+        original_write = buffer._write_batch
+
+        async def broken_write(batch):
+            raise RuntimeError("db is down")
+
+        monkeypatch.setattr(buffer, '_write_batch', broken_write)
+        assert await buffer.flush() == 0
+
+        monkeypatch.setattr(buffer, '_write_batch', original_write)
+        assert await buffer.flush() == 1
+        assert (await _get_pattern(db_session, first_id)).triggers_count == 1
+
+    async def test_flush_on_size(self, db_session: AsyncSession, two_patterns):
+        """Набрав flush_size срабатываний, буфер сбрасывается сам."""
+        first_id, _ = two_patterns
+        buffer = _make_buffer(flush_size=2)
+
+        await buffer.record(first_id)
+        await buffer.record(first_id)
+        await asyncio.wait_for(buffer._size_flush_task, timeout=5)
+
+        assert (await _get_pattern(db_session, first_id)).triggers_count == 2
+
+    async def test_redis_last_at_is_utc(self, fake_redis, monkeypatch):
+        """Время из Redis — UTC, даже если часовой пояс процесса не UTC."""
+        monkeypatch.setenv("TZ", "Asia/Yekaterinburg")
+        time.tzset()
+        try:
+            buffer = _make_buffer(redis=fake_redis)
+            await buffer.record(1)
+
+            [(item_id, count, last_at)] = await buffer._take_from_redis()
+        finally:
+            monkeypatch.undo()
+            time.tzset()
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        assert (item_id, count) == (1, 1)
+        assert abs((now - last_at).total_seconds()) < 60
+
+    async def test_stop_waits_for_size_flush(self, monkeypatch):
+        """stop_trigger_counters дожидается досрочного сброса."""
+        buffer = _make_buffer(flush_size=1)
+        release = asyncio.Event()
+        written = []
+
+        async def slow_write(batch):
+            await release.wait()
+            written.append(batch)
+
+        monkeypatch.setattr(buffer, '_write_batch', slow_write)
+        monkeypatch.setattr(trigger_counters, 'ALL_COUNTERS', (buffer,))
+
+        await buffer.record(1)
+        stopping = asyncio.create_task(stop_trigger_counters())
+        await asyncio.sleep(0.05)
+        assert not stopping.done()
+
+        release.set()
+        await asyncio.wait_for(stopping, timeout=5)
+        assert buffer._size_flush_task.done()
+        assert len(written) == 1
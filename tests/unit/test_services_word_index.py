@@ -0,0 +1,141 @@
+# ============================================================
+# UNIT-ТЕСТЫ ДЛЯ WORD INDEX
+# ============================================================
+# Тестирует скомпилированный индекс запрещённых слов:
+# - WordGroupIndex: word / phrase / regex и порядок совпадений
+# - whitelist и разделение obfuscated / остальные категории
+# - WordIndexCache: кэширование и инвалидация через WordFilter
+# ============================================================
+
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.database.models import Group
+from bot.services.content_filter.word_filter import WordFilter
+from bot.services.content_filter.word_index import (
+    build_word_index,
+    get_word_index_cache,
+)
+
+
+# ============================================================
+# ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ
+# ============================================================
+
+def _make_word(word_id: int, word: str, match_type: str = 'word',
+               category: str = 'simple', normalized: str = None):
+    """Создаёт объект с полями FilterWord."""
+    return SimpleNamespace(
+        id=word_id, word=word, normalized=normalized or word.lower(),
+        match_type=match_type, category=category, action=None, action_duration=None
+    )
+
+
+def _find_plain(index, text: str):
+    """Ищет совпадение среди simple/harmful слов."""
+    text_lower = text.lower()
+    words = [w for w in text_lower.split() if w]
+    return index.plain.find_first(text_lower, words, text_lower, index.whitelist)
+
+
+# ============================================================
+# ТЕСТЫ: ИНДЕКС
+# ============================================================
+
+class TestWordIndex:
+    """Тесты поиска по скомпилированному индексу."""
+
+    def test_word_match_is_exact(self):
+        """match_type='word' срабатывает только на отдельное слово."""
+        index = build_word_index(-100, [_make_word(1, "кот")], set())
+
+        assert _find_plain(index, "рыжий кот спит").id == 1
+        assert _find_plain(index, "котик спит") is None
+
+    def test_phrase_is_substring(self):
+        """phrase/contains ищутся как подстрока."""
+        index = build_word_index(-100, [
+            _make_word(1, "кок", match_type='phrase'),
+            _make_word(2, "пиши в лс", match_type='contains'),
+        ], set())
+
+        assert _find_plain(index, "кокаин продаю").id == 1
+        assert _find_plain(index, "скорее пиши в лс").id == 2
+
+    def test_regex_precompiled(self):
+        """Regex компилируется при построении, некорректный пропускается."""
+        index = build_word_index(-100, [
+            _make_word(1, "[unclosed", match_type='regex'),
+            _make_word(2, r"\d{3}-\d{2}", match_type='regex'),
+        ], set())
+
+        assert len(index.plain.regexes) == 1
+        assert _find_plain(index, "звони 123-45").id == 2
+
+    def test_first_word_in_order_wins(self):
+        """При нескольких совпадениях побеждает слово, добавленное раньше."""
+        index = build_word_index(-100, [
+            _make_word(1, r"спам\w*", match_type='regex'),
+            _make_word(2, "спам"),
+            _make_word(3, "спа", match_type='phrase'),
+        ], set())
+
+        assert _find_plain(index, "тут спам").id == 1
+
+    def test_whitelist_excludes_words(self):
+        """Слова из whitelist не попадают в индекс, regex проверяет совпадение."""
+        index = build_word_index(-100, [
+            _make_word(1, "анал", match_type='phrase'),
+            _make_word(2, r"анализ\w*", match_type='regex'),
+        ], {"анал", "анализ"})
+
+        assert _find_plain(index, "сдал анализ") is None
+
+    def test_categories_are_separate(self):
+        """obfuscated слова не участвуют в простом поиске."""
+        index = build_word_index(-100, [
+            _make_word(1, "кока", category='obfuscated'),
+        ], set())
+
+        assert index.plain.is_empty
+        assert index.obfuscated.find_first("кока", ["кока"], "кока", set()).id == 1
+
+
+# ============================================================
+# ТЕСТЫ: КЭШ И ИНВАЛИДАЦИЯ
+# ============================================================
+
+@pytest.fixture
+async def chat_id(db_session: AsyncSession) -> int:
+    """Группа для тестов кэша."""
+    group = Group(chat_id=-1009090909090, title="Word Index Group")
+    db_session.add(group)
+    await db_session.commit()
+    return group.chat_id
+
+
+class TestWordIndexCache:
+    """Тесты кэша индексов и его инвалидации."""
+
+    async def test_index_is_cached(self, db_session: AsyncSession, chat_id: int):
+        """Повторный запрос возвращает тот же индекс."""
+        cache = get_word_index_cache()
+
+        first = await cache.get_index(chat_id, db_session)
+        second = await cache.get_index(chat_id, db_session)
+
+        assert first is second
+
+    async def test_add_and_remove_invalidate(self, db_session: AsyncSession, chat_id: int):
+        """add_word / remove_word сбрасывают индекс группы."""
+        cache = get_word_index_cache()
+        word_filter = WordFilter()
+        assert (await cache.get_index(chat_id, db_session)).is_empty
+
+        await word_filter.add_word(chat_id, "удали", 111, db_session)
+        assert (await cache.get_index(chat_id, db_session)).words_count == 1
+
+        await word_filter.remove_word(chat_id, "удали", db_session)
+        assert (await cache.get_index(chat_id, db_session)).is_empty